@@ -0,0 +1,241 @@
+# Regressionsprüfung der Abfragepläne: ruft alle Funktionen aus db.py gegen eine
+# Beispiel-Datenbank auf, sammelt die ausgeführten Statements per Trace-Callback und
+# prüft jedes mit EXPLAIN QUERY PLAN. Ein vollständiger Tabellen-Scan ohne Index oder
+# ein temporärer B-Tree zum Sortieren/Gruppieren gilt als Fehler.
+#
+#   python wartung.py plaene
+import os
+import re
+import tempfile
+
+import db
+import db_pool
+from fingerabdruck import fingerabdruck
+
+# Tabellen mit wenigen Zeilen (je Konto/Kategorie eine, monatswerte je Monat x Kategorie x Konto x Typ,
+# vertraege und regeln einige hundert, sqlite_sequence je Tabelle eine, archive je Jahr eine), hier ist ein Scan
+# oder eine Sortierung unkritisch
+KLEINE_TABELLEN = {"konten", "kategorien", "salden", "monatswerte", "vertraege", "regeln", "sqlite_sequence",
+                   "archive", "archiv_verweise"}
+# Einmalige, vom Benutzer ausgelöste Aktionen und Wartung, die bewusst alle Zahlungen (eines Jahres
+# bzw. eines Imports) oder alle Kurse lesen
+BEWUSSTE_SCANS = {"vertraege_uebernehmen", "archivieren", "pruefe_monatswerte", "beschreibungen_neu_aufbauen",
+                  "get_kursbestand", "massenimport"}
+
+_IGNORIERT = ("BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "CREATE", "ANALYZE", "--")
+_SCAN = re.compile(r"^SCAN (\w+)")
+_TABELLEN = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_KEINE_ALIASE = {"where", "set", "on", "left", "inner", "join", "order", "group", "limit", "values"}
+
+
+def _beispieldaten():
+    db.init_db()
+    with db.transaction() as con:
+        zeilen = []
+        for i in range(200):
+            cent = (1000 + i % 20) * (-1 if i % 2 else 1)
+            # die ersten 24 im Jahr 2023, das als Archiv angehängt wird (archivieren)
+            datum = f"{2023 if i < 24 else 2024}-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+            konto_id = 1 + i % 2
+            beschreibung = f"Beispiel {i % 7}"
+            zeilen.append((cent, "Ausgabe" if i % 2 else "Einnahme", datum, 1 + i % 4, konto_id, beschreibung,
+                           i % 5 == 0, fingerabdruck(datum, cent, konto_id, beschreibung)))
+        con.executemany("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                   fingerabdruck)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, zeilen)
+
+
+def _aufrufe():
+    # Jede öffentliche Funktion aus db.py mit Beispielargumenten
+    return [
+        ("archivieren", lambda: db.archivieren(2023)),
+        ("get_archive", lambda: db.get_archive()),
+        ("stammdaten_neu_laden", lambda: db.stammdaten_neu_laden()),
+        ("get_konten", lambda: db.get_konten()),
+        ("add_konto", lambda: db.add_konto("Tagesgeld")),
+        ("update_konto", lambda: db.update_konto(3, "Sparkonto")),
+        ("add_konto (Fremdwährung)", lambda: db.add_konto("Depot", "USD")),
+        ("konto_waehrung_setzen", lambda: db.konto_waehrung_setzen(db.add_konto("Reisekasse"), "CHF")),
+        ("kurse_laden", lambda: db.kurse_laden([_kursdatei()])),
+        ("get_kursbestand", lambda: db.get_kursbestand()),
+        ("get_kategorien", lambda: db.get_kategorien()),
+        ("add_kategorie", lambda: db.add_kategorie("Urlaub")),
+        ("update_kategorie", lambda: db.update_kategorie(5, "Reisen")),
+        ("add_zahlung", lambda: db.add_zahlung(12.5, "Ausgabe", "2024-03-01", 1, 1, "Bäcker", False,
+                                               duplikat_erlauben=True)),
+        ("add_zahlung (Fremdwährung)", lambda: db.add_zahlung(
+            99, "Einnahme", "2024-05-02", 1, db.get_stammdaten().id("konten", "Depot"), "Dividende", False)),
+        ("update_zahlung", lambda: db.update_zahlung(1, 20.0, "Einnahme", "2024-03-02", 2, 2, "Bäcker", True)),
+        ("get_zahlung_by_id", lambda: db.get_zahlung_by_id(1)),
+        ("zahlungen_kategorie_setzen", lambda: db.zahlungen_kategorie_setzen([3, 4, 5, 6], 2)),
+        ("zahlungen_konto_setzen", lambda: db.zahlungen_konto_setzen([3, 4, 5, 6], 2)),
+        ("zahlungen_wiederkehrend_setzen", lambda: db.zahlungen_wiederkehrend_setzen([3, 4, 5, 6], True)),
+        ("get_zahlungen", lambda: db.get_zahlungen()),
+        ("zahlungen_lesen", lambda: list(db.zahlungen_lesen())),
+        ("zahlungen_lesen (Filter)", lambda: list(db.zahlungen_lesen(
+            {"von": "2024-01-01", "bis": "2024-06-30", "konto_id": 1}))),
+        ("zahlungen_lesen (Kategorie, Text)", lambda: list(db.zahlungen_lesen({"kategorie_id": 2, "text": "beispiel"}))),
+        ("zahlungen_zaehlen", lambda: db.zahlungen_zaehlen({"von": "2024-01-01", "bis": "2024-06-30"})),
+        ("zahlungen_zaehlen (mit Archiv)", lambda: db.zahlungen_zaehlen({"von": "2023-07-01", "kategorie_id": 2})),
+        ("ueber_archive", lambda: list(db.ueber_archive("SELECT id, datum FROM {s}.zahlungen"))),
+        ("get_zahlungen_seite", lambda: db.get_zahlungen_seite(50)),
+        ("get_zahlungen_seite (nach)", lambda: db.get_zahlungen_seite(50, nach=("2024-06-15", 100))),
+        ("get_zahlungen_seite (Archiv)", lambda: db.get_zahlungen_seite(50, nach=("2024-01-05", 30))),
+        ("get_uebersicht_zeile", lambda: db.get_uebersicht_zeile(1)),
+        ("get_zahlungen_gefiltert (Datum)", lambda: db.get_zahlungen_gefiltert(
+            {"von": "2024-03-01", "bis": "2024-03-31"}, 50)),
+        ("get_zahlungen_gefiltert (Konto)", lambda: db.get_zahlungen_gefiltert(
+            {"konto_id": 1}, 50, nach=("2024-06-15", 100))),
+        ("get_zahlungen_gefiltert (Kategorie)", lambda: db.get_zahlungen_gefiltert(
+            {"kategorie_id": 2, "von": "2024-01-01"}, 50)),
+        ("get_zahlungen_gefiltert (Betrag)", lambda: db.get_zahlungen_gefiltert(
+            {"betrag_min": 1005, "betrag_max": 1010}, 50)),
+        ("get_zahlungen_gefiltert (Archiv)", lambda: db.get_zahlungen_gefiltert(
+            {"von": "2023-01-01", "konto_id": 1}, 50, nach=("2024-02-15", 100))),
+        ("suche_zahlungen", lambda: db.suche_zahlungen({"text": "Beispiel"}, 50)),
+        ("suche_zahlungen (Filter)", lambda: db.suche_zahlungen(
+            {"text": "beisp", "konto_id": 1, "von": "2024-01-01"}, 50, offset=50)),
+        ("suche_zahlungen (Archiv)", lambda: db.suche_zahlungen({"text": "beispiel", "konto_id": 1}, 50, offset=80)),
+        ("get_gesamtvermoegen", lambda: db.get_gesamtvermoegen()),
+        ("get_salden", lambda: db.get_salden()),
+        ("pruefe_salden", lambda: db.pruefe_salden()),
+        ("pruefe_monatswerte", lambda: db.pruefe_monatswerte()),
+        ("get_cashflow", lambda: db.get_cashflow("2024-01", "2024-12")),
+        ("get_kategorie_summen", lambda: db.get_kategorie_summen("2024-01", "2024-12")),
+        ("get_jahresverlauf", lambda: db.get_jahresverlauf()),
+        ("add_vertrag", lambda: db.add_vertrag("Miete", 800, "Ausgabe", 1, "2024-01-31", None, 1, 1)),
+        ("update_vertrag", lambda: db.update_vertrag(1, "Miete", 850, "Ausgabe", 1, "2024-01-31", "2024-12-31", 1, 1)),
+        ("vertraege_buchen", lambda: db.vertraege_buchen("2024-06-30")),
+        ("get_vertraege", lambda: db.get_vertraege()),
+        ("get_vorschau", lambda: db.get_vorschau()),
+        ("vertraege_uebernehmen", lambda: db.vertraege_uebernehmen()),
+        ("add_regel", lambda: db.add_regel("text", "beispiel 3", 3)),
+        ("update_regel", lambda: db.update_regel(1, "regex", r"^beispiel [12]$", 4, betrag_min=1000, konto_id=1)),
+        ("get_regeln", lambda: db.get_regeln()),
+        ("kategorie_vorschlagen", lambda: db.kategorie_vorschlagen("Beispiel 1", 12.5, "Ausgabe", 1)),
+        ("zahlungen_kategorisieren", lambda: db.zahlungen_kategorisieren()),
+        ("beschreibungen_vorschlagen", lambda: db.beschreibungen_vorschlagen("Beispiel 1")),
+        ("beschreibungen_vorschlagen (häufig)", lambda: _haeufiger_praefix("b")),
+        ("beschreibungen_neu_aufbauen", lambda: db.beschreibungen_neu_aufbauen()),
+        ("finde_duplikat", lambda: db.finde_duplikat("1:-1250:abcdef")),
+        ("finde_beinahe_duplikate", lambda: db.finde_beinahe_duplikate()),
+        ("delete_zahlung", lambda: db.delete_zahlung(2)),
+        ("zahlungen_loeschen", lambda: db.zahlungen_loeschen([7, 8, 9])),
+        ("delete_konto", lambda: db.delete_konto(3)),
+        ("delete_kategorie", lambda: db.delete_kategorie(5)),
+        ("delete_vertrag", lambda: db.delete_vertrag(1)),
+        ("delete_regel", lambda: db.delete_regel(1)),
+        ("protokolliert", lambda: _rueckgaengig_wiederholen(db.protokolliert(db.zahlungen_loeschen, [10, 11, 12]))),
+        ("massenimport", lambda: _import_aktion.append(db.protokolliert(_massenimport))),
+        ("zuruecknehmen (Massenimport)", lambda: _rueckgaengig_wiederholen(_import_aktion.pop())),
+        ("aenderungen_seit", lambda: db.aenderungen_seit(db.protokoll_stand() - 5)),
+        ("protokoll_verdichten", lambda: db.protokoll_verdichten(100)),
+    ]
+
+
+def _kursdatei():
+    # Kurse im EZB-Format neben der Beispiel-Datenbank
+    pfad = os.path.join(os.path.dirname(os.path.abspath(db.DB_FILE)), "kurse.csv")
+    with open(pfad, "w", encoding="utf-8") as f:
+        f.write("Date,USD,CHF,\n2024-05-02,1.0731,0.9781,\n2024-01-02,1.0956,0.9305,\n")
+    return pfad
+
+
+def _haeufiger_praefix(praefix):
+    # Die Beispieldaten haben nur wenige Beschreibungen; so läuft auch der Weg über den Teilindex
+    kandidaten, db.VORSCHLAG_KANDIDATEN = db.VORSCHLAG_KANDIDATEN, 0
+    try:
+        return db.beschreibungen_vorschlagen(praefix)
+    finally:
+        db.VORSCHLAG_KANDIDATEN = kandidaten
+
+
+# (ergebnis, von, bis) des Beispielimports für "zuruecknehmen (Massenimport)"
+_import_aktion = []
+
+
+def _massenimport():
+    # Einige Zahlungen über db.massenimport, also mit Sammeleintrag im Protokoll
+    with db.transaction() as con, db.massenimport(con):
+        con.executemany("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                   fingerabdruck)
+            VALUES (?, 'Ausgabe', '2024-07-01', 1, 1, 'Import', 0, ?)
+        """, [(-100 - i, f"1:{-100 - i}:import") for i in range(5)])
+
+
+def _rueckgaengig_wiederholen(aktion):
+    _, von, bis = aktion
+    db.zuruecknehmen(von, bis)
+    db.wiederholen(von, bis)
+
+
+def abfragen_sammeln():
+    gesammelt = []
+    aktuell = [None]
+
+    def trace(sql):
+        text = sql.strip()
+        if text and not text.upper().startswith(_IGNORIERT):
+            gesammelt.append((aktuell[0], text))
+
+    with db.connection() as con:
+        con.set_trace_callback(trace)
+        try:
+            for name, aufruf in _aufrufe():
+                aktuell[0] = name
+                aufruf()
+        finally:
+            con.set_trace_callback(None)
+    # Wiederholte Ausführungen (z.B. durch Trigger) nur einmal prüfen
+    return list(dict.fromkeys(gesammelt))
+
+
+def tabellen(sql):
+    # Alias -> Tabelle für alle Tabellen, die das Statement liest oder schreibt
+    zuordnung = {}
+    for tabelle, alias in _TABELLEN.findall(sql):
+        zuordnung[tabelle] = tabelle
+        if alias and alias.lower() not in _KEINE_ALIASE:
+            zuordnung[alias] = tabelle
+    return zuordnung
+
+
+def plan_probleme(sql, details):
+    zuordnung = tabellen(sql)
+    if set(zuordnung.values()) <= KLEINE_TABELLEN:
+        return []
+    probleme = []
+    for detail in details:
+        if "USE TEMP B-TREE" in detail:
+            probleme.append(detail)
+            continue
+        m = _SCAN.match(detail)
+        # Virtuelle Tabellen (FTS5) wählen ihren Zugriff selbst ("VIRTUAL TABLE INDEX ...")
+        if m and " USING " not in detail and " VIRTUAL TABLE " not in detail and zuordnung.get(m.group(1), m.group(1)) not in KLEINE_TABELLEN:
+            probleme.append(detail)
+    return probleme
+
+
+def pruefe():
+    # Liefert eine Liste von (funktion, sql, plan_zeile) für jeden beanstandeten Plan
+    alt = db.DB_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "plaene.db")
+        try:
+            _beispieldaten()
+            ergebnis = []
+            # Dieselbe Verbindung wie beim Sammeln: die angehängten Archive bleiben sichtbar
+            with db.connection() as con:
+                for funktion, sql in abfragen_sammeln():
+                    if funktion in BEWUSSTE_SCANS:
+                        continue
+                    details = [row["detail"] for row in con.execute("EXPLAIN QUERY PLAN " + sql)]
+                    for detail in plan_probleme(sql, details):
+                        ergebnis.append((funktion, sql, detail))
+            return ergebnis
+        finally:
+            db_pool.get_pool(db.DB_FILE).close_all()
+            db.DB_FILE = alt
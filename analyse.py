@@ -0,0 +1,229 @@
+# Spaltenorientierte Auswertungen mit NumPy: zahlungen wird einmal in typisierte Arrays geladen
+# (blockweise per fetchmany) und bis zur nächsten Änderung der Datenbankdatei wiederverwendet.
+# Gruppierungen, laufende Salden, gleitende Durchschnitte und Perzentile laufen vektorisiert.
+# Beträge von Konten in Fremdwährung werden beim Laden zum Kurs am Buchungstag in die
+# Basiswährung umgerechnet, je Währung in einem Schritt über alle ihre Zahlungen.
+import os
+import threading
+
+import numpy as np
+
+import db
+from waehrungen import BASIS, WaehrungFehler
+
+BLOCKGROESSE = 50000
+
+# Tage seit 1970-01-01 direkt in SQL, damit kein Datumstext in Python geparst werden muss.
+# Gelesen wird in Tabellenreihenfolge aus main und allen Archiven (db.ueber_archive); nach
+# (datum, id) sortiert NumPy danach deutlich schneller als ORDER BY über den Index mit einem
+# Tabellenzugriff je Zeile.
+_SPALTEN_SQL = """
+    SELECT id,
+           CAST(julianday(datum) - 2440587.5 AS INTEGER),
+           betrag_cent,
+           IFNULL(kategorie_id, 0),
+           IFNULL(konto_id, 0),
+           typ = 'Einnahme'
+    FROM {s}.zahlungen
+"""
+
+
+class Spalten:
+    # Alle Zahlungen als gleich lange Arrays, sortiert nach (datum, id)
+    __slots__ = ("id", "datum", "betrag_cent", "kategorie", "konto", "einnahme")
+
+    def __init__(self, id, datum, betrag_cent, kategorie, konto, einnahme):
+        self.id = id                    # int64
+        self.datum = datum              # datetime64[D]
+        self.betrag_cent = betrag_cent  # int64 in BASIS, Einnahmen > 0, Ausgaben < 0
+        self.kategorie = kategorie      # int32, 0 = ohne Kategorie
+        self.konto = konto              # int32, 0 = ohne Konto
+        self.einnahme = einnahme        # bool
+
+    def __len__(self):
+        return len(self.id)
+
+    @property
+    def monat(self):
+        return self.datum.astype("datetime64[M]")
+
+    def auswahl(self, maske):
+        return Spalten(*(getattr(self, name)[maske] for name in self.__slots__))
+
+    def zeitraum(self, von=None, bis=None):
+        # von/bis als "YYYY-MM" (einschließlich), wie bei den Monatswerten
+        maske = np.ones(len(self), dtype=bool)
+        monat = self.monat
+        if von:
+            maske &= monat >= np.datetime64(von, "M")
+        if bis:
+            maske &= monat <= np.datetime64(bis, "M")
+        return self.auswahl(maske)
+
+
+# --- Laden und Cache ---
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _stand(pfad):
+    # Änderungsstand der Datenbank: Hauptdatei und WAL (Commits landen zuerst im WAL)
+    stand = []
+    for datei in (pfad, pfad + "-wal"):
+        try:
+            st = os.stat(datei)
+        except FileNotFoundError:
+            stand.append(None)
+        else:
+            stand.append((st.st_mtime_ns, st.st_size))
+    return tuple(stand)
+
+
+def in_basis(betrag_cent, datum, konto):
+    # betrag_cent (Kontowährung) -> Cent in BASIS; datum datetime64[D], konto wie in Spalten.
+    # Je Fremdwährung: Zahlungen ihrer Konten per np.isin, der am Buchungstag gültige Kurs per
+    # searchsorted über die Kursdaten, dann eine Division für alle auf einmal.
+    konten = {}
+    for k in db.get_konten():
+        if k["waehrung"] != BASIS:
+            konten.setdefault(k["waehrung"], []).append(k["id"])
+    if not konten:
+        return betrag_cent
+    kurse = db.get_kurse()
+    ergebnis = betrag_cent.copy()
+    for waehrung, ids in konten.items():
+        maske = np.isin(konto, ids)
+        if not maske.any():
+            continue
+        tage, werte = kurse.reihe(waehrung)
+        if not tage:
+            raise WaehrungFehler(f"Keine Wechselkurse für {waehrung} geladen")
+        index = np.searchsorted(np.array(tage, dtype="datetime64[D]"), datum[maske], side="right") - 1
+        kurs = np.asarray(werte)[np.maximum(index, 0)]
+        ergebnis[maske] = np.rint(betrag_cent[maske] / kurs).astype(np.int64)
+    return ergebnis
+
+
+def _laden(blockgroesse):
+    bloecke = [np.array(zeilen, dtype=np.int64)
+               for zeilen in db.ueber_archive(_SPALTEN_SQL, blockgroesse=blockgroesse, roh=True)]
+    daten = np.concatenate(bloecke) if bloecke else np.empty((0, 6), dtype=np.int64)
+    daten = daten[np.lexsort((daten[:, 0], daten[:, 1]))]
+    datum = daten[:, 1].astype("datetime64[D]")
+    konto = daten[:, 4].astype(np.int32)
+    return Spalten(
+        id=daten[:, 0].copy(),
+        datum=datum,
+        betrag_cent=in_basis(daten[:, 2].copy(), datum, konto),
+        kategorie=daten[:, 3].astype(np.int32),
+        konto=konto,
+        einnahme=daten[:, 5].astype(bool),
+    )
+
+
+def spalten(blockgroesse=BLOCKGROESSE):
+    pfad = os.path.abspath(db.DB_FILE)
+    stand = _stand(pfad)
+    with _cache_lock:
+        eintrag = _cache.get(pfad)
+        if eintrag is not None and eintrag[0] == stand:
+            return eintrag[1]
+    daten = _laden(blockgroesse)
+    with _cache_lock:
+        _cache[pfad] = (stand, daten)
+    return daten
+
+
+def cache_leeren():
+    with _cache_lock:
+        _cache.clear()
+
+
+# --- Gruppierung ---
+def gruppieren(schluessel, werte):
+    # Summe und Anzahl je Schlüssel, exakt in int64 (bincount würde über float64 rechnen).
+    # Liefert (schluessel, summen, anzahl), sortiert nach Schlüssel.
+    if len(schluessel) == 0:
+        return schluessel[:0], werte[:0], np.zeros(0, dtype=np.int64)
+    reihenfolge = np.argsort(schluessel, kind="stable")
+    sortiert = schluessel[reihenfolge]
+    starts = np.flatnonzero(np.concatenate(([True], sortiert[1:] != sortiert[:-1])))
+    summen = np.add.reduceat(werte[reihenfolge], starts)
+    anzahl = np.diff(np.append(starts, len(sortiert)))
+    return sortiert[starts], summen, anzahl
+
+
+def monatssummen(sp, nach=None):
+    # Summe je Monat, optional zusätzlich je "kategorie" oder "konto".
+    # Liefert (monate, [gruppen], summen, anzahl); gruppen nur mit nach.
+    monat = sp.monat.astype(np.int64)
+    if nach is None:
+        monate, summen, anzahl = gruppieren(monat, sp.betrag_cent)
+        return monate.astype("datetime64[M]"), summen, anzahl
+    gruppe = getattr(sp, nach).astype(np.int64)
+    # Monat und Gruppe in einen int64-Schlüssel packen (Gruppen-ids < 2^31)
+    schluessel, summen, anzahl = gruppieren((monat << 32) | gruppe, sp.betrag_cent)
+    return (schluessel >> 32).astype("datetime64[M]"), (schluessel & 0xFFFFFFFF).astype(np.int32), summen, anzahl
+
+
+# --- Verläufe ---
+def laufender_saldo(sp, konto_id=None):
+    # Saldo nach jedem Buchungstag: (tage, saldo_cent). Die Arrays sind bereits nach Datum sortiert.
+    if konto_id is not None:
+        sp = sp.auswahl(sp.konto == konto_id)
+    if len(sp) == 0:
+        return sp.datum, sp.betrag_cent
+    saldo = np.cumsum(sp.betrag_cent)
+    letzte = np.flatnonzero(np.append(sp.datum[1:] != sp.datum[:-1], True))
+    return sp.datum[letzte], saldo[letzte]
+
+
+def saldo_zum_monatsende(sp, konto_id=None):
+    # Für jeden Monat vom ersten bis zum letzten Buchungsmonat, Monate ohne Buchung übernehmen den Vormonat
+    tage, saldo = laufender_saldo(sp, konto_id)
+    if len(tage) == 0:
+        return tage.astype("datetime64[M]"), saldo
+    monate = tage.astype("datetime64[M]")
+    letzte = np.flatnonzero(np.append(monate[1:] != monate[:-1], True))
+    monate, saldo = monate[letzte], saldo[letzte]
+    alle = np.arange(monate[0], monate[-1] + 1)
+    return alle, saldo[np.searchsorted(monate, alle, side="right") - 1]
+
+
+def gleitender_durchschnitt(werte, fenster):
+    # Mittel über die letzten `fenster` Werte; am Anfang über die bisher vorhandenen
+    werte = np.asarray(werte, dtype=np.float64)
+    if len(werte) == 0:
+        return werte
+    summen = np.cumsum(np.concatenate(([0.0], werte)))
+    ende = np.arange(1, len(werte) + 1)
+    anfang = np.maximum(ende - fenster, 0)
+    return (summen[ende] - summen[anfang]) / (ende - anfang)
+
+
+# --- Verteilungen ---
+def perzentile(sp, q=(50, 90, 99), einnahmen=False):
+    # Perzentile der Einzelbeträge (ohne Vorzeichen) in Cent
+    betraege = np.abs(sp.betrag_cent[sp.einnahme == einnahmen])
+    if len(betraege) == 0:
+        return {p: 0 for p in q}
+    return dict(zip(q, np.percentile(betraege, q).round().astype(np.int64).tolist()))
+
+
+def perzentile_je_kategorie(sp, q=(50, 90), einnahmen=False):
+    # {kategorie_id: {p: cent}}; eine Sortierung nach (Kategorie, Betrag), dann Indexzugriff je Gruppe
+    auswahl = sp.einnahme == einnahmen
+    kategorie = sp.kategorie[auswahl]
+    betraege = np.abs(sp.betrag_cent[auswahl])
+    if len(betraege) == 0:
+        return {}
+    reihenfolge = np.lexsort((betraege, kategorie))
+    kategorie, betraege = kategorie[reihenfolge], betraege[reihenfolge]
+    starts = np.flatnonzero(np.concatenate(([True], kategorie[1:] != kategorie[:-1])))
+    enden = np.append(starts[1:], len(kategorie))
+    ergebnis = {}
+    for start, ende in zip(starts, enden):
+        ergebnis[int(kategorie[start])] = dict(zip(
+            q, np.percentile(betraege[start:ende], q).round().astype(np.int64).tolist()
+        ))
+    return ergebnis
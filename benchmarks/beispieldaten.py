@@ -0,0 +1,237 @@
+# Deterministische Beispiel-Buchhaltung für Benchmarks: gleiche Anzahl und gleicher Seed ergeben
+# Zeile für Zeile dieselbe Datenbank.
+#
+#   python benchmarks/beispieldaten.py ZIEL.db [--zahlungen 1000000] [--seed 42]
+#
+# Zehn Jahre (2015-2024), zehn Konten, gut dreißig Kategorien mit Regeln und laufende Verträge.
+# Die Zahlungen kommen wie im echten Betrieb ungefähr in Datumsreihenfolge an: je Monat Gehalt,
+# Miete und Abos aus den Verträgen, dazwischen Kartenzahlungen bei Händlern, deren Beträge je
+# Kategorie typisch streuen. Etwa jede zwanzigste Zahlung hat keine Kategorie (für die Regeln),
+# jede fünfzigste ist ein Beinahe-Duplikat einer vorigen.
+#
+# vorlage() legt die Datei einmal in einem Cache-Verzeichnis an und liefert danach nur den
+# Pfad; 10 Mio. Zahlungen brauchen beim ersten Mal etwa eine halbe Stunde.
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from fingerabdruck import fingerabdruck
+
+GROESSEN = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+ERSTER_TAG = date(2015, 1, 1)
+LETZTER_TAG = date(2024, 12, 31)
+TAGE = (LETZTER_TAG - ERSTER_TAG).days + 1
+CACHE = os.path.join(tempfile.gettempdir(), "finanz-benchmarks")
+
+KONTEN = ["Girokonto", "Bargeld", "Tagesgeld", "Kreditkarte", "Gemeinschaftskonto", "PayPal", "Depot",
+          "Sparbuch", "Girokonto Partner", "Reisekasse"]
+# Kategorie -> (Händler, Median-Betrag in Cent, Streuung, Anteil an den Kartenzahlungen)
+KATEGORIEN = {
+    "Lebensmittel": (["REWE Markt", "EDEKA Center", "Aldi Süd", "Lidl", "Penny", "Netto", "Kaufland"], 3500, 0.7, 30),
+    "Drogerie": (["dm Drogerie", "Rossmann", "Müller Drogerie"], 1800, 0.6, 6),
+    "Restaurant": (["Pizzeria Da Mario", "Sushi Bar", "Gasthaus Krone", "Burger Laden", "Thai Imbiss"], 3200, 0.6, 8),
+    "Café": (["Bäckerei Müller", "Starbucks", "Café Central"], 650, 0.5, 7),
+    "Tanken": (["Shell Tankstelle", "Aral", "Esso", "Total"], 6500, 0.3, 5),
+    "ÖPNV": (["MVG Automat", "Deutsche Bahn", "BVG"], 350, 0.8, 5),
+    "Reisen": (["Lufthansa", "Booking.com", "Airbnb", "Deutsche Bahn Fernverkehr"], 28000, 0.9, 1),
+    "Kleidung": (["H&M", "Zalando", "C&A", "Decathlon"], 4500, 0.7, 3),
+    "Elektronik": (["MediaMarkt", "Saturn", "Cyberport"], 12000, 1.0, 1),
+    "Online-Shopping": (["Amazon Marketplace", "Otto", "eBay"], 2800, 0.9, 8),
+    "Haushalt": (["IKEA", "Obi", "Bauhaus", "Hornbach"], 5500, 0.9, 3),
+    "Apotheke": (["Apotheke am Markt", "Linden-Apotheke"], 1500, 0.7, 2),
+    "Freizeit": (["Kino Palast", "Fitness First", "Thalia", "Eventim"], 2500, 0.8, 4),
+    "Geschenke": (["Blumen Rosi", "Thalia", "Spielwaren Krause"], 3000, 0.7, 2),
+    "Bargeldabhebung": (["Sparkasse Geldautomat", "Volksbank Geldautomat"], 10000, 0.5, 3),
+    "Gesundheit": (["Zahnarztpraxis Dr. Weber", "Physiotherapie Schmidt", "Optiker Fielmann"], 8000, 0.8, 1),
+    "Haustier": (["Fressnapf", "Tierarztpraxis"], 3500, 0.8, 2),
+    "Bildung": (["Volkshochschule", "Udemy", "Buchhandlung Hugendubel"], 4000, 0.8, 1),
+    "Spenden": (["UNICEF", "Ärzte ohne Grenzen", "WWF"], 3000, 0.6, 1),
+    "Sonstiges": (["Kiosk", "Post Filiale", "Schlüsseldienst"], 1500, 1.0, 4),
+}
+# Verträge: (Name, Kategorie, Betrag in Cent, Typ, Rhythmus in Monaten, Tag im Monat, Konto)
+VERTRAEGE = [
+    ("Gehalt Arbeitgeber AG", "Gehalt", 320000, "Einnahme", 1, 28, "Girokonto"),
+    ("Miete Wohnung", "Miete", 115000, "Ausgabe", 1, 1, "Girokonto"),
+    ("Stadtwerke Strom", "Nebenkosten", 8500, "Ausgabe", 1, 15, "Girokonto"),
+    ("Stadtwerke Gas", "Nebenkosten", 9500, "Ausgabe", 1, 15, "Girokonto"),
+    ("Telekom Festnetz", "Telefon & Internet", 3999, "Ausgabe", 1, 5, "Girokonto"),
+    ("Vodafone Mobilfunk", "Telefon & Internet", 2499, "Ausgabe", 1, 10, "Kreditkarte"),
+    ("Netflix", "Abos", 1299, "Ausgabe", 1, 12, "Kreditkarte"),
+    ("Spotify", "Abos", 999, "Ausgabe", 1, 12, "Kreditkarte"),
+    ("Fitnessstudio", "Freizeit", 3990, "Ausgabe", 1, 1, "Girokonto"),
+    ("Allianz Haftpflicht", "Versicherungen", 6490, "Ausgabe", 12, 1, "Girokonto"),
+    ("HUK Kfz-Versicherung", "Versicherungen", 48000, "Ausgabe", 12, 1, "Girokonto"),
+    ("Rundfunkbeitrag", "Abgaben", 5508, "Ausgabe", 3, 15, "Girokonto"),
+    ("Sparplan ETF", "Sparen", 25000, "Ausgabe", 1, 2, "Depot"),
+    ("Kindergeld", "Kindergeld", 25000, "Einnahme", 1, 20, "Gemeinschaftskonto"),
+    ("Dauerauftrag Haushaltskasse", "Umbuchung", 60000, "Ausgabe", 1, 1, "Girokonto Partner"),
+]
+ZWECKE = ["Kartenzahlung", "Lastschrift", "Einkauf", "Kontaktlos", "Apple Pay", "Online-Zahlung"]
+
+
+def kategorien_namen():
+    namen = list(KATEGORIEN)
+    for _, kategorie, *_ in VERTRAEGE:
+        if kategorie not in namen:
+            namen.append(kategorie)
+    return namen
+
+
+def _monatstermine():
+    # (datum, vertrag) aller Vertragstermine in Datumsreihenfolge
+    termine = []
+    for jahr in range(ERSTER_TAG.year, ERSTER_TAG.year + 10):
+        for monat in range(1, 13):
+            for v in VERTRAEGE:
+                if (monat - 1) % v[4] == 0:
+                    termine.append((date(jahr, monat, min(v[5], 28)), v))
+    termine.sort(key=lambda t: t[0])
+    return termine
+
+
+def zeilen(anzahl, konto_ids, kategorie_ids, seed=42):
+    # Erzeugt die Zahlungen als Tupel für INSERT INTO zahlungen (siehe befuellen), in Datumsreihenfolge.
+    # Vertragstermine machen höchstens ein Zehntel aus; bei kleinen Mengen wird ausgedünnt.
+    rnd = random.Random(seed)
+    termine = _monatstermine()
+    jeder = max(1, math.ceil(len(termine) * 10 / anzahl))
+    termine = termine[::jeder]
+    handel = anzahl - len(termine)
+    gewichte = [v[3] for v in KATEGORIEN.values()]
+    namen = list(KATEGORIEN)
+    karten_konten = [konto_ids[k] for k in ("Girokonto", "Kreditkarte", "Bargeld", "PayPal", "Gemeinschaftskonto",
+                                            "Girokonto Partner", "Reisekasse")]
+    letzte = deque(maxlen=50)
+    t = 0
+    for i in range(handel):
+        tag = ERSTER_TAG + timedelta(days=i * TAGE // handel)
+        while t < len(termine) and termine[t][0] <= tag:
+            datum, (name, kategorie, cent, typ, *_rest, konto) = termine[t]
+            cent = cent if typ == "Einnahme" else -cent
+            text = f"{name} {datum:%m/%Y}"
+            datum = datum.isoformat()
+            yield (cent, typ, datum, kategorie_ids[kategorie], konto_ids[konto], text, 1,
+                   fingerabdruck(datum, cent, konto_ids[konto], text))
+            t += 1
+        if letzte and rnd.random() < 0.02:
+            # Beinahe-Duplikat: gleiches Konto und gleicher Betrag, ein paar Tage später, leicht andere Beschreibung
+            cent, konto, text = rnd.choice(letzte)
+            tag = min(tag + timedelta(days=rnd.randint(0, 3)), LETZTER_TAG)
+            text = text.replace("Ref", "Referenz")
+            kategorie = None
+        else:
+            kategorie = rnd.choices(namen, gewichte)[0]
+            haendler, median, streuung, _ = KATEGORIEN[kategorie]
+            cent = -max(1, int(rnd.lognormvariate(math.log(median), streuung)))
+            if kategorie == "Sonstiges" and rnd.random() < 0.1:
+                cent = -cent   # Erstattungen, Rücküberweisungen
+            konto = rnd.choice(karten_konten)
+            text = f"{rnd.choice(haendler)} {rnd.choice(ZWECKE)} Ref {rnd.randint(1, 10 ** 7)}"
+            if rnd.random() < 0.05:
+                kategorie = None
+            letzte.append((cent, konto, text))
+        datum = tag.isoformat()
+        yield (cent, "Einnahme" if cent > 0 else "Ausgabe", datum,
+               kategorie_ids[kategorie] if kategorie else None, konto, text, 0,
+               fingerabdruck(datum, cent, konto, text))
+    for datum, (name, kategorie, cent, typ, *_rest, konto) in termine[t:]:
+        cent = cent if typ == "Einnahme" else -cent
+        text = f"{name} {datum:%m/%Y}"
+        datum = datum.isoformat()
+        yield (cent, typ, datum, kategorie_ids[kategorie], konto_ids[konto], text, 1,
+               fingerabdruck(datum, cent, konto_ids[konto], text))
+
+
+def befuellen(anzahl, seed=42):
+    # Füllt db.DB_FILE (leer oder neu) mit Stammdaten, Regeln, Verträgen und `anzahl` Zahlungen
+    db.init_db()
+    with db.transaction() as con:
+        con.executemany("INSERT OR IGNORE INTO konten (name) VALUES (?)", [(k,) for k in KONTEN])
+        con.executemany("INSERT OR IGNORE INTO kategorien (name) VALUES (?)", [(k,) for k in kategorien_namen()])
+        konto_ids = {r["name"]: r["id"] for r in con.execute("SELECT id, name FROM konten")}
+        kategorie_ids = {r["name"]: r["id"] for r in con.execute("SELECT id, name FROM kategorien")}
+        con.executemany("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                   fingerabdruck)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, zeilen(anzahl, konto_ids, kategorie_ids, seed))
+    for kategorie, (haendler, *_rest) in KATEGORIEN.items():
+        for name in haendler[:2]:
+            db.add_regel("text", name, kategorie_ids[kategorie])
+    db.add_regel("regex", r"^(Netflix|Spotify)\b", kategorie_ids["Abos"])
+    # Verträge sind bis Ende 2024 gebucht (die Zahlungen dazu stehen oben schon drin)
+    for name, kategorie, cent, typ, rhythmus, tag, konto in VERTRAEGE:
+        vertrag_id = db.add_vertrag(name, cent / 100, typ, rhythmus, f"{ERSTER_TAG.year}-01-{min(tag, 28):02d}", None,
+                                    kategorie_ids[kategorie], konto_ids[konto])
+        with db.transaction() as con:
+            con.execute("UPDATE vertraege SET naechste_faelligkeit = ? WHERE id = ?",
+                        (f"2025-01-{min(tag, 28):02d}", vertrag_id))
+    with db.transaction() as con:
+        # Das Erzeugen selbst soll nicht im Änderungsprotokoll stehen (Rückgängig beginnt leer)
+        con.execute("DELETE FROM protokoll")
+    with db.connection() as con:
+        con.execute("ANALYZE")
+        con.execute("INSERT INTO zahlungen_fts (zahlungen_fts) VALUES ('optimize')")
+    db.stammdaten_neu_laden()
+
+
+def pruefsumme():
+    # (Anzahl, Summe in Cent): gleiche Vorlage <=> gleiche Werte; Ergebnisse mit anderer
+    # Prüfsumme sind nicht vergleichbar
+    with db.connection() as con:
+        anzahl, summe = con.execute("SELECT COUNT(*), IFNULL(SUM(betrag_cent), 0) FROM zahlungen").fetchone()
+    return {"zahlungen": anzahl, "summe_cent": summe}
+
+
+def vorlage(anzahl, seed=42, verzeichnis=CACHE):
+    # Pfad zur fertigen Vorlage; wird beim ersten Aufruf erzeugt. Der Name enthält die Zahl
+    # der Migrationen, nach einer Schemaänderung entsteht also eine neue Vorlage.
+    os.makedirs(verzeichnis, exist_ok=True)
+    pfad = os.path.join(verzeichnis, f"ledger_{anzahl}_{seed}_s{len(db.MIGRATIONEN)}.db")
+    if os.path.exists(pfad):
+        return pfad
+    vorher = db.DB_FILE
+    db.DB_FILE = pfad + ".neu"
+    for rest in ("", "-wal", "-shm"):
+        if os.path.exists(db.DB_FILE + rest):
+            os.remove(db.DB_FILE + rest)
+    try:
+        start = time.perf_counter()
+        befuellen(anzahl, seed)
+        with db.connection() as con:
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        db_pool.close_all()
+        os.replace(db.DB_FILE, pfad)
+        print(f"Vorlage mit {anzahl:,} Zahlungen in {time.perf_counter() - start:.0f} s angelegt: {pfad}"
+              .replace(",", "."), file=sys.stderr)
+    finally:
+        db.DB_FILE = vorher
+    return pfad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beispiel-Buchhaltung erzeugen")
+    parser.add_argument("ziel")
+    parser.add_argument("--zahlungen", type=int, default=GROESSEN["1m"])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if os.path.exists(args.ziel):
+        sys.exit(f"{args.ziel} existiert bereits")
+    db.DB_FILE = args.ziel
+    befuellen(args.zahlungen, args.seed)
+    print(pruefsumme())
+
+
+if __name__ == "__main__":
+    main()
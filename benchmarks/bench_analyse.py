@@ -0,0 +1,95 @@
+# Auswertungen: zeilenweise über get_zahlungen() (sqlite3.Row + Python-Schleifen) vs. analyse.py (NumPy-Spalten)
+#
+#   python benchmarks/bench_analyse.py [--zahlungen 500000] [--db PFAD]
+#
+# Beide Varianten berechnen dasselbe: Summen je Monat x Kategorie, laufenden Saldo je Tag,
+# gleitenden 3-Monats-Schnitt des Saldos und Perzentile der Ausgaben.
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import analyse
+import db
+import db_pool
+from bench_suche import befuellen
+
+
+def zeilenweise():
+    summen = {}
+    saldo_je_tag = {}
+    ausgaben = []
+    saldo = 0
+    zeilen = sorted(db.get_zahlungen(), key=lambda z: (z["datum"], z["id"]))
+    for z in zeilen:
+        schluessel = (z["datum"][:7], z["kategorie_id"] or 0)
+        summen[schluessel] = summen.get(schluessel, 0) + z["betrag_cent"]
+        saldo += z["betrag_cent"]
+        saldo_je_tag[z["datum"]] = saldo
+        if z["typ"] != "Einnahme":
+            ausgaben.append(-z["betrag_cent"])
+    monate = {}
+    for (monat, _), summe in summen.items():
+        monate[monat] = monate.get(monat, 0) + summe
+    werte = [monate[m] for m in sorted(monate)]
+    schnitt = [sum(werte[max(i - 2, 0):i + 1]) / len(werte[max(i - 2, 0):i + 1]) for i in range(len(werte))]
+    ausgaben.sort()
+    perz = {p: ausgaben[min(len(ausgaben) - 1, int(p / 100 * len(ausgaben)))] for p in (50, 90, 99)} if ausgaben else {}
+    return summen, saldo_je_tag, schnitt, perz
+
+
+def spaltenweise():
+    sp = analyse.spalten()
+    summen = analyse.monatssummen(sp, nach="kategorie")
+    saldo = analyse.laufender_saldo(sp)
+    _, monatssummen, _ = analyse.monatssummen(sp)
+    schnitt = analyse.gleitender_durchschnitt(monatssummen, 3)
+    perz = analyse.perzentile(sp)
+    return summen, saldo, schnitt, perz
+
+
+def messen(func):
+    start = time.perf_counter()
+    ergebnis = func()
+    return time.perf_counter() - start, ergebnis
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=500000)
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = args.db or os.path.join(tmp, "bench.db")
+        if os.path.exists(db.DB_FILE):
+            db.init_db()
+        else:
+            befuellen(args.zahlungen)
+        with db.connection() as con:
+            anzahl = con.execute("SELECT count(*) FROM zahlungen").fetchone()[0]
+
+        t_zeilen, (summen, saldo_je_tag, _, _) = messen(zeilenweise)
+        analyse.cache_leeren()
+        t_kalt, (spalten_summen, (tage, saldo), _, _) = messen(spaltenweise)
+        t_warm, _ = messen(spaltenweise)
+        db_pool.close_all()
+
+    # Beide Wege müssen dasselbe liefern
+    monate, kategorien, werte, _ = spalten_summen
+    assert {(str(m), int(k)): int(w) for m, k, w in zip(monate, kategorien, werte)} == summen
+    assert int(saldo[-1]) == saldo_je_tag[max(saldo_je_tag)] and len(tage) == len(saldo_je_tag)
+
+    print(f"{anzahl:,} Zahlungen".replace(",", "."))
+    print(f"{'Variante':<32}{'Zeit [s]':>10}{'Faktor':>9}")
+    print(f"{'zeilenweise (get_zahlungen)':<32}{t_zeilen:>10.3f}{1:>8.1f}x")
+    print(f"{'analyse, kalt (inkl. Laden)':<32}{t_kalt:>10.3f}{t_zeilen / t_kalt:>8.1f}x")
+    print(f"{'analyse, warm (Cache)':<32}{t_warm:>10.3f}{t_zeilen / t_warm:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Archive: Abfragen auf das laufende Jahr und über alle Jahre vor und nach dem Archivieren
+#
+#   python benchmarks/bench_archiv.py [--zahlungen 1000000] [--behalten 2]
+#
+# Die Beispieldaten verteilen sich auf zehn Jahre (2015-2024, siehe bench_suche.befuellen).
+# Archiviert werden alle bis auf die letzten --behalten Jahre. Danach sollten Abfragen auf das
+# laufende Jahr gleich schnell oder schneller sein (kleinere Hauptdatei und Indizes), Abfragen
+# über alle Jahre lesen per UNION ALL die Archive mit. Die Suche kann nachher langsamer sein:
+# hat main nur noch bis zu db.RANG_GRENZE Treffer, wird nach Relevanz sortiert statt nach Datum.
+# Braucht das Archivieren eines Jahres länger als das Budget, endet das Skript mit Code 1.
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from bench_suche import befuellen
+
+ZIEL_S = 30
+WIEDERHOLUNGEN = 5
+
+
+def messen(funktion, *args):
+    # Bester von WIEDERHOLUNGEN Läufen, Schreibzugriffe schwanken sonst stark mit dem WAL
+    zeiten = []
+    for _ in range(WIEDERHOLUNGEN):
+        start = time.perf_counter()
+        funktion(*args)
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return min(zeiten)
+
+
+def uebersicht_blaettern(suchfilter, seiten=10):
+    nach = None
+    for _ in range(seiten):
+        zeilen = db.get_zahlungen_gefiltert(suchfilter, 100, nach)
+        if not zeilen:
+            return
+        nach = (zeilen[-1]["datum"], zeilen[-1]["id"])
+
+
+def neue_zahlungen(jahr, anzahl=50):
+    # Mit Duplikatprüfung wie in der Oberfläche
+    for i in range(anzahl):
+        db.add_zahlung(12.34 + i, "Ausgabe", f"{jahr}-06-{i % 28 + 1:02d}", 1, 1, f"Bench {time.perf_counter()}", False)
+
+
+def alle_lesen():
+    return sum(len(block) for block in db.zahlungen_lesen())
+
+
+def messungen(jahr):
+    laufend = {"von": f"{jahr}-01-01"}
+    ergebnis = {
+        "Übersicht laufendes Jahr (10 Seiten)": messen(uebersicht_blaettern, laufend),
+        "Übersicht Konto, laufendes Jahr": messen(uebersicht_blaettern, {**laufend, "konto_id": 1}),
+        "Suche laufendes Jahr": messen(db.suche_zahlungen, {**laufend, "text": "rewe"}, 100),
+        "50 neue Zahlungen": messen(neue_zahlungen, jahr),
+        "Alle Jahre zählen": messen(db.zahlungen_zaehlen),
+        "Alle Jahre lesen": messen(alle_lesen),
+    }
+    with db.connection() as con:
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return ergebnis
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=1000000)
+    parser.add_argument("--behalten", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        with db.connection() as con:
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            erstes, letztes = (int(j[:4]) for j in con.execute("SELECT MIN(datum), MAX(datum) FROM zahlungen").fetchone())
+        groesse_vorher = os.path.getsize(db.DB_FILE) / 2 ** 20
+        vorher = messungen(letztes)
+
+        archiviert = []
+        for jahr in range(erstes, letztes - args.behalten + 1):
+            start = time.perf_counter()
+            anzahl = db.archivieren(jahr)
+            archiviert.append((jahr, anzahl, time.perf_counter() - start))
+        groesse_nachher = os.path.getsize(db.DB_FILE) / 2 ** 20
+        nachher = messungen(letztes)
+        abweichungen = db.pruefe_salden() + db.pruefe_monatswerte()
+        db_pool.close_all()
+
+    print(f"{args.zahlungen:,} Zahlungen".replace(",", ".") + f", {len(archiviert)} Jahre archiviert")
+    for jahr, anzahl, sekunden in archiviert:
+        print(f"  {jahr}: {anzahl:>9,} Zahlungen in {sekunden:.1f} s".replace(",", "."))
+    print(f"\n{'Abfrage':<40}{'vorher [ms]':>14}{'nachher [ms]':>14}")
+    print(f"{'Hauptdatei [MiB]':<40}{groesse_vorher:>14.0f}{groesse_nachher:>14.0f}")
+    for name in vorher:
+        print(f"{name:<40}{vorher[name]:>14.1f}{nachher[name]:>14.1f}")
+    if abweichungen:
+        print(f"\n{len(abweichungen)} Salden/Monatswerte weichen nach dem Archivieren ab")
+        sys.exit(1)
+    if max(sekunden for _, _, sekunden in archiviert) > ZIEL_S:
+        print(f"\nArchivieren eines Jahres über {ZIEL_S} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
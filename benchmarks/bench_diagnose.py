@@ -0,0 +1,115 @@
+# Kosten der Laufzeitmessung (diagnose.py) auf den Datenbankfunktionen
+#
+#   python benchmarks/bench_diagnose.py [--zahlungen 100000] [--runden 15] [--aufrufe 2000]
+#
+# Vergleicht je Funktion den direkten Aufruf (__wrapped__) mit der Hülle bei ausgeschalteter und
+# eingeschalteter Messung (mit SQL-Verfolgung). Die Varianten laufen abwechselnd in Runden
+# (Reihenfolge wechselt je Runde); berichtet wird der Median der Verhältnisse je Runde.
+#
+# Die ausgeschaltete Hülle kostet weniger, als die Datenbankaufrufe von Runde zu Runde schwanken.
+# Geprüft wird deshalb ihr eigener Aufschlag (Hülle um eine leere Funktion, Minimum aus mehreren
+# Wiederholungen) im Verhältnis zum billigsten Datenbankaufruf: über ZIEL_PROZENT endet das
+# Skript mit Code 1.
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+import diagnose
+from bench_suche import befuellen
+
+ZIEL_PROZENT = 2.0
+
+
+def faelle(ids):
+    # (name, hülle, argumente), vom billigsten zum teuersten Aufruf
+    return [
+        ("get_uebersicht_zeile", db.get_uebersicht_zeile, lambda i: (ids[i % len(ids)],)),
+        ("get_zahlung_by_id", db.get_zahlung_by_id, lambda i: (ids[i % len(ids)],)),
+        ("get_salden", db.get_salden, lambda i: ()),
+        ("get_zahlungen_seite", db.get_zahlungen_seite, lambda i: (100,)),
+    ]
+
+
+def huellen_aufschlag_us():
+    # Reiner Aufschlag der ausgeschalteten Hülle je Aufruf
+    def leer(a):
+        return a
+
+    huelle = diagnose.umhuellen(leer, "bench")
+    zeiten = {}
+    for name, func in (("leer", leer), ("huelle", huelle)):
+        zeiten[name] = min(timeit.repeat(lambda: func(1), number=100000, repeat=9)) / 100000 * 1e6
+    return zeiten["huelle"] - zeiten["leer"]
+
+
+def runde(func, argumente, aufrufe):
+    start = time.perf_counter()
+    for i in range(aufrufe):
+        func(*argumente(i))
+    return (time.perf_counter() - start) / aufrufe * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=100000)
+    parser.add_argument("--runden", type=int, default=15)
+    parser.add_argument("--aufrufe", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        diagnose.LOGDATEI = os.path.join(tmp, "langsam.log")
+        befuellen(args.zahlungen)
+        with db.connection() as con:
+            ids = [r[0] for r in con.execute("SELECT id FROM zahlungen ORDER BY random() LIMIT 1000")]
+
+        ergebnisse = []
+        for name, huelle, argumente in faelle(ids):
+            direkt = huelle.__wrapped__
+            varianten = [("direkt", direkt, False), ("aus", huelle, False), ("an", huelle, True)]
+            zeiten = {art: [] for art, _, _ in varianten}
+            runde(direkt, argumente, args.aufrufe)  # aufwärmen (Cache, Statements)
+            for r in range(args.runden):
+                for art, func, an in (varianten if r % 2 == 0 else varianten[::-1]):
+                    if an:
+                        diagnose.einschalten()
+                    else:
+                        diagnose.ausschalten()
+                    zeiten[art].append(runde(func, argumente, args.aufrufe))
+            diagnose.ausschalten()
+            diagnose.zuruecksetzen()
+            ergebnisse.append((name, {
+                "direkt": statistics.median(zeiten["direkt"]),
+                "aus": statistics.median(a / d for a, d in zip(zeiten["aus"], zeiten["direkt"])),
+                "an": statistics.median(a / d for a, d in zip(zeiten["an"], zeiten["direkt"])),
+            }))
+        db_pool.close_all()
+    aufschlag = huellen_aufschlag_us()
+
+    anzahl = f"{args.zahlungen:,}".replace(",", ".")
+    print(f"{anzahl} Zahlungen, {args.runden} Runden à {args.aufrufe} Aufrufe (Median je Aufruf)")
+    print(f"{'Funktion':<24}{'direkt [µs]':>12}{'aus [%]':>9}{'an [%]':>9}")
+    for name, m in ergebnisse:
+        aus = (m["aus"] - 1) * 100
+        an = (m["an"] - 1) * 100
+        print(f"{name:<24}{m['direkt']:>12.1f}{aus:>9.1f}{an:>9.1f}")
+    billigster = min(m["direkt"] for _, m in ergebnisse)
+    anteil = aufschlag / billigster * 100
+    print(f"\nHülle ausgeschaltet: {aufschlag * 1000:.0f} ns je Aufruf = {anteil:.2f} % des billigsten Aufrufs")
+    if anteil > ZIEL_PROZENT:
+        print(f"Mehr als {ZIEL_PROZENT:.0f} % Aufschlag")
+        sys.exit(1)
+    print(f"Höchstens {ZIEL_PROZENT:.0f} % Aufschlag")
+
+
+if __name__ == "__main__":
+    main()
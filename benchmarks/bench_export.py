@@ -0,0 +1,98 @@
+# Export: Laufzeit und Spitzen-Speicher beim Export aller Zahlungen
+#
+#   python benchmarks/bench_export.py [--zahlungen 5000000] [--formate csv parquet] [--db pfad]
+#
+# Jeder Export läuft als eigener Prozess (export.main), der seinen Spitzen-Speicher (maxrss)
+# meldet. Exportiert wird einmal ein Jahr und einmal alles: bei konstantem Speicherbedarf
+# liegen beide gleich auf. Der Wert enthält SQLites Page-Cache und Memory-Mapping
+# (zusammen höchstens 320 MiB, siehe db_pool.PRAGMAS), die nicht mit der Zahl der Zeilen wachsen.
+# Liegt ein Export über dem Budget, endet das Skript mit Code 1.
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+import export
+from bench_suche import befuellen
+
+ZIEL_MB = 400
+
+# Läuft im Kindprozess: export.main(argv), danach maxrss in MiB (Linux: KiB, macOS: Byte)
+_KIND = """
+import resource, sys
+sys.path.insert(0, {pfad!r})
+import export
+code = export.main(sys.argv[1:])
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(rss / (1024 * 1024 if sys.platform == "darwin" else 1024))
+sys.exit(code)
+"""
+
+
+def exportieren(argv):
+    # Ein Export als eigener Prozess; liefert (Sekunden, Spitzen-Speicher in MiB)
+    code = _KIND.format(pfad=str(Path(__file__).resolve().parent.parent))
+    start = time.perf_counter()
+    lauf = subprocess.run([sys.executable, "-c", code, *argv], capture_output=True, text=True)
+    sekunden = time.perf_counter() - start
+    if lauf.returncode != 0:
+        sys.exit(f"Export fehlgeschlagen:\n{lauf.stdout}{lauf.stderr}")
+    return sekunden, float(lauf.stdout.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=5000000)
+    parser.add_argument("--formate", nargs="+", choices=export.FORMATE,
+                        default=[f for f in export.verfuegbare_formate() if f != "xlsx"])
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = args.db or os.path.join(tmp, "bench.db")
+        if os.path.exists(db.DB_FILE):
+            db.init_db()
+        else:
+            start = time.perf_counter()
+            befuellen(args.zahlungen)
+            print(f"{args.zahlungen:,} Zahlungen angelegt in {time.perf_counter() - start:.1f} s\n".replace(",", "."))
+        jahr_filter = {"von": "2020-01-01", "bis": "2020-12-31"}
+        anzahl, anzahl_jahr = db.zahlungen_zaehlen(), db.zahlungen_zaehlen(jahr_filter)
+        db_pool.close_all()
+
+        print(f"Export von {anzahl:,} Zahlungen".replace(",", "."))
+        print(f"{'Format':<10}{'Umfang':<10}{'Zeit [s]':>10}{'Zeilen/s':>12}{'Speicher [MiB]':>16}{'Datei [MiB]':>13}")
+        zu_viel = []
+        for format in args.formate:
+            if format not in export.verfuegbare_formate():
+                print(f"{format:<10}übersprungen ({export.PAKETE[format]} fehlt)")
+                continue
+            ziel = os.path.join(tmp, f"export.{format}")
+            jahr = os.path.join(tmp, f"jahr.{format}")
+            for umfang, argv, datei, zeilen in (
+                ("2020", ["--von", jahr_filter["von"], "--bis", jahr_filter["bis"], jahr], jahr, anzahl_jahr),
+                ("alles", [ziel], ziel, anzahl),
+            ):
+                sekunden, mib = exportieren(["--db", db.DB_FILE, *argv])
+                rate = f"{zeilen / sekunden:,.0f}".replace(",", ".")
+                groesse = os.path.getsize(datei) / 2 ** 20
+                print(f"{format:<10}{umfang:<10}{sekunden:>10.1f}{rate:>12}{mib:>16.0f}{groesse:>13.0f}")
+                if mib > ZIEL_MB:
+                    zu_viel.append(f"{format} ({umfang})")
+                os.remove(datei)
+
+    if zu_viel:
+        print(f"\nÜber {ZIEL_MB} MiB: {', '.join(zu_viel)}")
+        sys.exit(1)
+    print(f"\nAlle Exporte unter {ZIEL_MB} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Import-Durchsatz: Massenimport (eine Transaktion) vs. add_zahlung pro Zeile
+#
+#   python benchmarks/bench_import.py [--zeilen 200000] [--einzeln 2000]
+#
+# Liegt der Massenimport unter ZIEL_ZEILEN_PRO_S, endet das Skript mit Code 1.
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+import importer
+
+ZIEL_ZEILEN_PRO_S = 100000
+
+
+def csv_erzeugen(pfad, zeilen, seed=42):
+    rnd = random.Random(seed)
+    haendler = ["REWE", "EDEKA", "Aldi", "Shell", "Amazon", "Stadtwerke", "Vermieter GmbH", "Arbeitgeber AG"]
+    with open(pfad, "w", encoding="utf-8") as f:
+        f.write("Buchungstag;Beguenstigter/Zahlungspflichtiger;Verwendungszweck;Betrag\n")
+        for i in range(zeilen):
+            cent = rnd.randint(-80000, 60000)
+            vz = "-" if cent < 0 else ""
+            f.write(f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(2015, 2024)};"
+                    f"{rnd.choice(haendler)};Referenz {i};{vz}{abs(cent) // 100},{abs(cent) % 100:02d}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zeilen", type=int, default=200000)
+    parser.add_argument("--einzeln", type=int, default=2000, help="Zeilen für den Vergleich mit add_zahlung")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pfad = os.path.join(tmp, "umsaetze.csv")
+        csv_erzeugen(pfad, args.zeilen)
+
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        ergebnis = importer.importiere_datei(pfad, konto="Girokonto")
+        print(f"Massenimport:     {ergebnis}")
+
+        db.DB_FILE = os.path.join(tmp, "einzeln.db")
+        db.init_db()
+        with open(pfad, "rb") as datei:
+            start = time.perf_counter()
+            for i, d in enumerate(importer.lese_csv(datei)):
+                if i >= args.einzeln:
+                    break
+                typ = "Einnahme" if d["betrag_cent"] > 0 else "Ausgabe"
+                db.add_zahlung(abs(d["betrag_cent"]) / 100, typ, d["datum"], None, 1, d["beschreibung"], False)
+            dauer = time.perf_counter() - start
+        print(f"add_zahlung/Zeile: {args.einzeln} Zahlungen in {dauer:.2f} s ({args.einzeln / dauer:,.0f} Zeilen/s)")
+        db_pool.close_all()
+
+    if ergebnis.zeilen_pro_sekunde < ZIEL_ZEILEN_PRO_S:
+        print(f"\nMassenimport unter {ZIEL_ZEILEN_PRO_S:,} Zeilen/s")
+        sys.exit(1)
+    print(f"\nMassenimport über {ZIEL_ZEILEN_PRO_S:,} Zeilen/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# Automatische Kategorisierung: kompiliertes Regelwerk vs. Regel-für-Regel-Schleife
+#
+#   python benchmarks/bench_kategorisierung.py [--regeln 300] [--beschreibungen 100000] [--zahlungen 100000]
+#
+# Misst die Klassifikation eines Stapels Beschreibungen (Ziel: unter einer Sekunde für 100.000)
+# und den Job "Zahlungen ohne Kategorie einordnen" gegen eine Datenbank.
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from bench_suche import HAENDLER, ZWECKE, befuellen
+from kategorisierung import Regelwerk
+
+ZIEL_S = 1.0
+
+
+def regeln_erzeugen(anzahl, seed=3):
+    # Händlernamen plus zufällige Kunstwörter; jede 20. Regel ein regulärer Ausdruck,
+    # jede 10. mit Betragsgrenze, jede 15. nur für ein Konto
+    rnd = random.Random(seed)
+    woerter = [h.lower() for h in HAENDLER]
+    while len(woerter) < anzahl:
+        woerter.append("".join(rnd.choice("abcdefghijklmnopqrstuvwxyzäöü") for _ in range(rnd.randint(4, 10))))
+    regeln = []
+    for i, wort in enumerate(woerter[:anzahl]):
+        regex = i % 20 == 19
+        regeln.append({
+            "id": i + 1,
+            "art": "regex" if regex else "text",
+            "muster": rf"^{re.escape(wort)}\b.*\d{{6}}$" if regex else wort,
+            "kategorie_id": 1 + i % 4,
+            "betrag_min": 5000 if i % 10 == 9 else None,
+            "betrag_max": None,
+            "konto_id": 1 if i % 15 == 14 else None,
+            "prioritaet": 100,
+        })
+    return regeln
+
+
+def beschreibungen_erzeugen(anzahl, woerter, seed=4):
+    rnd = random.Random(seed)
+    return [(f"{rnd.choice(woerter)} {rnd.choice(ZWECKE)} Ref {rnd.randint(1, 10 ** 6)}",
+             rnd.randint(-80000, 60000), rnd.choice([1, 2])) for _ in range(anzahl)]
+
+
+def regel_fuer_regel(regeln, zeilen):
+    # Naheliegende Variante: jede Beschreibung gegen jede Regel der Reihe nach
+    vorbereitet = [(re.compile(r["muster"], re.IGNORECASE) if r["art"] == "regex" else None, r) for r in regeln]
+    ergebnis = []
+    for beschreibung, cent, konto_id in zeilen:
+        text = beschreibung.lower()
+        treffer = None
+        for regex, r in vorbereitet:
+            if r["konto_id"] is not None and r["konto_id"] != konto_id:
+                continue
+            if r["betrag_min"] is not None and abs(cent) < r["betrag_min"]:
+                continue
+            if regex.search(text) if regex else r["muster"] in text:
+                treffer = r["kategorie_id"]
+                break
+        ergebnis.append(treffer)
+    return ergebnis
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regeln", type=int, default=300)
+    parser.add_argument("--beschreibungen", type=int, default=100000)
+    parser.add_argument("--zahlungen", type=int, default=100000)
+    args = parser.parse_args()
+
+    regeln = regeln_erzeugen(args.regeln)
+    zeilen = beschreibungen_erzeugen(args.beschreibungen, [r["muster"] for r in regeln if r["art"] == "text"]
+                                     + HAENDLER + ["Unbekannt GmbH"])
+
+    start = time.perf_counter()
+    regelwerk = Regelwerk(regeln)
+    t_kompilieren = time.perf_counter() - start
+    start = time.perf_counter()
+    kompiliert = regelwerk.kategorisieren(zeilen)
+    t_kompiliert = time.perf_counter() - start
+    start = time.perf_counter()
+    einzeln = regel_fuer_regel(regeln, zeilen)
+    t_einzeln = time.perf_counter() - start
+    assert kompiliert == einzeln
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        for r in regeln:
+            db.add_regel(r["art"], r["muster"], r["kategorie_id"], r["betrag_min"], r["betrag_max"], r["konto_id"])
+        with db.transaction() as con:
+            con.execute("UPDATE zahlungen SET kategorie_id = NULL")
+        # Wie eine eingeschwungene Datenbank: WAL zurückschreiben, FTS-Segmente zusammenführen
+        with db.connection() as con:
+            con.execute("INSERT INTO zahlungen_fts (zahlungen_fts) VALUES ('optimize')")
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        start = time.perf_counter()
+        zugeordnet = db.zahlungen_kategorisieren()
+        t_job = time.perf_counter() - start
+        db_pool.close_all()
+
+    treffer = sum(k is not None for k in kompiliert)
+    print(f"{args.regeln} Regeln, {args.beschreibungen:,} Beschreibungen ({treffer:,} mit Treffer)".replace(",", "."))
+    print(f"{'Variante':<36}{'Zeit [s]':>10}")
+    print(f"{'Regelwerk kompilieren':<36}{t_kompilieren:>10.3f}")
+    print(f"{'kompiliertes Regelwerk':<36}{t_kompiliert:>10.3f}")
+    print(f"{'Regel für Regel':<36}{t_einzeln:>10.3f}")
+    print(f"{'Job: ' + format(zugeordnet, ',').replace(',', '.') + ' Zahlungen einordnen':<36}{t_job:>10.3f}")
+    if t_kompiliert > ZIEL_S:
+        print(f"\nÜber {ZIEL_S:.0f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Sammelbearbeitung: Kategorie, Konto, Wiederkehrend und Löschen für viele Zahlungen auf einmal
+#
+#   python benchmarks/bench_sammel.py [--zahlungen 100000] [--auswahl 10000] [--einzeln 1000]
+#
+# Vergleicht die Sammelfunktionen (eine Transaktion, IN-Listen in Blöcken) mit update_zahlung
+# Zeile für Zeile, wie es die Oberfläche früher für jede Zahlung einzeln getan hätte. Die
+# Einzelvariante läuft nur für --einzeln Zahlungen und wird auf die Auswahl hochgerechnet.
+# Das Löschen läuft wie in der Oberfläche über das Änderungsprotokoll und wird danach zurückgenommen.
+# Braucht eine Sammeloperation (oder ihr Rückgängigmachen) länger als das Budget, endet das Skript mit Code 1.
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from bench_suche import befuellen
+from money import Money
+
+ZIEL_MS = 2000
+
+
+def messen(funktion, *args):
+    start = time.perf_counter()
+    funktion(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def einzeln(ids):
+    # Naheliegende Variante: jede Zahlung lesen und mit neuer Kategorie vollständig zurückschreiben
+    for zahlung_id in ids:
+        z = db.get_zahlung_by_id(zahlung_id)
+        db.update_zahlung(zahlung_id, Money(z["betrag_cent"]), z["typ"], z["datum"], 2, z["konto_id"], z["beschreibung"],
+                          bool(z["wiederkehrend"]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=100000)
+    parser.add_argument("--auswahl", type=int, default=10000)
+    parser.add_argument("--einzeln", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        with db.connection() as con:
+            alle = [r[0] for r in con.execute("SELECT id FROM zahlungen")]
+            con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        ids = random.Random(5).sample(alle, args.auswahl)
+
+        t_einzeln = messen(einzeln, ids[:args.einzeln]) * args.auswahl / args.einzeln
+        ergebnisse = [
+            ("Kategorie ändern", messen(db.zahlungen_kategorie_setzen, ids, 3)),
+            ("Konto ändern", messen(db.zahlungen_konto_setzen, ids, 2)),
+            ("Wiederkehrend setzen", messen(db.zahlungen_wiederkehrend_setzen, ids, 1)),
+        ]
+        start = time.perf_counter()
+        _, von, bis = db.protokolliert(db.zahlungen_loeschen, ids)
+        ergebnisse.append(("Löschen", (time.perf_counter() - start) * 1000))
+        ergebnisse.append(("Löschen rückgängig", messen(db.zuruecknehmen, von, bis)))
+        db_pool.close_all()
+
+    anzahl = format(args.auswahl, ",").replace(",", ".")
+    print(f"{anzahl} von {args.zahlungen:,} Zahlungen".replace(",", "."))
+    print(f"{'Variante':<40}{'Zeit [ms]':>12}")
+    print(f"{'Zeile für Zeile (hochgerechnet)':<40}{t_einzeln:>12.0f}")
+    for name, dauer in ergebnisse:
+        print(f"{name:<40}{dauer:>12.0f}")
+    if max(dauer for _, dauer in ergebnisse) > ZIEL_MS:
+        print(f"\nSammeloperation über {ZIEL_MS} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
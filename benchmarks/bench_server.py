@@ -0,0 +1,133 @@
+# Last auf den lokalen HTTP/JSON-Server (finanz.server): parallele Leser und einige Schreiber
+#
+#   python benchmarks/bench_server.py [--zahlungen 200000] [--leser 8] [--schreiber 2] [--sekunden 10]
+#
+# Der Server läuft als eigener Prozess (python -m finanz server), damit die Clients nicht mit
+# ihm um den GIL konkurrieren. Jeder Client-Thread hält eine Keep-Alive-Verbindung; Leser blättern per GET /zahlungen mit
+# wechselnden Filtern, Schreiber legen per POST /zahlungen an. Gemessen werden Anfragen je
+# Sekunde und p50/p95 der Antwortzeit, getrennt nach Lesen und Schreiben. Leser dürfen durch
+# die Schreiber nicht ausgebremst werden (WAL); liegt p95 beim Lesen über dem Budget, endet
+# das Skript mit Code 1.
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from bench_suche import befuellen
+
+ZIEL_MS = 50  # p95 beim Lesen
+
+
+def perzentil(werte, p):
+    if not werte:
+        return 0.0
+    return statistics.quantiles(werte, n=100, method="inclusive")[p - 1] if len(werte) > 1 else werte[0]
+
+
+def server_starten(port):
+    prozess = subprocess.Popen([sys.executable, "-m", "finanz", "--db", db.DB_FILE, "server", "--port", str(port)],
+                               cwd=Path(__file__).resolve().parent.parent, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return prozess
+        except OSError:
+            time.sleep(0.1)
+    prozess.kill()
+    sys.exit("Server startet nicht")
+
+
+def freier_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def client(adresse, ende, zeiten, fehler, schreiben, seed):
+    rnd = random.Random(seed)
+    verbindung = http.client.HTTPConnection(*adresse)
+    nummer = 0
+    while time.perf_counter() < ende:
+        if schreiben:
+            nummer += 1
+            koerper = json.dumps({"datum": "2024-12-31", "betrag": f"-{rnd.randint(1, 9999) / 100:.2f}",
+                                  "beschreibung": f"Last {seed}-{nummer}", "duplikat_erlauben": True})
+            anfrage = ("POST", "/zahlungen", koerper, {"Content-Type": "application/json"})
+        else:
+            jahr = rnd.randint(2015, 2024)
+            pfad = rnd.choice([
+                "/zahlungen?limit=100",
+                f"/zahlungen?von={jahr}-01-01&bis={jahr}-12-31&limit=100",
+                f"/zahlungen?betrag_min={rnd.randint(1, 500)}&limit=50",
+                "/salden",
+            ])
+            anfrage = ("GET", pfad, None, {})
+        start = time.perf_counter()
+        verbindung.request(*anfrage)
+        antwort = verbindung.getresponse()
+        antwort.read()
+        zeiten.append((time.perf_counter() - start) * 1000)
+        if antwort.status >= 400:
+            fehler.append(f"{anfrage[0]} {anfrage[1]}: {antwort.status}")
+    verbindung.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=200000)
+    parser.add_argument("--leser", type=int, default=8)
+    parser.add_argument("--schreiber", type=int, default=2)
+    parser.add_argument("--sekunden", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        db_pool.close_all()
+        adresse = ("127.0.0.1", freier_port())
+        server = server_starten(adresse[1])
+        lesen, schreiben, fehler = [], [], []
+        ende = time.perf_counter() + args.sekunden
+        threads = [threading.Thread(target=client, args=(adresse, ende, lesen, fehler, False, i))
+                   for i in range(args.leser)]
+        threads += [threading.Thread(target=client, args=(adresse, ende, schreiben, fehler, True, i))
+                    for i in range(args.schreiber)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    anzahl = f"{args.zahlungen:,}".replace(",", ".")
+    print(f"{anzahl} Zahlungen, {args.leser} Leser, {args.schreiber} Schreiber, {args.sekunden:.0f} s")
+    print(f"{'Art':<12}{'Anfragen':>10}{'je s':>10}{'p50 [ms]':>10}{'p95 [ms]':>10}")
+    for art, zeiten in (("Lesen", lesen), ("Schreiben", schreiben)):
+        print(f"{art:<12}{len(zeiten):>10}{len(zeiten) / args.sekunden:>10.0f}"
+              f"{perzentil(zeiten, 50):>10.1f}{perzentil(zeiten, 95):>10.1f}")
+    if fehler:
+        print(f"\n{len(fehler)} Fehler, z.B. {fehler[0]}")
+        sys.exit(1)
+    if perzentil(lesen, 95) > ZIEL_MS:
+        print(f"\np95 beim Lesen über {ZIEL_MS} ms")
+        sys.exit(1)
+    print(f"\np95 beim Lesen unter {ZIEL_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
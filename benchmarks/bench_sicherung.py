@@ -0,0 +1,95 @@
+# Sicherung im laufenden Betrieb: Dauer und Durchsatz, und wie sehr sie Schreiber ausbremst
+#
+#   python benchmarks/bench_sicherung.py [--zahlungen 300000] [--sekunden 3]
+#
+# Ein Schreiber-Thread legt fortlaufend Zahlungen an (db.add_zahlung, wie aus der Oberfläche),
+# zuerst ohne, dann während einer Sicherung (sicherung.sichern). Verglichen wird die Antwortzeit
+# von add_zahlung; liegt p99 während der Sicherung über ZIEL_MS, endet das Skript mit Code 1.
+# Zum Schluss wird die Sicherung in eine zweite Datenbank wiederhergestellt und gezählt.
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+import sicherung
+from bench_suche import befuellen
+
+ZIEL_MS = 50  # p99 von add_zahlung während der Sicherung
+
+
+def perzentil(werte, p):
+    if len(werte) < 2:
+        return werte[0] if werte else 0.0
+    return statistics.quantiles(werte, n=100, method="inclusive")[p - 1]
+
+
+def schreiben(zeiten, weiter):
+    nummer = 0
+    while weiter():
+        nummer += 1
+        start = time.perf_counter()
+        db.add_zahlung("-4.20", "Ausgabe", "2024-12-31", None, None, f"Last {nummer}", False, duplikat_erlauben=True)
+        zeiten.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.002)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=300000)
+    parser.add_argument("--sekunden", type=float, default=3.0, help="Messdauer ohne Sicherung")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        groesse = os.path.getsize(db.DB_FILE) / 2**20
+
+        ohne = []
+        ende = time.perf_counter() + args.sekunden
+        schreiben(ohne, lambda: time.perf_counter() < ende)
+
+        waehrend = []
+        laeuft = True
+        thread = threading.Thread(target=schreiben, args=(waehrend, lambda: laeuft))
+        thread.start()
+        try:
+            ergebnis = sicherung.sichern(os.path.join(tmp, "sicherungen"))
+        finally:
+            laeuft = False
+            thread.join()
+
+        db.DB_FILE = os.path.join(tmp, "wiederhergestellt.db")
+        start = time.perf_counter()
+        info, _ = sicherung.wiederherstellen(ergebnis.pfad, vorher_sichern=False)
+        wiederherstellen = time.perf_counter() - start
+        with db.connection() as con:
+            anzahl = con.execute("SELECT COUNT(*) FROM zahlungen").fetchone()[0]
+        db_pool.close_all()
+
+    print(f"Datenbank {groesse:.0f} MiB, Sicherung {os.path.basename(ergebnis.pfad)}")
+    print(f"Sicherung:        {ergebnis.sekunden:.1f} s ({groesse / ergebnis.sekunden:.0f} MiB/s), "
+          f"{ergebnis.beschreibung['zahlungen']} Zahlungen")
+    print(f"Wiederherstellen: {wiederherstellen:.1f} s, {anzahl} Zahlungen")
+    print(f"{'add_zahlung':<18}{'Anzahl':>8}{'p50 [ms]':>10}{'p99 [ms]':>10}{'max [ms]':>10}")
+    for name, zeiten in (("ohne Sicherung", ohne), ("während", waehrend)):
+        print(f"{name:<18}{len(zeiten):>8}{perzentil(zeiten, 50):>10.1f}{perzentil(zeiten, 99):>10.1f}"
+              f"{max(zeiten):>10.1f}")
+    if anzahl != info["zahlungen"]:
+        print(f"\nWiederhergestellt {anzahl} statt {info['zahlungen']} Zahlungen")
+        sys.exit(1)
+    if perzentil(waehrend, 99) > ZIEL_MS:
+        print(f"\np99 von add_zahlung während der Sicherung über {ZIEL_MS} ms")
+        sys.exit(1)
+    print(f"\np99 von add_zahlung während der Sicherung unter {ZIEL_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Programmstart: Zeit bis zum ersten Zeichnen des Hauptfensters
+#
+#   python benchmarks/bench_start.py [--zahlungen 100000] [--wiederholungen 5]
+#
+# Startet finanzguru_main.py --profile-startup mehrfach als eigenen Prozess (ohne Bildschirm:
+# QT_QPA_PLATFORM=offscreen) und wertet die ausgegebenen Phasen aus. Der erste Start läuft auf
+# einer leeren Datenbank (alle Migrationen), die übrigen auf einer befüllten mit aktuellem
+# Schema. Liegt das erste Zeichnen im Median über dem Budget, endet das Skript mit Code 1.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from bench_suche import befuellen
+
+HAUPTPROGRAMM = Path(__file__).resolve().parent.parent / "finanzguru_main.py"
+ZIEL_MS = 400
+
+
+def starten(verzeichnis):
+    # Ein Programmstart; liefert ({phase: summe_ms}, Wandzeit des Prozesses in ms)
+    umgebung = dict(os.environ)
+    umgebung.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    lauf = subprocess.run([sys.executable, str(HAUPTPROGRAMM), "--profile-startup"], cwd=verzeichnis,
+                          env=umgebung, capture_output=True, text=True, timeout=120)
+    wand = (time.perf_counter() - start) * 1000
+    if lauf.returncode != 0:
+        sys.exit(f"Start fehlgeschlagen:\n{lauf.stderr}")
+    phasen = {}
+    for zeile in lauf.stdout.splitlines()[1:]:
+        name, _, summe = zeile.rsplit(maxsplit=2)
+        phasen[name] = float(summe)
+    return phasen, wand
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=100000)
+    parser.add_argument("--wiederholungen", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as leer, tempfile.TemporaryDirectory() as befuellt:
+        erststart, erststart_wand = starten(leer)
+        db.DB_FILE = os.path.join(befuellt, "finanzguru_data.db")
+        befuellen(args.zahlungen)
+        db_pool.close_all()
+        laeufe = [starten(befuellt) for _ in range(args.wiederholungen)]
+
+    anzahl = format(args.zahlungen, ",").replace(",", ".")
+    print(f"Start mit {anzahl} Zahlungen, Median aus {args.wiederholungen} Läufen")
+    print(f"{'Phase (seit Programmstart)':<28}{'Median [ms]':>13}{'Max [ms]':>11}{'Erststart [ms]':>16}")
+    for name in erststart:
+        werte = [phasen[name] for phasen, _ in laeufe]
+        print(f"{name:<28}{statistics.median(werte):>13.1f}{max(werte):>11.1f}{erststart[name]:>16.1f}")
+    wand = [w for _, w in laeufe]
+    print(f"{'Prozess gesamt':<28}{statistics.median(wand):>13.1f}{max(wand):>11.1f}{erststart_wand:>16.1f}")
+
+    erstes_zeichnen = statistics.median(phasen["Erstes Zeichnen"] for phasen, _ in laeufe)
+    if erstes_zeichnen > ZIEL_MS:
+        print(f"\nErstes Zeichnen über {ZIEL_MS} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Volltextsuche und Filter der Übersicht: Antwortzeit der ersten Seite auf einem großen Buchungsbestand
+#
+#   python benchmarks/bench_suche.py [--zahlungen 1000000] [--wiederholungen 20] [--db PFAD]
+#
+# Mit --db wird eine vorhandene Datenbank verwendet bzw. beim ersten Lauf dort angelegt.
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+from fingerabdruck import fingerabdruck
+
+ZIEL_MS = 50
+SEITE = 500
+
+HAENDLER = ["REWE Markt", "EDEKA Center", "Aldi Süd", "Shell Tankstelle", "Amazon Marketplace", "Stadtwerke München",
+            "Vermieter GmbH", "Arbeitgeber AG", "Deutsche Bahn", "Lidl", "dm Drogerie", "Netflix", "Spotify",
+            "Apotheke am Markt", "Bäckerei Müller", "Telekom", "Vodafone", "IKEA", "MediaMarkt", "Allianz Versicherung"]
+ZWECKE = ["Einkauf", "Lastschrift", "Kartenzahlung", "Dauerauftrag", "Gutschrift", "Überweisung", "Abo", "Rechnung"]
+
+
+def befuellen(anzahl, seed=42):
+    rnd = random.Random(seed)
+    db.init_db()
+    with db.transaction() as con:
+        con.executemany("INSERT OR IGNORE INTO konten (name) VALUES (?)", [("Tagesgeld",), ("Kreditkarte",)])
+        konten = [r["id"] for r in con.execute("SELECT id FROM konten")]
+        kategorien = [r["id"] for r in con.execute("SELECT id FROM kategorien")]
+
+        def zeilen():
+            for i in range(anzahl):
+                cent = rnd.randint(-80000, 60000) or 1
+                datum = f"{rnd.randint(2015, 2024)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+                konto = rnd.choice(konten)
+                text = f"{rnd.choice(HAENDLER)} {rnd.choice(ZWECKE)} Ref {rnd.randint(1, 10 ** 6)}"
+                yield (cent, "Einnahme" if cent > 0 else "Ausgabe", datum, rnd.choice(kategorien), konto, text, 0,
+                       fingerabdruck(datum, cent, konto, text))
+
+        con.executemany("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                   fingerabdruck)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, zeilen())
+    with db.connection() as con:
+        con.execute("ANALYZE")
+        con.execute("INSERT INTO zahlungen_fts (zahlungen_fts) VALUES ('optimize')")
+
+
+def messen(func, wiederholungen):
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        treffer = func()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return statistics.median(zeiten), max(zeiten), len(treffer)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=1000000)
+    parser.add_argument("--wiederholungen", type=int, default=20)
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = args.db or os.path.join(tmp, "bench.db")
+        if os.path.exists(db.DB_FILE):
+            db.init_db()
+        else:
+            start = time.perf_counter()
+            befuellen(args.zahlungen)
+            print(f"{args.zahlungen:,} Zahlungen angelegt in {time.perf_counter() - start:.1f} s\n")
+        with db.connection() as con:
+            konto_id = con.execute("SELECT id FROM konten WHERE name = 'Tagesgeld'").fetchone()["id"]
+            kategorie_id = con.execute("SELECT id FROM kategorien ORDER BY id LIMIT 1").fetchone()["id"]
+
+        faelle = [
+            ("Text selten", {"text": "netflix abo"}),
+            ("Text häufig", {"text": "rewe"}),
+            ("Text Präfix", {"text": "apo"}),
+            ("Text Kategorie", {"text": "lebensmittel kartenzahlung"}),
+            ("Text + Datum", {"text": "shell", "von": "2023-01-01", "bis": "2023-12-31"}),
+            ("Text + Monat", {"text": "shell", "von": "2015-01-01", "bis": "2015-01-31"}),
+            ("Text + Betrag", {"text": "amazon", "betrag_min": 5000, "betrag_max": 10000}),
+            ("Text + Konto", {"text": "bahn", "konto_id": konto_id}),
+            ("Datum", {"von": "2020-03-01", "bis": "2020-03-31"}),
+            ("Konto", {"konto_id": konto_id}),
+            ("Kategorie + Datum", {"kategorie_id": kategorie_id, "von": "2022-01-01", "bis": "2022-06-30"}),
+            ("Betrag", {"betrag_min": 79000}),
+        ]
+        print(f"{'Fall':<20}{'Median [ms]':>13}{'Max [ms]':>11}{'Treffer':>9}")
+        zu_langsam = []
+        for name, suchfilter in faelle:
+            median, maximum, treffer = messen(lambda: db.suche_zahlungen(suchfilter, SEITE), args.wiederholungen)
+            print(f"{name:<20}{median:>13.1f}{maximum:>11.1f}{treffer:>9}")
+            if median > ZIEL_MS:
+                zu_langsam.append(name)
+        db_pool.close_all()
+
+    if zu_langsam:
+        print(f"\nÜber {ZIEL_MS} ms: {', '.join(zu_langsam)}")
+        sys.exit(1)
+    print(f"\nAlle Fälle unter {ZIEL_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
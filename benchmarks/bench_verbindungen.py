@@ -0,0 +1,98 @@
+# Micro-Benchmark: Aufrufe pro Sekunde mit Connect-pro-Aufruf (alt) vs. Verbindungs-Pool (neu)
+#
+#   python benchmarks/bench_verbindungen.py [--zahlungen 50000] [--sekunden 1.0]
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+
+
+# --- Alte Variante: jede Funktion öffnet ihre eigene Verbindung ---
+def alt_connection():
+    con = sqlite3.connect(db.DB_FILE)
+    con.row_factory = sqlite3.Row
+    return con
+
+def alt_get_konten():
+    con = alt_connection()
+    rows = con.execute("SELECT id, name FROM konten ORDER BY name").fetchall()
+    con.close()
+    return rows
+
+def alt_get_zahlung_by_id(zahlung_id):
+    con = alt_connection()
+    row = con.execute("SELECT * FROM zahlungen WHERE id = ?", (zahlung_id,)).fetchone()
+    con.close()
+    return row
+
+def alt_add_zahlung(betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend):
+    con = alt_connection()
+    con.execute("""
+        INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (db.betrag_cent(betrag, typ), typ, datum, kategorie_id, konto_id, beschreibung, int(bool(wiederkehrend))))
+    con.commit()
+    con.close()
+
+
+def messen(func, sekunden):
+    anzahl = 0
+    start = time.perf_counter()
+    ende = start + sekunden
+    while True:
+        func()
+        anzahl += 1
+        jetzt = time.perf_counter()
+        if jetzt >= ende:
+            return anzahl / (jetzt - start)
+
+
+def befuellen(anzahl):
+    db.init_db()
+    with db.transaction() as con:
+        con.executemany("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ((1250 + i % 100) * (-1 if i % 3 else 1), "Ausgabe" if i % 3 else "Einnahme",
+             f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", 1 + i % 4, 1 + i % 2, f"Buchung {i}", 0)
+            for i in range(anzahl)
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=50000)
+    parser.add_argument("--sekunden", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        mitte = args.zahlungen // 2
+
+        faelle = [
+            ("get_konten", alt_get_konten, db.get_konten),
+            ("get_zahlung_by_id", lambda: alt_get_zahlung_by_id(mitte), lambda: db.get_zahlung_by_id(mitte)),
+            ("add_zahlung",
+             lambda: alt_add_zahlung(9.99, "Ausgabe", "2024-06-01", 1, 1, "Bench", False),
+             lambda: db.add_zahlung(9.99, "Ausgabe", "2024-06-01", 1, 1, "Bench", False)),
+        ]
+        print(f"{'Funktion':<22}{'alt [1/s]':>14}{'Pool [1/s]':>14}{'Faktor':>10}")
+        for name, alt, neu in faelle:
+            r_alt = messen(alt, args.sekunden)
+            r_neu = messen(neu, args.sekunden)
+            print(f"{name:<22}{r_alt:>14.0f}{r_neu:>14.0f}{r_neu / r_alt:>9.1f}x")
+        db_pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
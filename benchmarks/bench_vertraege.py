@@ -0,0 +1,77 @@
+# Verträge: Buchen fälliger Termine und Vorschau des Kontostands bei vielen Verträgen
+#
+#   python benchmarks/bench_vertraege.py [--vertraege 500] [--zahlungen 200000] [--wiederholungen 20]
+#
+# Gemessen werden das Nachbuchen aller Termine seit Vertragsbeginn in einer Transaktion,
+# das Buchen ohne fällige Termine (nur Indexzugriff) und die 12-Monats-Vorschau.
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import db
+import db_pool
+import vertraege
+from bench_suche import befuellen
+
+ZIEL_MS = 50
+
+
+def vertraege_anlegen(anzahl, seed=7):
+    rnd = random.Random(seed)
+    heute = date.today()
+    for i in range(anzahl):
+        typ = rnd.choice(["Ausgabe", "Ausgabe", "Ausgabe", "Einnahme"])
+        # Beginn in den letzten 5 Jahren (auch zum 31.); das erste Buchen holt alle Termine seitdem nach
+        beginn = vertraege.plus_monate(date(heute.year - 5, 1, rnd.choice([1, 15, 28, 31])), rnd.randint(0, 59))
+        db.add_vertrag(f"Vertrag {i}", rnd.randint(100, 200000) / 100, typ, rnd.choice([1, 1, 1, 3, 6, 12]),
+                       beginn.isoformat(), None, 1, 1)
+
+
+def messen(func, wiederholungen):
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        func()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return statistics.median(zeiten), max(zeiten)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertraege", type=int, default=500)
+    parser.add_argument("--zahlungen", type=int, default=200000)
+    parser.add_argument("--wiederholungen", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        befuellen(args.zahlungen)
+        vertraege_anlegen(args.vertraege)
+
+        start = time.perf_counter()
+        rueckstand = db.vertraege_buchen()
+        t_rueckstand = (time.perf_counter() - start) * 1000
+        nichts_faellig = messen(db.vertraege_buchen, args.wiederholungen)
+        vorschau = messen(db.get_vorschau, args.wiederholungen)
+        db_pool.close_all()
+
+    print(f"{args.vertraege} Verträge, {args.zahlungen:,} Zahlungen".replace(",", "."))
+    print(f"{'Fall':<32}{'Median [ms]':>13}{'Max [ms]':>11}")
+    print(f"{'Nachbuchen (' + str(rueckstand) + ' Termine)':<32}{t_rueckstand:>13.1f}{t_rueckstand:>11.1f}")
+    print(f"{'Buchen, nichts fällig':<32}{nichts_faellig[0]:>13.1f}{nichts_faellig[1]:>11.1f}")
+    print(f"{'Vorschau 12 Monate':<32}{vorschau[0]:>13.1f}{vorschau[1]:>11.1f}")
+    if max(nichts_faellig[0], vorschau[0]) > ZIEL_MS:
+        print(f"\nÜber {ZIEL_MS} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
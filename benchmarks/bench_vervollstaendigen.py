@@ -0,0 +1,106 @@
+# Vervollständigen der Beschreibung im Eingabeformular: Antwortzeit von beschreibungen_vorschlagen
+#
+#   python benchmarks/bench_vervollstaendigen.py [--zahlungen 1000000] [--wiederkehrend 200000] [--praefixe 2000]
+#
+# Grundlage ist die Beispiel-Buchhaltung (beispieldaten.vorlage); deren Beschreibungen sind fast alle
+# einmalig (Händler + Zweck + Referenz). Dazu kommen --wiederkehrend Zahlungen mit Beschreibungen, die
+# nach einer Zipf-Verteilung immer wieder vorkommen (wenige sehr oft, viele selten), damit auch der
+# Teilindex der häufigen Beschreibungen realistisch gefüllt ist. Gemessen werden Präfixe von 1 bis 6
+# Zeichen aus zufälligen vorhandenen Beschreibungen, wie sie beim Tippen entstehen; liegt p99 über
+# ZIEL_MS, endet das Skript mit Code 1.
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import beispieldaten
+import db
+import db_pool
+from fingerabdruck import fingerabdruck
+
+ZIEL_MS = 5
+
+ORTE = ["Berlin", "München", "Hamburg", "Köln", "Leipzig", "Dresden", "Ulm", "Essen", "Bonn", "Kiel"]
+
+
+def perzentil(werte, p):
+    return statistics.quantiles(werte, n=100, method="inclusive")[p - 1]
+
+
+def wiederkehrende(anzahl, seed=42):
+    # Zahlungen mit anzahl // 10 verschiedenen Beschreibungen, Häufigkeit ~ 1/Rang
+    rnd = random.Random(seed)
+    haendler = [h for namen, *_ in beispieldaten.KATEGORIEN.values() for h in namen]
+    namen = [f"{rnd.choice(haendler)} {rnd.choice(ORTE)} {nummer}" for nummer in range(max(1, anzahl // 10))]
+    gewichte = [1 / rang for rang in range(1, len(namen) + 1)]
+    for text in rnd.choices(namen, gewichte, k=anzahl):
+        cent = -rnd.randint(100, 20000)
+        datum = f"{rnd.randint(2015, 2024)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        yield (cent, "Ausgabe", datum, None, None, text, 0, fingerabdruck(datum, cent, None, text))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=1000000)
+    parser.add_argument("--wiederkehrend", type=int, default=200000)
+    parser.add_argument("--praefixe", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        shutil.copy(beispieldaten.vorlage(args.zahlungen), db.DB_FILE)
+        db.init_db()
+        with db.transaction() as con:
+            con.executemany("""
+                INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                       fingerabdruck)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, wiederkehrende(args.wiederkehrend))
+        with db.connection() as con:
+            con.execute("ANALYZE")
+            zahlungen = con.execute("SELECT COUNT(*) FROM zahlungen").fetchone()[0]
+            verschieden, haeufig = con.execute(
+                "SELECT COUNT(*), IFNULL(SUM(anzahl > 1), 0) FROM beschreibungen").fetchone()
+            texte = [r[0] for r in con.execute("SELECT beschreibung FROM zahlungen ORDER BY random() LIMIT ?",
+                                               (args.praefixe,))]
+
+        rnd = random.Random(1)
+        praefixe = [text[:rnd.randint(1, 6)] for text in texte]
+        db.beschreibungen_vorschlagen("a")  # aufwärmen
+        zeiten = {}
+        for praefix in praefixe:
+            start = time.perf_counter()
+            vorschlaege = db.beschreibungen_vorschlagen(praefix)
+            zeiten.setdefault(len(praefix), []).append((time.perf_counter() - start) * 1000)
+            if not vorschlaege:
+                sys.exit(f"Keine Vorschläge für {praefix!r}")
+        db_pool.close_all()
+
+    alle = [z for werte in zeiten.values() for z in werte]
+
+    def zahl(n):
+        return f"{n:,}".replace(",", ".")
+
+    print(f"{zahl(zahlungen)} Zahlungen, {zahl(verschieden)} verschiedene Beschreibungen, "
+          f"davon {zahl(haeufig)} mehrfach")
+    print(f"{'Präfix':<10}{'Anzahl':>8}{'p50 [ms]':>10}{'p99 [ms]':>10}{'max [ms]':>10}")
+    for laenge in sorted(zeiten):
+        werte = zeiten[laenge]
+        print(f"{f'{laenge} Zeichen':<10}{len(werte):>8}{statistics.median(werte):>10.2f}"
+              f"{perzentil(werte, 99):>10.2f}{max(werte):>10.2f}")
+    print(f"{'alle':<10}{len(alle):>8}{statistics.median(alle):>10.2f}{perzentil(alle, 99):>10.2f}{max(alle):>10.2f}")
+    if perzentil(alle, 99) > ZIEL_MS:
+        print(f"\np99 über {ZIEL_MS} ms")
+        sys.exit(1)
+    print(f"\np99 unter {ZIEL_MS} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Konten in Fremdwährung: Umrechnung aller Zahlungen in die Basiswährung (analyse.in_basis) und
+# die umrechnenden Auswertungen aus db.py
+#
+#   python benchmarks/bench_waehrungen.py [--zahlungen 1000000] [--wiederholungen 5]
+#
+# Grundlage ist die Beispiel-Buchhaltung (beispieldaten.vorlage); einige ihrer Konten werden per
+# SQL auf USD, GBP und CHF umgestellt (konto_waehrung_setzen lehnt das bei Konten mit Zahlungen
+# ab), dazu kommen erfundene Tageskurse 2010-2025 im EZB-Format über db.kurse_laden. Gemessen
+# wird die Umrechnung aller Zahlungen mit kaltem Kurs-Cache (Kurse frisch aus der Datenbank) und
+# zum Vergleich zeilenweise über Kurse.umrechnen; liegt der Median von in_basis über ZIEL_S,
+# endet das Skript mit Code 1.
+import argparse
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import analyse
+import beispieldaten
+import db
+import db_pool
+
+ZIEL_S = 1.0
+
+FREMD = {"Kreditkarte": "USD", "PayPal": "GBP", "Gemeinschaftskonto": "CHF"}
+MITTEL = {"USD": 1.12, "GBP": 0.86, "CHF": 1.05}
+
+
+def kursdatei(pfad, von=date(2010, 1, 1), bis=date(2025, 12, 31)):
+    # Werktage mit leicht schwankenden Kursen, neueste zuerst wie bei der EZB
+    tage = []
+    tag = von
+    while tag <= bis:
+        if tag.weekday() < 5:
+            tage.append(tag)
+        tag += timedelta(days=1)
+    with open(pfad, "w", encoding="utf-8") as f:
+        f.write("Date," + ",".join(MITTEL) + ",\n")
+        for i, tag in reversed(list(enumerate(tage))):
+            kurse = ",".join(f"{mittel * (1 + 0.08 * math.sin(i / 90 + n)):.4f}"
+                             for n, mittel in enumerate(MITTEL.values()))
+            f.write(f"{tag.isoformat()},{kurse},\n")
+    return len(tage) * len(MITTEL)
+
+
+def messen(func, wiederholungen, vorher=None):
+    zeiten = []
+    for _ in range(wiederholungen):
+        if vorher is not None:
+            vorher()
+        start = time.perf_counter()
+        ergebnis = func()
+        zeiten.append(time.perf_counter() - start)
+    return statistics.median(zeiten), ergebnis
+
+
+def kalter_cache():
+    db._kurse.pop(db.DB_FILE, None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zahlungen", type=int, default=1000000)
+    parser.add_argument("--wiederholungen", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        shutil.copy(beispieldaten.vorlage(args.zahlungen), db.DB_FILE)
+        db.init_db()
+        with db.transaction() as con:
+            con.executemany("UPDATE konten SET waehrung = ? WHERE name = ?", [(w, k) for k, w in FREMD.items()])
+        db.stammdaten_neu_laden()
+
+        anzahl_kurse = kursdatei(os.path.join(tmp, "kurse.csv"))
+        start = time.perf_counter()
+        db.kurse_laden([os.path.join(tmp, "kurse.csv")])
+        laden = time.perf_counter() - start
+
+        sp = analyse.spalten()
+        # Beträge in Kontowährung, in derselben Reihenfolge wie die Spalten (datum, id)
+        with db.connection() as con:
+            roh = np.fromiter((r[0] for r in con.execute("SELECT betrag_cent FROM zahlungen ORDER BY datum, id")),
+                              dtype=np.int64, count=len(sp))
+        fremd = int(np.isin(sp.konto, [k["id"] for k in db.get_konten() if k["waehrung"] != "EUR"]).sum())
+
+        spaltenweise, umgerechnet = messen(lambda: analyse.in_basis(roh, sp.datum, sp.konto), args.wiederholungen,
+                                           vorher=kalter_cache)
+
+        stammdaten = db.get_stammdaten()
+        kurse = db.get_kurse()
+        tage = sp.datum.astype(str).tolist()
+
+        def zeilenweise():
+            return [kurse.umrechnen(cent, stammdaten.waehrung(konto), tag)
+                    for cent, konto, tag in zip(roh.tolist(), sp.konto.tolist(), tage)]
+
+        einzeln, vergleich = messen(zeilenweise, 1, vorher=kalter_cache)
+        if vergleich != umgerechnet.tolist():
+            sys.exit("in_basis und zeilenweise Umrechnung weichen voneinander ab")
+
+        berichte = [
+            ("get_gesamtvermoegen", db.get_gesamtvermoegen),
+            ("get_salden", db.get_salden),
+            ("get_cashflow", db.get_cashflow),
+            ("get_kategorie_summen", lambda: db.get_kategorie_summen("2020-01", "2020-12")),
+            ("get_jahresverlauf", db.get_jahresverlauf),
+            ("get_vorschau", db.get_vorschau),
+        ]
+        berichtszeiten = [(name, messen(func, args.wiederholungen, vorher=kalter_cache)[0])
+                          for name, func in berichte]
+        db_pool.close_all()
+
+    def zahl(n):
+        return f"{n:,}".replace(",", ".")
+
+    print(f"{zahl(len(sp))} Zahlungen, davon {zahl(fremd)} in Fremdwährung ({', '.join(FREMD.values())}); "
+          f"{zahl(anzahl_kurse)} Kurse in {laden:.2f} s geladen")
+    print(f"{'Umrechnung':<28}{'Median [s]':>12}")
+    print(f"{'in_basis (je Währung)':<28}{spaltenweise:>12.3f}")
+    print(f"{'zeilenweise (Kurse.umrechnen)':<28}{einzeln:>12.3f}")
+    print(f"\n{'Auswertung':<28}{'Median [ms]':>12}")
+    for name, sekunden in berichtszeiten:
+        print(f"{name:<28}{sekunden * 1000:>12.2f}")
+    if spaltenweise > ZIEL_S:
+        print(f"\nUmrechnung über {ZIEL_S} s")
+        sys.exit(1)
+    print(f"\nUmrechnung unter {ZIEL_S} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# Benchmark-Suite: alle Einstiegspunkte von db.py und die Aktualisierungen der Oberfläche auf
+# deterministischen Beispieldaten, Ergebnis als JSON mit Vergleich gegen eine gespeicherte Basis
+#
+#   python benchmarks/suite.py [--groessen 10k 1m 10m] [--basis benchmarks/basis.json] [--basis-schreiben]
+#                              [--ausgabe ergebnis.json] [--nur MUSTER] [--ohne-qt]
+#
+# Je Größe wird die Vorlage aus beispieldaten.vorlage() (einmal erzeugt, danach aus dem Cache)
+# in ein temporäres Verzeichnis kopiert; Schreibfälle ändern also nie die Vorlage. Jeder Fall
+# läuft mindestens MIN_LAEUFE-mal und höchstens --wiederholungen-mal bzw. bis ZEIT_JE_FALL
+# verbraucht ist; Fälle, die den Bestand verändern (z.B. zahlungen_kategorisieren), genau
+# einmal. Vorbereitung und Aufräumen (z.B. die Zahlung, die delete_zahlung löscht) zählen nicht mit.
+#
+# Die Oberfläche läuft ohne Bildschirm (QT_QPA_PLATFORM=offscreen): gemessen wird vom Auslösen
+# (update_uebersicht, Filter, update_balance, ...) bis der DbWorker fertig ist und das
+# Ergebnis gezeichnet ist, also Abfrage im Worker-Thread, Übergabe, Model-Update und Zeichnen.
+#
+# Vergleich: ein Fall gilt als langsamer, wenn sein Median um mehr als TOLERANZ über der Basis
+# liegt und mindestens RAUSCHEN_MS mehr braucht. Dann endet das Skript mit Code 1. Die Basis
+# ist maschinenabhängig; sie wird auf dem Rechner geschrieben, auf dem auch verglichen wird.
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import beispieldaten
+import db
+import db_pool
+
+TOLERANZ = 0.25
+RAUSCHEN_MS = 0.5
+MIN_LAEUFE = 3
+ZEIT_JE_FALL = 2.0  # Sekunden
+BASIS = Path(__file__).resolve().parent / "basis.json"
+
+
+class Fall:
+    # func wird gemessen; vorher()/nachher() laufen ungemessen um jeden Lauf herum. vorher()
+    # darf Argumente für func liefern (Tupel). einmal=True für Fälle, die den Bestand ändern.
+    __slots__ = ("name", "func", "vorher", "nachher", "einmal")
+
+    def __init__(self, name, func, vorher=None, nachher=None, einmal=False):
+        self.name = name
+        self.func = func
+        self.vorher = vorher
+        self.nachher = nachher
+        self.einmal = einmal
+
+
+def messen(fall, wiederholungen):
+    zeiten = []
+    ende = time.perf_counter() + ZEIT_JE_FALL
+    while True:
+        argumente = fall.vorher() if fall.vorher else ()
+        start = time.perf_counter()
+        ergebnis = fall.func(*argumente)
+        zeiten.append((time.perf_counter() - start) * 1000)
+        if fall.nachher:
+            fall.nachher(ergebnis)
+        if fall.einmal or len(zeiten) >= wiederholungen:
+            break
+        if len(zeiten) >= MIN_LAEUFE and time.perf_counter() > ende:
+            break
+    zeiten.sort()
+    return {
+        "median_ms": round(statistics.median(zeiten), 3),
+        "p95_ms": round(zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.95))], 3),
+        "min_ms": round(zeiten[0], 3),
+        "laeufe": len(zeiten),
+    }
+
+
+# --- Fälle: db.py ---
+def db_faelle():
+    # Ids und Werte stammen aus der Vorlage und sind damit je Größe fest
+    with db.connection() as con:
+        erste, letzte = con.execute("SELECT MIN(id), MAX(id) FROM zahlungen").fetchone()
+        mitte = con.execute("SELECT id, datum FROM zahlungen WHERE id >= ? ORDER BY id LIMIT 1",
+                            ((erste + letzte) // 2,)).fetchone()
+        hundert = [r[0] for r in con.execute("SELECT id FROM zahlungen ORDER BY id DESC LIMIT 100")]
+    stammdaten = db.get_stammdaten()
+    giro = stammdaten.id("konten", "Girokonto")
+    lebensmittel = stammdaten.id("kategorien", "Lebensmittel")
+    sonstiges = stammdaten.id("kategorien", "Sonstiges")
+    jahr = {"von": "2020-01-01", "bis": "2020-12-31"}
+    zaehler = iter(range(10 ** 9))
+
+    def neue_zahlung():
+        return db.add_zahlung(12.34, "Ausgabe", "2024-06-15", lebensmittel, giro, f"Benchmark {next(zaehler)}", False)
+
+    def konto_mit_zahlungen():
+        konto_id = db.add_konto(f"Benchmark-Konto {next(zaehler)}")
+        with db.transaction() as con:
+            con.executemany("""
+                INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend)
+                VALUES (-500, 'Ausgabe', '2024-06-15', ?, ?, ?, 0)
+            """, [(lebensmittel, konto_id, f"Benchmark {i}") for i in range(100)])
+        return (konto_id,)
+
+    def alles_lesen(suchfilter=None):
+        return sum(len(block) for block in db.zahlungen_lesen(suchfilter))
+
+    def vertrag():
+        db.add_vertrag(f"Benchmark-Vertrag {next(zaehler)}", 9.99, "Ausgabe", 1, "2024-01-01", "2024-12-31",
+                       sonstiges, giro)
+        return ()
+
+    return [
+        Fall("init_db", db.init_db),
+        Fall("stammdaten_neu_laden", db.stammdaten_neu_laden),
+        Fall("get_konten", db.get_konten),
+        Fall("get_kategorien", db.get_kategorien),
+        Fall("zahlungen_lesen (erste 500)", lambda: next(db.zahlungen_lesen(blockgroesse=500, absteigend=True))),
+        Fall("get_zahlungen_seite", lambda: db.get_zahlungen_seite(500)),
+        Fall("get_zahlungen_seite (Mitte)", lambda: db.get_zahlungen_seite(500, (mitte["datum"], mitte["id"]))),
+        Fall("get_zahlungen_gefiltert (Jahr)", lambda: db.get_zahlungen_gefiltert(jahr, 500)),
+        Fall("get_zahlungen_gefiltert (Konto)", lambda: db.get_zahlungen_gefiltert({"konto_id": giro}, 500)),
+        Fall("get_zahlungen_gefiltert (Betrag)",
+             lambda: db.get_zahlungen_gefiltert({"betrag_min": 50000, "betrag_max": 100000}, 500)),
+        Fall("suche_zahlungen (häufig)", lambda: db.suche_zahlungen({"text": "rewe"}, 500)),
+        Fall("suche_zahlungen (selten)", lambda: db.suche_zahlungen({"text": "schlüsseldienst kontaktlos"}, 500)),
+        Fall("suche_zahlungen (Präfix)", lambda: db.suche_zahlungen({"text": "bäck"}, 500)),
+        Fall("zahlungen_zaehlen", db.zahlungen_zaehlen),
+        Fall("zahlungen_zaehlen (Jahr)", lambda: db.zahlungen_zaehlen(jahr)),
+        Fall("zahlungen_lesen (Jahr)", lambda: alles_lesen(jahr)),
+        Fall("zahlungen_lesen (alle)", alles_lesen, einmal=True),
+        Fall("get_uebersicht_zeile", lambda: db.get_uebersicht_zeile(mitte["id"])),
+        Fall("get_zahlung_by_id", lambda: db.get_zahlung_by_id(mitte["id"])),
+        Fall("get_gesamtvermoegen", db.get_gesamtvermoegen),
+        Fall("get_salden", db.get_salden),
+        Fall("get_cashflow", db.get_cashflow),
+        Fall("get_kategorie_summen", lambda: db.get_kategorie_summen("2020-01-01", "2020-12-31")),
+        Fall("get_jahresverlauf", db.get_jahresverlauf),
+        Fall("get_vertraege", db.get_vertraege),
+        Fall("get_vorschau", db.get_vorschau),
+        Fall("get_regeln", db.get_regeln),
+        Fall("kategorie_vorschlagen", lambda: db.kategorie_vorschlagen("REWE Markt Kartenzahlung", 12.34)),
+        Fall("beschreibungen_vorschlagen (häufig)", lambda: db.beschreibungen_vorschlagen("r")),
+        Fall("beschreibungen_vorschlagen (selten)", lambda: db.beschreibungen_vorschlagen("schlüsseldienst kon")),
+        Fall("finde_duplikat", lambda: db.finde_duplikat("x")),
+        Fall("protokoll_stand", db.protokoll_stand),
+        Fall("aenderungen_seit", lambda: db.aenderungen_seit(0)),
+        Fall("add_zahlung", neue_zahlung),
+        Fall("update_zahlung", lambda zahlung_id: db.update_zahlung(
+            zahlung_id, 23.45, "Ausgabe", "2024-06-16", sonstiges, giro, "Benchmark geändert", False),
+            vorher=lambda: (neue_zahlung(),)),
+        Fall("delete_zahlung", db.delete_zahlung, vorher=lambda: (neue_zahlung(),)),
+        Fall("zahlungen_kategorie_setzen (100)",
+             lambda: db.zahlungen_kategorie_setzen(hundert, sonstiges),
+             nachher=lambda _: db.zahlungen_kategorie_setzen(hundert, lebensmittel)),
+        Fall("zahlungen_loeschen (100)", db.zahlungen_loeschen,
+             vorher=lambda: ([neue_zahlung() for _ in range(100)],)),
+        Fall("zuruecknehmen", lambda von, bis: db.zuruecknehmen(von, bis),
+             vorher=lambda: db.protokolliert(neue_zahlung)[1:]),
+        Fall("add_konto", lambda: db.add_konto(f"Benchmark-Konto {next(zaehler)}")),
+        Fall("update_konto", lambda konto_id: db.update_konto(konto_id, f"Umbenannt {next(zaehler)}"),
+             vorher=lambda: (db.add_konto(f"Benchmark-Konto {next(zaehler)}"),)),
+        Fall("delete_konto (100 Zahlungen)", db.delete_konto, vorher=konto_mit_zahlungen),
+        Fall("add_kategorie", lambda: db.add_kategorie(f"Benchmark-Kategorie {next(zaehler)}")),
+        Fall("delete_kategorie", db.delete_kategorie,
+             vorher=lambda: (db.add_kategorie(f"Benchmark-Kategorie {next(zaehler)}"),)),
+        Fall("vertraege_buchen (12 Termine)", lambda: db.vertraege_buchen("2024-12-31"), vorher=vertrag),
+        Fall("finde_beinahe_duplikate", db.finde_beinahe_duplikate, einmal=True),
+        Fall("zahlungen_kategorisieren", db.zahlungen_kategorisieren, einmal=True),
+        Fall("pruefe_salden", db.pruefe_salden, einmal=True),
+        Fall("pruefe_monatswerte", db.pruefe_monatswerte, einmal=True),
+    ]
+
+
+# --- Fälle: Oberfläche ---
+def qt_faelle(app, window):
+    from PySide6.QtCore import QEventLoop
+
+    zustand = {"beschaeftigt": False}
+    window.db.beschaeftigt.connect(lambda b: zustand.__setitem__("beschaeftigt", b))
+
+    def warten(fertig, zeitlimit=300):
+        # Ereignisse verarbeiten, bis der Worker nichts mehr zu tun hat und fertig() zutrifft
+        ende = time.perf_counter() + zeitlimit
+        while zustand["beschaeftigt"] or not fertig():
+            app.processEvents(QEventLoop.AllEvents, 5)
+            if time.perf_counter() > ende:
+                raise TimeoutError("Oberfläche wird nicht fertig")
+            time.sleep(0.0002)
+
+    model = window.model_uebersicht
+    seite = min(model.seitengroesse, db.zahlungen_zaehlen())
+
+    def uebersicht(ausloesen):
+        def lauf():
+            ausloesen()
+            warten(lambda: model.rowCount() >= seite or model._alles_geladen)
+        return lauf
+
+    def balance():
+        window.balance_label.clear()
+        window.update_balance()
+        warten(lambda: bool(window.balance_label.text()))
+
+    window.seite("kategorien")
+    zaehler = iter(range(10 ** 9))
+
+    def kategorie_anlegen():
+        # Ersatz für das frühere update_kategorien: Liste und Auswahlfelder bekommen nur die Änderung
+        name = f"Benchmark-Kategorie {next(zaehler)}"
+        anzahl = window.list_kategorien.count()
+        window.db.ausfuehren(db.add_kategorie, name)
+        warten(lambda: window.list_kategorien.count() > anzahl)
+
+    def statistik():
+        page = window.seite_zeigen("statistik")
+        page.aktualisieren()
+        warten(lambda: True)
+
+    def vertraege():
+        page = window.seite_zeigen("vertraege")
+        page.aktualisieren()
+        warten(lambda: True)
+
+    ohne_filter = uebersicht(lambda: model.set_filter(None))
+    return [
+        Fall("qt: update_uebersicht", uebersicht(window.update_uebersicht)),
+        Fall("qt: Filter (Jahr)", uebersicht(lambda: model.set_filter({"von": "2020-01-01", "bis": "2020-12-31"})),
+             nachher=lambda _: ohne_filter()),
+        Fall("qt: Suche", uebersicht(lambda: model.set_filter({"text": "rewe"})),
+             nachher=lambda _: ohne_filter()),
+        Fall("qt: update_balance", balance),
+        Fall("qt: Kategorie anlegen", kategorie_anlegen),
+        Fall("qt: Statistik aktualisieren", statistik),
+        Fall("qt: Verträge aktualisieren", vertraege),
+    ]
+
+
+def qt_messen(faelle_filter, wiederholungen):
+    # Ergebnisse der Oberflächen-Fälle oder None, wenn PySide6 fehlt
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        return None
+    from finanzguru_main import MainWindow
+
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow()
+    window.show()
+    ergebnisse = {}
+    try:
+        faelle = qt_faelle(app, window)
+        for fall in faelle:
+            if faelle_filter(fall.name):
+                # Erster Lauf baut die Seite bzw. lädt das Fenster zum ersten Mal; nicht mitmessen
+                ergebnis = fall.func()
+                if fall.nachher:
+                    fall.nachher(ergebnis)
+                ergebnisse[fall.name] = messen(fall, wiederholungen)
+    finally:
+        window.close()
+    return ergebnisse
+
+
+# --- Ablauf ---
+def umgebung():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    try:
+        import PySide6
+        qt = PySide6.__version__
+    except ImportError:
+        qt = None
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pyside6": qt,
+        "system": f"{platform.system()} {platform.release()} {platform.machine()}",
+        "prozessor": platform.processor() or None,
+        "rechner": platform.node(),
+        "commit": commit,
+    }
+
+
+def groesse_messen(name, anzahl, args, faelle_filter):
+    vorlage = beispieldaten.vorlage(anzahl, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "finanzguru_data.db")
+        shutil.copyfile(vorlage, db.DB_FILE)
+        db.init_db()
+        db.stammdaten_neu_laden()
+        ergebnis = {"daten": {**beispieldaten.pruefsumme(), "seed": args.seed}, "faelle": {}}
+        for fall in db_faelle():
+            if faelle_filter(fall.name):
+                ergebnis["faelle"][fall.name] = messen(fall, args.wiederholungen)
+                print(f"  {name:<4} {fall.name:<40}{ergebnis['faelle'][fall.name]['median_ms']:>12.2f} ms",
+                      file=sys.stderr)
+        if not args.ohne_qt:
+            qt = qt_messen(faelle_filter, args.wiederholungen)
+            if qt is None:
+                print("  PySide6 fehlt, Oberflächen-Fälle übersprungen", file=sys.stderr)
+            else:
+                ergebnis["faelle"].update(qt)
+        db_pool.close_all()
+    return ergebnis
+
+
+def vergleichen(ergebnis, basis):
+    # Liefert die Liste der langsameren Fälle und druckt die Gegenüberstellung
+    langsamer = []
+    print(f"\n{'Größe':<6}{'Fall':<42}{'Basis [ms]':>12}{'Jetzt [ms]':>12}{'Faktor':>9}")
+    for groesse, neu in ergebnis["groessen"].items():
+        alt = basis["groessen"].get(groesse)
+        if alt is None:
+            print(f"{groesse:<6}(nicht in der Basis)")
+            continue
+        if alt["daten"] != neu["daten"]:
+            print(f"{groesse:<6}andere Daten als die Basis ({alt['daten']} gegen {neu['daten']}), nicht vergleichbar")
+            continue
+        for fall, werte in neu["faelle"].items():
+            vorher = alt["faelle"].get(fall)
+            jetzt = werte["median_ms"]
+            if vorher is None:
+                print(f"{groesse:<6}{fall:<42}{'-':>12}{jetzt:>12.2f}")
+                continue
+            vorher = vorher["median_ms"]
+            faktor = jetzt / vorher if vorher else float("inf")
+            markierung = ""
+            if jetzt > vorher * (1 + TOLERANZ) and jetzt - vorher >= RAUSCHEN_MS:
+                langsamer.append(f"{groesse} {fall}")
+                markierung = "  langsamer"
+            elif jetzt < vorher / (1 + TOLERANZ) and vorher - jetzt >= RAUSCHEN_MS:
+                markierung = "  schneller"
+            print(f"{groesse:<6}{fall:<42}{vorher:>12.2f}{jetzt:>12.2f}{faktor:>8.2f}x{markierung}")
+    if basis.get("umgebung", {}).get("rechner") != ergebnis["umgebung"]["rechner"]:
+        print("\nHinweis: Basis stammt von einem anderen Rechner")
+    return langsamer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark-Suite für db.py und die Oberfläche")
+    parser.add_argument("--groessen", nargs="+", choices=beispieldaten.GROESSEN, default=["10k"])
+    parser.add_argument("--wiederholungen", type=int, default=20, help="Höchstens so viele Läufe je Fall")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--nur", action="append", help="Nur Fälle, deren Name auf dieses Muster passt (fnmatch)")
+    parser.add_argument("--ohne-qt", action="store_true", help="Oberflächen-Fälle auslassen")
+    parser.add_argument("--ausgabe", help="Ergebnis als JSON in diese Datei schreiben")
+    parser.add_argument("--basis", default=str(BASIS), help="Basis zum Vergleich (Standard: %(default)s)")
+    parser.add_argument("--basis-schreiben", action="store_true", help="Ergebnis als neue Basis speichern")
+    args = parser.parse_args()
+
+    def faelle_filter(name):
+        return not args.nur or any(fnmatch.fnmatch(name, muster) for muster in args.nur)
+
+    ergebnis = {
+        "version": 1,
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "umgebung": umgebung(),
+        "groessen": {},
+    }
+    for name in args.groessen:
+        ergebnis["groessen"][name] = groesse_messen(name, beispieldaten.GROESSEN[name], args, faelle_filter)
+
+    text = json.dumps(ergebnis, indent=2, ensure_ascii=False)
+    if args.ausgabe:
+        Path(args.ausgabe).write_text(text + "\n", encoding="utf-8")
+    if args.basis_schreiben:
+        Path(args.basis).write_text(text + "\n", encoding="utf-8")
+        print(f"Basis gespeichert: {args.basis}")
+        return
+    if not os.path.exists(args.basis):
+        print(text)
+        print(f"\nKeine Basis unter {args.basis} (mit --basis-schreiben anlegen)")
+        return
+    langsamer = vergleichen(ergebnis, json.loads(Path(args.basis).read_text(encoding="utf-8")))
+    if langsamer:
+        print(f"\nMehr als {TOLERANZ:.0%} langsamer als die Basis: {', '.join(langsamer)}")
+        sys.exit(1)
+    print(f"\nKein Fall mehr als {TOLERANZ:.0%} langsamer als die Basis")
+
+
+if __name__ == "__main__":
+    main()
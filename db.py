@@ -1,16 +1,36 @@
+import calendar
+import diagnose
+import heapq
+import json
+import os
+import re
 import sqlite3
+from contextlib import contextmanager
+from datetime import date, timedelta
+from difflib import SequenceMatcher
 from pathlib import Path
+from db_pool import get_pool
+from fingerabdruck import fingerabdruck, normalisiere_beschreibung, bucket
+from money import Money
+from kategorisierung import Regelwerk, pruefe_muster
+import vertraege
+from stammdaten import Stammdaten
+from waehrungen import BASIS, Kurse, WaehrungFehler, kurse_lesen, pruefe_code
 
-DB_FILE = "finanzguru_data.db"
+# Standard im Arbeitsverzeichnis; abweichend per Umgebungsvariable oder --db der Programme
+DB_FILE = os.environ.get("FINANZGURU_DB", "finanzguru_data.db")
 
-def get_connection():
-    con = sqlite3.connect(DB_FILE)
-    con.row_factory = sqlite3.Row
-    return con
+# Verbindungen kommen aus einem langlebigen Pool (WAL, Statement-Cache, siehe db_pool.py)
+def connection():
+    return get_pool(DB_FILE).connection()
 
-def init_db():
-    con = get_connection()
-    cur = con.cursor()
+def transaction():
+    return get_pool(DB_FILE).transaction()
+
+# --- Schema-Migrationen ---
+# Jede Migration hebt die Datenbank um genau eine Version an (PRAGMA user_version).
+# Neue Schemaänderungen werden nur hinten an MIGRATIONEN angehängt.
+def _migration_basis(cur):
     # Konten
     cur.execute("""
     CREATE TABLE IF NOT EXISTS konten (
@@ -40,7 +60,6 @@ def init_db():
         FOREIGN KEY (konto_id) REFERENCES konten(id)
     )
     """)
-    con.commit()
     # Standard-Konten
     cur.execute("INSERT OR IGNORE INTO konten (name) VALUES (?)", ("Girokonto",))
     cur.execute("INSERT OR IGNORE INTO konten (name) VALUES (?)", ("Bargeld",))
@@ -49,128 +68,1928 @@ def init_db():
     cur.execute("INSERT OR IGNORE INTO kategorien (name) VALUES (?)", ("Lebensmittel",))
     cur.execute("INSERT OR IGNORE INTO kategorien (name) VALUES (?)", ("Gehalt",))
     cur.execute("INSERT OR IGNORE INTO kategorien (name) VALUES (?)", ("Sonstiges",))
-    con.commit()
-    con.close()
+
+def _migration_salden(cur):
+    # Salden je Konto (konto_id 0 = ohne Konto), per Trigger bei jeder Änderung an zahlungen gepflegt
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS salden (
+        konto_id INTEGER PRIMARY KEY,
+        saldo REAL NOT NULL DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS zahlungen_salden_insert AFTER INSERT ON zahlungen
+    BEGIN
+        INSERT INTO salden (konto_id, saldo)
+        VALUES (IFNULL(NEW.konto_id, 0), CASE WHEN NEW.typ = 'Einnahme' THEN NEW.betrag ELSE -NEW.betrag END)
+        ON CONFLICT (konto_id) DO UPDATE SET saldo = saldo + excluded.saldo;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS zahlungen_salden_delete AFTER DELETE ON zahlungen
+    BEGIN
+        UPDATE salden
+        SET saldo = saldo - CASE WHEN OLD.typ = 'Einnahme' THEN OLD.betrag ELSE -OLD.betrag END
+        WHERE konto_id = IFNULL(OLD.konto_id, 0);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER IF NOT EXISTS zahlungen_salden_update AFTER UPDATE OF betrag, typ, konto_id ON zahlungen
+    BEGIN
+        UPDATE salden
+        SET saldo = saldo - CASE WHEN OLD.typ = 'Einnahme' THEN OLD.betrag ELSE -OLD.betrag END
+        WHERE konto_id = IFNULL(OLD.konto_id, 0);
+        INSERT INTO salden (konto_id, saldo)
+        VALUES (IFNULL(NEW.konto_id, 0), CASE WHEN NEW.typ = 'Einnahme' THEN NEW.betrag ELSE -NEW.betrag END)
+        ON CONFLICT (konto_id) DO UPDATE SET saldo = saldo + excluded.saldo;
+    END
+    """)
+    cur.execute("DELETE FROM salden")
+    cur.execute("""
+        INSERT INTO salden (konto_id, saldo)
+        SELECT IFNULL(konto_id, 0), SUM(CASE WHEN typ='Einnahme' THEN betrag ELSE -betrag END)
+        FROM zahlungen
+        GROUP BY IFNULL(konto_id, 0)
+    """)
+
+def _migration_indizes(cur):
+    # Übersicht (ORDER BY datum DESC, id DESC) sowie delete_konto/delete_kategorie
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_zahlungen_datum_id ON zahlungen (datum, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_zahlungen_konto_datum ON zahlungen (konto_id, datum)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_zahlungen_kategorie_datum ON zahlungen (kategorie_id, datum)")
+
+def _migration_cent(cur):
+    # betrag REAL -> betrag_cent INTEGER mit Vorzeichen (Einnahme > 0, Ausgabe < 0).
+    # Tabelle wird neu aufgebaut; Trigger und Indizes entstehen dabei neu.
+    cur.execute("""
+    CREATE TABLE zahlungen_neu (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        betrag_cent INTEGER NOT NULL,
+        typ TEXT NOT NULL,
+        datum TEXT NOT NULL,
+        kategorie_id INTEGER,
+        konto_id INTEGER,
+        beschreibung TEXT,
+        wiederkehrend INTEGER,
+        FOREIGN KEY (kategorie_id) REFERENCES kategorien(id),
+        FOREIGN KEY (konto_id) REFERENCES konten(id)
+    )
+    """)
+    cur.execute("""
+        INSERT INTO zahlungen_neu (id, betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend)
+        SELECT id,
+               CAST(ROUND(betrag * 100) AS INTEGER) * (CASE WHEN typ='Einnahme' THEN 1 ELSE -1 END),
+               typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend
+        FROM zahlungen
+    """)
+    cur.execute("DROP TABLE zahlungen")
+    cur.execute("ALTER TABLE zahlungen_neu RENAME TO zahlungen")
+    # Indizes decken betrag_cent mit ab, damit Summen je Konto/Kategorie ohne Tabellenzugriff laufen
+    cur.execute("CREATE INDEX idx_zahlungen_datum_id ON zahlungen (datum, id)")
+    cur.execute("CREATE INDEX idx_zahlungen_konto_datum ON zahlungen (konto_id, datum, betrag_cent)")
+    cur.execute("CREATE INDEX idx_zahlungen_kategorie_datum ON zahlungen (kategorie_id, datum, betrag_cent)")
+
+    cur.execute("DROP TABLE salden")
+    cur.execute("""
+    CREATE TABLE salden (
+        konto_id INTEGER PRIMARY KEY,
+        saldo_cent INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_salden_insert AFTER INSERT ON zahlungen
+    BEGIN
+        INSERT INTO salden (konto_id, saldo_cent) VALUES (IFNULL(NEW.konto_id, 0), NEW.betrag_cent)
+        ON CONFLICT (konto_id) DO UPDATE SET saldo_cent = saldo_cent + excluded.saldo_cent;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_salden_delete AFTER DELETE ON zahlungen
+    BEGIN
+        UPDATE salden SET saldo_cent = saldo_cent - OLD.betrag_cent WHERE konto_id = IFNULL(OLD.konto_id, 0);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_salden_update AFTER UPDATE OF betrag_cent, konto_id ON zahlungen
+    BEGIN
+        UPDATE salden SET saldo_cent = saldo_cent - OLD.betrag_cent WHERE konto_id = IFNULL(OLD.konto_id, 0);
+        INSERT INTO salden (konto_id, saldo_cent) VALUES (IFNULL(NEW.konto_id, 0), NEW.betrag_cent)
+        ON CONFLICT (konto_id) DO UPDATE SET saldo_cent = saldo_cent + excluded.saldo_cent;
+    END
+    """)
+    _salden_neu_berechnen(cur)
+
+def _migration_fingerabdruck(cur):
+    # Fingerabdruck aus Datum, Betrag, Konto und normalisierter Beschreibung für Duplikatprüfungen
+    cur.execute("ALTER TABLE zahlungen ADD COLUMN fingerabdruck TEXT")
+    rows = cur.execute("SELECT id, datum, betrag_cent, konto_id, beschreibung FROM zahlungen").fetchall()
+    cur.executemany(
+        "UPDATE zahlungen SET fingerabdruck = ? WHERE id = ?",
+        ((fingerabdruck(r["datum"], r["betrag_cent"], r["konto_id"], r["beschreibung"]), r["id"]) for r in rows)
+    )
+    cur.execute("CREATE INDEX idx_zahlungen_fingerabdruck ON zahlungen (fingerabdruck, datum)")
+
+def _migration_volltext(cur):
+    # FTS5-Index über Beschreibung, Kategorie- und Kontoname (rowid = zahlungen.id).
+    # Namen stehen nicht in zahlungen, daher eine eigene FTS-Tabelle, die Trigger mitführen.
+    cur.execute("""
+    CREATE VIRTUAL TABLE zahlungen_fts USING fts5(
+        beschreibung, kategorie, konto,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """)
+    cur.execute("""
+        INSERT INTO zahlungen_fts (rowid, beschreibung, kategorie, konto)
+        SELECT z.id, z.beschreibung, k.name, ko.name
+        FROM zahlungen z
+        LEFT JOIN kategorien k ON z.kategorie_id = k.id
+        LEFT JOIN konten ko ON z.konto_id = ko.id
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_fts_insert AFTER INSERT ON zahlungen
+    BEGIN
+        INSERT INTO zahlungen_fts (rowid, beschreibung, kategorie, konto) VALUES (
+            NEW.id, NEW.beschreibung,
+            (SELECT name FROM kategorien WHERE id = NEW.kategorie_id),
+            (SELECT name FROM konten WHERE id = NEW.konto_id)
+        );
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_fts_delete AFTER DELETE ON zahlungen
+    BEGIN
+        DELETE FROM zahlungen_fts WHERE rowid = OLD.id;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_fts_update AFTER UPDATE OF beschreibung, kategorie_id, konto_id ON zahlungen
+    BEGIN
+        UPDATE zahlungen_fts SET
+            beschreibung = NEW.beschreibung,
+            kategorie = (SELECT name FROM kategorien WHERE id = NEW.kategorie_id),
+            konto = (SELECT name FROM konten WHERE id = NEW.konto_id)
+        WHERE rowid = NEW.id;
+    END
+    """)
+    # Umbenennen: nur die betroffenen Zahlungen (über idx_zahlungen_*_datum) neu indizieren
+    cur.execute("""
+    CREATE TRIGGER kategorien_fts_update AFTER UPDATE OF name ON kategorien
+    BEGIN
+        UPDATE zahlungen_fts SET kategorie = NEW.name
+        WHERE rowid IN (SELECT id FROM zahlungen WHERE kategorie_id = NEW.id);
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER konten_fts_update AFTER UPDATE OF name ON konten
+    BEGIN
+        UPDATE zahlungen_fts SET konto = NEW.name
+        WHERE rowid IN (SELECT id FROM zahlungen WHERE konto_id = NEW.id);
+    END
+    """)
+    # Filter der Übersicht: id gehört in die Indizes, damit Konto-/Kategoriefilter in der Reihenfolge
+    # (datum, id) ohne Sortierung liefern; Betragsfilter werden direkt auf dem Index geprüft.
+    cur.execute("DROP INDEX idx_zahlungen_datum_id")
+    cur.execute("CREATE INDEX idx_zahlungen_datum_id ON zahlungen (datum, id, betrag_cent)")
+    cur.execute("DROP INDEX idx_zahlungen_konto_datum")
+    cur.execute("CREATE INDEX idx_zahlungen_konto_datum ON zahlungen (konto_id, datum, id, betrag_cent)")
+    cur.execute("DROP INDEX idx_zahlungen_kategorie_datum")
+    cur.execute("CREATE INDEX idx_zahlungen_kategorie_datum ON zahlungen (kategorie_id, datum, id, betrag_cent)")
+
+def _migration_monatswerte(cur):
+    # Summen und Anzahl je Monat x Kategorie x Konto x Typ für die Statistik (0 = ohne Kategorie/Konto).
+    # Trigger pflegen die Tabelle wie salden; leere Gruppen werden entfernt.
+    cur.execute("""
+    CREATE TABLE monatswerte (
+        monat TEXT NOT NULL,
+        kategorie_id INTEGER NOT NULL,
+        konto_id INTEGER NOT NULL,
+        typ TEXT NOT NULL,
+        summe_cent INTEGER NOT NULL DEFAULT 0,
+        anzahl INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (monat, kategorie_id, konto_id, typ)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_monatswerte_insert AFTER INSERT ON zahlungen
+    BEGIN
+        INSERT INTO monatswerte (monat, kategorie_id, konto_id, typ, summe_cent, anzahl)
+        VALUES (substr(NEW.datum, 1, 7), IFNULL(NEW.kategorie_id, 0), IFNULL(NEW.konto_id, 0), NEW.typ,
+                NEW.betrag_cent, 1)
+        ON CONFLICT (monat, kategorie_id, konto_id, typ) DO UPDATE
+        SET summe_cent = summe_cent + excluded.summe_cent, anzahl = anzahl + 1;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_monatswerte_delete AFTER DELETE ON zahlungen
+    BEGIN
+        UPDATE monatswerte SET summe_cent = summe_cent - OLD.betrag_cent, anzahl = anzahl - 1
+        WHERE monat = substr(OLD.datum, 1, 7) AND kategorie_id = IFNULL(OLD.kategorie_id, 0)
+          AND konto_id = IFNULL(OLD.konto_id, 0) AND typ = OLD.typ;
+        DELETE FROM monatswerte
+        WHERE monat = substr(OLD.datum, 1, 7) AND kategorie_id = IFNULL(OLD.kategorie_id, 0)
+          AND konto_id = IFNULL(OLD.konto_id, 0) AND typ = OLD.typ AND anzahl = 0;
+    END
+    """)
+    cur.execute("""
+    CREATE TRIGGER zahlungen_monatswerte_update
+    AFTER UPDATE OF betrag_cent, typ, datum, kategorie_id, konto_id ON zahlungen
+    BEGIN
+        UPDATE monatswerte SET summe_cent = summe_cent - OLD.betrag_cent, anzahl = anzahl - 1
+        WHERE monat = substr(OLD.datum, 1, 7) AND kategorie_id = IFNULL(OLD.kategorie_id, 0)
+          AND konto_id = IFNULL(OLD.konto_id, 0) AND typ = OLD.typ;
+        DELETE FROM monatswerte
+        WHERE monat = substr(OLD.datum, 1, 7) AND kategorie_id = IFNULL(OLD.kategorie_id, 0)
+          AND konto_id = IFNULL(OLD.konto_id, 0) AND typ = OLD.typ AND anzahl = 0;
+        INSERT INTO monatswerte (monat, kategorie_id, konto_id, typ, summe_cent, anzahl)
+        VALUES (substr(NEW.datum, 1, 7), IFNULL(NEW.kategorie_id, 0), IFNULL(NEW.konto_id, 0), NEW.typ,
+                NEW.betrag_cent, 1)
+        ON CONFLICT (monat, kategorie_id, konto_id, typ) DO UPDATE
+        SET summe_cent = summe_cent + excluded.summe_cent, anzahl = anzahl + 1;
+    END
+    """)
+    cur.execute("""
+        INSERT INTO monatswerte (monat, kategorie_id, konto_id, typ, summe_cent, anzahl)
+        SELECT substr(datum, 1, 7), IFNULL(kategorie_id, 0), IFNULL(konto_id, 0), typ, SUM(betrag_cent), COUNT(*)
+        FROM zahlungen
+        GROUP BY 1, 2, 3, 4
+    """)
+
+def _migration_vertraege(cur):
+    # Wiederkehrende Verträge. naechste_faelligkeit ist NULL, sobald ein Vertrag ausgelaufen ist;
+    # der Teilindex enthält nur laufende Verträge, die Buchung liest damit nur tatsächlich fällige.
+    cur.execute("""
+    CREATE TABLE vertraege (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        betrag_cent INTEGER NOT NULL,
+        typ TEXT NOT NULL,
+        kategorie_id INTEGER,
+        konto_id INTEGER,
+        rhythmus_monate INTEGER NOT NULL DEFAULT 1,
+        beginn TEXT NOT NULL,
+        ende TEXT,
+        naechste_faelligkeit TEXT,
+        FOREIGN KEY (kategorie_id) REFERENCES kategorien(id),
+        FOREIGN KEY (konto_id) REFERENCES konten(id)
+    )
+    """)
+    cur.execute("""
+        CREATE INDEX idx_vertraege_faelligkeit ON vertraege (naechste_faelligkeit)
+        WHERE naechste_faelligkeit IS NOT NULL
+    """)
+    # Gebuchte Zahlungen zeigen auf ihren Vertrag
+    cur.execute("ALTER TABLE zahlungen ADD COLUMN vertrag_id INTEGER REFERENCES vertraege(id)")
+    cur.execute("CREATE INDEX idx_zahlungen_vertrag ON zahlungen (vertrag_id, datum) WHERE vertrag_id IS NOT NULL")
+
+def _migration_regeln(cur):
+    # Regeln für die automatische Kategorisierung (siehe kategorisierung.py).
+    # betrag_min/betrag_max in Cent ohne Vorzeichen; kleinere prioritaet gewinnt.
+    cur.execute("""
+    CREATE TABLE regeln (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        art TEXT NOT NULL DEFAULT 'text',
+        muster TEXT NOT NULL,
+        kategorie_id INTEGER NOT NULL,
+        betrag_min INTEGER,
+        betrag_max INTEGER,
+        konto_id INTEGER,
+        prioritaet INTEGER NOT NULL DEFAULT 100,
+        FOREIGN KEY (kategorie_id) REFERENCES kategorien(id),
+        FOREIGN KEY (konto_id) REFERENCES konten(id)
+    )
+    """)
+
+# Tabellen mit eigenen Daten; salden, monatswerte und zahlungen_fts leiten Trigger daraus ab
+PROTOKOLL_TABELLEN = ("konten", "kategorien", "vertraege", "regeln", "zahlungen")
+
+def _protokoll_trigger(cur, tabelle):
+    # Schreibt jede Änderung an tabelle mit Vorher- und Nachher-Bild (JSON der ganzen Zeile) ins
+    # Protokoll. Die Spaltenliste steckt im Trigger: Migrationen, die Spalten einer der
+    # PROTOKOLL_TABELLEN ändern, rufen diese Funktion danach erneut auf.
+    spalten = [r[1] for r in cur.execute(f"PRAGMA table_info({tabelle})")]
+
+    def bild(zeile):
+        return "json_object(" + ", ".join(f"'{s}', {zeile}.{s}" for s in spalten) + ")"
+
+    for art in ("insert", "update", "delete"):
+        cur.execute(f"DROP TRIGGER IF EXISTS {tabelle}_protokoll_{art}")
+    cur.execute(f"""
+    CREATE TRIGGER {tabelle}_protokoll_insert AFTER INSERT ON {tabelle}
+    BEGIN
+        INSERT INTO protokoll (tabelle, zeilen_id, nachher) VALUES ('{tabelle}', NEW.id, {bild("NEW")});
+    END
+    """)
+    # Updates ohne tatsächliche Änderung (z.B. SET x = x) erzeugen keinen Eintrag
+    cur.execute(f"""
+    CREATE TRIGGER {tabelle}_protokoll_update AFTER UPDATE ON {tabelle}
+    WHEN {" OR ".join(f"OLD.{s} IS NOT NEW.{s}" for s in spalten)}
+    BEGIN
+        INSERT INTO protokoll (tabelle, zeilen_id, vorher, nachher)
+        VALUES ('{tabelle}', NEW.id, {bild("OLD")}, {bild("NEW")});
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER {tabelle}_protokoll_delete AFTER DELETE ON {tabelle}
+    BEGIN
+        INSERT INTO protokoll (tabelle, zeilen_id, vorher) VALUES ('{tabelle}', OLD.id, {bild("OLD")});
+    END
+    """)
+
+def _migration_protokoll(cur):
+    # Änderungsprotokoll, nur angehängt: Grundlage für Rückgängig/Wiederholen und den Änderungsfeed.
+    # vorher ist NULL bei neuen Zeilen, nachher bei gelöschten; seq steigt streng monoton.
+    cur.execute("""
+    CREATE TABLE protokoll (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        zeit TEXT NOT NULL DEFAULT (datetime('now')),
+        tabelle TEXT NOT NULL,
+        zeilen_id INTEGER NOT NULL,
+        vorher TEXT,
+        nachher TEXT
+    )
+    """)
+    for tabelle in PROTOKOLL_TABELLEN:
+        _protokoll_trigger(cur, tabelle)
+
+def _migration_archive(cur):
+    # Archivierte Jahre (eine Datei je Jahr, siehe archivieren) und welche Konten/Kategorien
+    # darin vorkommen: so prüfen Schreibzugriffe und Löschen ohne die Archive anzuhängen.
+    cur.execute("""
+    CREATE TABLE archive (
+        jahr INTEGER PRIMARY KEY,
+        anzahl INTEGER NOT NULL,
+        erstellt TEXT NOT NULL DEFAULT (datetime('now'))
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE archiv_verweise (
+        art TEXT NOT NULL,
+        eintrag_id INTEGER NOT NULL,
+        jahr INTEGER NOT NULL,
+        PRIMARY KEY (art, eintrag_id, jahr)
+    ) WITHOUT ROWID
+    """)
+
+def _schluessel(spalte, trim="trim"):
+    # Vergleichsform einer Beschreibung für Vorschläge: ohne Rand-Leerzeichen, klein geschrieben.
+    # lower() in SQLite kennt nur ASCII, die Umlaute werden vorher ersetzt.
+    return f"lower(replace(replace(replace({trim}({spalte}), 'Ä', 'ä'), 'Ö', 'ö'), 'Ü', 'ü'))"
+
+# Zählt eine (Gruppe von) Zahlung(en) zu einer Beschreibung hinzu; die Werte der neuesten Zahlung
+# (nach Datum, bei Gleichstand die zuletzt eingetragene) bleiben als "zuletzt gesehen" stehen.
+# Im SET beziehen sich die Spalten ohne excluded noch auf die bisherige Zeile.
+_BESCHREIBUNG_ZUZAEHLEN = """
+    INSERT INTO beschreibungen (schluessel, beschreibung, anzahl, zuletzt, zahlung_id, betrag_cent, typ,
+                                kategorie_id, konto_id)
+    {quelle}
+    ON CONFLICT (schluessel) DO UPDATE SET
+        anzahl = anzahl + excluded.anzahl,
+        beschreibung = CASE WHEN excluded.zuletzt >= zuletzt THEN excluded.beschreibung ELSE beschreibung END,
+        zahlung_id = CASE WHEN excluded.zuletzt >= zuletzt THEN excluded.zahlung_id ELSE zahlung_id END,
+        betrag_cent = CASE WHEN excluded.zuletzt >= zuletzt THEN excluded.betrag_cent ELSE betrag_cent END,
+        typ = CASE WHEN excluded.zuletzt >= zuletzt THEN excluded.typ ELSE typ END,
+        kategorie_id = CASE WHEN excluded.zuletzt >= zuletzt THEN excluded.kategorie_id ELSE kategorie_id END,
+        konto_id = CASE WHEN excluded.zuletzt >= zuletzt THEN excluded.konto_id ELSE konto_id END,
+        zuletzt = MAX(zuletzt, excluded.zuletzt)
+"""
+
+# Je Beschreibung einer Quelle ({s}.zahlungen): Anzahl und die Spalten der neuesten Zahlung
+# (SQLite liefert die übrigen Spalten aus der Zeile von MAX(datum))
+_BESCHREIBUNGEN_SQL = f"""
+    SELECT {_schluessel("beschreibung")} AS schluessel, trim(beschreibung), COUNT(*) AS anzahl, MAX(datum) AS zuletzt,
+           id AS zahlung_id, betrag_cent, typ, kategorie_id, konto_id
+    FROM {{s}}.zahlungen
+    WHERE trim(beschreibung) != ''
+    GROUP BY 1
+"""
+
+def _migration_beschreibungen(cur):
+    # Eine Zeile je unterschiedlicher Beschreibung für das Vervollständigen im Eingabeformular:
+    # Häufigkeit und die Werte der zuletzt gesehenen Zahlung zum Vorbelegen. Gepflegt per Trigger
+    # wie monatswerte; wird die zuletzt gesehene Zahlung gelöscht, bleiben ihre Werte stehen, bis
+    # die Beschreibung wieder vorkommt. Präfixsuche über den Primärschlüssel; der Teilindex enthält
+    # nur mehrfach vorkommende Beschreibungen in Häufigkeitsreihenfolge (siehe beschreibungen_vorschlagen).
+    cur.execute("""
+    CREATE TABLE beschreibungen (
+        schluessel TEXT PRIMARY KEY,
+        beschreibung TEXT NOT NULL,
+        anzahl INTEGER NOT NULL,
+        zuletzt TEXT NOT NULL,
+        zahlung_id INTEGER,
+        betrag_cent INTEGER,
+        typ TEXT,
+        kategorie_id INTEGER,
+        konto_id INTEGER
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE INDEX idx_beschreibungen_haeufig ON beschreibungen(anzahl DESC, schluessel) WHERE anzahl > 1
+    """)
+    zuzaehlen = _BESCHREIBUNG_ZUZAEHLEN.format(quelle=f"""
+        SELECT {_schluessel("NEW.beschreibung")}, trim(NEW.beschreibung), 1, NEW.datum, NEW.id, NEW.betrag_cent,
+               NEW.typ, NEW.kategorie_id, NEW.konto_id
+        WHERE trim(NEW.beschreibung) != ''""")
+    abziehen = f"""
+        UPDATE beschreibungen SET anzahl = anzahl - 1 WHERE schluessel = {_schluessel("OLD.beschreibung")};
+        DELETE FROM beschreibungen WHERE schluessel = {_schluessel("OLD.beschreibung")} AND anzahl <= 0;
+    """
+    cur.execute(f"""
+    CREATE TRIGGER zahlungen_beschreibungen_insert AFTER INSERT ON zahlungen
+    BEGIN
+        {zuzaehlen};
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER zahlungen_beschreibungen_delete AFTER DELETE ON zahlungen
+    BEGIN
+        {abziehen}
+    END
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER zahlungen_beschreibungen_update
+    AFTER UPDATE OF beschreibung, betrag_cent, typ, datum, kategorie_id, konto_id ON zahlungen
+    BEGIN
+        {abziehen}
+        {zuzaehlen};
+    END
+    """)
+    cur.execute(_BESCHREIBUNG_ZUZAEHLEN.format(quelle=_BESCHREIBUNGEN_SQL.format(s="main") + " ORDER BY 1"))
+
+_WAEHRUNG_GETRENNT = "Zahlungen können nur zwischen Konten gleicher Währung verschoben werden"
+
+def _migration_waehrungen(cur):
+    # Währung je Konto (Zahlungen haben die ihres Kontos) und Wechselkurse je Tag in
+    # Fremdwährung je 1 EUR (siehe waehrungen.py). Zahlungen zwischen Konten verschiedener
+    # Währung zu verschieben würde ihre Beträge umdeuten; das verhindert ein Trigger für alle
+    # Wege (Bearbeiten, Sammelbearbeitung, Rückgängig, direktes SQL).
+    cur.execute(f"ALTER TABLE konten ADD COLUMN waehrung TEXT NOT NULL DEFAULT '{BASIS}'")
+    _protokoll_trigger(cur, "konten")
+    cur.execute("""
+    CREATE TABLE kurse (
+        waehrung TEXT NOT NULL,
+        datum TEXT NOT NULL,
+        kurs REAL NOT NULL,
+        PRIMARY KEY (waehrung, datum)
+    ) WITHOUT ROWID
+    """)
+    cur.execute(f"""
+    CREATE TRIGGER zahlungen_waehrung_pruefen BEFORE UPDATE OF konto_id ON zahlungen
+    WHEN IFNULL((SELECT waehrung FROM konten WHERE id = OLD.konto_id), '{BASIS}')
+         != IFNULL((SELECT waehrung FROM konten WHERE id = NEW.konto_id), '{BASIS}')
+    BEGIN
+        SELECT RAISE(ABORT, '{_WAEHRUNG_GETRENNT}');
+    END
+    """)
+
+MIGRATIONEN = [
+    _migration_basis,
+    _migration_salden,
+    _migration_indizes,
+    _migration_cent,
+    _migration_fingerabdruck,
+    _migration_volltext,
+    _migration_monatswerte,
+    _migration_vertraege,
+    _migration_regeln,
+    _migration_protokoll,
+    _migration_archive,
+    _migration_beschreibungen,
+    _migration_waehrungen,
+]
+
+def schema_version(con):
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+def init_db():
+    # Normalfall beim Start: Schema aktuell, nur lesen statt Schreibtransaktion
+    with connection() as con:
+        if schema_version(con) >= len(MIGRATIONEN):
+            return
+    with transaction() as con:
+        version = schema_version(con)
+        for nummer, migration in enumerate(MIGRATIONEN[version:], start=version + 1):
+            migration(con.cursor())
+            con.execute(f"PRAGMA user_version = {nummer}")
+
+# --- Stammdaten-Cache ---
+# Konten und Kategorien je Datenbankdatei im Speicher (siehe stammdaten.py). Die Funktionen
+# unten tragen ihre Änderungen selbst ein; wer konten/kategorien direkt per SQL schreibt
+# (z.B. der Import), ruft danach stammdaten_neu_laden() auf.
+_stammdaten = {}
+_stammdaten_abonnenten = []
+
+def stammdaten_abonnieren(callback):
+    # callback(Aenderung) läuft in dem Thread, der die Änderung vorgenommen hat
+    _stammdaten_abonnenten.append(callback)
+
+def stammdaten_abbestellen(callback):
+    if callback in _stammdaten_abonnenten:
+        _stammdaten_abonnenten.remove(callback)
+
+def _stammdaten_melden(aenderung):
+    if aenderung is not None:
+        for callback in list(_stammdaten_abonnenten):
+            callback(aenderung)
+
+def get_stammdaten(laden=True):
+    # laden=False: nur das (evtl. noch leere) Objekt, ohne Datenbankzugriff
+    stammdaten = _stammdaten.setdefault(DB_FILE, Stammdaten())
+    if laden and not stammdaten.geladen:
+        stammdaten_neu_laden()
+    return stammdaten
+
+def stammdaten_neu_laden():
+    stammdaten = _stammdaten.setdefault(DB_FILE, Stammdaten())
+    with connection() as con:
+        konten = con.execute("SELECT id, name, waehrung FROM konten").fetchall()
+        kategorien = con.execute("SELECT id, name FROM kategorien").fetchall()
+    stammdaten.waehrungen_setzen({k["id"]: k["waehrung"] for k in konten})
+    _stammdaten_melden(stammdaten.setzen("konten", konten))
+    _stammdaten_melden(stammdaten.setzen("kategorien", kategorien))
+    return stammdaten
 
 # --- Konten ---
-def add_konto(name):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("INSERT OR IGNORE INTO konten (name) VALUES (?)", (name,))
-    con.commit()
-    con.close()
+def add_konto(name, waehrung=BASIS):
+    # Ein schon vorhandenes Konto gleichen Namens behält seine Währung
+    waehrung = pruefe_code(waehrung)
+    with transaction() as con:
+        con.execute("INSERT OR IGNORE INTO konten (name, waehrung) VALUES (?, ?)", (name, waehrung))
+        row = con.execute("SELECT id, waehrung FROM konten WHERE name = ?", (name,)).fetchone()
+    stammdaten = get_stammdaten()
+    stammdaten.waehrung_setzen(row["id"], row["waehrung"])
+    _stammdaten_melden(stammdaten.eintragen("konten", row["id"], name))
+    return row["id"]
 
 def update_konto(konto_id, new_name):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("UPDATE konten SET name = ? WHERE id = ?", (new_name, konto_id))
-    con.commit()
-    con.close()
+    with transaction() as con:
+        con.execute("UPDATE konten SET name = ? WHERE id = ?", (new_name, konto_id))
+    _stammdaten_melden(get_stammdaten().eintragen("konten", konto_id, new_name))
+
+def _konto_hat_zahlungen(con, konto_id):
+    return (con.execute("SELECT 1 FROM zahlungen WHERE konto_id = ? LIMIT 1", (konto_id,)).fetchone()
+            or con.execute("SELECT 1 FROM archiv_verweise WHERE art = 'konten' AND eintrag_id = ? LIMIT 1",
+                           (konto_id,)).fetchone()) is not None
+
+def konto_waehrung_setzen(konto_id, waehrung):
+    # Nur solange das Konto keine Zahlungen hat: deren Beträge würden sonst umgedeutet
+    waehrung = pruefe_code(waehrung)
+    with transaction() as con:
+        row = con.execute("SELECT waehrung FROM konten WHERE id = ?", (konto_id,)).fetchone()
+        if row is None or row["waehrung"] == waehrung:
+            return
+        if _konto_hat_zahlungen(con, konto_id):
+            raise WaehrungFehler(f"Das Konto hat bereits Zahlungen in {row['waehrung']}; "
+                                 "die Währung kann nicht mehr geändert werden")
+        con.execute("UPDATE konten SET waehrung = ? WHERE id = ?", (waehrung, konto_id))
+    get_stammdaten().waehrung_setzen(konto_id, waehrung)
 
 def delete_konto(konto_id):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("UPDATE zahlungen SET konto_id = NULL WHERE konto_id = ?", (konto_id,))
-    cur.execute("DELETE FROM konten WHERE id = ?", (konto_id,))
-    con.commit()
-    con.close()
+    _regelwerke.pop(DB_FILE, None)
+    with transaction() as con:
+        _archiv_verwendet(con, "konten", konto_id)
+        row = con.execute("SELECT waehrung FROM konten WHERE id = ?", (konto_id,)).fetchone()
+        # Zahlungen ohne Konto gelten in BASIS; Fremdwährungskonten müssen dafür leer sein
+        if row is not None and row["waehrung"] != BASIS and _konto_hat_zahlungen(con, konto_id):
+            raise WaehrungFehler(f"Das Konto hat Zahlungen in {row['waehrung']}; verschieben Sie diese zuerst "
+                                 "auf ein anderes Konto in derselben Währung")
+        # Fingerabdruck beginnt mit der konto_id ("<konto_id>:..."), daher mit umschreiben
+        con.execute("""
+            UPDATE zahlungen
+            SET konto_id = NULL, fingerabdruck = '0' || substr(fingerabdruck, instr(fingerabdruck, ':'))
+            WHERE konto_id = ?
+        """, (konto_id,))
+        con.execute("UPDATE vertraege SET konto_id = NULL WHERE konto_id = ?", (konto_id,))
+        # Regeln nur für dieses Konto können nicht mehr greifen
+        con.execute("DELETE FROM regeln WHERE konto_id = ?", (konto_id,))
+        con.execute("DELETE FROM konten WHERE id = ?", (konto_id,))
+        con.execute("DELETE FROM salden WHERE konto_id = ?", (konto_id,))
+    _stammdaten_melden(get_stammdaten().entfernen("konten", konto_id))
 
 def get_konten():
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("SELECT id, name FROM konten ORDER BY name")
-    return cur.fetchall()
+    with connection() as con:
+        return con.execute("SELECT id, name, waehrung FROM konten ORDER BY name").fetchall()
 
 # --- Kategorien ---
 def add_kategorie(name):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("INSERT OR IGNORE INTO kategorien (name) VALUES (?)", (name,))
-    con.commit()
-    con.close()
+    with transaction() as con:
+        con.execute("INSERT OR IGNORE INTO kategorien (name) VALUES (?)", (name,))
+        kategorie_id = con.execute("SELECT id FROM kategorien WHERE name = ?", (name,)).fetchone()[0]
+    _stammdaten_melden(get_stammdaten().eintragen("kategorien", kategorie_id, name))
+    return kategorie_id
 
 def update_kategorie(kategorie_id, new_name):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("UPDATE kategorien SET name = ? WHERE id = ?", (new_name, kategorie_id))
-    con.commit()
-    con.close()
+    with transaction() as con:
+        con.execute("UPDATE kategorien SET name = ? WHERE id = ?", (new_name, kategorie_id))
+    _stammdaten_melden(get_stammdaten().eintragen("kategorien", kategorie_id, new_name))
 
 def delete_kategorie(kategorie_id):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("UPDATE zahlungen SET kategorie_id = NULL WHERE kategorie_id = ?", (kategorie_id,))
-    cur.execute("DELETE FROM kategorien WHERE id = ?", (kategorie_id,))
-    con.commit()
-    con.close()
+    _regelwerke.pop(DB_FILE, None)
+    with transaction() as con:
+        _archiv_verwendet(con, "kategorien", kategorie_id)
+        con.execute("UPDATE zahlungen SET kategorie_id = NULL WHERE kategorie_id = ?", (kategorie_id,))
+        con.execute("UPDATE vertraege SET kategorie_id = NULL WHERE kategorie_id = ?", (kategorie_id,))
+        con.execute("DELETE FROM regeln WHERE kategorie_id = ?", (kategorie_id,))
+        con.execute("DELETE FROM kategorien WHERE id = ?", (kategorie_id,))
+    _stammdaten_melden(get_stammdaten().entfernen("kategorien", kategorie_id))
 
 def get_kategorien():
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("SELECT id, name FROM kategorien ORDER BY name")
-    return cur.fetchall()
+    with connection() as con:
+        return con.execute("SELECT id, name FROM kategorien ORDER BY name").fetchall()
 
 # --- Zahlungen ---
-def add_zahlung(betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
-        INSERT INTO zahlungen (betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (betrag, typ, datum, kategorie_id, konto_id, beschreibung, int(bool(wiederkehrend))))
-    con.commit()
-    con.close()
+def betrag_cent(betrag, typ):
+    # Betrag (Money, Decimal, Zahl oder Text) -> vorzeichenbehaftete Cent nach typ
+    cent = abs(Money.von(betrag).cent)
+    return cent if typ == "Einnahme" else -cent
+
+class DoppelteZahlung(ValueError):
+    def __init__(self, zahlung_id):
+        super().__init__(f"Identische Zahlung existiert bereits (id {zahlung_id})")
+        self.zahlung_id = zahlung_id
+
+def finde_duplikat(fingerabdruck_):
+    with connection() as con:
+        row = con.execute("SELECT id FROM zahlungen WHERE fingerabdruck = ? LIMIT 1", (fingerabdruck_,)).fetchone()
+    return row["id"] if row else None
+
+def add_zahlung(betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend, duplikat_erlauben=False):
+    cent = betrag_cent(betrag, typ)
+    fp = fingerabdruck(datum, cent, konto_id, beschreibung)
+    with transaction() as con:
+        _nicht_archiviert(con, datum)
+        if not duplikat_erlauben:
+            vorhanden = finde_duplikat(fp)
+            if vorhanden is not None:
+                raise DoppelteZahlung(vorhanden)
+        cur = con.execute("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                   fingerabdruck)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (cent, typ, datum, kategorie_id, konto_id, beschreibung, int(bool(wiederkehrend)), fp))
+        return cur.lastrowid
+
+@contextmanager
+def _waehrung_getrennt():
+    # Abbruch durch den Trigger aus _migration_waehrungen als WaehrungFehler melden
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        if str(e) == _WAEHRUNG_GETRENNT:
+            raise WaehrungFehler(_WAEHRUNG_GETRENNT) from None
+        raise
 
 def update_zahlung(zahlung_id, betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
-        UPDATE zahlungen
-        SET betrag = ?, typ = ?, datum = ?, kategorie_id = ?, konto_id = ?, beschreibung = ?, wiederkehrend = ?
-        WHERE id = ?
-    """, (betrag, typ, datum, kategorie_id, konto_id, beschreibung, int(bool(wiederkehrend)), zahlung_id))
-    con.commit()
-    con.close()
+    cent = betrag_cent(betrag, typ)
+    with transaction() as con, _waehrung_getrennt():
+        _nicht_archiviert(con, datum)
+        con.execute("""
+            UPDATE zahlungen
+            SET betrag_cent = ?, typ = ?, datum = ?, kategorie_id = ?, konto_id = ?, beschreibung = ?, wiederkehrend = ?,
+                fingerabdruck = ?
+            WHERE id = ?
+        """, (cent, typ, datum, kategorie_id, konto_id, beschreibung, int(bool(wiederkehrend)),
+              fingerabdruck(datum, cent, konto_id, beschreibung), zahlung_id))
 
 def delete_zahlung(zahlung_id):
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("DELETE FROM zahlungen WHERE id = ?", (zahlung_id,))
-    con.commit()
-    con.close()
+    with transaction() as con:
+        con.execute("DELETE FROM zahlungen WHERE id = ?", (zahlung_id,))
+
+# --- Sammelbearbeitung ---
+# Mehrere Zahlungen (Liste von ids) in einer Transaktion ändern; je Block ein
+# "UPDATE ... WHERE id IN (...)", weil SQLite die Zahl der Parameter begrenzt.
+# Zeilen, die den Zielwert schon haben, werden ausgelassen (keine Trigger-Arbeit).
+# Rückgabe jeweils: Anzahl geänderter Zahlungen.
+ID_BLOCK = 500
 
+def _fuer_ids(con, sql, ids, *params):
+    # sql enthält "{ids}" als Platzhalter für die Parameterliste eines Blocks
+    ids = list(ids)
+    anzahl = 0
+    for start in range(0, len(ids), ID_BLOCK):
+        block = ids[start:start + ID_BLOCK]
+        anzahl += con.execute(sql.format(ids=",".join("?" * len(block))), (*params, *block)).rowcount
+    return anzahl
+
+def zahlungen_kategorie_setzen(ids, kategorie_id):
+    with transaction() as con:
+        return _fuer_ids(con, """
+            UPDATE zahlungen SET kategorie_id = ?1
+            WHERE id IN ({ids}) AND kategorie_id IS NOT ?1
+        """, ids, kategorie_id)
+
+def zahlungen_konto_setzen(ids, konto_id):
+    # Fingerabdruck beginnt mit der konto_id (siehe delete_konto), daher mit umschreiben
+    with transaction() as con, _waehrung_getrennt():
+        return _fuer_ids(con, """
+            UPDATE zahlungen
+            SET konto_id = ?1, fingerabdruck = IFNULL(?1, 0) || substr(fingerabdruck, instr(fingerabdruck, ':'))
+            WHERE id IN ({ids}) AND konto_id IS NOT ?1
+        """, ids, konto_id)
+
+def zahlungen_wiederkehrend_setzen(ids, wiederkehrend):
+    with transaction() as con:
+        return _fuer_ids(con, """
+            UPDATE zahlungen SET wiederkehrend = ?1
+            WHERE id IN ({ids}) AND wiederkehrend != ?1
+        """, ids, int(bool(wiederkehrend)))
+
+def zahlungen_loeschen(ids):
+    with transaction() as con:
+        return _fuer_ids(con, "DELETE FROM zahlungen WHERE id IN ({ids})", ids)
+
+# Zahlungen liefern nur kategorie_id/konto_id; Namen kommen aus get_stammdaten().name(...)
 def get_zahlungen():
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
-        SELECT z.*, 
-               k.name AS kategorie_name,
-               ko.name AS konto_name
+    # Vollständige Liste (datum DESC, id DESC); wer alle Zahlungen nur einmal durchgehen will,
+    # liest mit zahlungen_lesen blockweise, ohne alles im Speicher zu halten
+    return [zahlung for block in zahlungen_lesen(absteigend=True) for zahlung in block]
+
+# Spalten für die Übersicht: gleiche Reihenfolge wie get_zahlungen (datum DESC, id DESC)
+_UEBERSICHT_SELECT = """
+    SELECT z.id, z.datum, z.typ, z.betrag_cent, z.beschreibung, z.wiederkehrend,
+           z.kategorie_id, z.konto_id
+    FROM zahlungen z
+"""
+# Dasselbe für main und Archive ({s} = Schema, siehe _ueber_quellen)
+_UEBERSICHT_ARM = _UEBERSICHT_SELECT.replace("FROM zahlungen z", "FROM {s}.zahlungen z")
+
+def get_zahlungen_seite(limit, nach=None):
+    # Keyset-Pagination: nach = (datum, id) der letzten bereits geladenen Zeile
+    return get_zahlungen_gefiltert({}, limit, nach)
+
+# --- Massenimport ---
+# Die Einfüge-Trigger auf zahlungen schreiben je Zeile Salden, Monatswerte, Volltextindex und
+# Beschreibungen fort und protokollieren sie. importer.importiere entfernt sie innerhalb seiner
+# Transaktion (massenimport) und ergänzt die abgeleiteten Tabellen danach mit je einem Statement
+# über alle neuen Zeilen; wegen AUTOINCREMENT sind das genau die mit id über dem bisherigen
+# Maximum. Ins Protokoll kommt statt eines Eintrags je Zahlung ein Sammeleintrag (siehe
+# Änderungsprotokoll). Bricht der Import ab, stellt das Rollback die Trigger wieder her. Kommt ein
+# Einfüge-Trigger hinzu, gehört er hierher und in _massenimport_nachtragen.
+_MASSENIMPORT_TRIGGER = ("zahlungen_salden_insert", "zahlungen_monatswerte_insert", "zahlungen_fts_insert",
+                         "zahlungen_beschreibungen_insert", "zahlungen_protokoll_insert")
+
+def _massenimport_nachtragen(con, ab_id):
+    con.execute("""
+        INSERT INTO salden (konto_id, saldo_cent)
+        SELECT IFNULL(konto_id, 0), SUM(betrag_cent) FROM zahlungen WHERE id > ? GROUP BY 1
+        ON CONFLICT (konto_id) DO UPDATE SET saldo_cent = saldo_cent + excluded.saldo_cent
+    """, (ab_id,))
+    con.execute("""
+        INSERT INTO monatswerte (monat, kategorie_id, konto_id, typ, summe_cent, anzahl)
+        SELECT substr(datum, 1, 7), IFNULL(kategorie_id, 0), IFNULL(konto_id, 0), typ, SUM(betrag_cent), COUNT(*)
+        FROM zahlungen WHERE id > ? GROUP BY 1, 2, 3, 4
+        ON CONFLICT (monat, kategorie_id, konto_id, typ) DO UPDATE
+        SET summe_cent = summe_cent + excluded.summe_cent, anzahl = anzahl + excluded.anzahl
+    """, (ab_id,))
+    con.execute("""
+        INSERT INTO zahlungen_fts (rowid, beschreibung, kategorie, konto)
+        SELECT z.id, z.beschreibung, k.name, ko.name
         FROM zahlungen z
         LEFT JOIN kategorien k ON z.kategorie_id = k.id
         LEFT JOIN konten ko ON z.konto_id = ko.id
-        ORDER BY z.datum DESC, z.id DESC
-    """)
-    return cur.fetchall()
-
-def get_gesamtvermoegen():
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
-        SELECT SUM(CASE WHEN typ='Einnahme' THEN betrag ELSE -betrag END) as saldo
+        WHERE z.id > ?
+    """, (ab_id,))
+    con.execute(_BESCHREIBUNG_ZUZAEHLEN.format(quelle=f"""
+        SELECT {_schluessel("beschreibung")}, trim(beschreibung), COUNT(*), MAX(datum), id, betrag_cent, typ,
+               kategorie_id, konto_id
         FROM zahlungen
-    """)
-    result = cur.fetchone()
-    return result["saldo"] if result and result["saldo"] is not None else 0.0
+        WHERE id > ? AND trim(beschreibung) != ''
+        GROUP BY 1
+        ORDER BY 1"""), (ab_id,))
+    con.execute(f"""
+        INSERT INTO protokoll (tabelle, zeilen_id, nachher)
+        SELECT 'zahlungen', {SAMMELEINTRAG}, json_object('import', COUNT(*), 'von_id', MIN(id), 'bis_id', MAX(id))
+        FROM zahlungen WHERE id > ?
+        HAVING COUNT(*) > 0
+    """, (ab_id,))
+
+@contextmanager
+def massenimport(con):
+    # con: Verbindung mit offener Transaktion; Einfügen in zahlungen innerhalb des with-Blocks
+    ab_id = con.execute("SELECT IFNULL(MAX(id), 0) FROM zahlungen").fetchone()[0]
+    namen = ", ".join(f"'{name}'" for name in _MASSENIMPORT_TRIGGER)
+    trigger = con.execute(f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({namen})").fetchall()
+    for name, _ in trigger:
+        con.execute(f"DROP TRIGGER {name}")
+    yield
+    for _, sql in trigger:
+        con.execute(sql)
+    _massenimport_nachtragen(con, ab_id)
+
+# --- Suche und Filter ---
+# suchfilter ist ein dict mit den optionalen Schlüsseln text, von, bis (ISO-Datum),
+# betrag_min, betrag_max (Cent, ohne Vorzeichen), konto_id, kategorie_id.
+RANG_GRENZE = 5000
+
+def fts_abfrage(text):
+    # Alle Wörter müssen vorkommen; nur das letzte (gerade getippte) als Präfix:
+    # "rewe mie" -> "rewe" "mie"*. Präfixe ohne passenden Präfix-Index liest FTS5 komplett ein,
+    # ganze Wörter dagegen schrittweise. lower() statt casefold(): unicode61 macht aus "ß" kein "ss".
+    woerter = [f'"{w}"' for w in re.findall(r"\w+", (text or "").lower())]
+    if woerter:
+        woerter[-1] += "*"
+    return " ".join(woerter)
+
+def _filter_bedingungen(suchfilter):
+    bedingungen, params = [], []
+    if suchfilter.get("von"):
+        bedingungen.append("z.datum >= ?")
+        params.append(suchfilter["von"])
+    if suchfilter.get("bis"):
+        bedingungen.append("z.datum <= ?")
+        params.append(suchfilter["bis"])
+    if suchfilter.get("betrag_min") is not None:
+        bedingungen.append("abs(z.betrag_cent) >= ?")
+        params.append(suchfilter["betrag_min"])
+    if suchfilter.get("betrag_max") is not None:
+        bedingungen.append("abs(z.betrag_cent) <= ?")
+        params.append(suchfilter["betrag_max"])
+    if suchfilter.get("konto_id") is not None:
+        bedingungen.append("z.konto_id = ?")
+        params.append(suchfilter["konto_id"])
+    if suchfilter.get("kategorie_id") is not None:
+        bedingungen.append("z.kategorie_id = ?")
+        params.append(suchfilter["kategorie_id"])
+    return bedingungen, params
+
+def get_zahlungen_gefiltert(suchfilter, limit, nach=None):
+    # Wie get_zahlungen_seite, aber mit Datums-, Betrags-, Konto- und Kategoriefilter.
+    # Archivierte Jahre liegen zeitlich vor main: sie werden erst angehängt und gelesen, wenn
+    # main keine weiteren Zeilen mehr hat, und nur die, die der Datumsfilter einschließt.
+    bedingungen, params = _filter_bedingungen(suchfilter)
+    if nach is not None:
+        bedingungen.append("(z.datum, z.id) < (?, ?)")
+        params.extend(nach)
+    where = ("WHERE " + " AND ".join(bedingungen)) if bedingungen else ""
+    with connection() as con:
+        zeilen = con.execute(_UEBERSICHT_SELECT + where + """
+            ORDER BY z.datum DESC, z.id DESC
+            LIMIT ?
+        """, (*params, limit)).fetchall()
+        if len(zeilen) < limit:
+            jahre = _archivjahre_im(con, suchfilter.get("von"), suchfilter.get("bis"))
+            for cur in _ueber_quellen(con, _UEBERSICHT_ARM + where, params, """
+                ORDER BY datum DESC, id DESC
+                LIMIT ?
+            """, (limit - len(zeilen),), jahre, main=False, absteigend=True):
+                zeilen.extend(cur.fetchmany(limit - len(zeilen)))
+                if len(zeilen) >= limit:
+                    break
+    return zeilen
+
+EXPORT_BLOCK = 10000
+
+def _lese_bedingungen(suchfilter):
+    # Wie _filter_bedingungen, ein Suchtext schränkt zusätzlich per FTS ein (Index im selben Schema)
+    bedingungen, params = _filter_bedingungen(suchfilter)
+    abfrage = fts_abfrage(suchfilter.get("text", ""))
+    if abfrage:
+        bedingungen.append("z.id IN (SELECT rowid FROM {s}.zahlungen_fts WHERE zahlungen_fts MATCH ?)")
+        params.append(abfrage)
+    return ("WHERE " + " AND ".join(bedingungen)) if bedingungen else "", params
+
+def zahlungen_lesen(suchfilter=None, blockgroesse=EXPORT_BLOCK, absteigend=False):
+    # Liefert alle passenden Zahlungen aller Jahre (Archive eingeschlossen) in Blöcken (Listen
+    # von sqlite3.Row) über einen offenen Cursor mit fetchmany: der Speicherbedarf hängt nur von
+    # blockgroesse ab, nicht von der Anzahl. Sortiert über idx_zahlungen_*_datum, also ohne
+    # Zwischenergebnis; bei einem Suchtext liegen nur dessen Treffer-ids im Speicher.
+    suchfilter = suchfilter or {}
+    where, params = _lese_bedingungen(suchfilter)
+    richtung = "DESC" if absteigend else "ASC"
+    with connection() as con:
+        jahre = _archivjahre_im(con, suchfilter.get("von"), suchfilter.get("bis"))
+        for cur in _ueber_quellen(con, f"SELECT {ZAHLUNG_SPALTEN} FROM {{s}}.zahlungen z {where}", params,
+                                  f" ORDER BY datum {richtung}, id {richtung}", (), jahre, absteigend=absteigend):
+            while True:
+                block = cur.fetchmany(blockgroesse)
+                if not block:
+                    break
+                yield block
+
+def zahlungen_zaehlen(suchfilter=None):
+    # Anzahl für zahlungen_lesen (Fortschrittsanzeige)
+    suchfilter = suchfilter or {}
+    where, params = _lese_bedingungen(suchfilter)
+    with connection() as con:
+        jahre = _archivjahre_im(con, suchfilter.get("von"), suchfilter.get("bis"))
+        return sum(row[0] for cur in _ueber_quellen(con, f"SELECT COUNT(*) FROM {{s}}.zahlungen z {where}",
+                                                     params, "", (), jahre)
+                   for row in cur)
+
+_SUCHE_FROM = """
+    FROM {s}.zahlungen_fts
+    CROSS JOIN {s}.zahlungen z ON z.id = zahlungen_fts.rowid
+    WHERE zahlungen_fts MATCH ?{where}
+"""
+
+def _suche_in(con, s, abfrage, where, params, limit, offset):
+    # Treffer aus dem FTS-Index des Schemas s, zahlungen wird nur per id gelesen
+    anzahl = con.execute(f"""
+        SELECT count(*) FROM (SELECT 1 FROM {s}.zahlungen_fts WHERE zahlungen_fts MATCH ? LIMIT ?)
+    """, (abfrage, RANG_GRENZE + 1)).fetchone()[0]
+    reihenfolge = "zahlungen_fts.rank" if anzahl <= RANG_GRENZE else "zahlungen_fts.rowid DESC"
+    return con.execute(f"""
+        SELECT z.id, z.datum, z.typ, z.betrag_cent, z.beschreibung, z.wiederkehrend,
+               z.kategorie_id, z.konto_id
+        {_SUCHE_FROM.format(s=s, where=where)}
+        ORDER BY {reihenfolge}
+        LIMIT ? OFFSET ?
+    """, (abfrage, *params, limit, offset)).fetchall()
+
+def _suchquellen(con, von, bis):
+    # main, danach die Archive der Jahre von..bis vom jüngsten an; angehängt erst bei Bedarf
+    yield "main"
+    for jahr in reversed(_archivjahre_im(con, von, bis)):
+        yield _anhaengen(con, [jahr])[0]
+
+def suche_zahlungen(suchfilter, limit, offset=0):
+    # Volltextsuche; weitere Filter schränken die Treffer ein. Bis RANG_GRENZE Treffer wird nach
+    # Relevanz (bm25) sortiert. Darüber kostet bm25 spürbar Zeit pro Treffer und unterscheidet
+    # kaum noch (fast jede Zeile enthält den Begriff genau einmal), dann kommen die neuesten
+    # Buchungen zuerst. Archivierte Jahre haben je einen eigenen Index; ihre Treffer folgen nach
+    # denen aus main, jüngstes Jahr zuerst, und werden erst gelesen, wenn main keine mehr hat.
+    abfrage = fts_abfrage(suchfilter.get("text", ""))
+    if not abfrage:
+        return get_zahlungen_gefiltert(suchfilter, limit) if offset == 0 else []
+    bedingungen, params = _filter_bedingungen(suchfilter)
+    where = "".join(" AND " + b for b in bedingungen)
+    zeilen = []
+    with connection() as con:
+        for s in _suchquellen(con, suchfilter.get("von"), suchfilter.get("bis")):
+            treffer = _suche_in(con, s, abfrage, where, params, limit - len(zeilen), offset)
+            zeilen += treffer
+            if len(zeilen) >= limit:
+                break
+            # Weiter in der nächsten Quelle; von offset bleibt, was s nicht schon übersprungen hat
+            if offset:
+                offset = 0 if treffer else offset - con.execute(
+                    "SELECT count(*)" + _SUCHE_FROM.format(s=s, where=where), (abfrage, *params)).fetchone()[0]
+    return zeilen
+
+def get_uebersicht_zeile(zahlung_id):
+    with connection() as con:
+        return con.execute(_UEBERSICHT_SELECT + "WHERE z.id = ?", (zahlung_id,)).fetchone()
+
+# --- Wechselkurse ---
+# Je Datenbank ein waehrungen.Kurse im Speicher; eine Währung wird erst beim ersten Bedarf aus
+# kurse gelesen (Primärschlüssel), kurse_laden verwirft den Cache.
+_kurse = {}
+
+def get_kurse():
+    kurse = _kurse.get(DB_FILE)
+    if kurse is None:
+        pool = get_pool(DB_FILE)
+
+        def laden(waehrung):
+            with pool.connection() as con:
+                return con.execute("SELECT datum, kurs FROM kurse WHERE waehrung = ? ORDER BY datum",
+                                   (waehrung,)).fetchall()
+
+        kurse = _kurse.setdefault(DB_FILE, Kurse(laden))
+    return kurse
+
+def kurse_laden(pfade):
+    # Kursdateien einlesen (Formate siehe waehrungen.kurse_lesen); ein schon vorhandener Kurs
+    # derselben Währung am selben Tag wird ersetzt. Liefert die Anzahl gelesener Kurse.
+    anzahl = 0
+    with transaction() as con:
+        for pfad in pfade:
+            anzahl += con.executemany("INSERT OR REPLACE INTO kurse (waehrung, datum, kurs) VALUES (?, ?, ?)",
+                                      kurse_lesen(pfad)).rowcount
+    _kurse.pop(DB_FILE, None)
+    return anzahl
+
+def get_kursbestand():
+    # Je Währung: Anzahl Kurse und abgedeckter Zeitraum
+    with connection() as con:
+        return con.execute("""
+            SELECT waehrung, COUNT(*) AS anzahl, MIN(datum) AS von, MAX(datum) AS bis
+            FROM kurse
+            GROUP BY waehrung
+            ORDER BY waehrung
+        """).fetchall()
+
+def _salden_je_waehrung(con):
+    # Salden der Konten ohne Konto oder mit gelöschtem Konto zählen zu BASIS
+    return con.execute(f"""
+        SELECT IFNULL(ko.waehrung, '{BASIS}') AS waehrung, SUM(s.saldo_cent) AS saldo_cent
+        FROM salden s
+        LEFT JOIN konten ko ON s.konto_id = ko.id
+        GROUP BY 1
+    """).fetchall()
+
+def get_gesamtvermoegen(stichtag=None):
+    # Summe über die gepflegten Salden (eine Zeile je Konto), kein Scan über zahlungen; je Währung
+    # eine Umrechnung zum Kurs am stichtag (Standard: heute)
+    stichtag = stichtag or date.today().isoformat()
+    kurse = get_kurse()
+    with connection() as con:
+        gruppen = _salden_je_waehrung(con)
+    return Money(sum(kurse.umrechnen(g["saldo_cent"], g["waehrung"], stichtag) for g in gruppen))
+
+def get_salden():
+    # Je Konto in dessen Währung
+    with connection() as con:
+        return con.execute(f"""
+            SELECT s.konto_id, ko.name AS konto_name, s.saldo_cent, IFNULL(ko.waehrung, '{BASIS}') AS waehrung
+            FROM salden s
+            LEFT JOIN konten ko ON s.konto_id = ko.id
+            WHERE s.konto_id != 0 OR s.saldo_cent != 0
+            ORDER BY ko.name IS NULL, ko.name
+        """).fetchall()
+
+# --- Salden prüfen / neu berechnen ---
+_SALDEN_SQL = "SELECT konto_id, SUM(betrag_cent) AS saldo_cent FROM {s}.zahlungen GROUP BY konto_id"
+
+def _salden_berechnen(cur, archiv=None):
+    # Reine Integer-Summe, GROUP BY konto_id läuft über den Index; NULL wird danach auf 0 abgebildet.
+    # archiv: Summen der Archive (_archiv_salden), die Salden gelten für alle Jahre
+    cur.execute(_SALDEN_SQL.format(s="main"))
+    salden = dict(archiv or {})
+    for row in cur.fetchall():
+        konto_id = row["konto_id"] or 0
+        salden[konto_id] = salden.get(konto_id, 0) + row["saldo_cent"]
+    return salden
+
+def _archiv_salden(con):
+    # Archive ändern sich nicht mehr, daher außerhalb der Transaktion (ATTACH geht nur dort)
+    salden = {}
+    for cur in _ueber_quellen(con, _SALDEN_SQL, jahre=_archivjahre_im(con), main=False):
+        for row in cur:
+            konto_id = row["konto_id"] or 0
+            salden[konto_id] = salden.get(konto_id, 0) + row["saldo_cent"]
+    return salden
+
+def _salden_neu_berechnen(cur, archiv=None):
+    cur.execute("DELETE FROM salden")
+    cur.executemany(
+        "INSERT INTO salden (konto_id, saldo_cent) VALUES (?, ?)",
+        _salden_berechnen(cur, archiv).items()
+    )
+
+def pruefe_salden(reparieren=False):
+    # Liefert Abweichungen als Liste von (konto_id, gespeichert, berechnet)
+    with connection() as con:
+        archiv = _archiv_salden(con)
+    with transaction() as con:
+        cur = con.cursor()
+        berechnet = _salden_berechnen(cur, archiv)
+        gespeichert = {row["konto_id"]: row["saldo_cent"] for row in cur.execute("SELECT konto_id, saldo_cent FROM salden")}
+        abweichungen = []
+        for konto_id in sorted(berechnet.keys() | gespeichert.keys()):
+            soll = Money(berechnet.get(konto_id, 0))
+            ist = Money(gespeichert.get(konto_id, 0))
+            if soll != ist:
+                abweichungen.append((konto_id, ist, soll))
+        if reparieren:
+            _salden_neu_berechnen(cur, archiv)
+    return abweichungen
+
+# --- Monatswerte (Statistik) ---
+# Alle Auswertungen lesen nur monatswerte (wenige hundert bis tausend Zeilen), nie zahlungen.
+# Monate als "YYYY-MM"; von/bis sind jeweils einschließlich und optional.
+def _monatsbereich(von, bis, spalte="monat"):
+    bedingungen, params = ["1"], []
+    if von:
+        bedingungen.append(f"{spalte} >= ?")
+        params.append(von)
+    if bis:
+        bedingungen.append(f"{spalte} <= ?")
+        params.append(bis)
+    return " AND ".join(bedingungen), params
+
+_EINNAHMEN_AUSGABEN = """
+    SUM(CASE WHEN m.typ = 'Einnahme' THEN m.summe_cent ELSE 0 END) AS einnahmen_cent,
+    SUM(CASE WHEN m.typ = 'Einnahme' THEN 0 ELSE m.summe_cent END) AS ausgaben_cent"""
+
+# Nur die Monatswerte von Konten in Fremdwährung, je Währung und Monat
+_FREMDWAEHRUNG = f"JOIN konten ko ON m.konto_id = ko.id AND ko.waehrung != '{BASIS}'"
+
+def _monatsende(monat):
+    # "YYYY-MM" -> letzter Tag des Monats als ISO-Datum
+    jahr, nummer = int(monat[:4]), int(monat[5:7])
+    return f"{monat}-{calendar.monthrange(jahr, nummer)[1]:02d}"
+
+def _in_basis(con, zeilen, schluessel, fremd_sql, params):
+    # zeilen: Auswertung über alle Konten mit den Beträgen (Spalten *_cent) in Kontowährung.
+    # fremd_sql liefert dieselben Spalten nur für Fremdwährungskonten, zusätzlich je waehrung
+    # und monat; jede solche Gruppe wird einmal zum Kurs am Monatsende umgerechnet und ersetzt
+    # ihren Anteil in der Zeile mit demselben schluessel. Liefert die Zeilen als dicts.
+    zeilen = [dict(z) for z in zeilen]
+    fremd = con.execute(fremd_sql, params).fetchall()
+    if fremd:
+        kurse = get_kurse()
+        je_schluessel = {z[schluessel]: z for z in zeilen}
+        for f in fremd:
+            zeile, stichtag = je_schluessel[f[schluessel]], _monatsende(f["monat"])
+            for spalte in f.keys():
+                if spalte.endswith("_cent"):
+                    zeile[spalte] += kurse.umrechnen(f[spalte], f["waehrung"], stichtag) - f[spalte]
+    return zeilen
+
+def get_cashflow(von=None, bis=None):
+    # Je Monat: Einnahmen (>= 0), Ausgaben (<= 0) in Cent
+    where, params = _monatsbereich(von, bis, "m.monat")
+    with connection() as con:
+        zeilen = con.execute(f"""
+            SELECT m.monat, {_EINNAHMEN_AUSGABEN}, SUM(m.anzahl) AS anzahl
+            FROM monatswerte m
+            WHERE {where}
+            GROUP BY m.monat
+            ORDER BY m.monat
+        """, params).fetchall()
+        return _in_basis(con, zeilen, "monat", f"""
+            SELECT m.monat, ko.waehrung, {_EINNAHMEN_AUSGABEN}
+            FROM monatswerte m {_FREMDWAEHRUNG}
+            WHERE {where}
+            GROUP BY m.monat, ko.waehrung
+        """, params)
+
+def get_kategorie_summen(von=None, bis=None, typ="Ausgabe"):
+    # Summe je Kategorie für einen Zeitraum, betragsmäßig größte zuerst
+    where, params = _monatsbereich(von, bis, "m.monat")
+    with connection() as con:
+        zeilen = con.execute(f"""
+            SELECT m.kategorie_id, k.name AS kategorie_name,
+                   SUM(m.summe_cent) AS summe_cent, SUM(m.anzahl) AS anzahl
+            FROM monatswerte m
+            LEFT JOIN kategorien k ON m.kategorie_id = k.id
+            WHERE {where} AND m.typ = ?
+            GROUP BY m.kategorie_id
+            ORDER BY abs(SUM(m.summe_cent)) DESC
+        """, (*params, typ)).fetchall()
+        zeilen = _in_basis(con, zeilen, "kategorie_id", f"""
+            SELECT m.kategorie_id, m.monat, ko.waehrung, SUM(m.summe_cent) AS summe_cent
+            FROM monatswerte m {_FREMDWAEHRUNG}
+            WHERE {where} AND m.typ = ?
+            GROUP BY m.kategorie_id, m.monat, ko.waehrung
+        """, (*params, typ))
+    zeilen.sort(key=lambda z: -abs(z["summe_cent"]))
+    return zeilen
+
+def get_jahresverlauf():
+    with connection() as con:
+        zeilen = con.execute(f"""
+            SELECT substr(m.monat, 1, 4) AS jahr, {_EINNAHMEN_AUSGABEN}, SUM(m.anzahl) AS anzahl
+            FROM monatswerte m
+            GROUP BY jahr
+            ORDER BY jahr
+        """).fetchall()
+        return _in_basis(con, zeilen, "jahr", f"""
+            SELECT substr(m.monat, 1, 4) AS jahr, m.monat, ko.waehrung, {_EINNAHMEN_AUSGABEN}
+            FROM monatswerte m {_FREMDWAEHRUNG}
+            GROUP BY m.monat, ko.waehrung
+        """, ())
+
+_MONATSWERTE_SQL = """
+    SELECT substr(datum, 1, 7) AS monat, IFNULL(kategorie_id, 0) AS kategorie_id,
+           IFNULL(konto_id, 0) AS konto_id, typ,
+           SUM(betrag_cent) AS summe_cent, COUNT(*) AS anzahl
+    FROM {s}.zahlungen
+    GROUP BY 1, 2, 3, 4
+"""
+
+def _monatswerte_berechnen(cur, archiv=None):
+    # archiv: Monatswerte der Archive (_archiv_monatswerte); deren Monate kommen in main nicht vor
+    cur.execute(_MONATSWERTE_SQL.format(s="main"))
+    werte = dict(archiv or {})
+    werte.update(((r["monat"], r["kategorie_id"], r["konto_id"], r["typ"]), (r["summe_cent"], r["anzahl"]))
+                 for r in cur.fetchall())
+    return werte
+
+def _archiv_monatswerte(con):
+    return {(r["monat"], r["kategorie_id"], r["konto_id"], r["typ"]): (r["summe_cent"], r["anzahl"])
+            for cur in _ueber_quellen(con, _MONATSWERTE_SQL, jahre=_archivjahre_im(con), main=False)
+            for r in cur}
+
+def _monatswerte_neu_berechnen(cur, archiv=None):
+    cur.execute("DELETE FROM monatswerte")
+    cur.executemany(
+        "INSERT INTO monatswerte (monat, kategorie_id, konto_id, typ, summe_cent, anzahl) VALUES (?, ?, ?, ?, ?, ?)",
+        (schluessel + werte for schluessel, werte in _monatswerte_berechnen(cur, archiv).items())
+    )
+
+def pruefe_monatswerte(reparieren=False):
+    # Liefert Abweichungen als Liste von (schluessel, gespeichert, berechnet);
+    # schluessel = (monat, kategorie_id, konto_id, typ), Werte = (summe_cent, anzahl)
+    with connection() as con:
+        archiv = _archiv_monatswerte(con)
+    with transaction() as con:
+        cur = con.cursor()
+        berechnet = _monatswerte_berechnen(cur, archiv)
+        gespeichert = {
+            (r["monat"], r["kategorie_id"], r["konto_id"], r["typ"]): (r["summe_cent"], r["anzahl"])
+            for r in cur.execute("SELECT * FROM monatswerte")
+        }
+        abweichungen = [
+            (schluessel, gespeichert.get(schluessel, (0, 0)), berechnet.get(schluessel, (0, 0)))
+            for schluessel in sorted(berechnet.keys() | gespeichert.keys())
+            if gespeichert.get(schluessel) != berechnet.get(schluessel)
+        ]
+        if reparieren:
+            _monatswerte_neu_berechnen(cur, archiv)
+    return abweichungen
+
+# --- Beschreibungen (Vervollständigen im Eingabeformular) ---
+VORSCHLAG_KANDIDATEN = 200  # bis zu so vielen Treffern wird der Präfixbereich komplett sortiert
+
+_VORSCHLAG_SPALTEN = "schluessel, beschreibung, anzahl, zuletzt, zahlung_id, betrag_cent, typ, kategorie_id, konto_id"
+
+def beschreibungen_vorschlagen(praefix, limit=10):
+    # Die häufigsten Beschreibungen, die mit praefix beginnen (Groß-/Kleinschreibung egal), samt der
+    # Werte ihrer zuletzt gesehenen Zahlung. Seltene Präfixe: Schlüssel und Anzahl des Bereichs über
+    # den Primärschlüssel lesen, hier sortieren und nur die besten ganz laden. Häufige Präfixe (kurz,
+    # viele Treffer): zuerst die mehrfach vorkommenden in Häufigkeitsreihenfolge über den Teilindex,
+    # aufgefüllt mit einmaligen in alphabetischer Folge; das ergibt dieselbe Reihenfolge wie das
+    # vollständige Sortieren, ohne den ganzen Bereich zu lesen.
+    with connection() as con:
+        von = con.execute(f"SELECT {_schluessel('?', 'ltrim')}", (praefix,)).fetchone()[0]
+        if not von:
+            return []
+        bereich = (von, von + "\U0010ffff")
+        cur = con.execute("SELECT anzahl, schluessel FROM beschreibungen WHERE schluessel >= ? AND schluessel < ? LIMIT ?",
+                          (*bereich, VORSCHLAG_KANDIDATEN + 1))
+        cur.row_factory = None
+        kandidaten = cur.fetchall()
+        if len(kandidaten) <= VORSCHLAG_KANDIDATEN:
+            beste = [k for _, k in heapq.nsmallest(limit, kandidaten, key=lambda r: (-r[0], r[1]))]
+            zeilen = {row["schluessel"]: row for row in con.execute(f"""
+                SELECT {_VORSCHLAG_SPALTEN} FROM beschreibungen
+                WHERE schluessel IN ({", ".join("?" * len(beste))})
+            """, beste)}
+            return [zeilen[k] for k in beste if k in zeilen]
+        vorschlaege = con.execute(f"""
+            SELECT {_VORSCHLAG_SPALTEN} FROM beschreibungen INDEXED BY idx_beschreibungen_haeufig
+            WHERE anzahl > 1 AND schluessel >= ? AND schluessel < ?
+            ORDER BY anzahl DESC, schluessel
+            LIMIT ?
+        """, (*bereich, limit)).fetchall()
+        if len(vorschlaege) < limit:
+            vorschlaege += con.execute(f"""
+                SELECT {_VORSCHLAG_SPALTEN} FROM beschreibungen
+                WHERE schluessel >= ? AND schluessel < ? AND anzahl = 1
+                ORDER BY schluessel
+                LIMIT ?
+            """, (*bereich, limit - len(vorschlaege))).fetchall()
+        return vorschlaege
+
+def beschreibungen_neu_aufbauen():
+    # Baut die Tabelle aus main und den Archiven neu auf (nach einer Wiederherstellung von Hand o.ä.);
+    # liefert die Anzahl unterschiedlicher Beschreibungen
+    with connection() as con:
+        archiv = [tuple(row) for cur in _ueber_quellen(con, _BESCHREIBUNGEN_SQL, jahre=_archivjahre_im(con), main=False)
+                  for row in cur]
+    with transaction() as con:
+        con.execute("DELETE FROM beschreibungen")
+        con.executemany(_BESCHREIBUNG_ZUZAEHLEN.format(quelle=f"VALUES ({', '.join('?' * 9)})"), archiv)
+        con.execute(_BESCHREIBUNG_ZUZAEHLEN.format(quelle=_BESCHREIBUNGEN_SQL.format(s="main") + " ORDER BY 1"))
+        return con.execute("SELECT COUNT(*) FROM beschreibungen").fetchone()[0]
+
+# --- Verträge ---
+# Termine berechnet vertraege.py; hier nur Speichern, Buchen und die Vorschau.
+def _naechste_faelligkeit(cur, vertrag_id, beginn, rhythmus_monate, ende):
+    # Erster Termin nach der letzten bereits gebuchten Zahlung des Vertrags (sonst ab Beginn)
+    letzte = cur.execute(
+        "SELECT MAX(datum) AS datum FROM zahlungen WHERE vertrag_id = ?", (vertrag_id,)
+    ).fetchone()["datum"]
+    ab = date.fromisoformat(letzte) + timedelta(days=1) if letzte else beginn
+    termin = vertraege.naechster_termin(beginn, rhythmus_monate, ab, ende)
+    return termin.isoformat() if termin else None
+
+def add_vertrag(name, betrag, typ, rhythmus_monate, beginn, ende, kategorie_id, konto_id):
+    cent = betrag_cent(betrag, typ)
+    with transaction() as con:
+        cur = con.execute("""
+            INSERT INTO vertraege (name, betrag_cent, typ, kategorie_id, konto_id, rhythmus_monate, beginn, ende)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (name, cent, typ, kategorie_id, konto_id, rhythmus_monate, beginn, ende))
+        vertrag_id = cur.lastrowid
+        con.execute("UPDATE vertraege SET naechste_faelligkeit = ? WHERE id = ?", (
+            _naechste_faelligkeit(con.cursor(), vertrag_id, beginn, rhythmus_monate, ende), vertrag_id))
+        return vertrag_id
+
+def update_vertrag(vertrag_id, name, betrag, typ, rhythmus_monate, beginn, ende, kategorie_id, konto_id):
+    # Bereits gebuchte Zahlungen bleiben unverändert; nur künftige Termine folgen den neuen Werten
+    cent = betrag_cent(betrag, typ)
+    with transaction() as con:
+        con.execute("""
+            UPDATE vertraege
+            SET name = ?, betrag_cent = ?, typ = ?, kategorie_id = ?, konto_id = ?, rhythmus_monate = ?,
+                beginn = ?, ende = ?, naechste_faelligkeit = ?
+            WHERE id = ?
+        """, (name, cent, typ, kategorie_id, konto_id, rhythmus_monate, beginn, ende,
+              _naechste_faelligkeit(con.cursor(), vertrag_id, beginn, rhythmus_monate, ende), vertrag_id))
+
+def delete_vertrag(vertrag_id):
+    # Gebuchte Zahlungen bleiben erhalten, nur ohne Vertrag
+    with transaction() as con:
+        con.execute("UPDATE zahlungen SET vertrag_id = NULL WHERE vertrag_id = ?", (vertrag_id,))
+        con.execute("DELETE FROM vertraege WHERE id = ?", (vertrag_id,))
+
+def get_vertraege():
+    with connection() as con:
+        return con.execute("""
+            SELECT v.*, k.name AS kategorie_name, ko.name AS konto_name
+            FROM vertraege v
+            LEFT JOIN kategorien k ON v.kategorie_id = k.id
+            LEFT JOIN konten ko ON v.konto_id = ko.id
+            ORDER BY v.naechste_faelligkeit IS NULL, v.naechste_faelligkeit, v.name
+        """).fetchall()
+
+def vertraege_buchen(bis=None):
+    # Bucht alle Termine bis einschließlich `bis` (Standard: heute) in einer Transaktion und
+    # rückt naechste_faelligkeit weiter. Gelesen werden über den Teilindex nur fällige Verträge.
+    # Liefert die Anzahl der neuen Zahlungen.
+    bis = bis or date.today().isoformat()
+    with transaction() as con:
+        faellig = con.execute("""
+            SELECT id, name, betrag_cent, typ, kategorie_id, konto_id, rhythmus_monate, beginn, ende,
+                   naechste_faelligkeit
+            FROM vertraege
+            WHERE naechste_faelligkeit <= ?
+        """, (bis,)).fetchall()
+        grenze = _archiv_grenze(con)
+        buchungen, weiter = [], []
+        for v in faellig:
+            termine, naechste = vertraege.faellige_termine(v, bis)
+            for termin in termine:
+                datum = termin.isoformat()
+                if grenze and datum <= grenze:
+                    continue  # archivierte Jahre bleiben wie sie sind
+                buchungen.append((v["betrag_cent"], v["typ"], datum, v["kategorie_id"], v["konto_id"], v["name"],
+                                  fingerabdruck(datum, v["betrag_cent"], v["konto_id"], v["name"]), v["id"]))
+            weiter.append((naechste.isoformat() if naechste else None, v["id"]))
+        con.executemany("""
+            INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                   fingerabdruck, vertrag_id)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+        """, buchungen)
+        con.executemany("UPDATE vertraege SET naechste_faelligkeit = ? WHERE id = ?", weiter)
+    return len(buchungen)
+
+def vertraege_uebernehmen():
+    # Legt für bisher nur als "wiederkehrend" markierte Zahlungen ohne Vertrag je Gruppe gleicher
+    # Beschreibung, Betrag, Konto und Kategorie einen monatlichen Vertrag an und verknüpft die Zahlungen.
+    # Verpasste Termine werden nicht nachgebucht: fällig wird der erste Termin nach heute.
+    morgen = date.today() + timedelta(days=1)
+    with transaction() as con:
+        gruppen = {}
+        for z in con.execute("""
+            SELECT id, datum, IFNULL(beschreibung, '') AS name, betrag_cent, typ, kategorie_id, konto_id
+            FROM zahlungen
+            WHERE wiederkehrend = 1 AND vertrag_id IS NULL
+        """):
+            schluessel = (z["name"], z["betrag_cent"], z["typ"], z["kategorie_id"], z["konto_id"])
+            gruppe = gruppen.setdefault(schluessel, {"letzte": z["datum"], "ids": []})
+            gruppe["letzte"] = max(gruppe["letzte"], z["datum"])
+            gruppe["ids"].append(z["id"])
+        for (name, cent, typ, kategorie_id, konto_id), gruppe in gruppen.items():
+            letzte = date.fromisoformat(gruppe["letzte"])
+            naechste = vertraege.naechster_termin(letzte, 1, max(morgen, letzte + timedelta(days=1)))
+            cur = con.execute("""
+                INSERT INTO vertraege (name, betrag_cent, typ, kategorie_id, konto_id, rhythmus_monate, beginn,
+                                       naechste_faelligkeit)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+            """, (name, cent, typ, kategorie_id, konto_id, gruppe["letzte"], naechste.isoformat()))
+            con.executemany("UPDATE zahlungen SET vertrag_id = ? WHERE id = ?",
+                            ((cur.lastrowid, zahlung_id) for zahlung_id in gruppe["ids"]))
+    return len(gruppen)
+
+def get_vorschau(monate=12):
+    # Kontostand der nächsten Monate aus dem aktuellen Gesamtvermögen und den laufenden Verträgen
+    # in BASIS zum heutigen Kurs
+    heute = date.today().isoformat()
+    kurse = get_kurse()
+    with connection() as con:
+        saldo = sum(kurse.umrechnen(g["saldo_cent"], g["waehrung"], heute) for g in _salden_je_waehrung(con))
+        laufend = con.execute(f"""
+            SELECT v.betrag_cent, v.rhythmus_monate, v.beginn, v.ende, v.naechste_faelligkeit,
+                   IFNULL(ko.waehrung, '{BASIS}') AS waehrung
+            FROM vertraege v
+            LEFT JOIN konten ko ON v.konto_id = ko.id
+            WHERE v.naechste_faelligkeit IS NOT NULL
+        """).fetchall()
+    laufend = [dict(v, betrag_cent=kurse.umrechnen(v["betrag_cent"], v["waehrung"], heute)) for v in laufend]
+    return vertraege.vorschau(laufend, saldo, monate=monate)
+
+# --- Regeln (automatische Kategorisierung) ---
+# Das kompilierte Regelwerk wird je Datenbank zwischengespeichert und bei jeder Änderung an
+# den Regeln (auch über gelöschte Konten/Kategorien) verworfen.
+_regelwerke = {}
+
+def add_regel(art, muster, kategorie_id, betrag_min=None, betrag_max=None, konto_id=None, prioritaet=100):
+    pruefe_muster(art, muster)
+    _regelwerke.pop(DB_FILE, None)
+    with transaction() as con:
+        cur = con.execute("""
+            INSERT INTO regeln (art, muster, kategorie_id, betrag_min, betrag_max, konto_id, prioritaet)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (art, muster, kategorie_id, betrag_min, betrag_max, konto_id, prioritaet))
+        return cur.lastrowid
+
+def update_regel(regel_id, art, muster, kategorie_id, betrag_min=None, betrag_max=None, konto_id=None,
+                 prioritaet=100):
+    pruefe_muster(art, muster)
+    _regelwerke.pop(DB_FILE, None)
+    with transaction() as con:
+        con.execute("""
+            UPDATE regeln
+            SET art = ?, muster = ?, kategorie_id = ?, betrag_min = ?, betrag_max = ?, konto_id = ?, prioritaet = ?
+            WHERE id = ?
+        """, (art, muster, kategorie_id, betrag_min, betrag_max, konto_id, prioritaet, regel_id))
+
+def delete_regel(regel_id):
+    _regelwerke.pop(DB_FILE, None)
+    with transaction() as con:
+        con.execute("DELETE FROM regeln WHERE id = ?", (regel_id,))
+
+def get_regeln():
+    # In Auswertungsreihenfolge: kleinere Priorität zuerst, bei Gleichstand die ältere Regel
+    with connection() as con:
+        return con.execute("""
+            SELECT r.*, k.name AS kategorie_name, ko.name AS konto_name
+            FROM regeln r
+            LEFT JOIN kategorien k ON r.kategorie_id = k.id
+            LEFT JOIN konten ko ON r.konto_id = ko.id
+            ORDER BY r.prioritaet, r.id
+        """).fetchall()
+
+def get_regelwerk():
+    regelwerk = _regelwerke.get(DB_FILE)
+    if regelwerk is None:
+        regelwerk = _regelwerke[DB_FILE] = Regelwerk(get_regeln())
+    return regelwerk
+
+def kategorie_vorschlagen(beschreibung, betrag=None, typ="Ausgabe", konto_id=None):
+    # Für das Eingabeformular: kategorie_id der passenden Regel oder None
+    cent = betrag_cent(betrag, typ) if betrag is not None else None
+    return get_regelwerk().kategorie(beschreibung, cent, konto_id)
+
+def zahlungen_kategorisieren(alle=False):
+    # Ordnet Zahlungen ohne Kategorie (mit alle=True: sämtliche Zahlungen) per Regelwerk zu.
+    # Erst wird vollständig gelesen und klassifiziert, dann in einem executemany geschrieben.
+    # Liefert die Anzahl geänderter Zahlungen.
+    regelwerk = get_regelwerk()
+    if not len(regelwerk):
+        return 0
+    with transaction() as con:
+        cur = con.cursor()
+        cur.row_factory = None
+        cur.execute(
+            "SELECT id, beschreibung, betrag_cent, konto_id, kategorie_id FROM zahlungen"
+            + ("" if alle else " WHERE kategorie_id IS NULL")
+        )
+        kategorie = regelwerk.kategorie
+        aenderungen = []
+        while True:
+            zeilen = cur.fetchmany(20000)
+            if not zeilen:
+                break
+            for zahlung_id, beschreibung, cent, konto_id, alt in zeilen:
+                neu = kategorie(beschreibung, cent, konto_id)
+                if neu is not None and neu != alt:
+                    aenderungen.append((neu, zahlung_id))
+        con.executemany("UPDATE zahlungen SET kategorie_id = ? WHERE id = ?", aenderungen)
+    return len(aenderungen)
 
 def get_zahlung_by_id(zahlung_id):
-    con = get_connection()
+    with connection() as con:
+        return con.execute("""
+            SELECT *
+            FROM zahlungen
+            WHERE id = ?
+        """, (zahlung_id,)).fetchone()
+
+# --- Beinahe-Duplikate ---
+def _fenster_paare(zeilen, tage):
+    # zeilen: [(tag, id)] eines Buckets; liefert Paare, deren Datum höchstens `tage` auseinanderliegt
+    zeilen.sort()
+    paare = []
+    start = 0
+    for pos, (tag, zahlung_id) in enumerate(zeilen):
+        while tag - zeilen[start][0] > tage:
+            start += 1
+        paare.extend((andere, zahlung_id) for _, andere in zeilen[start:pos])
+    return paare
+
+def finde_beinahe_duplikate(tage=3, aehnlichkeit=0.9):
+    # Gruppen (Listen von ids) mit gleichem Konto und Betrag, deren Datum höchstens `tage`
+    # auseinanderliegt und deren Beschreibungen sich ähneln. Statt alle Paare zu vergleichen,
+    # wird idx_zahlungen_fingerabdruck gelesen: Buckets (Konto + Betrag) liegen dort zusammenhängend,
+    # verglichen wird nur innerhalb eines Buckets und Datumsfensters.
+    kandidaten = []
+    with connection() as con:
+        aktueller_bucket, zeilen = None, []
+        for row in con.execute("""
+            SELECT id, fingerabdruck, datum FROM zahlungen
+            WHERE fingerabdruck IS NOT NULL
+            ORDER BY fingerabdruck, datum
+        """):
+            b = bucket(row["fingerabdruck"])
+            if b != aktueller_bucket:
+                if len(zeilen) > 1:
+                    kandidaten.extend(_fenster_paare(zeilen, tage))
+                aktueller_bucket, zeilen = b, []
+            zeilen.append((date.fromisoformat(row["datum"]).toordinal(), row["id"]))
+        if len(zeilen) > 1:
+            kandidaten.extend(_fenster_paare(zeilen, tage))
+
+        # Beschreibungen nur für Kandidaten laden
+        ids = sorted({i for paar in kandidaten for i in paar})
+        beschreibungen = {}
+        for start in range(0, len(ids), 500):
+            teil = ids[start:start + 500]
+            platzhalter = ",".join("?" * len(teil))
+            for row in con.execute(f"SELECT id, beschreibung FROM zahlungen WHERE id IN ({platzhalter})", teil):
+                beschreibungen[row["id"]] = normalisiere_beschreibung(row["beschreibung"])
+
+    # Ähnliche Paare zu Gruppen zusammenfassen (Union-Find)
+    eltern = {}
+
+    def wurzel(x):
+        eltern.setdefault(x, x)
+        while eltern[x] != x:
+            eltern[x] = eltern[eltern[x]]
+            x = eltern[x]
+        return x
+
+    for a, b in kandidaten:
+        text_a, text_b = beschreibungen[a], beschreibungen[b]
+        if text_a == text_b or SequenceMatcher(None, text_a, text_b).ratio() >= aehnlichkeit:
+            eltern[wurzel(b)] = wurzel(a)
+    gruppen = {}
+    for x in list(eltern):
+        gruppen.setdefault(wurzel(x), []).append(x)
+    return sorted(sorted(g) for g in gruppen.values() if len(g) > 1)
+
+# --- Änderungsprotokoll: Rückgängig/Wiederholen und Änderungsfeed ---
+# Die Trigger aus _migration_protokoll schreiben jede Änderung an PROTOKOLL_TABELLEN mit.
+# Eine Aktion der Oberfläche läuft über protokolliert() und ist damit der Bereich
+# von < seq <= bis; zuruecknehmen/wiederholen spielen die Bilder dieses Bereichs zurück
+# bzw. erneut ein (das erzeugt selbst wieder Protokolleinträge). Der Feed liefert allen
+# Ansichten, welche Zeilen sich seit ihrem letzten Stand geändert haben.
+# Ein Massenimport (massenimport) schreibt statt der Bilder aller neuen Zahlungen nur einen
+# Sammeleintrag: zeilen_id SAMMELEINTRAG, nachher {"import": Anzahl, "von_id": ..., "bis_id": ...}.
+# Zurückgenommen wird er in einem Schritt (_import_setzen): die Zahlungen von_id..bis_id werden
+# gelöscht und dabei einzeln protokolliert; Wiederholen spielt sie aus diesen Bildern wieder ein.
+# Der Feed meldet für den Sammeleintrag die ganze Tabelle als geändert.
+# archivieren entfernt die Einträge der verschobenen Zahlungen und meldet sich mit einem Eintrag
+# für archive (zeilen_id = Jahr).
+SAMMELEINTRAG = 0
+PROTOKOLL_BEHALTEN = 200000  # Einträge; ältere entfernt protokoll_verdichten()
+
+class Konflikt(ValueError):
+    pass
+
+def _protokoll_stand(con):
+    row = con.execute("SELECT seq FROM sqlite_sequence WHERE name = 'protokoll'").fetchone()
+    return row[0] if row else 0
+
+def protokoll_stand():
+    with connection() as con:
+        return _protokoll_stand(con)
+
+def protokolliert(funktion, *args, **kwargs):
+    # Führt funktion in einer eigenen Transaktion aus; liefert (ergebnis, von, bis)
+    with transaction() as con:
+        von = _protokoll_stand(con)
+        ergebnis = funktion(*args, **kwargs)
+        return ergebnis, von, _protokoll_stand(con)
+
+def _zeile_setzen(con, tabelle, zeilen_id, soll, ziel):
+    # Prüft, dass die Zeile noch dem Bild soll entspricht, und bringt sie auf das Bild ziel
+    # (None = Zeile existiert nicht). Geschrieben werden nur abweichende Spalten, damit die
+    # abgeleiteten Tabellen nur die tatsächlich betroffenen Trigger sehen.
+    zeile = con.execute(f"SELECT * FROM {tabelle} WHERE id = ?", (zeilen_id,)).fetchone()
+    ist = None if zeile is None else {s: zeile[s] for s in (soll or ())}
+    if (zeile is None) != (soll is None) or ist != soll:
+        raise Konflikt(f"{tabelle} {zeilen_id} wurde inzwischen anderweitig geändert")
+    if ziel is None:
+        con.execute(f"DELETE FROM {tabelle} WHERE id = ?", (zeilen_id,))
+    elif zeile is None:
+        con.execute(f"INSERT INTO {tabelle} ({', '.join(ziel)}) VALUES ({', '.join('?' * len(ziel))})",
+                    list(ziel.values()))
+    else:
+        spalten = [s for s in ziel if s != "id" and ziel[s] != zeile[s]]
+        if spalten:
+            con.execute(f"UPDATE {tabelle} SET {', '.join(f'{s} = ?' for s in spalten)} WHERE id = ?",
+                        [ziel[s] for s in spalten] + [zeilen_id])
+
+def _import_setzen(con, seq, soll, ziel):
+    # Sammeleintrag (seq) eines Massenimports: entfernt alle importierten Zahlungen (ziel None) bzw.
+    # legt sie aus den Bildern wieder an, die das Entfernen nach seq protokolliert hat
+    sammel = soll or ziel
+    von_id, bis_id = sammel["von_id"], sammel["bis_id"]
+    vorhanden = con.execute("SELECT COUNT(*) FROM zahlungen WHERE id BETWEEN ? AND ?", (von_id, bis_id)).fetchone()[0]
+    if ziel is None:
+        if vorhanden != sammel["import"]:
+            raise Konflikt(f"Von {sammel['import']} importierten Zahlungen sind noch {vorhanden} vorhanden")
+        con.execute("DELETE FROM zahlungen WHERE id BETWEEN ? AND ?", (von_id, bis_id))
+        return
+    bilder = {}
+    for row in con.execute("""
+        SELECT zeilen_id, vorher FROM protokoll
+        WHERE seq > ? AND tabelle = 'zahlungen' AND zeilen_id BETWEEN ? AND ? AND nachher IS NULL
+        ORDER BY seq
+    """, (seq, von_id, bis_id)):
+        bilder[row["zeilen_id"]] = json.loads(row["vorher"])
+    if vorhanden or len(bilder) != sammel["import"]:
+        raise Konflikt("Die importierten Zahlungen lassen sich nicht wiederherstellen")
+    spalten = list(next(iter(bilder.values())))
+    con.executemany(f"INSERT INTO zahlungen ({', '.join(spalten)}) VALUES ({', '.join('?' * len(spalten))})",
+                    [[bild[s] for s in spalten] for bild in bilder.values()])
+
+def _protokoll_anwenden(von, bis, rueckwaerts):
+    with transaction() as con:
+        eintraege = con.execute(f"""
+            SELECT seq, tabelle, zeilen_id, vorher, nachher FROM protokoll
+            WHERE seq > ? AND seq <= ?
+            ORDER BY seq {"DESC" if rueckwaerts else "ASC"}
+        """, (von, bis)).fetchall()
+        if len(eintraege) != bis - von:
+            raise Konflikt("Die Änderung ist nicht mehr vollständig im Protokoll (verdichtet oder archiviert)")
+        tabellen = set()
+        for e in eintraege:
+            vorher = json.loads(e["vorher"]) if e["vorher"] else None
+            nachher = json.loads(e["nachher"]) if e["nachher"] else None
+            soll, ziel = (nachher, vorher) if rueckwaerts else (vorher, nachher)
+            try:
+                if e["zeilen_id"] == SAMMELEINTRAG:
+                    _import_setzen(con, e["seq"], soll, ziel)
+                else:
+                    _zeile_setzen(con, e["tabelle"], e["zeilen_id"], soll, ziel)
+            except sqlite3.IntegrityError as exc:
+                raise Konflikt(f"{e['tabelle']} {e['zeilen_id']}: {exc}") from exc
+            tabellen.add(e["tabelle"])
+    if tabellen & {"konten", "kategorien", "regeln"}:
+        _regelwerke.pop(DB_FILE, None)
+    if tabellen & {"konten", "kategorien"}:
+        stammdaten_neu_laden()
+    return len(eintraege)
+
+def zuruecknehmen(von, bis):
+    return _protokoll_anwenden(von, bis, rueckwaerts=True)
+
+def wiederholen(von, bis):
+    return _protokoll_anwenden(von, bis, rueckwaerts=False)
+
+def aenderungen_seit(seq):
+    # Änderungsfeed: (stand, {tabelle: {zeilen_id}}) aller Einträge nach seq; eine leere Menge
+    # heißt "ganze Tabelle" (Sammeleintrag). Statt der Tabellen None, wenn Einträge nach seq schon
+    # verdichtet sind (dann alles neu laden).
+    with connection() as con:
+        stand = _protokoll_stand(con)
+        erste = con.execute("SELECT MIN(seq) FROM protokoll").fetchone()[0]
+        if seq < (stand + 1 if erste is None else erste) - 1:
+            return stand, None
+        geaendert = {}
+        ganz = set()
+        for row in con.execute("SELECT tabelle, zeilen_id FROM protokoll WHERE seq > ?", (seq,)):
+            if row["zeilen_id"] == SAMMELEINTRAG:
+                ganz.add(row["tabelle"])
+            else:
+                geaendert.setdefault(row["tabelle"], set()).add(row["zeilen_id"])
+    for tabelle in ganz:
+        geaendert[tabelle] = set()
+    return stand, geaendert
+
+def protokoll_verdichten(behalten=PROTOKOLL_BEHALTEN):
+    # Hält das Protokoll begrenzt: nur die neuesten `behalten` Einträge bleiben.
+    # Läuft beim Programmstart, solange noch keine Aktion auf einen alten Bereich verweist.
+    with transaction() as con:
+        grenze = _protokoll_stand(con) - behalten
+        return con.execute("DELETE FROM protokoll WHERE seq <= ?", (grenze,)).rowcount
+
+# --- Archive: abgeschlossene Jahre in eigenen Dateien ---
+# archivieren(jahr) verschiebt die Zahlungen eines Jahres in "<datenbank>_<jahr>.db" neben der
+# Hauptdatei. Archiviert wird vom ältesten Jahr an, alle Archive liegen also zeitlich vor den
+# Zahlungen in main. Archive werden nur lesend und erst bei Bedarf angehängt (ATTACH, Schema
+# archiv_<jahr>); Abfragen auf laufende Jahre sehen nur main, Übersicht und Suche lesen die
+# Archive erst, wenn main keine weiteren Zeilen hat. Zahlungen in archivierten Jahren
+# lassen sich nicht mehr anlegen oder ändern; Salden und Monatswerte enthalten sie weiterhin.
+# Ändert eine Migration die Spalten von zahlungen, muss ZAHLUNG_SPALTEN in den Archiven
+# weiterhin lesbar bleiben (ARCHIV_VERSION).
+ARCHIV_VERSION = 1
+ZAHLUNG_SPALTEN = ("id, betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend, "
+                   "fingerabdruck, vertrag_id")
+# SQLite hängt höchstens 10 Datenbanken an eine Verbindung (main + 9); mehr Archive werden
+# in mehreren Abfragen nacheinander gelesen
+ARCHIV_JE_ABFRAGE = 9
+
+class ArchivFehler(ValueError):
+    pass
+
+def archivpfad(jahr):
+    stamm, endung = os.path.splitext(DB_FILE)
+    return f"{stamm}_{jahr}{endung or '.db'}"
+
+def archivjahre():
+    with connection() as con:
+        return _archivjahre_im(con)
+
+def get_archive():
+    with connection() as con:
+        return con.execute("SELECT jahr, anzahl, erstellt FROM archive ORDER BY jahr").fetchall()
+
+def _archivjahre_im(con, von=None, bis=None):
+    # Archivierte Jahre, die den Zeitraum von..bis (ISO-Datum, jeweils optional) berühren
+    return [row[0] for row in con.execute("""
+        SELECT jahr FROM archive
+        WHERE (? IS NULL OR jahr >= CAST(substr(?, 1, 4) AS INTEGER))
+          AND (? IS NULL OR jahr <= CAST(substr(?, 1, 4) AS INTEGER))
+        ORDER BY jahr
+    """, (von, von, bis, bis))]
+
+def _archiv_grenze(con):
+    # Letzter Tag des jüngsten archivierten Jahres (None ohne Archive)
+    jahr = con.execute("SELECT MAX(jahr) FROM archive").fetchone()[0]
+    return f"{jahr:04d}-12-31" if jahr is not None else None
+
+def _nicht_archiviert(con, datum):
+    grenze = _archiv_grenze(con)
+    if grenze and datum <= grenze:
+        raise ArchivFehler(f"{datum[:4]} ist archiviert, Zahlungen darin können nicht mehr geändert werden")
+
+def _archiv_verwendet(con, art, eintrag_id):
+    jahre = [row[0] for row in con.execute(
+        "SELECT jahr FROM archiv_verweise WHERE art = ? AND eintrag_id = ?", (art, eintrag_id))]
+    if jahre:
+        name = "Konto" if art == "konten" else "Kategorie"
+        raise ArchivFehler(f"{name} wird in archivierten Jahren verwendet ({', '.join(map(str, jahre))}) "
+                           "und kann nicht gelöscht werden")
+
+def _anhaengen(con, jahre):
+    # Hängt die Archive der jahre nur lesend an con an und liefert ihre Schemanamen. Andere
+    # Archive werden abgehängt, soweit sonst die Grenze überschritten würde. ATTACH und DETACH
+    # gehen nur außerhalb einer Transaktion; schon angehängte Archive sind auch darin lesbar.
+    angehaengt = [row["name"] for row in con.execute("PRAGMA database_list") if row["name"].startswith("archiv_")]
+    schemas = [f"archiv_{jahr}" for jahr in jahre]
+    fehlen = [(jahr, s) for jahr, s in zip(jahre, schemas) if s not in angehaengt]
+    if not fehlen:
+        return schemas
+    zu_viel = len(angehaengt) + len(fehlen) - ARCHIV_JE_ABFRAGE
+    for s in [s for s in angehaengt if s not in schemas][:max(zu_viel, 0)]:
+        con.execute(f"DETACH DATABASE {s}")
+    for jahr, s in fehlen:
+        pfad = Path(archivpfad(jahr)).resolve()
+        if not pfad.exists():
+            raise ArchivFehler(f"Archiv für {jahr} fehlt: {pfad}")
+        con.execute(f"ATTACH DATABASE ? AS {s}", (pfad.as_uri() + "?mode=ro",))
+    return schemas
+
+def _ueber_quellen(con, arm, params=(), nachsatz="", nachsatz_params=(), jahre=(), main=True,
+                   absteigend=False):
+    # Führt arm (ein SELECT über "{s}.zahlungen", s = Schema) für main und die Archive der jahre
+    # als UNION ALL aus, gefolgt von nachsatz (ORDER BY/LIMIT), und liefert die Cursor der Reihe
+    # nach. Gibt es mehr Archive als ARCHIV_JE_ABFRAGE, wird in Gruppen gelesen; da alle Archive
+    # vor main liegen, bleibt eine Sortierung nach Datum über die Gruppen hinweg erhalten.
+    jahre = list(jahre)
+    gruppen = [jahre[i:i + ARCHIV_JE_ABFRAGE] for i in range(0, len(jahre), ARCHIV_JE_ABFRAGE)] or [[]]
+    if absteigend:
+        gruppen = [gruppe[::-1] for gruppe in reversed(gruppen)]
+    for nummer, gruppe in enumerate(gruppen):
+        schemas = _anhaengen(con, gruppe)
+        if main and nummer == (0 if absteigend else len(gruppen) - 1):
+            schemas = ["main", *schemas] if absteigend else [*schemas, "main"]
+        if not schemas:
+            continue
+        cur = con.execute("\nUNION ALL\n".join(arm.format(s=s) for s in schemas) + nachsatz,
+                          (*params, ) * len(schemas) + tuple(nachsatz_params))
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+def ueber_archive(arm, blockgroesse=EXPORT_BLOCK, roh=False):
+    # Blockweise alle Zeilen von arm (SELECT über "{s}.zahlungen") aus main und allen Archiven,
+    # ohne Sortierung; roh=True liefert Tupel statt sqlite3.Row (z.B. für NumPy)
+    with connection() as con:
+        for cur in _ueber_quellen(con, arm, jahre=_archivjahre_im(con)):
+            if roh:
+                cur.row_factory = None
+            while True:
+                block = cur.fetchmany(blockgroesse)
+                if not block:
+                    break
+                yield block
+
+def _archiv_anlegen(con, schema):
     cur = con.cursor()
-    cur.execute("""
-        SELECT *
-        FROM zahlungen
-        WHERE id = ?
-    """, (zahlung_id,))
-    result = cur.fetchone()
-    con.close()
-    return result
\ No newline at end of file
+    cur.execute(f"""
+    CREATE TABLE {schema}.zahlungen (
+        id INTEGER PRIMARY KEY,
+        betrag_cent INTEGER NOT NULL,
+        typ TEXT NOT NULL,
+        datum TEXT NOT NULL,
+        kategorie_id INTEGER,
+        konto_id INTEGER,
+        beschreibung TEXT,
+        wiederkehrend INTEGER,
+        fingerabdruck TEXT,
+        vertrag_id INTEGER
+    )
+    """)
+    # Wie in main: Volltext über Beschreibung und die Namen zum Zeitpunkt der Archivierung
+    cur.execute(f"""
+    CREATE VIRTUAL TABLE {schema}.zahlungen_fts USING fts5(
+        beschreibung, kategorie, konto,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """)
+    cur.execute(f"PRAGMA {schema}.user_version = {ARCHIV_VERSION}")
+
+def _archiv_indizes(con, schema):
+    # Nach dem Befüllen angelegt (schneller als beim Einfügen mitzuführen); wie die Lesepfade in main
+    con.execute(f"CREATE INDEX {schema}.idx_zahlungen_datum_id ON zahlungen (datum, id, betrag_cent)")
+    con.execute(f"CREATE INDEX {schema}.idx_zahlungen_konto_datum ON zahlungen (konto_id, datum, id, betrag_cent)")
+    con.execute(f"CREATE INDEX {schema}.idx_zahlungen_kategorie_datum "
+                f"ON zahlungen (kategorie_id, datum, id, betrag_cent)")
+
+def archivieren(jahr):
+    # Verschiebt alle Zahlungen des (abgeschlossenen) Jahres in seine Archivdatei und verkleinert
+    # danach die Hauptdatei (VACUUM). Salden, Monatswerte und Beschreibungen behalten die Werte.
+    # Aus dem Änderungsprotokoll verschwinden nur die Einträge der verschobenen Zahlungen (Aktionen
+    # darauf lassen sich nicht mehr zurücknehmen); dafür kommt ein Eintrag für die neue Zeile in
+    # archive hinzu, an dem der Änderungsfeed die Archivierung meldet. Liefert die Anzahl
+    # verschobener Zahlungen.
+    jahr = int(jahr)
+    if jahr >= date.today().year:
+        raise ArchivFehler(f"{jahr} ist noch nicht abgeschlossen")
+    pfad, schema = archivpfad(jahr), f"archiv_{jahr}"
+    if os.path.exists(pfad):
+        raise ArchivFehler(f"{pfad} existiert bereits")
+    von, bis = f"{jahr:04d}-01-01", f"{jahr:04d}-12-31"
+    with connection() as con:
+        con.execute(f"ATTACH DATABASE ? AS {schema}", (os.path.abspath(pfad),))
+        try:
+            with transaction():
+                if con.execute("SELECT 1 FROM archive WHERE jahr = ?", (jahr,)).fetchone():
+                    raise ArchivFehler(f"{jahr} ist bereits archiviert")
+                erstes = con.execute("SELECT MIN(datum) FROM main.zahlungen").fetchone()[0]
+                if erstes is not None and erstes < von:
+                    raise ArchivFehler(f"Zuerst {erstes[:4]} archivieren (archiviert wird vom ältesten Jahr an)")
+                _archiv_anlegen(con, schema)
+                anzahl = con.execute(f"""
+                    INSERT INTO {schema}.zahlungen
+                    SELECT {ZAHLUNG_SPALTEN} FROM main.zahlungen
+                    WHERE datum BETWEEN ? AND ?
+                    ORDER BY datum, id
+                """, (von, bis)).rowcount
+                con.execute(f"""
+                    INSERT INTO {schema}.zahlungen_fts (rowid, beschreibung, kategorie, konto)
+                    SELECT z.id, z.beschreibung, k.name, ko.name
+                    FROM {schema}.zahlungen z
+                    LEFT JOIN main.kategorien k ON z.kategorie_id = k.id
+                    LEFT JOIN main.konten ko ON z.konto_id = ko.id
+                """)
+                _archiv_indizes(con, schema)
+                # Die Trigger ziehen die Beträge beim Löschen von Salden, Monatswerten und
+                # Beschreibungen ab; die Summen des Archivs kommen danach wieder hinzu
+                salden = con.execute(_SALDEN_SQL.format(s=schema)).fetchall()
+                monatswerte = con.execute(_MONATSWERTE_SQL.format(s=schema)).fetchall()
+                beschreibungen = con.execute(_BESCHREIBUNGEN_SQL.format(s=schema)).fetchall()
+                con.execute("DELETE FROM main.zahlungen WHERE datum BETWEEN ? AND ?", (von, bis))
+                con.executemany("""
+                    INSERT INTO salden (konto_id, saldo_cent) VALUES (?, ?)
+                    ON CONFLICT (konto_id) DO UPDATE SET saldo_cent = saldo_cent + excluded.saldo_cent
+                """, ((row["konto_id"] or 0, row["saldo_cent"]) for row in salden))
+                con.executemany("""
+                    INSERT INTO monatswerte (monat, kategorie_id, konto_id, typ, summe_cent, anzahl)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (tuple(row) for row in monatswerte))
+                con.executemany(_BESCHREIBUNG_ZUZAEHLEN.format(quelle=f"VALUES ({', '.join('?' * 9)})"),
+                                (tuple(row) for row in beschreibungen))
+                con.execute(f"""
+                    INSERT INTO archiv_verweise (art, eintrag_id, jahr)
+                    SELECT DISTINCT 'konten', konto_id, ? FROM {schema}.zahlungen WHERE konto_id IS NOT NULL
+                    UNION
+                    SELECT DISTINCT 'kategorien', kategorie_id, ? FROM {schema}.zahlungen WHERE kategorie_id IS NOT NULL
+                """, (jahr, jahr))
+                con.execute("INSERT INTO archive (jahr, anzahl) VALUES (?, ?)", (jahr, anzahl))
+                # Auch die Löscheinträge, die der Trigger eben geschrieben hat
+                con.execute(f"""
+                    DELETE FROM protokoll
+                    WHERE tabelle = 'zahlungen' AND zeilen_id IN (SELECT id FROM {schema}.zahlungen)
+                """)
+                con.execute("""
+                    INSERT INTO protokoll (tabelle, zeilen_id, nachher)
+                    VALUES ('archive', ?1, json_object('jahr', ?1, 'anzahl', ?2))
+                """, (jahr, anzahl))
+        except BaseException:
+            con.execute(f"DETACH DATABASE {schema}")
+            os.remove(pfad)
+            raise
+        con.execute(f"DETACH DATABASE {schema}")
+        con.execute("VACUUM")
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return anzahl
+
+# --- Laufzeitmessung ---
+# Alle öffentlichen Funktionen dieses Moduls werden umhüllt (siehe diagnose.py); ausgeschaltet
+# kostet das eine Abfrage von diagnose.aktiv je Aufruf. Ausgenommen sind die Kontextmanager und
+# reine Hilfsfunktionen ohne Datenbankzugriff, die in engen Schleifen laufen.
+diagnose.instrumentieren(globals(), "db", ausnahmen={
+    "connection", "transaction", "betrag_cent", "fts_abfrage", "archivpfad",
+    "get_stammdaten", "stammdaten_abonnieren", "stammdaten_abbestellen",
+})
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from queue import Queue, Empty, Full
+
+import diagnose
+
+# Werden für jede neue Verbindung einmal gesetzt
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",        # 64 MiB Page-Cache
+    "PRAGMA mmap_size=268435456",      # 256 MiB Memory-Mapping
+    "PRAGMA temp_store=MEMORY",
+)
+# Anzahl vorbereiteter Statements, die sqlite3 pro Verbindung vorhält
+STATEMENT_CACHE = 256
+MAX_IDLE = 4
+BUSY_TIMEOUT = 10.0
+
+
+class ConnectionPool:
+    def __init__(self, db_file, max_idle=MAX_IDLE):
+        self.db_file = db_file
+        self._idle = Queue(maxsize=max_idle)
+        self._local = threading.local()
+
+    def _neue_verbindung(self):
+        start = time.perf_counter() if diagnose.aktiv else None
+        con = sqlite3.connect(
+            self.db_file,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,          # Transaktionen steuern wir selbst
+            check_same_thread=False,       # Verbindungen wandern über den Pool zwischen Threads
+            cached_statements=STATEMENT_CACHE,
+            uri=True,                      # für ATTACH 'file:...?mode=ro' (Archive, siehe db.py)
+        )
+        con.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            con.execute(pragma)
+        if start is not None:
+            diagnose.erfassen("db", "sqlite3.connect", (time.perf_counter() - start) * 1000)
+        return con
+
+    @contextmanager
+    def connection(self):
+        lokal = self._local
+        con = getattr(lokal, "con", None)
+        if con is not None:
+            # Verschachtelter Aufruf im selben Thread: dieselbe Verbindung weiterverwenden
+            yield con
+            return
+
+        try:
+            con = self._idle.get_nowait()
+        except Empty:
+            con = self._neue_verbindung()
+        lokal.con = con
+        # SQL-Text für die Laufzeitmessung nur, solange sie läuft (der Callback kostet je Statement)
+        verfolgt = diagnose.aktiv
+        if verfolgt:
+            con.set_trace_callback(diagnose.sql_verfolgen)
+        try:
+            yield con
+        finally:
+            lokal.con = None
+            if verfolgt:
+                con.set_trace_callback(None)
+            if con.in_transaction:
+                con.rollback()
+            try:
+                self._idle.put_nowait(con)
+            except Full:
+                con.close()
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as con:
+            if con.in_transaction:
+                # Äußere Transaktion übernimmt Commit bzw. Rollback
+                yield con
+                return
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                yield con
+            except BaseException:
+                con.rollback()
+                raise
+            con.commit()
+
+    def close_all(self):
+        while True:
+            try:
+                con = self._idle.get_nowait()
+            except Empty:
+                break
+            con.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_file):
+    with _pools_lock:
+        pool = _pools.get(db_file)
+        if pool is None:
+            pool = _pools[db_file] = ConnectionPool(db_file)
+        return pool
+
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
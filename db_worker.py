@@ -0,0 +1,128 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QThread, Signal
+import diagnose
+
+
+class _Auftrag:
+    __slots__ = ("func", "args", "kwargs", "ergebnis", "fehler", "eingereiht")
+
+    def __init__(self, func, args, kwargs, ergebnis, fehler):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.ergebnis = ergebnis
+        self.fehler = fehler
+        # Für die Laufzeitmessung: wie lange der Auftrag hinter anderen gewartet hat
+        self.eingereiht = time.perf_counter() if diagnose.aktiv else None
+
+
+class _WorkerThread(QThread):
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+
+    def run(self):
+        self.worker._schleife()
+
+
+class DbWorker(QObject):
+    # Führt alle Datenbankaufrufe der Oberfläche nacheinander in einem eigenen Thread aus.
+    # Ergebnisse und Fehler kommen per Signal im GUI-Thread an und werden dort an die
+    # Callbacks übergeben. Aufträge mit gleichem "schluessel" (z.B. Neuladen einer Liste),
+    # die noch nicht gestartet sind, werden zusammengefasst: nur der neueste läuft.
+    beschaeftigt = Signal(bool)
+    fehler = Signal(object)                  # Exceptions ohne eigenen Fehler-Callback
+    _erledigt = Signal(object, object, object)  # (auftrag, ergebnis, exception)
+
+    def __init__(self, parent=None, synchron=False):
+        super().__init__(parent)
+        # synchron=True führt Aufträge sofort im aufrufenden Thread aus (Skripte, Benchmarks)
+        self.synchron = synchron
+        self._warteschlange = OrderedDict()
+        self._bedingung = threading.Condition()
+        self._zaehler = itertools.count()
+        self._offen = 0
+        self._laeuft = True
+        self._erledigt.connect(self._zustellen)
+        self._thread = None
+        if not synchron:
+            self._thread = _WorkerThread(self)
+            self._thread.start()
+
+    def ausfuehren(self, func, *args, ergebnis=None, fehler=None, schluessel=None, **kwargs):
+        auftrag = _Auftrag(func, args, kwargs, ergebnis, fehler)
+        if self.synchron:
+            try:
+                wert = func(*args, **kwargs)
+            except Exception as e:
+                self._melden(auftrag, None, e)
+            else:
+                self._melden(auftrag, wert, None)
+            return
+        with self._bedingung:
+            if schluessel is None:
+                schluessel = ("_", next(self._zaehler))
+            elif schluessel in self._warteschlange:
+                # Gleicher Auftrag wartet noch: ersetzen und ans Ende stellen,
+                # damit er auch die inzwischen eingereihten Schreibzugriffe sieht
+                del self._warteschlange[schluessel]
+                self._offen -= 1
+            self._warteschlange[schluessel] = auftrag
+            self._offen += 1
+            war_leer = self._offen == 1
+            self._bedingung.notify()
+        if war_leer:
+            self.beschaeftigt.emit(True)
+
+    def stoppen(self):
+        # Bereits eingereihte Aufträge (v.a. Schreibzugriffe) laufen noch zu Ende
+        if self._thread is None:
+            return
+        with self._bedingung:
+            self._laeuft = False
+            self._bedingung.notify()
+        self._thread.wait()
+        self._thread = None
+
+    # --- Worker-Thread ---
+    def _schleife(self):
+        while True:
+            with self._bedingung:
+                while self._laeuft and not self._warteschlange:
+                    self._bedingung.wait()
+                if not self._warteschlange:
+                    return
+                _, auftrag = self._warteschlange.popitem(last=False)
+            if auftrag.eingereiht is not None and diagnose.aktiv:
+                diagnose.erfassen("worker", "DbWorker.warteschlange",
+                                  (time.perf_counter() - auftrag.eingereiht) * 1000)
+            try:
+                wert = auftrag.func(*auftrag.args, **auftrag.kwargs)
+            except Exception as e:
+                self._erledigt.emit(auftrag, None, e)
+            else:
+                self._erledigt.emit(auftrag, wert, None)
+
+    # --- GUI-Thread ---
+    def _zustellen(self, auftrag, wert, exc):
+        # Erst melden, dann zählen: Folgeaufträge aus dem Callback lassen die Anzeige durchlaufen
+        try:
+            self._melden(auftrag, wert, exc)
+        finally:
+            with self._bedingung:
+                self._offen -= 1
+                leer = self._offen == 0
+        if leer:
+            self.beschaeftigt.emit(False)
+
+    def _melden(self, auftrag, wert, exc):
+        if exc is not None:
+            if auftrag.fehler is not None:
+                auftrag.fehler(exc)
+            else:
+                self.fehler.emit(exc)
+        elif auftrag.ergebnis is not None:
+            auftrag.ergebnis(wert)
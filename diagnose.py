@@ -0,0 +1,278 @@
+# Laufzeitmessung für Datenbankaufrufe und Aktualisierungen der Oberfläche
+#
+# db.py und die Refresh-Slots der Oberfläche werden beim Import mit instrumentieren() umhüllt.
+# Ausgeschaltet (Standard) prüft jede Hülle nur `aktiv` und ruft die Funktion direkt auf; die
+# SQL-Verfolgung (set_trace_callback) hängt nur an Verbindungen, solange gemessen wird (siehe
+# db_pool). Eingeschaltet wird per FINANZGURU_DIAGNOSE=1, --diagnose oder auf der versteckten
+# Diagnoseseite (Strg+Umschalt+D).
+#
+# Jede Messung landet in einem Ringpuffer (die letzten RING Einträge mit SQL und Zeilenzahl) und
+# im Histogramm ihrer Operation (alle Messungen seit dem Einschalten, für Perzentile).
+# Messungen ab LANGSAM_MS schreibt ein rotierendes Log (LOGDATEI, höchstens LOG_DATEIEN x
+# LOG_GROESSE). Die SQL-Texte enthalten die gebundenen Werte, also auch Beträge und
+# Beschreibungen; das Log bleibt deshalb lokal neben der Datenbank.
+import json
+import logging
+import logging.handlers
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from inspect import isgeneratorfunction
+
+RING = 2000
+LANGSAM_MS = float(os.environ.get("FINANZGURU_LANGSAM_MS", 100))
+LOGDATEI = os.environ.get("FINANZGURU_DIAGNOSE_LOG", "finanzguru_langsam.log")
+LOG_GROESSE = 1 << 20
+LOG_DATEIEN = 3
+SQL_JE_MESSUNG = 20      # weitere Statements einer Messung werden nur gezählt
+SQL_LAENGE = 500
+
+aktiv = False
+_ring = deque(maxlen=RING)
+_histogramme = {}
+_sperre = threading.Lock()
+_lokal = threading.local()
+_log = None
+_seit = None
+
+
+class Histogramm:
+    # Logarithmische Klassen: vier je Verdopplung ab 1 µs (gut 19 % Auflösung); Perzentile
+    # liefern die Obergrenze ihrer Klasse
+    __slots__ = ("art", "klassen", "anzahl", "summe", "maximum")
+    JE_VERDOPPLUNG = 4
+    KLASSEN = 4 * 36         # bis etwa 19 Stunden
+
+    def __init__(self, art):
+        self.art = art
+        self.klassen = [0] * self.KLASSEN
+        self.anzahl = 0
+        self.summe = 0.0
+        self.maximum = 0.0
+
+    def hinzufuegen(self, ms):
+        klasse = 0 if ms <= 0.001 else int(math.log2(ms * 1000) * self.JE_VERDOPPLUNG)
+        self.klassen[min(klasse, self.KLASSEN - 1)] += 1
+        self.anzahl += 1
+        self.summe += ms
+        self.maximum = max(self.maximum, ms)
+
+    def perzentil(self, p):
+        if not self.anzahl:
+            return 0.0
+        rang = math.ceil(self.anzahl * p / 100)
+        gezaehlt = 0
+        for klasse, anzahl in enumerate(self.klassen):
+            gezaehlt += anzahl
+            if gezaehlt >= rang:
+                return min(2 ** ((klasse + 1) / self.JE_VERDOPPLUNG) / 1000, self.maximum)
+        return self.maximum
+
+    def als_dict(self):
+        return {
+            "art": self.art,
+            "anzahl": self.anzahl,
+            "summe_ms": round(self.summe, 3),
+            "mittel_ms": round(self.summe / self.anzahl, 3) if self.anzahl else 0.0,
+            "p50_ms": round(self.perzentil(50), 3),
+            "p95_ms": round(self.perzentil(95), 3),
+            "p99_ms": round(self.perzentil(99), 3),
+            "max_ms": round(self.maximum, 3),
+        }
+
+
+# --- Ein- und Ausschalten ---
+def einschalten():
+    global aktiv, _seit
+    with _sperre:
+        if _seit is None:
+            _seit = datetime.now().isoformat(timespec="seconds")
+        aktiv = True
+
+
+def ausschalten():
+    # Gesammelte Werte bleiben erhalten (zuruecksetzen() verwirft sie)
+    global aktiv
+    aktiv = False
+
+
+def zuruecksetzen():
+    global _seit
+    with _sperre:
+        _ring.clear()
+        _histogramme.clear()
+        _seit = datetime.now().isoformat(timespec="seconds") if aktiv else None
+
+
+# --- Erfassen ---
+def sql_verfolgen(statement):
+    # Trace-Callback der Verbindungen (nur gesetzt, solange aktiv): ordnet das Statement der
+    # innersten laufenden Messung dieses Threads zu
+    stapel = getattr(_lokal, "stapel", None)
+    if stapel:
+        sql = stapel[-1]
+        if len(sql) < SQL_JE_MESSUNG:
+            sql.append(" ".join(statement.split())[:SQL_LAENGE])
+        else:
+            sql.append(None)
+
+
+def erfassen(art, name, ms, zeilen=None, sql=()):
+    if sql and sql[-1] is None:
+        weitere = sum(1 for s in sql if s is None)
+        sql = [s for s in sql if s is not None] + [f"... {weitere} weitere Statements"]
+    eintrag = (time.time(), art, name, ms, zeilen, tuple(sql), threading.current_thread().name)
+    with _sperre:
+        _ring.append(eintrag)
+        histogramm = _histogramme.get(name)
+        if histogramm is None:
+            histogramm = _histogramme[name] = Histogramm(art)
+        histogramm.hinzufuegen(ms)
+    if ms >= LANGSAM_MS:
+        _langsam_melden(eintrag)
+
+
+def _langsam_melden(eintrag):
+    global _log
+    if _log is None:
+        with _sperre:
+            if _log is None:
+                log = logging.getLogger("finanzguru.langsam")
+                log.propagate = False
+                log.setLevel(logging.INFO)
+                handler = logging.handlers.RotatingFileHandler(LOGDATEI, maxBytes=LOG_GROESSE,
+                                                               backupCount=LOG_DATEIEN, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                log.addHandler(handler)
+                _log = log
+    zeit, art, name, ms, zeilen, sql, thread = eintrag
+    text = f"{ms:.1f} ms {art} {name} [{thread}]"
+    if zeilen is not None:
+        text += f" {zeilen} Zeilen"
+    for statement in sql:
+        text += f"\n    {statement}"
+    _log.info(text)
+
+
+def _zeilen(ergebnis):
+    if isinstance(ergebnis, (list, tuple, dict, set)):
+        return len(ergebnis)
+    if isinstance(ergebnis, int) and not isinstance(ergebnis, bool):
+        return ergebnis
+    return None
+
+
+def _messen(func, art, name, args, kwargs):
+    stapel = getattr(_lokal, "stapel", None)
+    if stapel is None:
+        stapel = _lokal.stapel = []
+    sql = []
+    stapel.append(sql)
+    start = time.perf_counter()
+    try:
+        ergebnis = func(*args, **kwargs)
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        stapel.pop()
+    erfassen(art, name, ms, _zeilen(ergebnis), sql)
+    return ergebnis
+
+
+def _iterieren(erzeuger, art, name):
+    # Generatoren (z.B. zahlungen_lesen): gemessen wird nur die Zeit im Generator, nicht beim
+    # Verbraucher; Zeilen = gelieferte Elemente (Blöcke zählen mit ihrer Länge)
+    stapel = getattr(_lokal, "stapel", None)
+    if stapel is None:
+        stapel = _lokal.stapel = []
+    sql = []
+    ms = 0.0
+    zeilen = 0
+    try:
+        while True:
+            stapel.append(sql)
+            start = time.perf_counter()
+            try:
+                wert = next(erzeuger)
+            except StopIteration:
+                return
+            finally:
+                ms += (time.perf_counter() - start) * 1000
+                stapel.pop()
+            zeilen += len(wert) if isinstance(wert, list) else 1
+            yield wert
+    finally:
+        erzeuger.close()
+        erfassen(art, name, ms, zeilen, sql)
+
+
+def umhuellen(func, art, name=None):
+    name = name or func.__qualname__
+    if isgeneratorfunction(func):
+        @wraps(func)
+        def huelle(*args, **kwargs):
+            if not aktiv:
+                return func(*args, **kwargs)
+            return _iterieren(func(*args, **kwargs), art, name)
+    else:
+        @wraps(func)
+        def huelle(*args, **kwargs):
+            if not aktiv:
+                return func(*args, **kwargs)
+            return _messen(func, art, name, args, kwargs)
+    return huelle
+
+
+def instrumentieren(ziel, art, namen=None, ausnahmen=()):
+    # ziel: globals() eines Moduls (alle öffentlichen Funktionen, die dort definiert sind) oder
+    # eine Klasse (die Methoden in namen). Muss vor `from modul import ...` der Aufrufer laufen.
+    if isinstance(ziel, dict):
+        modul = ziel["__name__"]
+        for name, wert in list(ziel.items()):
+            if (callable(wert) and not isinstance(wert, type) and not name.startswith("_")
+                    and getattr(wert, "__module__", None) == modul and name not in ausnahmen):
+                ziel[name] = umhuellen(wert, art, f"{modul}.{name}")
+        return
+    for name in namen:
+        setattr(ziel, name, umhuellen(getattr(ziel, name), art, f"{ziel.__name__}.{name}"))
+
+
+# --- Auswerten ---
+def operationen():
+    # [(name, histogramm.als_dict())], langsamste Summe zuerst
+    with _sperre:
+        werte = [(name, h.als_dict()) for name, h in _histogramme.items()]
+    return sorted(werte, key=lambda w: w[1]["summe_ms"], reverse=True)
+
+
+def letzte(anzahl=RING):
+    # Jüngste Messungen zuerst
+    with _sperre:
+        eintraege = list(_ring)[-anzahl:]
+    return [{
+        "zeit": datetime.fromtimestamp(zeit).isoformat(timespec="milliseconds"),
+        "art": art, "name": name, "ms": round(ms, 3), "zeilen": zeilen, "sql": list(sql), "thread": thread,
+    } for zeit, art, name, ms, zeilen, sql, thread in reversed(eintraege)]
+
+
+def als_dict():
+    return {
+        "aktiv": aktiv,
+        "seit": _seit,
+        "langsam_ms": LANGSAM_MS,
+        "logdatei": os.path.abspath(LOGDATEI),
+        "operationen": dict(operationen()),
+        "letzte": letzte(),
+    }
+
+
+def speichern(pfad):
+    with open(pfad, "w", encoding="utf-8") as f:
+        json.dump(als_dict(), f, ensure_ascii=False, indent=2)
+
+
+if os.environ.get("FINANZGURU_DIAGNOSE") == "1":
+    einschalten()
@@ -0,0 +1,140 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QCheckBox, QPushButton, QSplitter, QFileDialog, QMessageBox,
+    QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView, QPlainTextEdit
+)
+from PySide6.QtCore import Qt, QTimer
+import diagnose
+
+SPALTEN_OPERATIONEN = ["Operation", "Art", "Anzahl", "p50 [ms]", "p95 [ms]", "p99 [ms]", "Max [ms]", "Summe [ms]"]
+SPALTEN_LETZTE = ["Zeit", "Art", "Operation", "ms", "Zeilen", "Thread"]
+LETZTE_ANZEIGEN = 200
+INTERVALL_MS = 1000
+
+
+def _zelle(wert, rechts=False):
+    item = QTableWidgetItem(wert)
+    if rechts:
+        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    return item
+
+
+class DiagnoseWidget(QWidget):
+    # Versteckte Seite (Strg+Umschalt+D): Messung ein/aus, Perzentile je Operation, die letzten
+    # Messungen mit ihrem SQL. Aktualisiert sich nur, solange sie sichtbar ist.
+    def __init__(self):
+        super().__init__()
+        self.letzte = []
+
+        layout = QVBoxLayout()
+        kopf = QHBoxLayout()
+        self.check_aktiv = QCheckBox("Messen")
+        self.check_aktiv.setChecked(diagnose.aktiv)
+        self.check_aktiv.toggled.connect(self.umschalten)
+        kopf.addWidget(self.check_aktiv)
+        self.label_info = QLabel()
+        self.label_info.setStyleSheet("color: gray;")
+        kopf.addWidget(self.label_info)
+        kopf.addStretch()
+        btn_zuruecksetzen = QPushButton("Zurücksetzen")
+        btn_zuruecksetzen.clicked.connect(self.zuruecksetzen)
+        kopf.addWidget(btn_zuruecksetzen)
+        btn_speichern = QPushButton("Als JSON speichern")
+        btn_speichern.clicked.connect(self.speichern)
+        kopf.addWidget(btn_speichern)
+        layout.addLayout(kopf)
+
+        self.table_operationen = self._tabelle(SPALTEN_OPERATIONEN)
+        self.table_letzte = self._tabelle(SPALTEN_LETZTE)
+        self.table_letzte.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table_letzte.itemSelectionChanged.connect(self.sql_zeigen)
+        self.text_sql = QPlainTextEdit()
+        self.text_sql.setReadOnly(True)
+        self.text_sql.setPlaceholderText("SQL der ausgewählten Messung")
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.table_operationen)
+        splitter.addWidget(self.table_letzte)
+        splitter.addWidget(self.text_sql)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(INTERVALL_MS)
+        self.timer.timeout.connect(self.aktualisieren)
+
+    def _tabelle(self, spalten):
+        table = QTableWidget(0, len(spalten))
+        table.setHorizontalHeaderLabels(spalten)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        return table
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.check_aktiv.setChecked(diagnose.aktiv)
+        self.aktualisieren()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def umschalten(self, an):
+        if an:
+            diagnose.einschalten()
+        else:
+            diagnose.ausschalten()
+        self.aktualisieren()
+
+    def zuruecksetzen(self):
+        diagnose.zuruecksetzen()
+        self.aktualisieren()
+
+    def speichern(self):
+        pfad, _ = QFileDialog.getSaveFileName(self, "Messwerte speichern", "finanzguru_diagnose.json",
+                                              "JSON (*.json)")
+        if not pfad:
+            return
+        try:
+            diagnose.speichern(pfad)
+        except OSError as e:
+            QMessageBox.warning(self, "Speichern fehlgeschlagen", str(e))
+
+    def aktualisieren(self):
+        operationen = diagnose.operationen()
+        self.label_info.setText(f"langsam ab {diagnose.LANGSAM_MS:.0f} ms → {diagnose.LOGDATEI}")
+        self.table_operationen.setRowCount(len(operationen))
+        for zeile, (name, h) in enumerate(operationen):
+            werte = [h["anzahl"], h["p50_ms"], h["p95_ms"], h["p99_ms"], h["max_ms"], h["summe_ms"]]
+            self.table_operationen.setItem(zeile, 0, _zelle(name))
+            self.table_operationen.setItem(zeile, 1, _zelle(h["art"]))
+            for spalte, wert in enumerate(werte, start=2):
+                self.table_operationen.setItem(zeile, spalte, _zelle(f"{wert:,}" if spalte == 2 else f"{wert:.2f}", True))
+
+        # Auswahl über die Aktualisierung hinweg halten (neue Messungen schieben die Zeilen)
+        gewaehlt = self._gewaehlt()
+        self.letzte = diagnose.letzte(LETZTE_ANZEIGEN)
+        self.table_letzte.blockSignals(True)
+        self.table_letzte.setRowCount(len(self.letzte))
+        for zeile, m in enumerate(self.letzte):
+            self.table_letzte.setItem(zeile, 0, _zelle(m["zeit"][11:]))
+            self.table_letzte.setItem(zeile, 1, _zelle(m["art"]))
+            self.table_letzte.setItem(zeile, 2, _zelle(m["name"]))
+            self.table_letzte.setItem(zeile, 3, _zelle(f"{m['ms']:.2f}", True))
+            self.table_letzte.setItem(zeile, 4, _zelle("" if m["zeilen"] is None else str(m["zeilen"]), True))
+            self.table_letzte.setItem(zeile, 5, _zelle(m["thread"]))
+            if gewaehlt is not None and (m["zeit"], m["name"]) == gewaehlt:
+                self.table_letzte.selectRow(zeile)
+        self.table_letzte.blockSignals(False)
+
+    def _gewaehlt(self):
+        zeile = self.table_letzte.currentRow()
+        if 0 <= zeile < len(self.letzte) and self.table_letzte.selectedItems():
+            return self.letzte[zeile]["zeit"], self.letzte[zeile]["name"]
+        return None
+
+    def sql_zeigen(self):
+        zeile = self.table_letzte.currentRow()
+        if 0 <= zeile < len(self.letzte):
+            self.text_sql.setPlainText("\n\n".join(self.letzte[zeile]["sql"]) or "(kein SQL)")
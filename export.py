@@ -0,0 +1,217 @@
+# Export der Zahlungen (CSV, Parquet, XLSX) mit konstantem Speicherbedarf
+#
+# Die Zahlungen kommen blockweise aus db.zahlungen_lesen (offener Cursor, fetchmany) und gehen
+# Block für Block an den Schreiber; im Speicher liegt nie mehr als ein Block. Parquet schreibt
+# jeden Block als eigene Row Group, XLSX nutzt den write-only-Modus von openpyxl.
+# Geschrieben wird in eine temporäre Datei, die erst am Ende die Zieldatei ersetzt.
+#
+#   python export.py zahlungen.csv [--format csv|parquet|xlsx] [--von 2024-01-01] [--bis 2024-12-31]
+#                                  [--konto Girokonto] [--kategorie Miete] [--text rewe]
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import date
+
+import db
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow ist optional; ohne gibt es keinen Parquet-Export
+    pa = pq = None
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl ist optional; ohne gibt es keinen XLSX-Export
+    Workbook = None
+
+FORMATE = ("csv", "parquet", "xlsx")
+PAKETE = {"parquet": "pyarrow", "xlsx": "openpyxl"}
+
+# Spaltennamen wie sie importer.py (CSV_SPALTEN) wiedererkennt
+KOPF = ("Datum", "Betrag", "Typ", "Konto", "Kategorie", "Beschreibung", "Wiederkehrend")
+# Zeilen je Tabellenblatt in Excel (einschließlich Kopfzeile); darüber geht es im nächsten Blatt weiter
+XLSX_MAX_ZEILEN = 1048576
+
+
+class ExportFehler(ValueError):
+    pass
+
+
+class ExportAbgebrochen(ExportFehler):
+    # Aus dem fortschritt-Callback geworfen, bricht den Export ab; die Zieldatei bleibt unverändert
+    pass
+
+
+def verfuegbare_formate():
+    return [f for f in FORMATE if f == "csv" or (f == "parquet" and pq) or (f == "xlsx" and Workbook)]
+
+
+def erkenne_format(pfad):
+    endung = os.path.splitext(pfad)[1].lower().lstrip(".")
+    if endung in FORMATE:
+        return endung
+    raise ExportFehler(f"Unbekanntes Dateiformat: {pfad}")
+
+
+def _betrag_text(cent):
+    # Dezimalkomma ohne Tausenderpunkte ("-1234,56"), so lesen es Excel und parse_betrag
+    euro, rest = divmod(abs(cent), 100)
+    return f"{'-' if cent < 0 else ''}{euro},{rest:02d}"
+
+
+def _namen(stammdaten, art):
+    # Schnappschuss {id: name} für die Zeilenschleife (ein dict-Zugriff statt Methodenaufruf je Zeile)
+    return {e["id"]: e["name"] for e in stammdaten.liste(art)}
+
+
+def _schreibe_csv(pfad, bloecke, stammdaten):
+    # Semikolon und UTF-8 mit BOM, wie es ein deutsches Excel erwartet
+    konten, kategorien = _namen(stammdaten, "konten"), _namen(stammdaten, "kategorien")
+    with open(pfad, "w", encoding="utf-8-sig", newline="") as datei:
+        writer = csv.writer(datei, delimiter=";")
+        writer.writerow(KOPF)
+        for block in bloecke:
+            writer.writerows(
+                (z["datum"], _betrag_text(z["betrag_cent"]), z["typ"],
+                 konten.get(z["konto_id"], ""), kategorien.get(z["kategorie_id"], ""),
+                 z["beschreibung"] or "", "ja" if z["wiederkehrend"] else "")
+                for z in block
+            )
+
+
+def _schreibe_parquet(pfad, bloecke, stammdaten):
+    # Spaltenweise je Block; Beträge als ganze Cent, damit nichts gerundet wird
+    konten, kategorien = _namen(stammdaten, "konten"), _namen(stammdaten, "kategorien")
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("datum", pa.date32()),
+        ("betrag_cent", pa.int64()),
+        ("typ", pa.string()),
+        ("konto", pa.string()),
+        ("kategorie", pa.string()),
+        ("beschreibung", pa.string()),
+        ("wiederkehrend", pa.bool_()),
+    ])
+    writer = pq.ParquetWriter(pfad, schema, compression="zstd")
+    try:
+        for block in bloecke:
+            writer.write_table(pa.table({
+                "id": [z["id"] for z in block],
+                "datum": [date.fromisoformat(z["datum"]) for z in block],
+                "betrag_cent": [z["betrag_cent"] for z in block],
+                "typ": [z["typ"] for z in block],
+                "konto": [konten.get(z["konto_id"]) for z in block],
+                "kategorie": [kategorien.get(z["kategorie_id"]) for z in block],
+                "beschreibung": [z["beschreibung"] for z in block],
+                "wiederkehrend": [bool(z["wiederkehrend"]) for z in block],
+            }, schema=schema))
+    finally:
+        writer.close()
+
+
+def _schreibe_xlsx(pfad, bloecke, stammdaten):
+    # Datum als Excel-Datum, Betrag als Zahl in Euro
+    konten, kategorien = _namen(stammdaten, "konten"), _namen(stammdaten, "kategorien")
+    mappe = Workbook(write_only=True)
+    blatt, zeilen = None, XLSX_MAX_ZEILEN
+    for block in bloecke:
+        for z in block:
+            if zeilen == XLSX_MAX_ZEILEN:
+                nummer = len(mappe.worksheets) + 1
+                blatt = mappe.create_sheet("Zahlungen" if nummer == 1 else f"Zahlungen {nummer}")
+                blatt.append(KOPF)
+                zeilen = 1
+            blatt.append((date.fromisoformat(z["datum"]), z["betrag_cent"] / 100, z["typ"],
+                          konten.get(z["konto_id"]), kategorien.get(z["kategorie_id"]),
+                          z["beschreibung"], "ja" if z["wiederkehrend"] else None))
+            zeilen += 1
+    if blatt is None:
+        mappe.create_sheet("Zahlungen").append(KOPF)
+    mappe.save(pfad)
+
+
+SCHREIBER = {
+    "csv": _schreibe_csv,
+    "parquet": _schreibe_parquet,
+    "xlsx": _schreibe_xlsx,
+}
+
+
+class ExportErgebnis:
+    def __init__(self, anzahl, sekunden, pfad):
+        self.anzahl = anzahl
+        self.sekunden = sekunden
+        self.pfad = pfad
+
+    def __str__(self):
+        zeilen_pro_sekunde = self.anzahl / self.sekunden if self.sekunden > 0 else float("inf")
+        return f"{self.anzahl} Zahlungen in {self.sekunden:.2f} s ({zeilen_pro_sekunde:,.0f} Zeilen/s)"
+
+
+def exportiere(pfad, format=None, suchfilter=None, fortschritt=None, blockgroesse=db.EXPORT_BLOCK):
+    # suchfilter wie in der Übersicht (von, bis, konto_id, kategorie_id, betrag_min/max, text)
+    # fortschritt(anzahl, anteil): wird nach jedem geschriebenen Block aufgerufen
+    format = format or erkenne_format(pfad)
+    if format not in FORMATE:
+        raise ExportFehler(f"Unbekanntes Format: {format}")
+    if format not in verfuegbare_formate():
+        raise ExportFehler(f"Für den Export als {format} fehlt das Paket {PAKETE[format]}")
+    start = time.perf_counter()
+    stammdaten = db.get_stammdaten()
+    gesamt = db.zahlungen_zaehlen(suchfilter) if fortschritt else 0
+    anzahl = 0
+
+    def bloecke():
+        nonlocal anzahl
+        for block in db.zahlungen_lesen(suchfilter, blockgroesse=blockgroesse):
+            yield block
+            anzahl += len(block)
+            if fortschritt:
+                fortschritt(anzahl, min(anzahl / gesamt, 1.0) if gesamt else 1.0)
+
+    temp = f"{pfad}.tmp"
+    try:
+        SCHREIBER[format](temp, bloecke(), stammdaten)
+        os.replace(temp, pfad)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return ExportErgebnis(anzahl, time.perf_counter() - start, pfad)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zahlungen exportieren")
+    parser.add_argument("datei")
+    parser.add_argument("--format", choices=FORMATE, help="Standard: anhand der Dateiendung")
+    parser.add_argument("--von", help="Erstes Datum (JJJJ-MM-TT)")
+    parser.add_argument("--bis", help="Letztes Datum (JJJJ-MM-TT)")
+    parser.add_argument("--konto", help="Nur Zahlungen dieses Kontos")
+    parser.add_argument("--kategorie", help="Nur Zahlungen dieser Kategorie")
+    parser.add_argument("--text", help="Nur Zahlungen, die diese Wörter enthalten")
+    parser.add_argument("--db", default=db.DB_FILE, help="Pfad zur Datenbank (Standard: %(default)s)")
+    args = parser.parse_args(argv)
+
+    db.DB_FILE = args.db
+    db.init_db()
+    stammdaten = db.get_stammdaten()
+    suchfilter = {"von": args.von, "bis": args.bis, "text": args.text}
+    for art, name in (("konten", args.konto), ("kategorien", args.kategorie)):
+        if name is not None:
+            if stammdaten.id(art, name) is None:
+                print(f"Unbekannt: {name}", file=sys.stderr)
+                return 1
+            suchfilter["konto_id" if art == "konten" else "kategorie_id"] = stammdaten.id(art, name)
+    try:
+        ergebnis = exportiere(args.datei, format=args.format, suchfilter=suchfilter)
+    except ExportFehler as e:
+        print(f"{args.datei}: {e}", file=sys.stderr)
+        return 1
+    print(f"{args.datei}: {ergebnis}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from PySide6.QtCore import QThread, Signal
+import export
+
+DATEIFILTER = {"csv": "CSV (*.csv)", "parquet": "Parquet (*.parquet)", "xlsx": "Excel (*.xlsx)"}
+
+
+class ExportThread(QThread):
+    fortschritt = Signal(int, float)
+    fertig = Signal(object)
+    fehler = Signal(str)
+
+    def __init__(self, pfad, format, suchfilter, parent=None):
+        super().__init__(parent)
+        self.pfad = pfad
+        self.format = format
+        self.suchfilter = suchfilter
+
+    def run(self):
+        def melden(anzahl, anteil):
+            if self.isInterruptionRequested():
+                raise export.ExportAbgebrochen("Export abgebrochen")
+            self.fortschritt.emit(anzahl, anteil)
+
+        try:
+            ergebnis = export.exportiere(self.pfad, format=self.format, suchfilter=self.suchfilter,
+                                         fortschritt=melden)
+        except Exception as e:
+            self.fehler.emit(str(e))
+        else:
+            self.fertig.emit(ergebnis)
+
+
+def exportieren(parent, suchfilter):
+    # Fragt nach der Zieldatei und exportiert im Hintergrund; das Fenster bleibt bedienbar.
+    # Liefert den laufenden ExportThread (oder None, wenn abgebrochen wurde).
+    formate = export.verfuegbare_formate()
+    pfad, gewaehlt = QFileDialog.getSaveFileName(
+        parent, "Zahlungen exportieren", "zahlungen.csv", ";;".join(DATEIFILTER[f] for f in formate)
+    )
+    if not pfad:
+        return None
+    format = next((f for f in formate if DATEIFILTER[f] == gewaehlt), None)
+    if format is None:
+        format = export.erkenne_format(pfad)
+    elif not pfad.lower().endswith(f".{format}"):
+        pfad += f".{format}"
+
+    fortschritt = QProgressDialog("Exportiere Zahlungen …", "Abbrechen", 0, 100, parent)
+    fortschritt.setWindowTitle("Export")
+    fortschritt.setMinimumDuration(500)
+    thread = ExportThread(pfad, format, suchfilter, parent)
+
+    def gemeldet(anzahl, anteil):
+        fortschritt.setLabelText(f"{anzahl:,} Zahlungen exportiert …".replace(",", "."))
+        fortschritt.setValue(int(anteil * 100))
+
+    def fertig(ergebnis):
+        fortschritt.reset()
+        QMessageBox.information(parent, "Export", f"{ergebnis}\nGespeichert in {ergebnis.pfad}")
+
+    def fehler(meldung):
+        fortschritt.reset()
+        if not thread.isInterruptionRequested():
+            QMessageBox.warning(parent, "Export fehlgeschlagen", meldung)
+
+    thread.fortschritt.connect(gemeldet)
+    thread.fertig.connect(fertig)
+    thread.fehler.connect(fehler)
+    thread.finished.connect(fortschritt.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    fortschritt.canceled.connect(thread.requestInterruption)
+    thread.start()
+    return thread
@@ -0,0 +1,147 @@
+from PySide6.QtWidgets import (
+    QWidget, QHBoxLayout, QLabel, QLineEdit, QComboBox, QDateEdit, QPushButton
+)
+from PySide6.QtCore import QDate, QTimer, Signal
+from money import parse_betrag
+from stammdaten_qt import combo_anwenden
+
+# Eingaben werden gesammelt und erst nach kurzer Tipp-Pause als Filter gemeldet
+VERZOEGERUNG_MS = 250
+_KEIN_DATUM = QDate(1900, 1, 1)
+
+
+class FilterLeiste(QWidget):
+    filter_geaendert = Signal(object)
+
+    def __init__(self, konten=None, kategorien=None, verzoegerung_ms=VERZOEGERUNG_MS):
+        super().__init__()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(verzoegerung_ms)
+        self._timer.timeout.connect(self._melden)
+        self._letzter = {}
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.input_text = QLineEdit()
+        self.input_text.setPlaceholderText("Suchen (Beschreibung, Kategorie, Konto)…")
+        self.input_text.setClearButtonEnabled(True)
+        self.input_text.textChanged.connect(self._timer.start)
+        layout.addWidget(self.input_text, 3)
+
+        layout.addWidget(QLabel("Von:"))
+        self.input_von = self._datumsfeld()
+        layout.addWidget(self.input_von)
+        layout.addWidget(QLabel("Bis:"))
+        self.input_bis = self._datumsfeld()
+        layout.addWidget(self.input_bis)
+
+        layout.addWidget(QLabel("Betrag:"))
+        self.input_betrag_min = QLineEdit()
+        self.input_betrag_min.setPlaceholderText("ab")
+        self.input_betrag_min.setMaximumWidth(80)
+        self.input_betrag_min.textChanged.connect(self._timer.start)
+        layout.addWidget(self.input_betrag_min)
+        self.input_betrag_max = QLineEdit()
+        self.input_betrag_max.setPlaceholderText("bis")
+        self.input_betrag_max.setMaximumWidth(80)
+        self.input_betrag_max.textChanged.connect(self._timer.start)
+        layout.addWidget(self.input_betrag_max)
+
+        self.combo_konto = QComboBox()
+        self.combo_konto.currentIndexChanged.connect(self._timer.start)
+        layout.addWidget(self.combo_konto)
+        self.combo_kategorie = QComboBox()
+        self.combo_kategorie.currentIndexChanged.connect(self._timer.start)
+        layout.addWidget(self.combo_kategorie)
+        self.update_konten(konten or [])
+        self.update_kategorien(kategorien or [])
+
+        self.btn_zuruecksetzen = QPushButton("Zurücksetzen")
+        self.btn_zuruecksetzen.clicked.connect(self.zuruecksetzen)
+        layout.addWidget(self.btn_zuruecksetzen)
+        self.setLayout(layout)
+
+    def _datumsfeld(self):
+        # Kleinstes Datum steht für "kein Datum" und wird als "—" angezeigt
+        feld = QDateEdit()
+        feld.setCalendarPopup(True)
+        feld.setMinimumDate(_KEIN_DATUM)
+        feld.setSpecialValueText("—")
+        feld.setDate(_KEIN_DATUM)
+        feld.dateChanged.connect(self._timer.start)
+        return feld
+
+    def _combo_fuellen(self, combo, leer_text, eintraege):
+        # Auswahl (per id) bleibt beim Neuaufbau erhalten, ohne dabei einen Filterwechsel auszulösen
+        auswahl = combo.currentData()
+        combo.blockSignals(True)
+        combo.clear()
+        combo.addItem(leer_text, userData=None)
+        for e in eintraege:
+            combo.addItem(e["name"], userData=e["id"])
+        index = combo.findData(auswahl) if auswahl is not None else 0
+        combo.setCurrentIndex(max(index, 0))
+        combo.blockSignals(False)
+        if auswahl is not None and index < 0:
+            self._timer.start()
+
+    def update_konten(self, konten):
+        self._combo_fuellen(self.combo_konto, "Alle Konten", konten)
+
+    def update_kategorien(self, kategorien):
+        self._combo_fuellen(self.combo_kategorie, "Alle Kategorien", kategorien)
+
+    # Einzelne Änderungen aus dem Stammdaten-Cache; fällt der gefilterte Eintrag weg, neu filtern
+    def konten_anwenden(self, aenderung):
+        if combo_anwenden(self.combo_konto, aenderung, versatz=1):
+            self._timer.start()
+
+    def kategorien_anwenden(self, aenderung):
+        if combo_anwenden(self.combo_kategorie, aenderung, versatz=1):
+            self._timer.start()
+
+    def zuruecksetzen(self):
+        for feld in (self.input_text, self.input_betrag_min, self.input_betrag_max):
+            feld.clear()
+        self.input_von.setDate(_KEIN_DATUM)
+        self.input_bis.setDate(_KEIN_DATUM)
+        self.combo_konto.setCurrentIndex(0)
+        self.combo_kategorie.setCurrentIndex(0)
+
+    def _betrag(self, feld):
+        # Ungültige Beträge werden ignoriert und rot markiert
+        text = feld.text().strip()
+        if not text:
+            feld.setStyleSheet("")
+            return None
+        try:
+            cent = abs(parse_betrag(text).cent)
+        except ValueError:
+            feld.setStyleSheet("color: red;")
+            return None
+        feld.setStyleSheet("")
+        return cent
+
+    def suchfilter(self):
+        suchfilter = {}
+        if self.input_text.text().strip():
+            suchfilter["text"] = self.input_text.text().strip()
+        for schluessel, feld in (("von", self.input_von), ("bis", self.input_bis)):
+            if feld.date() != _KEIN_DATUM:
+                suchfilter[schluessel] = feld.date().toString("yyyy-MM-dd")
+        for schluessel, feld in (("betrag_min", self.input_betrag_min), ("betrag_max", self.input_betrag_max)):
+            cent = self._betrag(feld)
+            if cent is not None:
+                suchfilter[schluessel] = cent
+        if self.combo_konto.currentData() is not None:
+            suchfilter["konto_id"] = self.combo_konto.currentData()
+        if self.combo_kategorie.currentData() is not None:
+            suchfilter["kategorie_id"] = self.combo_kategorie.currentData()
+        return suchfilter
+
+    def _melden(self):
+        suchfilter = self.suchfilter()
+        if suchfilter != self._letzter:
+            self._letzter = suchfilter
+            self.filter_geaendert.emit(suchfilter)
@@ -0,0 +1,5 @@
+# Kern ohne Oberfläche: Dienstschicht (finanz.dienst), Kommandozeile (python -m finanz) und
+# lokaler HTTP/JSON-Server (finanz.server). Die Datenbanklogik bleibt in db.py.
+from finanz.dienst import Eintrag, Finanzen, KategorieSumme, Monat, NichtGefunden, Zahlung
+
+__all__ = ["Finanzen", "NichtGefunden", "Zahlung", "Eintrag", "Monat", "KategorieSumme"]
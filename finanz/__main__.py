@@ -0,0 +1,5 @@
+import sys
+
+from finanz.cli import main
+
+sys.exit(main())
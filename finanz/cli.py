@@ -0,0 +1,241 @@
+# Kommandozeile über der Dienstschicht, ohne Qt und ohne Display (etwa für cron)
+#
+#   python -m finanz zahlungen [--von --bis --konto --kategorie --text --limit]
+#   python -m finanz anlegen DATUM BETRAG [--konto --kategorie --beschreibung --typ]
+#   python -m finanz aendern ID [--datum --betrag --konto --kategorie --beschreibung --typ]
+#   python -m finanz loeschen ID
+#   python -m finanz konten | kategorien | salden
+#   python -m finanz bericht cashflow|kategorien|jahre|vorschau [--von --bis --typ --monate]
+#   python -m finanz importieren DATEI... [--format --konto]
+#   python -m finanz exportieren DATEI [--format --von --bis --konto --kategorie]
+#   python -m finanz buchen [--bis]
+#   python -m finanz server [--host 127.0.0.1] [--port 8765] [--protokoll] [--diagnose]
+#
+# Mit --json gibt jeder Befehl JSON aus (wie der Server), sonst eine Zeile je Datensatz.
+import argparse
+import json
+import sys
+import xml.etree.ElementTree as ET
+
+import db
+import diagnose
+import export
+import importer
+from finanz.dienst import Finanzen, NichtGefunden
+from finanz.server import STANDARD_PORT, Server, _json
+
+
+def _ausgeben(args, daten, zeile):
+    # zeile(datensatz) -> Text; mit --json stattdessen eine JSON-Liste bzw. ein Objekt
+    if args.json:
+        print(json.dumps(_json(daten), ensure_ascii=False, indent=2))
+        return
+    for d in daten if isinstance(daten, list) else [daten]:
+        print(zeile(d))
+
+
+def _zahlung_zeile(z):
+    return (f"#{z.id:<7} {z.datum}  {str(z.betrag):>14}  {z.konto or '-':<16} {z.kategorie or '-':<18} "
+            f"{z.beschreibung}")
+
+
+def _monat_zeile(m):
+    return f"{m.zeitraum:<8} Einnahmen {str(m.einnahmen):>14}  Ausgaben {str(m.ausgaben):>14}  Saldo {str(m.saldo):>14}"
+
+
+def cmd_zahlungen(dienst, args):
+    suchfilter = dienst.suchfilter(args.von, args.bis, args.konto, args.kategorie, args.text)
+    _ausgeben(args, dienst.zahlungen(suchfilter, limit=args.limit), _zahlung_zeile)
+    return 0
+
+
+def cmd_anlegen(dienst, args):
+    z = dienst.zahlung_anlegen(args.datum, args.betrag, typ=args.typ, konto=args.konto, kategorie=args.kategorie,
+                               beschreibung=args.beschreibung, wiederkehrend=args.wiederkehrend,
+                               duplikat_erlauben=args.duplikat)
+    _ausgeben(args, z, _zahlung_zeile)
+    return 0
+
+
+def cmd_aendern(dienst, args):
+    felder = {feld: getattr(args, feld) for feld in ("datum", "betrag", "typ", "konto", "kategorie", "beschreibung")
+              if getattr(args, feld) is not None}
+    _ausgeben(args, dienst.zahlung_aendern(args.id, **felder), _zahlung_zeile)
+    return 0
+
+
+def cmd_loeschen(dienst, args):
+    dienst.zahlung_loeschen(args.id)
+    if not args.json:
+        print(f"Zahlung {args.id} gelöscht.")
+    return 0
+
+
+def cmd_konten(dienst, args):
+    _ausgeben(args, dienst.konten(), lambda e: f"{e.id:>4}  {e.name:<24} {e.saldo.format(waehrung=e.waehrung):>14}")
+    return 0
+
+
+def cmd_kategorien(dienst, args):
+    _ausgeben(args, dienst.kategorien(), lambda e: f"{e.id:>4}  {e.name}")
+    return 0
+
+
+def cmd_salden(dienst, args):
+    salden = dienst.salden()
+    if args.json:
+        print(json.dumps({"gesamt": dienst.gesamtvermoegen().cent, "konten": _json(salden)}, indent=2))
+        return 0
+    for e in salden:
+        print(f"{e.name or 'Ohne Konto':<24} {e.saldo.format(waehrung=e.waehrung):>14}")
+    print(f"{'Gesamt':<24} {str(dienst.gesamtvermoegen()):>14}")
+    return 0
+
+
+def cmd_bericht(dienst, args):
+    if args.bericht == "cashflow":
+        _ausgeben(args, dienst.cashflow(args.von, args.bis), _monat_zeile)
+    elif args.bericht == "jahre":
+        _ausgeben(args, dienst.jahresverlauf(), _monat_zeile)
+    elif args.bericht == "kategorien":
+        _ausgeben(args, dienst.kategorie_summen(args.von, args.bis, args.typ),
+                  lambda k: f"{k.kategorie or 'Ohne Kategorie':<24} {str(k.summe):>14}  ({k.anzahl})")
+    else:
+        vorschau = dienst.vorschau(args.monate)
+        if args.json:
+            print(json.dumps([{"monat": m, "saldo_cent": s.cent} for m, s in vorschau], indent=2))
+            return 0
+        for monat, saldo in vorschau:
+            print(f"{monat:<8} {str(saldo):>14}")
+    return 0
+
+
+def cmd_importieren(dienst, args):
+    for pfad in args.dateien:
+        try:
+            ergebnis = dienst.importieren(pfad, format=args.format, konto=args.konto)
+        except (importer.ImportFehler, ET.ParseError) as e:
+            print(f"{pfad}: {e}", file=sys.stderr)
+            return 1
+        print(f"{pfad}: {ergebnis}")
+    return 0
+
+
+def cmd_exportieren(dienst, args):
+    suchfilter = dienst.suchfilter(args.von, args.bis, args.konto, args.kategorie)
+    try:
+        ergebnis = dienst.exportieren(args.datei, format=args.format, suchfilter=suchfilter)
+    except export.ExportFehler as e:
+        print(f"{args.datei}: {e}", file=sys.stderr)
+        return 1
+    print(f"{args.datei}: {ergebnis}")
+    return 0
+
+
+def cmd_buchen(dienst, args):
+    print(f"{dienst.vertraege_buchen(args.bis)} Zahlungen aus Verträgen gebucht.")
+    return 0
+
+
+def cmd_server(dienst, args):
+    if args.diagnose:
+        diagnose.einschalten()
+    server = Server(dienst, args.host, args.port, protokollieren=args.protokoll)
+    host, port = server.server_address[:2]
+    print(f"Finanz-Server auf http://{host}:{port}/ (Strg+C beendet)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def _filter_argumente(p, text=True):
+    p.add_argument("--von", help="Erstes Datum (JJJJ-MM-TT)")
+    p.add_argument("--bis", help="Letztes Datum (JJJJ-MM-TT)")
+    p.add_argument("--konto", help="Konto (id oder Name)")
+    p.add_argument("--kategorie", help="Kategorie (id oder Name)")
+    if text:
+        p.add_argument("--text", help="Nur Zahlungen, die diese Wörter enthalten")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m finanz", description="Finanzen ohne Oberfläche")
+    parser.add_argument("--db", help="Pfad zur Datenbank (Standard: %(default)s)", default=db.DB_FILE)
+    parser.add_argument("--json", action="store_true", help="Ausgabe als JSON")
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("zahlungen", help="Zahlungen auflisten (neueste zuerst)")
+    _filter_argumente(p)
+    p.add_argument("--limit", type=int, default=50, help="Höchstens so viele Zahlungen (Standard: %(default)s)")
+    p.set_defaults(func=cmd_zahlungen)
+
+    p = sub.add_parser("anlegen", help="Zahlung anlegen")
+    p.add_argument("datum", help="JJJJ-MM-TT")
+    p.add_argument("betrag", help="Ausgaben negativ, z.B. -12.50 (oder --typ Ausgabe)")
+    p.add_argument("--typ", choices=("Einnahme", "Ausgabe"))
+    p.add_argument("--konto")
+    p.add_argument("--kategorie", help="Standard: per Regel aus der Beschreibung")
+    p.add_argument("--beschreibung", default="")
+    p.add_argument("--wiederkehrend", action="store_true")
+    p.add_argument("--duplikat", action="store_true", help="Auch anlegen, wenn es die Zahlung schon gibt")
+    p.set_defaults(func=cmd_anlegen)
+
+    p = sub.add_parser("aendern", help="Zahlung ändern (nur angegebene Felder)")
+    p.add_argument("id", type=int)
+    for feld in ("datum", "betrag", "konto", "kategorie", "beschreibung"):
+        p.add_argument(f"--{feld}")
+    p.add_argument("--typ", choices=("Einnahme", "Ausgabe"))
+    p.set_defaults(func=cmd_aendern)
+
+    p = sub.add_parser("loeschen", help="Zahlung löschen")
+    p.add_argument("id", type=int)
+    p.set_defaults(func=cmd_loeschen)
+
+    sub.add_parser("konten", help="Konten mit Saldo").set_defaults(func=cmd_konten)
+    sub.add_parser("kategorien", help="Kategorien").set_defaults(func=cmd_kategorien)
+    sub.add_parser("salden", help="Salden je Konto und Gesamtvermögen").set_defaults(func=cmd_salden)
+
+    p = sub.add_parser("bericht", help="Berichte wie in der Statistik")
+    p.add_argument("bericht", choices=("cashflow", "kategorien", "jahre", "vorschau"))
+    p.add_argument("--von", help="cashflow: JJJJ-MM, kategorien: JJJJ-MM-TT")
+    p.add_argument("--bis", help="cashflow: JJJJ-MM, kategorien: JJJJ-MM-TT")
+    p.add_argument("--typ", choices=("Einnahme", "Ausgabe"), default="Ausgabe", help="kategorien (Standard: %(default)s)")
+    p.add_argument("--monate", type=int, default=12, help="vorschau (Standard: %(default)s)")
+    p.set_defaults(func=cmd_bericht)
+
+    p = sub.add_parser("importieren", help="Kontoauszüge importieren")
+    p.add_argument("dateien", nargs="+")
+    p.add_argument("--format", choices=importer.FORMATE, help="Standard: anhand der Dateiendung")
+    p.add_argument("--konto", help="Alle Zahlungen diesem Konto zuordnen")
+    p.set_defaults(func=cmd_importieren)
+
+    p = sub.add_parser("exportieren", help="Zahlungen exportieren")
+    p.add_argument("datei")
+    p.add_argument("--format", choices=export.FORMATE, help="Standard: anhand der Dateiendung")
+    _filter_argumente(p, text=False)
+    p.set_defaults(func=cmd_exportieren)
+
+    p = sub.add_parser("buchen", help="Fällige Verträge buchen")
+    p.add_argument("--bis", help="Bis einschließlich (Standard: heute)")
+    p.set_defaults(func=cmd_buchen)
+
+    p = sub.add_parser("server", help="Lokalen HTTP/JSON-Server starten")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=STANDARD_PORT)
+    p.add_argument("--protokoll", action="store_true", help="Jede Anfrage auf stderr protokollieren")
+    p.add_argument("--diagnose", action="store_true", help="Laufzeitmessung einschalten (GET /diagnose)")
+    p.set_defaults(func=cmd_server)
+
+    args = parser.parse_args(argv)
+    dienst = Finanzen(args.db)
+    try:
+        return args.func(dienst, args)
+    except NichtGefunden as e:
+        print(e, file=sys.stderr)
+        return 2
+    except (db.DoppelteZahlung, db.ArchivFehler, db.Konflikt, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
@@ -0,0 +1,256 @@
+# Dienstschicht ohne Qt: Zahlungen, Konten, Kategorien, Salden und Berichte als Methoden, die
+# einfache Datensätze liefern. Grundlage für die Kommandozeile (python -m finanz) und den
+# HTTP/JSON-Server (finanz/server.py); beide laufen ohne Display, etwa aus cron.
+# Konten und Kategorien lassen sich per id oder per Name angeben. Alle Methoden sind
+# threadsicher: db.py holt sich je Thread eine eigene Verbindung aus dem Pool (WAL), Leser
+# laufen also parallel, Schreiber nacheinander. Wie bei den übrigen Werkzeugen gilt eine
+# Datenbank je Prozess (db.DB_FILE).
+from datetime import date
+
+import db
+import export
+import importer
+from money import Money
+from waehrungen import BASIS
+
+TYPEN = ("Einnahme", "Ausgabe")
+
+
+class NichtGefunden(ValueError):
+    pass
+
+
+class _Datensatz:
+    # Felder stehen in __slots__; als_dict() liefert JSON-taugliche Werte, Money als
+    # <feld>_cent (ganze Cent) und <feld> (Dezimaltext, z.B. "-12.50")
+    __slots__ = ()
+
+    def __init__(self, **werte):
+        for feld in self.__slots__:
+            setattr(self, feld, werte.get(feld))
+
+    def als_dict(self):
+        ergebnis = {}
+        for feld in self.__slots__:
+            wert = getattr(self, feld)
+            if isinstance(wert, Money):
+                ergebnis[f"{feld}_cent"] = wert.cent
+                wert = f"{wert.to_decimal():.2f}"
+            ergebnis[feld] = wert
+        return ergebnis
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.als_dict() == other.als_dict()
+
+    def __repr__(self):
+        felder = ", ".join(f"{feld}={getattr(self, feld)!r}" for feld in self.__slots__)
+        return f"{type(self).__name__}({felder})"
+
+
+class Zahlung(_Datensatz):
+    # betrag: Money mit Vorzeichen (Ausgaben < 0); konto/kategorie: Namen (None = ohne)
+    __slots__ = ("id", "datum", "betrag", "typ", "konto_id", "konto", "kategorie_id", "kategorie",
+                 "beschreibung", "wiederkehrend")
+
+
+class Eintrag(_Datensatz):
+    # Konto oder Kategorie; saldo (in der Währung des Kontos) und waehrung nur bei Konten
+    __slots__ = ("id", "name", "saldo", "waehrung")
+
+
+class Monat(_Datensatz):
+    # Zeile von cashflow() (zeitraum = "YYYY-MM") und jahresverlauf() (zeitraum = "YYYY")
+    __slots__ = ("zeitraum", "einnahmen", "ausgaben", "saldo", "anzahl")
+
+
+class KategorieSumme(_Datensatz):
+    __slots__ = ("kategorie_id", "kategorie", "summe", "anzahl")
+
+
+class Finanzen:
+    def __init__(self, db_datei=None):
+        if db_datei:
+            db.DB_FILE = db_datei
+        db.init_db()
+        self.stammdaten = db.get_stammdaten()
+
+    # --- Hilfen ---
+    def _eintrag_id(self, art, wert):
+        # id (int oder Ziffern) oder Name -> id; None bleibt None
+        if wert is None or wert == "":
+            return None
+        if isinstance(wert, int) or (isinstance(wert, str) and wert.isdigit()):
+            eintrag_id = int(wert)
+            if self.stammdaten.name(art, eintrag_id) is None:
+                raise NichtGefunden(f"{'Konto' if art == 'konten' else 'Kategorie'} {eintrag_id} existiert nicht")
+            return eintrag_id
+        eintrag_id = self.stammdaten.id(art, wert)
+        if eintrag_id is None:
+            raise NichtGefunden(f"{'Konto' if art == 'konten' else 'Kategorie'} {wert!r} existiert nicht")
+        return eintrag_id
+
+    def _zahlung(self, row):
+        return Zahlung(
+            id=row["id"], datum=row["datum"], betrag=Money(row["betrag_cent"]), typ=row["typ"],
+            konto_id=row["konto_id"], konto=self.stammdaten.name("konten", row["konto_id"]),
+            kategorie_id=row["kategorie_id"], kategorie=self.stammdaten.name("kategorien", row["kategorie_id"]),
+            beschreibung=row["beschreibung"], wiederkehrend=bool(row["wiederkehrend"]),
+        )
+
+    def suchfilter(self, von=None, bis=None, konto=None, kategorie=None, text=None, betrag_min=None,
+                   betrag_max=None):
+        # suchfilter wie in der Übersicht (db._filter_bedingungen), Beträge ohne Vorzeichen
+        suchfilter = {"von": von, "bis": bis, "text": text,
+                      "konto_id": self._eintrag_id("konten", konto),
+                      "kategorie_id": self._eintrag_id("kategorien", kategorie)}
+        for schluessel, wert in (("betrag_min", betrag_min), ("betrag_max", betrag_max)):
+            if wert not in (None, ""):
+                suchfilter[schluessel] = abs(Money.von(wert).cent)
+        return suchfilter
+
+    # --- Zahlungen ---
+    def zahlungen(self, suchfilter=None, limit=100, nach=None):
+        # Neueste zuerst; nach = (datum, id) der letzten Zeile der vorigen Seite. Mit Suchtext
+        # kommen die Treffer aus dem Volltextindex (ohne Blättern über nach).
+        suchfilter = suchfilter or {}
+        if suchfilter.get("text"):
+            zeilen = db.suche_zahlungen(suchfilter, limit)
+        else:
+            zeilen = db.get_zahlungen_gefiltert(suchfilter, limit, nach)
+        return [self._zahlung(z) for z in zeilen]
+
+    def alle_zahlungen(self, suchfilter=None):
+        # Iterator über alle passenden Zahlungen aller Jahre, älteste zuerst (blockweise gelesen)
+        for block in db.zahlungen_lesen(suchfilter):
+            for z in block:
+                yield self._zahlung(z)
+
+    def zahlung(self, zahlung_id):
+        row = db.get_uebersicht_zeile(zahlung_id)
+        if row is None:
+            raise NichtGefunden(f"Zahlung {zahlung_id} existiert nicht (oder ist archiviert)")
+        return self._zahlung(row)
+
+    def zahlung_anlegen(self, datum, betrag, typ=None, konto=None, kategorie=None, beschreibung="",
+                        wiederkehrend=False, duplikat_erlauben=False):
+        # betrag mit Vorzeichen (typ ergibt sich daraus) oder ohne und mit typ. Ohne Kategorie
+        # greifen die Regeln wie im Eingabeformular. Doppelte Zahlungen: db.DoppelteZahlung.
+        datum = date.fromisoformat(str(datum)).isoformat()
+        betrag = Money.von(betrag)
+        typ = typ or ("Ausgabe" if betrag.cent < 0 else "Einnahme")
+        if typ not in TYPEN:
+            raise ValueError(f"Unbekannter Typ: {typ!r}")
+        konto_id = self._eintrag_id("konten", konto)
+        kategorie_id = self._eintrag_id("kategorien", kategorie)
+        if kategorie_id is None:
+            kategorie_id = db.kategorie_vorschlagen(beschreibung, betrag, typ, konto_id)
+        zahlung_id = db.add_zahlung(betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                    duplikat_erlauben=duplikat_erlauben)
+        return self.zahlung(zahlung_id)
+
+    def zahlung_aendern(self, zahlung_id, **felder):
+        # felder: datum, betrag, typ, konto, kategorie, beschreibung, wiederkehrend (nur angegebene ändern sich;
+        # None bei konto/kategorie = ohne)
+        unbekannt = set(felder) - {"datum", "betrag", "typ", "konto", "kategorie", "beschreibung", "wiederkehrend"}
+        if unbekannt:
+            raise ValueError(f"Unbekannte Felder: {', '.join(sorted(unbekannt))}")
+        alt = self.zahlung(zahlung_id)
+        betrag = Money.von(felder["betrag"]) if "betrag" in felder else alt.betrag
+        if felder.get("typ"):
+            typ = felder["typ"]
+        elif "betrag" in felder:
+            typ = "Ausgabe" if betrag.cent < 0 else "Einnahme"   # wie bei zahlung_anlegen
+        else:
+            typ = alt.typ
+        if typ not in TYPEN:
+            raise ValueError(f"Unbekannter Typ: {typ!r}")
+        db.update_zahlung(
+            zahlung_id, betrag, typ,
+            date.fromisoformat(str(felder["datum"])).isoformat() if "datum" in felder else alt.datum,
+            self._eintrag_id("kategorien", felder["kategorie"]) if "kategorie" in felder else alt.kategorie_id,
+            self._eintrag_id("konten", felder["konto"]) if "konto" in felder else alt.konto_id,
+            felder.get("beschreibung", alt.beschreibung),
+            felder.get("wiederkehrend", alt.wiederkehrend),
+        )
+        return self.zahlung(zahlung_id)
+
+    def zahlung_loeschen(self, zahlung_id):
+        if db.zahlungen_loeschen([zahlung_id]) == 0:
+            raise NichtGefunden(f"Zahlung {zahlung_id} existiert nicht (oder ist archiviert)")
+
+    # --- Konten und Kategorien ---
+    def konten(self):
+        salden = {s["konto_id"]: Money(s["saldo_cent"]) for s in db.get_salden()}
+        return [Eintrag(id=e["id"], name=e["name"], saldo=salden.get(e["id"], Money(0)),
+                        waehrung=self.stammdaten.waehrung(e["id"]))
+                for e in self.stammdaten.liste("konten")]
+
+    def kategorien(self):
+        return [Eintrag(id=e["id"], name=e["name"]) for e in self.stammdaten.liste("kategorien")]
+
+    def konto_anlegen(self, name, waehrung=BASIS):
+        konto_id = db.add_konto(name, waehrung)
+        return Eintrag(id=konto_id, name=name, saldo=Money(0), waehrung=self.stammdaten.waehrung(konto_id))
+
+    def kategorie_anlegen(self, name):
+        return Eintrag(id=db.add_kategorie(name), name=name)
+
+    def konto_umbenennen(self, konto, name):
+        konto_id = self._eintrag_id("konten", konto)
+        db.update_konto(konto_id, name)
+        return next(e for e in self.konten() if e.id == konto_id)
+
+    def kategorie_umbenennen(self, kategorie, name):
+        kategorie_id = self._eintrag_id("kategorien", kategorie)
+        db.update_kategorie(kategorie_id, name)
+        return Eintrag(id=kategorie_id, name=name)
+
+    def konto_loeschen(self, konto):
+        db.delete_konto(self._eintrag_id("konten", konto))
+
+    def kategorie_loeschen(self, kategorie):
+        db.delete_kategorie(self._eintrag_id("kategorien", kategorie))
+
+    # --- Salden und Berichte ---
+    def gesamtvermoegen(self, stichtag=None):
+        # In BASIS, Fremdwährungen zum Kurs am stichtag (Standard: heute)
+        return db.get_gesamtvermoegen(stichtag)
+
+    def salden(self):
+        # Nur Konten mit Buchungen, wie in der Seitenleiste der Oberfläche
+        return [Eintrag(id=s["konto_id"] or None, name=s["konto_name"], saldo=Money(s["saldo_cent"]),
+                        waehrung=s["waehrung"])
+                for s in db.get_salden()]
+
+    def cashflow(self, von=None, bis=None):
+        # von/bis als "YYYY-MM"
+        return [Monat(zeitraum=m["monat"], einnahmen=Money(m["einnahmen_cent"]), ausgaben=Money(m["ausgaben_cent"]),
+                      saldo=Money(m["einnahmen_cent"] + m["ausgaben_cent"]), anzahl=m["anzahl"])
+                for m in db.get_cashflow(von, bis)]
+
+    def jahresverlauf(self):
+        return [Monat(zeitraum=j["jahr"], einnahmen=Money(j["einnahmen_cent"]), ausgaben=Money(j["ausgaben_cent"]),
+                      saldo=Money(j["einnahmen_cent"] + j["ausgaben_cent"]), anzahl=j["anzahl"])
+                for j in db.get_jahresverlauf()]
+
+    def kategorie_summen(self, von=None, bis=None, typ="Ausgabe"):
+        if typ not in TYPEN:
+            raise ValueError(f"Unbekannter Typ: {typ!r}")
+        return [KategorieSumme(kategorie_id=k["kategorie_id"] or None, kategorie=k["kategorie_name"],
+                               summe=Money(k["summe_cent"]), anzahl=k["anzahl"])
+                for k in db.get_kategorie_summen(von, bis, typ)]
+
+    def vorschau(self, monate=12):
+        # [(monat, Money)]: erwarteter Kontostand am Monatsende aus den laufenden Verträgen
+        return [(monat, Money(cent)) for monat, cent in db.get_vorschau(monate)]
+
+    # --- Stapelaufgaben ---
+    def importieren(self, pfad, **optionen):
+        # optionen wie importer.importiere_datei (format, konto, trennzeichen, encoding)
+        return importer.importiere_datei(pfad, **optionen)
+
+    def exportieren(self, pfad, format=None, suchfilter=None):
+        return export.exportiere(pfad, format=format, suchfilter=suchfilter)
+
+    def vertraege_buchen(self, bis=None):
+        return db.vertraege_buchen(bis)
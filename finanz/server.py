@@ -0,0 +1,195 @@
+# Lokaler HTTP/JSON-Server über der Dienstschicht (nur Standardbibliothek).
+#
+#   python -m finanz server [--host 127.0.0.1] [--port 8765]
+#
+# Jede Anfrage läuft in einem eigenen Thread (ThreadingHTTPServer) mit eigener Verbindung aus
+# dem Pool; Leser laufen über WAL parallel, Schreiber nacheinander (BEGIN IMMEDIATE mit
+# Wartezeit, siehe db_pool). Ohne Anmeldung: gedacht für localhost, nicht fürs Netz.
+#
+#   GET    /zahlungen?von=&bis=&konto=&kategorie=&text=&betrag_min=&betrag_max=&limit=&nach_datum=&nach_id=
+#   GET    /zahlungen/<id>       POST /zahlungen       PATCH /zahlungen/<id>       DELETE /zahlungen/<id>
+#   GET    /konten               POST /konten          PATCH /konten/<id>          DELETE /konten/<id>
+#   GET    /kategorien           POST /kategorien      PATCH /kategorien/<id>      DELETE /kategorien/<id>
+#   GET    /salden
+#   GET    /berichte/cashflow?von=&bis=    /berichte/kategorien?von=&bis=&typ=
+#   GET    /berichte/jahre                 /berichte/vorschau?monate=
+#   GET    /diagnose             (Laufzeitmessung, siehe diagnose.py; server --diagnose schaltet sie ein)
+#
+# Antworten sind JSON; Fehler {"fehler": "..."} mit 400 (ungültig), 404 (nicht gefunden) oder
+# 409 (Duplikat, archiviertes Jahr, Konflikt), 405 bei falscher Methode.
+import json
+import re
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import db
+import diagnose
+from finanz.dienst import NichtGefunden
+from waehrungen import BASIS
+
+STANDARD_PORT = 8765
+MAX_LIMIT = 1000
+MAX_KOERPER = 1 << 20  # Bytes
+
+
+class AnfrageFehler(ValueError):
+    pass
+
+
+def _json(wert):
+    if isinstance(wert, list):
+        return [_json(w) for w in wert]
+    if hasattr(wert, "als_dict"):
+        return wert.als_dict()
+    return wert
+
+
+def _limit(parameter):
+    try:
+        limit = int(parameter.get("limit", 100))
+    except ValueError:
+        raise AnfrageFehler("limit muss eine Zahl sein") from None
+    return max(1, min(limit, MAX_LIMIT))
+
+
+# --- Routen: (Methode, Pfad-Muster) -> Funktion(dienst, parameter, koerper, *gruppen) ---
+def _zahlungen(dienst, p, koerper):
+    suchfilter = dienst.suchfilter(p.get("von"), p.get("bis"), p.get("konto"), p.get("kategorie"), p.get("text"),
+                                   p.get("betrag_min"), p.get("betrag_max"))
+    nach = None
+    if p.get("nach_datum") and p.get("nach_id"):
+        nach = (p["nach_datum"], int(p["nach_id"]))
+    return 200, dienst.zahlungen(suchfilter, limit=_limit(p), nach=nach)
+
+
+def _zahlung_anlegen(dienst, p, koerper):
+    erlaubt = {"datum", "betrag", "typ", "konto", "kategorie", "beschreibung", "wiederkehrend", "duplikat_erlauben"}
+    unbekannt = set(koerper) - erlaubt
+    if unbekannt:
+        raise AnfrageFehler(f"Unbekannte Felder: {', '.join(sorted(unbekannt))}")
+    if "datum" not in koerper or "betrag" not in koerper:
+        raise AnfrageFehler("datum und betrag sind Pflichtfelder")
+    return 201, dienst.zahlung_anlegen(**koerper)
+
+
+ROUTEN = [
+    ("GET", r"/zahlungen", _zahlungen),
+    ("GET", r"/zahlungen/(\d+)", lambda d, p, k, i: (200, d.zahlung(int(i)))),
+    ("POST", r"/zahlungen", _zahlung_anlegen),
+    ("PATCH", r"/zahlungen/(\d+)", lambda d, p, k, i: (200, d.zahlung_aendern(int(i), **k))),
+    ("DELETE", r"/zahlungen/(\d+)", lambda d, p, k, i: (204, d.zahlung_loeschen(int(i)))),
+    ("GET", r"/konten", lambda d, p, k: (200, d.konten())),
+    ("POST", r"/konten", lambda d, p, k: (201, d.konto_anlegen(k["name"], k.get("waehrung", BASIS)))),
+    ("PATCH", r"/konten/(\d+)", lambda d, p, k, i: (200, d.konto_umbenennen(int(i), k["name"]))),
+    ("DELETE", r"/konten/(\d+)", lambda d, p, k, i: (204, d.konto_loeschen(int(i)))),
+    ("GET", r"/kategorien", lambda d, p, k: (200, d.kategorien())),
+    ("POST", r"/kategorien", lambda d, p, k: (201, d.kategorie_anlegen(k["name"]))),
+    ("PATCH", r"/kategorien/(\d+)", lambda d, p, k, i: (200, d.kategorie_umbenennen(int(i), k["name"]))),
+    ("DELETE", r"/kategorien/(\d+)", lambda d, p, k, i: (204, d.kategorie_loeschen(int(i)))),
+    ("GET", r"/salden", lambda d, p, k: (200, {"gesamt": d.gesamtvermoegen().cent,
+                                              "konten": _json(d.salden())})),
+    ("GET", r"/berichte/cashflow", lambda d, p, k: (200, d.cashflow(p.get("von"), p.get("bis")))),
+    ("GET", r"/berichte/kategorien", lambda d, p, k: (200, d.kategorie_summen(p.get("von"), p.get("bis"),
+                                                                              p.get("typ", "Ausgabe")))),
+    ("GET", r"/berichte/jahre", lambda d, p, k: (200, d.jahresverlauf())),
+    ("GET", r"/berichte/vorschau", lambda d, p, k: (200, [{"monat": m, "saldo_cent": s.cent}
+                                                          for m, s in d.vorschau(int(p.get("monate", 12)))])),
+    ("GET", r"/diagnose", lambda d, p, k: (200, diagnose.als_dict())),
+]
+_ROUTEN = [(methode, re.compile(muster + "$"), funktion) for methode, muster, funktion in ROUTEN]
+
+
+class Anfrage(BaseHTTPRequestHandler):
+    server_version = "Finanz/1"
+    protocol_version = "HTTP/1.1"   # Verbindungen bleiben offen (Keep-Alive)
+    # Kopfzeilen und Körper gehen getrennt raus; mit Nagle wartet der Körper auf das verzögerte
+    # ACK des Clients (~40 ms je Antwort)
+    disable_nagle_algorithm = True
+
+    def _antworten(self, status, daten=None):
+        koerper = b"" if status == 204 else json.dumps(_json(daten), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        if koerper:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(koerper)))
+        self.end_headers()
+        self.wfile.write(koerper)
+
+    def _koerper(self):
+        laenge = int(self.headers.get("Content-Length") or 0)
+        if laenge > MAX_KOERPER:
+            self.close_connection = True   # Körper bleibt ungelesen
+            raise AnfrageFehler("Anfrage zu groß")
+        if not laenge:
+            return {}
+        daten = json.loads(self.rfile.read(laenge))
+        if not isinstance(daten, dict):
+            raise AnfrageFehler("JSON-Objekt erwartet")
+        return daten
+
+    def _bearbeiten(self, methode):
+        teile = urlsplit(self.path)
+        parameter = {k: v[-1] for k, v in parse_qs(teile.query).items()}
+        pfad = teile.path.rstrip("/") or "/"
+        passend = [(m, treffer, f) for m, muster, f in _ROUTEN if (treffer := muster.match(pfad))]
+        route = next(((treffer, f) for m, treffer, f in passend if m == methode), None)
+        try:
+            koerper = self._koerper()   # immer lesen, sonst stört der Rest die nächste Anfrage (Keep-Alive)
+            if route is None:
+                if passend:
+                    self._antworten(405, {"fehler": f"{methode} ist für {pfad} nicht erlaubt"})
+                    return
+                raise NichtGefunden(f"Unbekannter Pfad: {pfad}")
+            treffer, funktion = route
+            status, daten = funktion(self.server.dienst, parameter, koerper, *treffer.groups())
+        except NichtGefunden as e:
+            self._antworten(404, {"fehler": str(e)})
+        except (db.DoppelteZahlung, db.ArchivFehler, db.Konflikt) as e:
+            self._antworten(409, {"fehler": str(e)})
+        except KeyError as e:
+            self._antworten(400, {"fehler": f"Feld fehlt: {e}"})
+        except ValueError as e:
+            self._antworten(400, {"fehler": str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            self._antworten(500, {"fehler": f"Interner Fehler: {e}"})
+        else:
+            self._antworten(status, daten)
+
+    def do_GET(self):
+        self._bearbeiten("GET")
+
+    def do_POST(self):
+        self._bearbeiten("POST")
+
+    def do_PATCH(self):
+        self._bearbeiten("PATCH")
+
+    def do_PUT(self):
+        self._bearbeiten("PUT")   # gibt es nicht, aber als JSON-Fehler 405 statt HTML
+
+    def do_DELETE(self):
+        self._bearbeiten("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.protokollieren:
+            super().log_message(format, *args)
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, dienst, host="127.0.0.1", port=STANDARD_PORT, protokollieren=False):
+        super().__init__((host, port), Anfrage)
+        self.dienst = dienst
+        self.protokollieren = protokollieren
+
+
+def im_hintergrund(dienst, host="127.0.0.1", port=0):
+    # Startet den Server in einem Thread (port=0: freier Port, siehe server.server_address);
+    # beenden mit server.shutdown(). Für Tests und Lastmessungen.
+    server = Server(dienst, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
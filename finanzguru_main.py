@@ -1,27 +1,99 @@
+import startprofil
 import sys
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QStackedWidget, QMessageBox, QListWidget, QListWidgetItem, QInputDialog, QMenu
+    QLabel, QPushButton, QStackedWidget, QMessageBox, QListWidget, QListWidgetItem, QInputDialog, QMenu,
+    QTableView, QAbstractItemView, QHeaderView, QProgressBar, QFileDialog
 )
-from PySide6.QtCore import Qt, QPoint
+from PySide6.QtCore import Qt, QPoint, QTimer, Signal
+from PySide6.QtGui import QAction, QKeySequence, QUndoStack, QUndoCommand
+import db
+import diagnose
 from db import (
-    init_db, get_kategorien, add_kategorie, update_kategorie, delete_kategorie,
-    get_konten, add_konto, update_konto, delete_konto,
-    add_zahlung, update_zahlung, delete_zahlung,
-    get_zahlungen, get_gesamtvermoegen, get_zahlung_by_id
+    init_db, add_kategorie, update_kategorie, delete_kategorie, add_konto, update_konto, delete_konto,
+    get_stammdaten, stammdaten_neu_laden, stammdaten_abonnieren, stammdaten_abbestellen,
+    add_zahlung, update_zahlung, DoppelteZahlung,
+    zahlungen_kategorie_setzen, zahlungen_konto_setzen, zahlungen_wiederkehrend_setzen, zahlungen_loeschen,
+    get_gesamtvermoegen, get_salden, get_zahlung_by_id, kategorie_vorschlagen, vertraege_buchen,
+    beschreibungen_vorschlagen, konto_waehrung_setzen, kurse_laden,
+    protokolliert, protokoll_stand, protokoll_verdichten, zuruecknehmen, wiederholen, aenderungen_seit
 )
-from zahlung_eintragen_widget import ZahlungEintragenWidget
+from money import Money
+from waehrungen import GAENGIGE, WaehrungFehler
+from db_worker import DbWorker
+from filter_leiste import FilterLeiste
+from stammdaten_qt import liste_anwenden
+from uebersicht_model import ZahlungenModel, SPALTE_BESCHREIBUNG
+# Die übrigen Seiten (und mit der Statistik QtGui und numpy) werden erst beim ersten Anzeigen importiert
+startprofil.phase("Imports")
+
+# Bis zu so vielen geänderten Zahlungen zieht die Übersicht einzeln nach, darüber lädt sie neu
+FEED_EINZELN_MAX = 200
+# Erste Prüfung auf eine fällige Sicherung nach dem Start
+SICHERUNG_VERZOEGERUNG_MS = 2 * 60 * 1000
+
+
+class Aktion(QUndoCommand):
+    # Eine rückgängig machbare Änderung: die Protokolleinträge von < seq <= bis (siehe db.protokolliert)
+    def __init__(self, fenster, text, von, bis):
+        super().__init__(text)
+        self.fenster = fenster
+        self.von = von
+        self.bis = bis
+        self.gespeichert = True
+
+    def undo(self):
+        self.fenster.protokoll_anwenden(zuruecknehmen, self)
+
+    def redo(self):
+        # push() ruft redo() sofort auf; die Änderung selbst ist da schon gespeichert
+        if self.gespeichert:
+            self.gespeichert = False
+            return
+        self.fenster.protokoll_anwenden(wiederholen, self)
+
 
 class MainWindow(QMainWindow):
+    # Änderungen an Konten/Kategorien (stammdaten.Aenderung), aus jedem Thread, im GUI-Thread zugestellt
+    stammdaten_geaendert = Signal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Finanzverwaltung")
         self.resize(1100, 700)
 
-        init_db()
-
-        self.kategorien = [dict(row) for row in get_kategorien()]
-        self.konten = [dict(row) for row in get_konten()]
+        # Alle Datenbankzugriffe laufen über den Worker; das Fenster wird leer aufgebaut
+        # und füllt sich, sobald init_db und die ersten Abfragen fertig sind.
+        self.db = DbWorker(self)
+        self.db.fehler.connect(self.db_fehler)
+        # init_db ist der erste Auftrag; alles Weitere (auch das erste fetchMore
+        # der Übersicht) läuft in der Warteschlange danach.
+        self.db.ausfuehren(init_db)
+        # Konten und Kategorien stehen im Stammdaten-Cache; Listen und Auswahlfelder bekommen
+        # nur noch die Änderungen. Geladen wird direkt nach init_db, vor den ersten Zahlungen.
+        self.stammdaten = get_stammdaten(laden=False)
+        self._stammdaten_melden = self.stammdaten_geaendert.emit
+        self.stammdaten_geaendert.connect(self._stammdaten_geaendert)
+        stammdaten_abonnieren(self._stammdaten_melden)
+        self.db.ausfuehren(stammdaten_neu_laden, schluessel="stammdaten")
+        # Rückgängig/Wiederholen über das Änderungsprotokoll; protokoll_seq ist der Stand, bis zu
+        # dem Übersicht und Listen alle Änderungen kennen (Änderungsfeed, siehe aenderungen_abholen)
+        self.verlauf = QUndoStack(self)
+        self.verlauf.setUndoLimit(100)
+        self.protokoll_seq = 0
+        self.db.ausfuehren(protokoll_stand, ergebnis=self._protokoll_stand)
+        menu_bearbeiten = self.menuBar().addMenu("Bearbeiten")
+        aktion_rueckgaengig = self.verlauf.createUndoAction(self, "Rückgängig")
+        aktion_rueckgaengig.setShortcut(QKeySequence.Undo)
+        menu_bearbeiten.addAction(aktion_rueckgaengig)
+        aktion_wiederholen = self.verlauf.createRedoAction(self, "Wiederholen")
+        aktion_wiederholen.setShortcut(QKeySequence.Redo)
+        menu_bearbeiten.addAction(aktion_wiederholen)
+        # Versteckte Diagnoseseite (Laufzeitmessung), ohne Menüeintrag
+        aktion_diagnose = QAction("Diagnose", self)
+        aktion_diagnose.setShortcut(QKeySequence("Ctrl+Shift+D"))
+        aktion_diagnose.triggered.connect(lambda: self.seite_zeigen("diagnose"))
+        self.addAction(aktion_diagnose)
 
         main_widget = QWidget()
         main_layout = QVBoxLayout()
@@ -31,6 +103,9 @@ class MainWindow(QMainWindow):
         self.balance_label = QLabel()
         self.balance_label.setStyleSheet("font-size: 28px; font-weight: bold; margin: 16px;")
         main_layout.addWidget(self.balance_label, alignment=Qt.AlignCenter)
+        self.salden_label = QLabel()
+        self.salden_label.setStyleSheet("color: gray; margin-bottom: 8px;")
+        main_layout.addWidget(self.salden_label, alignment=Qt.AlignCenter)
 
         nav_layout = QHBoxLayout()
         self.btn_zahlung = QPushButton("Zahlung eintragen")
@@ -39,6 +114,7 @@ class MainWindow(QMainWindow):
         self.btn_vertraege = QPushButton("Verträge")
         self.btn_kategorien = QPushButton("Kategorien verwalten")
         self.btn_konten = QPushButton("Konten verwalten")
+        self.btn_import = QPushButton("Importieren")
 
         nav_layout.addWidget(self.btn_zahlung)
         nav_layout.addWidget(self.btn_uebersicht)
@@ -46,29 +122,151 @@ class MainWindow(QMainWindow):
         nav_layout.addWidget(self.btn_vertraege)
         nav_layout.addWidget(self.btn_kategorien)
         nav_layout.addWidget(self.btn_konten)
+        nav_layout.addWidget(self.btn_import)
         main_layout.addLayout(nav_layout)
 
         self.stacked_widget = QStackedWidget()
 
-        # Seite: Zahlung eintragen (auch für Bearbeiten)
-        self.page_zahlung = ZahlungEintragenWidget(
-            kategorien=self.kategorien,
-            konten=self.konten,
-            on_save=self.zahlung_speichern,
-            on_update=self.zahlung_aktualisieren
-        )
-
-        # Seite: Finanzübersicht (Liste mit Kontextmenü)
+        # Seite: Finanzübersicht (Tabelle mit Kontextmenü, Zeilen werden fensterweise nachgeladen).
+        # Die übrigen Seiten entstehen erst beim ersten Anzeigen (siehe seite()).
         self.page_uebersicht = QWidget()
         overview_layout = QVBoxLayout()
-        self.list_uebersicht = QListWidget()
-        self.list_uebersicht.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.list_uebersicht.customContextMenuRequested.connect(self.zahlung_context_menu)
-        overview_layout.addWidget(self.list_uebersicht)
+        self.model_uebersicht = ZahlungenModel(self, worker=self.db)
+        self.filter_uebersicht = FilterLeiste(konten=self.stammdaten.liste("konten"),
+                                              kategorien=self.stammdaten.liste("kategorien"))
+        self.filter_uebersicht.filter_geaendert.connect(self.model_uebersicht.set_filter)
+        filter_zeile = QHBoxLayout()
+        filter_zeile.addWidget(self.filter_uebersicht, 1)
+        self.btn_export = QPushButton("Exportieren …")
+        self.btn_export.clicked.connect(self.exportieren)
+        filter_zeile.addWidget(self.btn_export, alignment=Qt.AlignTop)
+        overview_layout.addLayout(filter_zeile)
+        self.view_uebersicht = QTableView()
+        self.view_uebersicht.setModel(self.model_uebersicht)
+        self.view_uebersicht.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view_uebersicht.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view_uebersicht.setWordWrap(False)
+        self.view_uebersicht.setAlternatingRowColors(True)
+        self.view_uebersicht.verticalHeader().hide()
+        self.view_uebersicht.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view_uebersicht.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.view_uebersicht.horizontalHeader().setSectionResizeMode(SPALTE_BESCHREIBUNG, QHeaderView.Stretch)
+        self.view_uebersicht.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.view_uebersicht.customContextMenuRequested.connect(self.zahlung_context_menu)
+        aktion_loeschen = QAction("Löschen", self.view_uebersicht)
+        aktion_loeschen.setShortcut(QKeySequence.Delete)
+        aktion_loeschen.setShortcutContext(Qt.WidgetShortcut)
+        aktion_loeschen.triggered.connect(lambda: self.auswahl_loeschen(self.ausgewaehlte_zahlungen()))
+        self.view_uebersicht.addAction(aktion_loeschen)
+        overview_layout.addWidget(self.view_uebersicht)
         self.page_uebersicht.setLayout(overview_layout)
+        self.stacked_widget.addWidget(self.page_uebersicht)
+        main_layout.addWidget(self.stacked_widget)
 
-        # Seite: Kategorien verwalten
-        self.page_kategorien = QWidget()
+        self.page_zahlung = None
+        self.page_statistik = None
+        self.page_vertraege = None
+        self.page_kategorien = None
+        self.page_konten = None
+        self.page_import = None
+        self.page_diagnose = None
+        self.exporte = set()
+
+        self.btn_zahlung.clicked.connect(self.show_zahlung_eintragen)
+        self.btn_uebersicht.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_uebersicht))
+        self.btn_statistik.clicked.connect(self.show_statistik)
+        self.btn_vertraege.clicked.connect(self.show_vertraege)
+        self.btn_kategorien.clicked.connect(lambda: self.seite_zeigen("kategorien"))
+        self.btn_konten.clicked.connect(lambda: self.seite_zeigen("konten"))
+        self.btn_import.clicked.connect(lambda: self.seite_zeigen("import"))
+
+        # Busy-Anzeige in der Statusleiste, solange der Worker Aufträge hat
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setMaximumWidth(120)
+        self.busy_indicator.setTextVisible(False)
+        self.busy_indicator.hide()
+        self.statusBar().addPermanentWidget(self.busy_indicator)
+        self.db.beschaeftigt.connect(self.busy_indicator.setVisible)
+
+        self.stacked_widget.setCurrentWidget(self.page_uebersicht)
+        self.balance_label.setText("Gesamtvermögen: …")
+        # Saldo, Listen und fällige Verträge werden erst nach dem ersten Zeichnen angefordert
+        self.gezeichnet = False
+        self.daten_angefordert = False
+
+        # Fällige Vertragszahlungen danach stündlich buchen (auch über Mitternacht)
+        self.timer_vertraege = QTimer(self)
+        self.timer_vertraege.setInterval(60 * 60 * 1000)
+        self.timer_vertraege.timeout.connect(self.vertraege_buchen)
+        # Stündlich nachsehen, ob eine Sicherung fällig ist (sicherung.STUNDEN); die erste Prüfung
+        # wartet SICHERUNG_VERZOEGERUNG_MS, damit sie nicht mit dem Laden beim Start konkurriert
+        self.sicherung_thread = None
+        self.timer_sicherung = QTimer(self)
+        self.timer_sicherung.setInterval(60 * 60 * 1000)
+        self.timer_sicherung.timeout.connect(self.sicherung_pruefen)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.gezeichnet:
+            self.gezeichnet = True
+            startprofil.phase("Erstes Zeichnen")
+            QTimer.singleShot(0, self.daten_laden)
+
+    def daten_laden(self):
+        self.daten_angefordert = True
+        self.update_balance()
+        # Noch verweist keine Aktion im Verlauf auf alte Protokolleinträge
+        self.db.ausfuehren(protokoll_verdichten)
+        self.vertraege_buchen()
+        self.timer_vertraege.start()
+        QTimer.singleShot(SICHERUNG_VERZOEGERUNG_MS, self.sicherung_pruefen)
+        self.timer_sicherung.start()
+
+    # --- Seiten ---
+    def seite(self, name):
+        # Baut die Seite beim ersten Zugriff (_seite_<name>) und hängt sie in den Stapel
+        page = getattr(self, f"page_{name}")
+        if page is None:
+            page = getattr(self, f"_seite_{name}")()
+            setattr(self, f"page_{name}", page)
+            self.stacked_widget.addWidget(page)
+        return page
+
+    def seite_zeigen(self, name):
+        page = self.seite(name)
+        self.stacked_widget.setCurrentWidget(page)
+        return page
+
+    def _seite_zahlung(self):
+        # Zahlung eintragen (auch für Bearbeiten)
+        from zahlung_eintragen_widget import ZahlungEintragenWidget
+        return ZahlungEintragenWidget(
+            kategorien=self.stammdaten.liste("kategorien"),
+            konten=self.stammdaten.liste("konten"),
+            on_save=self.zahlung_speichern,
+            on_update=self.zahlung_aktualisieren,
+            on_vorschlag=self.kategorie_vorschlagen,
+            on_vervollstaendigen=self.beschreibungen_vorschlagen
+        )
+
+    def _seite_statistik(self):
+        # Statistik (liest nur die vorberechneten Monatswerte)
+        from statistik_widget import StatistikWidget
+        return StatistikWidget(self.db)
+
+    def _seite_vertraege(self):
+        # Verträge (wiederkehrende Zahlungen mit Vorschau des Kontostands)
+        from vertraege_widget import VertraegeWidget
+        page = VertraegeWidget(self.db, kategorien=self.stammdaten.liste("kategorien"),
+                               konten=self.stammdaten.liste("konten"))
+        page.gebucht.connect(self.vertraege_gebucht)
+        return page
+
+    def _seite_kategorien(self):
+        # Kategorien verwalten (mit Regeln für die automatische Kategorisierung)
+        from regeln_widget import RegelnWidget
+        page = QWidget()
         kategorien_layout = QVBoxLayout()
         self.list_kategorien = QListWidget()
         self.list_kategorien.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -77,137 +275,391 @@ class MainWindow(QMainWindow):
         self.btn_kategorie_hinzufuegen.clicked.connect(self.kategorie_hinzufuegen)
         kategorien_layout.addWidget(self.list_kategorien)
         kategorien_layout.addWidget(self.btn_kategorie_hinzufuegen)
-        self.page_kategorien.setLayout(kategorien_layout)
-
-        # Seite: Konten verwalten
-        self.page_konten = QWidget()
+        self.regeln = RegelnWidget(self.db, kategorien=self.stammdaten.liste("kategorien"),
+                                   konten=self.stammdaten.liste("konten"))
+        self.regeln.zahlungen_geaendert.connect(self.zahlungen_kategorisiert)
+        kategorien_layout.addWidget(self.regeln)
+        page.setLayout(kategorien_layout)
+        self._liste_fuellen(self.list_kategorien, self.stammdaten.liste("kategorien"))
+        return page
+
+    def _seite_konten(self):
+        # Konten verwalten
+        page = QWidget()
         konten_layout = QVBoxLayout()
         self.list_konten = QListWidget()
         self.list_konten.setContextMenuPolicy(Qt.CustomContextMenu)
         self.list_konten.customContextMenuRequested.connect(self.konto_context_menu)
         self.btn_konto_hinzufuegen = QPushButton("Konto hinzufügen")
         self.btn_konto_hinzufuegen.clicked.connect(self.konto_hinzufuegen)
+        self.btn_kurse_laden = QPushButton("Wechselkurse laden …")
+        self.btn_kurse_laden.clicked.connect(self.kurse_laden)
         konten_layout.addWidget(self.list_konten)
         konten_layout.addWidget(self.btn_konto_hinzufuegen)
-        self.page_konten.setLayout(konten_layout)
-
-        self.page_statistik = QLabel("Statistik – Diagramme und Auswertungen (später)")
-        self.page_vertraege = QLabel("Verträge – Wiederkehrende Zahlungen (später)")
+        konten_layout.addWidget(self.btn_kurse_laden)
+        page.setLayout(konten_layout)
+        self._liste_fuellen(self.list_konten, self.stammdaten.liste("konten"))
+        return page
+
+    def _seite_import(self):
+        # Kontoauszüge importieren
+        from import_widget import ImportWidget
+        return ImportWidget(konten=self.stammdaten.liste("konten"), on_import=self.import_fertig)
+
+    def _seite_diagnose(self):
+        # Laufzeitmessung (Strg+Umschalt+D)
+        from diagnose_widget import DiagnoseWidget
+        return DiagnoseWidget()
+
+    def _liste_fuellen(self, liste, eintraege):
+        liste.clear()
+        for k in eintraege:
+            item = QListWidgetItem(f"{k['name']}")
+            item.setData(Qt.UserRole, k["id"])
+            liste.addItem(item)
+
+    def closeEvent(self, event):
+        stammdaten_abbestellen(self._stammdaten_melden)
+        for thread in list(self.exporte):
+            thread.requestInterruption()
+            thread.wait()
+        if self.sicherung_thread is not None:
+            # Eine abgebrochene Sicherung hinterlässt keine Datei
+            self.sicherung_thread.requestInterruption()
+            self.sicherung_thread.wait()
+        self.db.stoppen()
+        super().closeEvent(event)
+
+    def db_fehler(self, exc):
+        QMessageBox.warning(self, "Datenbankfehler", str(exc))
+
+    def show_statistik(self):
+        self.seite_zeigen("statistik").aktualisieren()
+
+    def show_vertraege(self):
+        self.seite_zeigen("vertraege").aktualisieren()
+
+    def vertraege_buchen(self):
+        # Fällige Termine buchen; die Vertragsseite wird dafür nicht gebaut
+        if self.page_vertraege is not None:
+            self.page_vertraege.buchen()
+            return
+        self.db.ausfuehren(vertraege_buchen, ergebnis=self._vertraege_gebucht, schluessel="vertraege_buchen")
 
-        self.stacked_widget.addWidget(self.page_zahlung)
-        self.stacked_widget.addWidget(self.page_uebersicht)
-        self.stacked_widget.addWidget(self.page_statistik)
-        self.stacked_widget.addWidget(self.page_vertraege)
-        self.stacked_widget.addWidget(self.page_kategorien)
-        self.stacked_widget.addWidget(self.page_konten)
-        main_layout.addWidget(self.stacked_widget)
+    def _vertraege_gebucht(self, anzahl):
+        if anzahl:
+            self.vertraege_gebucht(anzahl)
 
-        self.btn_zahlung.clicked.connect(self.show_zahlung_eintragen)
-        self.btn_uebersicht.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_uebersicht))
-        self.btn_statistik.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_statistik))
-        self.btn_vertraege.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_vertraege))
-        self.btn_kategorien.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_kategorien))
-        self.btn_konten.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.page_konten))
+    def vertraege_gebucht(self, anzahl):
+        self.aenderungen_abholen()
+        self.statusBar().showMessage(f"{anzahl} fällige Vertragszahlungen gebucht", 10000)
 
-        self.stacked_widget.setCurrentWidget(self.page_uebersicht)
-        self.update_balance()
-        self.update_uebersicht()
-        self.update_kategorien()
-        self.update_konten()
+    # --- Sicherung ---
+    def sicherung_pruefen(self):
+        import sicherung
+        if self.sicherung_thread is not None or not sicherung.faellig():
+            return
+        from sicherung_qt import SicherungThread
+        thread = self.sicherung_thread = SicherungThread(self)
+        thread.fortschritt.connect(
+            lambda schritt, prozent: self.statusBar().showMessage(f"Sicherung: {schritt} {prozent} %"))
+        thread.fertig.connect(lambda ergebnis: self.statusBar().showMessage(f"Sicherung erstellt: {ergebnis}", 10000))
+        thread.fehler.connect(self._sicherung_fehlgeschlagen)
+        thread.finished.connect(self._sicherung_beendet)
+        thread.start()
+
+    def _sicherung_fehlgeschlagen(self, meldung):
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Sicherung fehlgeschlagen", meldung)
+
+    def _sicherung_beendet(self):
+        self.sicherung_thread.deleteLater()
+        self.sicherung_thread = None
 
     # --- Zahlungen ---
     def show_zahlung_eintragen(self):
-        self.page_zahlung.set_edit_mode(False)
+        self.seite("zahlung").set_edit_mode(False)
         self.stacked_widget.setCurrentWidget(self.page_zahlung)
 
     def zahlung_speichern(self, daten):
-        add_zahlung(
+        args = (
             daten["betrag"], daten["typ"], daten["datum"],
             daten["kategorie_id"], daten["konto_id"], daten["beschreibung"], daten["wiederkehrend"]
         )
-        QMessageBox.information(self, "Erfolg", "Zahlung gespeichert!")
-        self.update_uebersicht()
+
+        def doppelt(exc):
+            if not isinstance(exc, DoppelteZahlung):
+                self.db_fehler(exc)
+                return
+            confirm = QMessageBox.question(
+                self, "Doppelte Zahlung",
+                "Eine identische Zahlung (Datum, Betrag, Konto, Beschreibung) ist bereits gespeichert.\n"
+                "Trotzdem speichern?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if confirm == QMessageBox.Yes:
+                self.aufzeichnen("Zahlung eintragen", add_zahlung, *args, duplikat_erlauben=True,
+                                 ergebnis=self._zahlung_gespeichert)
+
+        self.aufzeichnen("Zahlung eintragen", add_zahlung, *args, ergebnis=self._zahlung_gespeichert, fehler=doppelt)
+
+    def _zahlung_gespeichert(self, zahlung_id):
+        self.page_zahlung.clear_fields()
+        self.model_uebersicht.zeile_eingefuegt(zahlung_id)
         self.update_balance()
         self.stacked_widget.setCurrentWidget(self.page_uebersicht)
+        QMessageBox.information(self, "Erfolg", "Zahlung gespeichert!")
 
     def zahlung_aktualisieren(self, zahlung_id, daten):
-        update_zahlung(
-            zahlung_id,
+        def geaendert(_):
+            self.model_uebersicht.zeile_geaendert(zahlung_id)
+            self.update_balance()
+            self.page_zahlung.set_edit_mode(False)
+            self.stacked_widget.setCurrentWidget(self.page_uebersicht)
+            QMessageBox.information(self, "Erfolg", "Zahlung geändert!")
+
+        self.aufzeichnen(
+            "Zahlung ändern", update_zahlung, zahlung_id,
             daten["betrag"], daten["typ"], daten["datum"],
-            daten["kategorie_id"], daten["konto_id"], daten["beschreibung"], daten["wiederkehrend"]
+            daten["kategorie_id"], daten["konto_id"], daten["beschreibung"], daten["wiederkehrend"],
+            ergebnis=geaendert
         )
-        QMessageBox.information(self, "Erfolg", "Zahlung geändert!")
-        self.update_uebersicht()
-        self.update_balance()
-        self.page_zahlung.set_edit_mode(False)
-        self.stacked_widget.setCurrentWidget(self.page_uebersicht)
+
+    def kategorie_vorschlagen(self, daten, fertig):
+        # Nur der jeweils letzte Vorschlag zählt; ältere Anfragen in der Warteschlange entfallen
+        self.db.ausfuehren(
+            kategorie_vorschlagen, daten["beschreibung"], daten["betrag"], daten["typ"], daten["konto_id"],
+            ergebnis=fertig, schluessel="kategorie_vorschlag"
+        )
+
+    def beschreibungen_vorschlagen(self, praefix, fertig):
+        # Beim Tippen zählt nur der jeweils letzte Präfix
+        self.db.ausfuehren(beschreibungen_vorschlagen, praefix, ergebnis=fertig, schluessel="beschreibungen_vorschlagen")
+
+    def zahlungen_kategorisiert(self, anzahl):
+        self.aenderungen_abholen()
+
+    def ausgewaehlte_zahlungen(self):
+        return [self.model_uebersicht.zahlung_id(i.row()) for i in self.view_uebersicht.selectionModel().selectedRows()]
 
     def zahlung_context_menu(self, pos: QPoint):
-        item = self.list_uebersicht.itemAt(pos)
-        if item is None:
+        # Wirkt auf alle markierten Zeilen (der Rechtsklick markiert die Zeile darunter mit)
+        index = self.view_uebersicht.indexAt(pos)
+        if not index.isValid():
             return
+        zeilen = [i.row() for i in self.view_uebersicht.selectionModel().selectedRows()] or [index.row()]
+        ids = [self.model_uebersicht.zahlung_id(row) for row in zeilen]
         menu = QMenu()
         edit_action = menu.addAction("Bearbeiten")
-        delete_action = menu.addAction("Löschen")
-        action = menu.exec(self.list_uebersicht.viewport().mapToGlobal(pos))
-        zahlung_id = item.data(Qt.UserRole)
+        edit_action.setEnabled(len(ids) == 1)
+        menu_kategorie = menu.addMenu("Kategorie ändern")
+        for k in [{"id": None, "name": "Keine Kategorie"}] + self.stammdaten.liste("kategorien"):
+            menu_kategorie.addAction(k["name"]).setData(("kategorie_id", k["id"]))
+        menu_konto = menu.addMenu("Konto ändern")
+        for k in [{"id": None, "name": "Kein Konto"}] + self.stammdaten.liste("konten"):
+            menu_konto.addAction(k["name"]).setData(("konto_id", k["id"]))
+        wiederkehrend_action = menu.addAction("Wiederkehrend")
+        wiederkehrend_action.setCheckable(True)
+        wiederkehrend_action.setChecked(all(self.model_uebersicht.eintrag(row)["wiederkehrend"] for row in zeilen))
+        menu.addSeparator()
+        delete_action = menu.addAction("Löschen" if len(ids) == 1 else f"{len(ids)} Zahlungen löschen")
+        action = menu.exec(self.view_uebersicht.viewport().mapToGlobal(pos))
+        if action is None:
+            return
         if action == edit_action:
-            self.zahlung_bearbeiten(zahlung_id)
+            self.zahlung_bearbeiten(ids[0])
         elif action == delete_action:
-            self.zahlung_loeschen(zahlung_id)
+            self.auswahl_loeschen(ids)
+        elif action == wiederkehrend_action:
+            self.auswahl_aendern(ids, "wiederkehrend", int(action.isChecked()))
+        elif action.data():
+            self.auswahl_aendern(ids, *action.data())
 
     def zahlung_bearbeiten(self, zahlung_id):
-        eintrag = get_zahlung_by_id(zahlung_id)
-        if eintrag:
-            daten = dict(eintrag)
-            self.page_zahlung.set_edit_mode(True, zahlung_id=zahlung_id, daten=daten)
-            self.stacked_widget.setCurrentWidget(self.page_zahlung)
-
-    def zahlung_loeschen(self, zahlung_id):
-        confirm = QMessageBox.question(
-            self, "Zahlung löschen",
-            "Soll diese Zahlung wirklich gelöscht werden?",
-            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
-        )
-        if confirm == QMessageBox.Yes:
-            delete_zahlung(zahlung_id)
-            self.update_uebersicht()
+        def geladen(eintrag):
+            if eintrag:
+                daten = dict(eintrag)
+                self.seite("zahlung").set_edit_mode(True, zahlung_id=zahlung_id, daten=daten)
+                self.stacked_widget.setCurrentWidget(self.page_zahlung)
+            else:
+                # Zahlungen archivierter Jahre lassen sich in Übersicht und Suche nur noch ansehen
+                self.statusBar().showMessage("Die Zahlung ist archiviert und kann nicht bearbeitet werden", 10000)
+
+        self.db.ausfuehren(get_zahlung_by_id, zahlung_id, ergebnis=geladen)
+
+    # --- Sammelbearbeitung: eine Transaktion, danach ein Update der Übersicht ---
+    SAMMEL_FUNKTIONEN = {
+        "kategorie_id": (zahlungen_kategorie_setzen, "Kategorie ändern"),
+        "konto_id": (zahlungen_konto_setzen, "Konto ändern"),
+        "wiederkehrend": (zahlungen_wiederkehrend_setzen, "Wiederkehrend setzen"),
+    }
+
+    def auswahl_aendern(self, ids, feld, wert):
+        def fertig(anzahl):
+            self.model_uebersicht.zeilen_geaendert(ids, {feld: wert}, anzahl)
             self.update_balance()
-            QMessageBox.information(self, "Erfolg", "Zahlung gelöscht!")
+            self.statusBar().showMessage(f"{anzahl} Zahlungen geändert", 10000)
+
+        funktion, text = self.SAMMEL_FUNKTIONEN[feld]
+        self.aufzeichnen(f"{text} ({len(ids)} Zahlungen)", funktion, ids, wert, ergebnis=fertig)
+
+    def auswahl_loeschen(self, ids):
+        # Ohne Rückfrage: Löschen lässt sich rückgängig machen
+        if ids:
+            self.aufzeichnen(f"{len(ids)} Zahlungen löschen" if len(ids) > 1 else "Zahlung löschen",
+                             zahlungen_loeschen, ids, ergebnis=lambda anzahl: self._zahlungen_geloescht(ids, anzahl))
+
+    def _zahlungen_geloescht(self, ids, anzahl):
+        self.model_uebersicht.zeilen_entfernt(ids, anzahl)
+        self.update_balance()
+        text = "Zahlung gelöscht" if anzahl == 1 else f"{anzahl} Zahlungen gelöscht"
+        self.statusBar().showMessage(f"{text} (Rückgängig mit {QKeySequence(QKeySequence.Undo).toString()})", 10000)
+
+    # --- Verlauf (Rückgängig/Wiederholen) und Änderungsfeed ---
+    def aufzeichnen(self, text, funktion, *args, ergebnis=None, fehler=None, **kwargs):
+        # Wie self.db.ausfuehren, aber rückgängig machbar: die Änderung landet als Aktion im Verlauf
+        def gespeichert(werte):
+            wert, von, bis = werte
+            if bis > von:
+                if self.protokoll_seq == von:
+                    # Eigene Änderung, Ansichten ziehen im Callback nach
+                    self.protokoll_seq = bis
+                self.verlauf.push(Aktion(self, text, von, bis))
+            if ergebnis is not None:
+                ergebnis(wert)
+
+        self.db.ausfuehren(protokolliert, funktion, *args, ergebnis=gespeichert, fehler=fehler, **kwargs)
+
+    def protokoll_anwenden(self, funktion, aktion):
+        self.db.ausfuehren(funktion, aktion.von, aktion.bis,
+                           ergebnis=lambda _: self.aenderungen_abholen(), fehler=self._verlauf_fehler)
+
+    def _verlauf_fehler(self, exc):
+        # Datenbank passt nicht mehr zum Verlauf (inzwischen anders geändert oder verdichtet)
+        self.verlauf.clear()
+        self.aenderungen_abholen()
+        QMessageBox.warning(self, "Rückgängig nicht möglich", f"{exc}\nDer Verlauf wurde geleert.")
+
+    def _protokoll_stand(self, stand):
+        self.protokoll_seq = stand
+
+    def aenderungen_abholen(self):
+        # Zieht Übersicht, Salden und sichtbare Seiten auf den aktuellen Protokollstand nach
+        self.db.ausfuehren(aenderungen_seit, self.protokoll_seq, ergebnis=self._aenderungen_angekommen,
+                           schluessel="aenderungen")
+
+    def _aenderungen_angekommen(self, feed):
+        stand, geaendert = feed
+        self.protokoll_seq = max(self.protokoll_seq, stand)
+        if geaendert is None:
+            # Protokoll seit dem letzten Stand verdichtet (oder die Einträge eines archivierten
+            # Jahres entfernt): alles neu laden; Aktionen im Verlauf fehlen womöglich Einträge
+            self.verlauf.clear()
+            geaendert = dict.fromkeys(("zahlungen", "vertraege", "regeln", "konten", "kategorien"), ())
+            self.db.ausfuehren(stammdaten_neu_laden, schluessel="stammdaten")
+        elif "archive" in geaendert:
+            # Ein Jahr wurde archiviert (wartung.py archivieren): seine Zahlungen sind aus main und
+            # aus dem Protokoll verschwunden, Aktionen darauf ließen sich nicht mehr zurücknehmen
+            self.verlauf.clear()
+            geaendert["zahlungen"] = ()
+            self.statusBar().showMessage("Ein Jahr wurde archiviert, der Verlauf wurde geleert", 10000)
+        zahlungen = geaendert.get("zahlungen")
+        if zahlungen is not None:
+            if not zahlungen or len(zahlungen) > FEED_EINZELN_MAX:
+                self.update_uebersicht()
+            else:
+                for zahlung_id in zahlungen:
+                    self.model_uebersicht.zeile_geaendert(zahlung_id)
+        if "vertraege" in geaendert and self.page_vertraege is not None:
+            self.page_vertraege.aktualisieren()
+        if geaendert.keys() & {"regeln", "konten", "kategorien"} and self.page_kategorien is not None:
+            self.regeln.aktualisieren()
+        self.update_balance()
+
+    def exportieren(self):
+        # Exportiert, was die Übersicht gerade zeigt (aktueller Filter), in einem eigenen Thread
+        from export_widget import exportieren
+        thread = exportieren(self, self.filter_uebersicht.suchfilter())
+        if thread is not None:
+            self.exporte.add(thread)
+            thread.finished.connect(lambda: self.exporte.discard(thread))
 
     def update_uebersicht(self):
-        self.list_uebersicht.clear()
-        for eintrag in get_zahlungen():
-            typ = "➕" if eintrag['typ'] == "Einnahme" else "➖"
-            wiederk = "🔁" if eintrag["wiederkehrend"] else ""
-            betrag = f"{eintrag['betrag']:.2f} €"
-            konto = eintrag['konto_name'] if eintrag['konto_name'] else "Kein Konto"
-            kategorie = eintrag['kategorie_name'] if eintrag['kategorie_name'] else "Keine Kategorie"
-            text = f"{typ} {eintrag['datum']} | {betrag} | Konto: {konto} | Kategorie: {kategorie} | {eintrag['beschreibung']} {wiederk}"
-            item = QListWidgetItem(text)
-            item.setData(Qt.UserRole, eintrag["id"])
-            self.list_uebersicht.addItem(item)
+        # Setzt nur das Model zurück; die View lädt das erste Fenster selbst nach
+        self.model_uebersicht.neu_laden()
+
+    def import_fertig(self, ergebnis, von, bis):
+        # Neue Konten und Kategorien meldet der Import selbst über den Stammdaten-Cache.
+        # Der Import lässt sich als Ganzes zurücknehmen (Sammeleintrag im Protokoll)
+        if bis > von:
+            self.verlauf.push(Aktion(self, f"{ergebnis.anzahl} Zahlungen importieren", von, bis))
+        self.aenderungen_abholen()
 
     def update_balance(self):
-        saldo = get_gesamtvermoegen()
-        self.balance_label.setText(f"Gesamtvermögen: {saldo:.2f} €")
+        # Mehrfache Anfragen hintereinander (z.B. nach Import) laufen nur einmal
+        self.db.ausfuehren(
+            lambda: (get_gesamtvermoegen(), get_salden()),
+            ergebnis=self._balance_geladen, fehler=self._balance_fehler, schluessel="balance"
+        )
 
-    # --- Kategorien ---
-    def update_kategorien(self):
-        self.kategorien = [dict(row) for row in get_kategorien()]
-        self.list_kategorien.clear()
-        for k in self.kategorien:
-            item = QListWidgetItem(f"{k['name']}")
-            item.setData(Qt.UserRole, k["id"])
-            self.list_kategorien.addItem(item)
-        self.page_zahlung.update_kategorien(self.kategorien)
+    def _balance_fehler(self, exc):
+        # Fehlende Wechselkurse zeigt das Label selbst, statt bei jeder Änderung einen Dialog
+        if isinstance(exc, WaehrungFehler):
+            self.balance_label.setText(f"Gesamtvermögen: – ({exc})")
+            self.db.ausfuehren(get_salden, ergebnis=self._salden_zeigen, schluessel="salden")
+        else:
+            self.db_fehler(exc)
+
+    def _balance_geladen(self, werte):
+        # Nach jeder Änderung an Zahlungen kommt update_balance; sichtbare Statistik/Vorschau mitziehen
+        aktuell = self.stacked_widget.currentWidget()
+        if aktuell is self.page_statistik or aktuell is self.page_vertraege:
+            aktuell.aktualisieren()
+        saldo, salden = werte
+        self.balance_label.setText(f"Gesamtvermögen: {saldo}")
+        self._salden_zeigen(salden)
+
+    def _salden_zeigen(self, salden):
+        teile = [
+            f"{s['konto_name'] if s['konto_name'] else 'Kein Konto'}: "
+            f"{Money(s['saldo_cent']).format(waehrung=s['waehrung'])}"
+            for s in salden
+        ]
+        self.salden_label.setText("  ·  ".join(teile))
+
+    # --- Stammdaten (Konten und Kategorien) ---
+    def _stammdaten_geaendert(self, aenderung):
+        # Seiten, die noch nicht gebaut sind, holen sich beim Erzeugen den aktuellen Stand
+        if aenderung.art == "kategorien":
+            if self.page_kategorien is not None:
+                liste_anwenden(self.list_kategorien, aenderung)
+                self.regeln.kategorien_anwenden(aenderung)
+            for page in (self.page_zahlung, self.page_vertraege, self.filter_uebersicht):
+                if page is not None:
+                    page.kategorien_anwenden(aenderung)
+        else:
+            if self.page_konten is not None:
+                liste_anwenden(self.list_konten, aenderung)
+            if self.page_kategorien is not None:
+                self.regeln.konten_anwenden(aenderung)
+            for page in (self.page_zahlung, self.page_import, self.page_vertraege, self.filter_uebersicht):
+                if page is not None:
+                    page.konten_anwenden(aenderung)
+        if aenderung.umbenannt or aenderung.entfernt:
+            # Übersicht löst Namen beim Zeichnen auf; Salden und Statistik zeigen Namen aus der Datenbank
+            self.model_uebersicht.namen_geaendert()
+            self.update_balance()
 
+    def _stammdaten_gespeichert(self, meldung):
+        # Listen und Übersicht ziehen über stammdaten_geaendert nach
+        QMessageBox.information(self, "Erfolg", meldung)
+
+    # --- Kategorien ---
     def kategorie_hinzufuegen(self):
         name, ok = QInputDialog.getText(self, "Kategorie hinzufügen", "Name der neuen Kategorie:")
         if ok and name.strip():
-            add_kategorie(name.strip())
-            self.update_kategorien()
-            QMessageBox.information(self, "Erfolg", "Kategorie hinzugefügt!")
+            self.aufzeichnen("Kategorie hinzufügen", add_kategorie, name.strip(),
+                             ergebnis=lambda _: self._stammdaten_gespeichert("Kategorie hinzugefügt!"))
 
     def kategorie_context_menu(self, pos: QPoint):
         item = self.list_kategorien.itemAt(pos)
@@ -228,9 +680,8 @@ class MainWindow(QMainWindow):
     def kategorie_bearbeiten(self, kategorie_id, alte_name):
         new_name, ok = QInputDialog.getText(self, "Kategorie bearbeiten", "Neuer Name:", text=alte_name)
         if ok and new_name.strip() and new_name.strip() != alte_name:
-            update_kategorie(kategorie_id, new_name.strip())
-            self.update_kategorien()
-            QMessageBox.information(self, "Erfolg", "Kategorie geändert!")
+            self.aufzeichnen("Kategorie umbenennen", update_kategorie, kategorie_id, new_name.strip(),
+                             ergebnis=lambda _: self._stammdaten_gespeichert("Kategorie geändert!"))
 
     def kategorie_loeschen(self, kategorie_id, kategorie_name):
         confirm = QMessageBox.question(
@@ -240,49 +691,69 @@ class MainWindow(QMainWindow):
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            delete_kategorie(kategorie_id)
-            self.update_kategorien()
-            QMessageBox.information(self, "Erfolg", "Kategorie gelöscht!")
+            self.aufzeichnen("Kategorie löschen", delete_kategorie, kategorie_id,
+                             ergebnis=lambda _: self._stammdaten_gespeichert("Kategorie gelöscht!"))
 
     # --- Konten ---
-    def update_konten(self):
-        self.konten = [dict(row) for row in get_konten()]
-        self.list_konten.clear()
-        for k in self.konten:
-            item = QListWidgetItem(f"{k['name']}")
-            item.setData(Qt.UserRole, k["id"])
-            self.list_konten.addItem(item)
-        self.page_zahlung.update_konten(self.konten)
-
     def konto_hinzufuegen(self):
         name, ok = QInputDialog.getText(self, "Konto hinzufügen", "Name des neuen Kontos:")
-        if ok and name.strip():
-            add_konto(name.strip())
-            self.update_konten()
-            QMessageBox.information(self, "Erfolg", "Konto hinzugefügt!")
+        if not ok or not name.strip():
+            return
+        waehrung, ok = QInputDialog.getItem(self, "Konto hinzufügen", "Währung des Kontos:", GAENGIGE, 0, True)
+        if ok:
+            self.aufzeichnen("Konto hinzufügen", add_konto, name.strip(), waehrung,
+                             ergebnis=lambda _: self._stammdaten_gespeichert("Konto hinzugefügt!"))
 
     def konto_context_menu(self, pos: QPoint):
         item = self.list_konten.itemAt(pos)
         if item is None:
             return
         menu = QMenu()
+        konto_id = item.data(Qt.UserRole)
+        konto_name = item.text()
         edit_action = menu.addAction("Bearbeiten")
+        waehrung_action = menu.addAction(f"Währung ändern ({self.stammdaten.waehrung(konto_id)}) …")
         delete_action = menu.addAction("Löschen")
         action = menu.exec(self.list_konten.viewport().mapToGlobal(pos))
-        konto_id = item.data(Qt.UserRole)
-        konto_name = item.text()
 
         if action == edit_action:
             self.konto_bearbeiten(konto_id, konto_name)
+        elif action == waehrung_action:
+            self.konto_waehrung_aendern(konto_id, konto_name)
         elif action == delete_action:
             self.konto_loeschen(konto_id, konto_name)
 
     def konto_bearbeiten(self, konto_id, alte_name):
         new_name, ok = QInputDialog.getText(self, "Konto bearbeiten", "Neuer Name:", text=alte_name)
         if ok and new_name.strip() and new_name.strip() != alte_name:
-            update_konto(konto_id, new_name.strip())
-            self.update_konten()
-            QMessageBox.information(self, "Erfolg", "Konto geändert!")
+            self.aufzeichnen("Konto umbenennen", update_konto, konto_id, new_name.strip(),
+                             ergebnis=lambda _: self._stammdaten_gespeichert("Konto geändert!"))
+
+    def konto_waehrung_aendern(self, konto_id, konto_name):
+        # Nur für Konten ohne Zahlungen, sonst meldet konto_waehrung_setzen einen Fehler
+        alt = self.stammdaten.waehrung(konto_id)
+        waehrungen = list(GAENGIGE) if alt in GAENGIGE else [alt, *GAENGIGE]
+        waehrung, ok = QInputDialog.getItem(self, "Währung ändern", f"Währung des Kontos '{konto_name}':",
+                                            waehrungen, waehrungen.index(alt), True)
+        if ok and waehrung.strip().upper() != alt:
+            self.aufzeichnen("Kontowährung ändern", konto_waehrung_setzen, konto_id, waehrung,
+                             ergebnis=lambda _: self._waehrung_geaendert())
+
+    def _waehrung_geaendert(self):
+        # Beträge in der Übersicht und die Salden zeigen die Währung des Kontos
+        self.model_uebersicht.namen_geaendert()
+        self.update_balance()
+        QMessageBox.information(self, "Erfolg", "Währung geändert!")
+
+    def kurse_laden(self):
+        pfade, _ = QFileDialog.getOpenFileNames(
+            self, "Wechselkurse laden", "", "Kursdateien (*.csv *.zip);;Alle Dateien (*)")
+        if pfade:
+            self.db.ausfuehren(kurse_laden, pfade, ergebnis=self._kurse_geladen)
+
+    def _kurse_geladen(self, anzahl):
+        self.update_balance()
+        QMessageBox.information(self, "Wechselkurse", f"{anzahl} Kurse geladen.")
 
     def konto_loeschen(self, konto_id, konto_name):
         confirm = QMessageBox.question(
@@ -292,12 +763,48 @@ class MainWindow(QMainWindow):
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            delete_konto(konto_id)
-            self.update_konten()
-            QMessageBox.information(self, "Erfolg", "Konto gelöscht!")
+            self.aufzeichnen("Konto löschen", delete_konto, konto_id,
+                             ergebnis=lambda _: self._stammdaten_gespeichert("Konto gelöscht!"))
+
+
+# Laufzeitmessung (siehe diagnose.py): Slots, die Übersicht, Salden und Seiten nachziehen
+diagnose.instrumentieren(MainWindow, "ui", [
+    "update_uebersicht", "update_balance", "_balance_geladen", "_stammdaten_geaendert",
+    "aenderungen_abholen", "_aenderungen_angekommen",
+])
+
+
+def startprofil_ausgeben(window):
+    # --profile-startup: nach dem ersten Leerlauf des Workers (Startdaten geladen) Phasen ausgeben und beenden
+    def leerlauf(beschaeftigt):
+        if not beschaeftigt and window.daten_angefordert:
+            window.db.beschaeftigt.disconnect(leerlauf)
+            startprofil.phase("Daten geladen")
+            print(startprofil.bericht(), flush=True)
+            window.close()
+
+    window.db.beschaeftigt.connect(leerlauf)
+
 
 if __name__ == "__main__":
+    profil = "--profile-startup" in sys.argv
+    if profil:
+        sys.argv.remove("--profile-startup")
+    if "--diagnose" in sys.argv:
+        # Laufzeitmessung von Anfang an (wie FINANZGURU_DIAGNOSE=1)
+        sys.argv.remove("--diagnose")
+        diagnose.einschalten()
+    if "--db" in sys.argv[:-1]:
+        # Andere Datenbankdatei (Standard: db.DB_FILE bzw. FINANZGURU_DB); Archive liegen daneben
+        stelle = sys.argv.index("--db")
+        db.DB_FILE = sys.argv[stelle + 1]
+        del sys.argv[stelle:stelle + 2]
     app = QApplication(sys.argv)
+    startprofil.phase("QApplication")
     window = MainWindow()
+    startprofil.phase("Hauptfenster aufbauen")
+    if profil:
+        startprofil_ausgeben(window)
     window.show()
+    startprofil.phase("Anzeigen")
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,33 @@
+import hashlib
+import re
+from functools import partial
+
+_NICHT_ALNUM = re.compile(r"[\W_]+")
+
+
+def normalisiere_beschreibung(text):
+    # Groß-/Kleinschreibung, Satzzeichen und Mehrfach-Leerzeichen spielen keine Rolle
+    return _NICHT_ALNUM.sub(" ", (text or "").casefold()).strip()
+
+
+def teil_hash(datum, beschreibung):
+    norm = normalisiere_beschreibung(beschreibung)
+    return hashlib.blake2b(f"{datum}|{norm}".encode(), digest_size=6).hexdigest()
+
+
+def teil_hashes(daten, beschreibungen):
+    # teil_hash für ganze Spalten (Massenimport): nur map über eingebaute Funktionen, damit je
+    # Zeile kein Python-Aufruf anfällt; beschreibungen dürfen hier nicht None sein
+    norm = map(str.strip, map(partial(_NICHT_ALNUM.sub, " "), map(str.casefold, beschreibungen)))
+    texte = map(str.encode, map("{}|{}".format, daten, norm))
+    return list(map(hashlib.blake2b.hexdigest, map(partial(hashlib.blake2b, digest_size=6), texte)))
+
+
+def fingerabdruck(datum, betrag_cent, konto_id, beschreibung):
+    # "<konto_id>:<betrag_cent>:<hash(datum, beschreibung)>"
+    # Der Präfix bis zum letzten ":" (Konto + Betrag) dient als Bucket für die Beinahe-Duplikat-Suche.
+    return f"{konto_id or 0}:{betrag_cent}:{teil_hash(datum, beschreibung)}"
+
+
+def bucket(fingerabdruck):
+    return fingerabdruck.rsplit(":", 1)[0]
@@ -0,0 +1,130 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
+    QPushButton, QFileDialog, QProgressBar, QMessageBox
+)
+from PySide6.QtCore import QThread, Signal
+import importer
+from db import protokolliert
+from stammdaten_qt import combo_anwenden
+
+
+class ImportThread(QThread):
+    fortschritt = Signal(int, float)
+    fertig = Signal(object)
+    fehler = Signal(str)
+
+    def __init__(self, pfad, format, konto, parent=None):
+        super().__init__(parent)
+        self.pfad = pfad
+        self.format = format
+        self.konto = konto
+
+    def run(self):
+        # Über protokolliert, damit sich der Import als eine Aktion zurücknehmen lässt:
+        # fertig liefert (ergebnis, von, bis)
+        try:
+            werte = protokolliert(
+                importer.importiere_datei, self.pfad, format=self.format, konto=self.konto,
+                fortschritt=lambda anzahl, anteil: self.fortschritt.emit(anzahl, anteil)
+            )
+        except Exception as e:
+            self.fehler.emit(str(e))
+        else:
+            self.fertig.emit(werte)
+
+
+class ImportWidget(QWidget):
+    def __init__(self, konten=None, on_import=None):
+        super().__init__()
+        self.on_import = on_import
+        self.thread = None
+
+        layout = QVBoxLayout()
+        # Zeile 1: Datei
+        row1 = QHBoxLayout()
+        row1.addWidget(QLabel("Datei:"))
+        self.input_datei = QLineEdit()
+        self.input_datei.setPlaceholderText("CSV, CAMT.053 (.xml) oder MT940 (.sta)")
+        row1.addWidget(self.input_datei)
+        self.btn_durchsuchen = QPushButton("Durchsuchen…")
+        self.btn_durchsuchen.clicked.connect(self.datei_waehlen)
+        row1.addWidget(self.btn_durchsuchen)
+        layout.addLayout(row1)
+
+        # Zeile 2: Format, Zielkonto
+        row2 = QHBoxLayout()
+        row2.addWidget(QLabel("Format:"))
+        self.combo_format = QComboBox()
+        self.combo_format.addItem("Automatisch", userData=None)
+        self.combo_format.addItem("CSV", userData="csv")
+        self.combo_format.addItem("CAMT.053", userData="camt")
+        self.combo_format.addItem("MT940", userData="mt940")
+        row2.addWidget(self.combo_format)
+        row2.addWidget(QLabel("Konto:"))
+        self.combo_konto = QComboBox()
+        row2.addWidget(self.combo_konto)
+        layout.addLayout(row2)
+        self.update_konten(konten or [])
+
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 1000)
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+        self.label_status = QLabel()
+        layout.addWidget(self.label_status)
+
+        self.btn_importieren = QPushButton("Importieren")
+        self.btn_importieren.clicked.connect(self.importieren)
+        layout.addWidget(self.btn_importieren)
+        layout.addStretch()
+        self.setLayout(layout)
+
+    def update_konten(self, konten):
+        self.combo_konto.clear()
+        self.combo_konto.addItem("Aus der Datei", userData=None)
+        for k in konten:
+            self.combo_konto.addItem(k["name"], userData=k["id"])
+
+    def konten_anwenden(self, aenderung):
+        combo_anwenden(self.combo_konto, aenderung, versatz=1)
+
+    def datei_waehlen(self):
+        pfad, _ = QFileDialog.getOpenFileName(
+            self, "Kontoauszug wählen", "",
+            "Kontoauszüge (*.csv *.xml *.sta *.mt940 *.txt);;Alle Dateien (*)"
+        )
+        if pfad:
+            self.input_datei.setText(pfad)
+
+    def importieren(self):
+        pfad = self.input_datei.text().strip()
+        if not pfad:
+            QMessageBox.warning(self, "Fehler", "Bitte eine Datei auswählen.")
+            return
+        self.btn_importieren.setEnabled(False)
+        self.progress.setValue(0)
+        self.label_status.setText("Import läuft…")
+        # Der Importer erwartet den Kontonamen
+        konto = self.combo_konto.currentText() if self.combo_konto.currentData() is not None else None
+        self.thread = ImportThread(pfad, self.combo_format.currentData(), konto, self)
+        self.thread.fortschritt.connect(self.fortschritt)
+        self.thread.fertig.connect(self.fertig)
+        self.thread.fehler.connect(self.fehler)
+        self.thread.start()
+
+    def fortschritt(self, anzahl, anteil):
+        self.progress.setValue(int(anteil * 1000))
+        self.label_status.setText(f"{anzahl:,} Zeilen gelesen…".replace(",", "."))
+
+    def fertig(self, werte):
+        ergebnis, von, bis = werte
+        self.btn_importieren.setEnabled(True)
+        self.progress.setValue(1000)
+        self.label_status.setText(str(ergebnis))
+        if self.on_import:
+            self.on_import(ergebnis, von, bis)
+
+    def fehler(self, meldung):
+        self.btn_importieren.setEnabled(True)
+        self.label_status.setText("")
+        QMessageBox.warning(self, "Import fehlgeschlagen", meldung)
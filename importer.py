@@ -0,0 +1,376 @@
+# Massenimport von Kontoauszügen (CSV, CAMT.053, MT940)
+#
+# Jede Quelle ist ein Generator, der normalisierte Datensätze liefert:
+#   {"datum": "YYYY-MM-DD", "betrag_cent": int (mit Vorzeichen), "beschreibung": str,
+#    "konto": Name oder None, "kategorie": Name oder None}
+# importiere() schreibt sie in Blöcken per executemany in einer einzigen Transaktion.
+#
+#   python importer.py umsaetze.csv [--konto Girokonto] [--format csv|camt|mt940]
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from itertools import islice, repeat
+from operator import itemgetter
+
+import db
+from fingerabdruck import teil_hashes
+from money import parse_cent
+
+BLOCKGROESSE = 20000
+
+FORMATE = ("csv", "camt", "mt940")
+
+# Übliche Spaltennamen deutscher Banken-Exporte je Zielfeld
+CSV_SPALTEN = {
+    "datum": ("datum", "buchungstag", "buchungsdatum", "valutadatum", "wertstellung", "date"),
+    "betrag": ("betrag", "umsatz", "betrag (eur)", "betrag in eur", "amount"),
+    "beschreibung": ("beschreibung", "verwendungszweck", "buchungstext", "description"),
+    "gegenpartei": ("beguenstigter/zahlungspflichtiger", "begünstigter/zahlungspflichtiger",
+                    "empfänger", "auftraggeber", "name zahlungsbeteiligter", "payee"),
+    "konto": ("konto", "auftragskonto", "iban auftragskonto", "account"),
+    "kategorie": ("kategorie", "category"),
+}
+
+
+class ImportFehler(ValueError):
+    pass
+
+
+def erkenne_format(pfad):
+    endung = os.path.splitext(pfad)[1].lower()
+    if endung == ".csv":
+        return "csv"
+    if endung == ".xml":
+        return "camt"
+    if endung in (".sta", ".mt940", ".940", ".txt"):
+        return "mt940"
+    raise ImportFehler(f"Unbekanntes Dateiformat: {pfad}")
+
+
+def _datum(text):
+    # "31.12.2024", "31.12.24", "2024-12-31" -> "2024-12-31"; ohne datetime, da pro Zeile aufgerufen
+    text = text.strip()
+    if len(text) == 10 and text[4] == "-":
+        return text
+    if len(text) == 10 and text[2] == ".":
+        return f"{text[6:10]}-{text[3:5]}-{text[0:2]}"
+    if len(text) == 8 and text[2] == ".":
+        return f"20{text[6:8]}-{text[3:5]}-{text[0:2]}"
+    raise ImportFehler(f"Ungültiges Datum: {text!r}")
+
+
+# --- CSV ---
+def _spalten_zuordnen(kopf, zuordnung=None):
+    namen = [k.strip().lower() for k in kopf]
+    indizes = {}
+    for feld, kandidaten in CSV_SPALTEN.items():
+        if zuordnung and feld in zuordnung:
+            kandidaten = (zuordnung[feld].strip().lower(),)
+        for kandidat in kandidaten:
+            if kandidat in namen:
+                indizes[feld] = namen.index(kandidat)
+                break
+    for pflicht in ("datum", "betrag"):
+        if pflicht not in indizes:
+            raise ImportFehler(f"Spalte für '{pflicht}' nicht gefunden (Kopfzeile: {', '.join(kopf)})")
+    return indizes
+
+
+def lese_csv(datei, encoding="utf-8-sig", trennzeichen=None, zuordnung=None):
+    text = io.TextIOWrapper(datei, encoding=encoding, newline="")
+    kopfzeile = text.readline()
+    if trennzeichen is None:
+        trennzeichen = ";" if kopfzeile.count(";") >= kopfzeile.count(",") else ","
+    kopf = next(csv.reader([kopfzeile], delimiter=trennzeichen))
+    idx = _spalten_zuordnen(kopf, zuordnung)
+    i_datum, i_betrag = idx["datum"], idx["betrag"]
+    i_beschr, i_gegen = idx.get("beschreibung"), idx.get("gegenpartei")
+    i_konto, i_kat = idx.get("konto"), idx.get("kategorie")
+
+    # Kurze Zeilen (weniger Spalten als die Kopfzeile) wären sonst ein IndexError mitten im Import
+    breite = max(idx.values()) + 1
+    leser = csv.reader(text, delimiter=trennzeichen)
+    for zeile in leser:
+        if not zeile:
+            continue
+        if len(zeile) < breite:
+            # line_num zählt ab der zweiten Zeile der Datei, die Kopfzeile kommt dazu
+            raise ImportFehler(f"Zeile {leser.line_num + 1}: {len(zeile)} statt mindestens {breite} Spalten")
+        beschreibung = zeile[i_beschr] if i_beschr is not None else ""
+        if i_gegen is not None and zeile[i_gegen]:
+            beschreibung = f"{zeile[i_gegen]} {beschreibung}".strip()
+        yield {
+            "datum": _datum(zeile[i_datum]),
+            "betrag_cent": parse_cent(zeile[i_betrag]),
+            "beschreibung": beschreibung,
+            "konto": (zeile[i_konto] or None) if i_konto is not None else None,
+            "kategorie": (zeile[i_kat] or None) if i_kat is not None else None,
+        }
+
+
+# --- CAMT.053 (ISO 20022) ---
+def _lokal(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _kind(elem, *pfad):
+    for name in pfad:
+        if elem is None:
+            return None
+        elem = next((k for k in elem if _lokal(k.tag) == name), None)
+    return elem
+
+
+def _text(elem, *pfad):
+    e = _kind(elem, *pfad)
+    return e.text.strip() if e is not None and e.text else ""
+
+
+def lese_camt(datei):
+    iban = None
+    for ereignis, elem in ET.iterparse(datei, events=("end",)):
+        tag = _lokal(elem.tag)
+        if tag == "Acct":
+            iban = _text(elem, "Id", "IBAN") or iban
+        elif tag == "Ntry":
+            cent = parse_cent(_text(elem, "Amt"))
+            if _text(elem, "CdtDbtInd") == "DBIT":
+                cent = -cent
+            datum = _text(elem, "BookgDt", "Dt") or _text(elem, "BookgDt", "DtTm")[:10]
+            details = _kind(elem, "NtryDtls", "TxDtls")
+            zweck = " ".join(
+                e.text.strip() for e in (details.iter() if details is not None else ())
+                if _lokal(e.tag) == "Ustrd" and e.text
+            )
+            partei = _text(details, "RltdPties", "Cdtr" if cent < 0 else "Dbtr", "Nm")
+            beschreibung = " ".join(t for t in (partei, zweck or _text(elem, "AddtlNtryInf")) if t)
+            yield {
+                "datum": datum,
+                "betrag_cent": cent,
+                "beschreibung": beschreibung,
+                "konto": iban,
+                "kategorie": None,
+            }
+            elem.clear()
+        elif tag == "Stmt":
+            elem.clear()
+
+
+# --- MT940 (SWIFT) ---
+_MT940_61 = re.compile(r"^(\d{6})(\d{4})?(R?[CD])[A-Z]?(\d+,\d{0,2})")
+
+
+def _mt940_verwendungszweck(text):
+    # Strukturiertes Feld 86 (?20..?29 Verwendungszweck, ?32/?33 Name), sonst Rohtext
+    if len(text) > 3 and text[3:4] == "?":
+        felder = {}
+        for teil in text[4:].split("?"):
+            if len(teil) >= 2 and teil[:2].isdigit():
+                felder[int(teil[:2])] = teil[2:]
+        name = "".join(felder.get(n, "") for n in (32, 33)).strip()
+        zweck = "".join(felder.get(n, "") for n in range(20, 30)).strip()
+        return " ".join(t for t in (name, zweck) if t)
+    return text.strip()
+
+
+def lese_mt940(datei, encoding="latin-1"):
+    konto = None
+    offen = None        # Datensatz aus :61:, wartet auf :86:
+    tag, inhalt = None, []
+
+    def feld_ende():
+        nonlocal konto, offen
+        wert = "".join(inhalt)
+        if tag == "25":
+            konto = wert.strip()
+        elif tag == "61":
+            m = _MT940_61.match(wert)
+            if not m:
+                raise ImportFehler(f"Ungültige :61:-Zeile: {wert!r}")
+            jj, mm, tt = m.group(1)[:2], m.group(1)[2:4], m.group(1)[4:6]
+            cent = parse_cent(m.group(4))
+            if m.group(3) in ("D", "RC"):
+                cent = -cent
+            offen = {"datum": f"20{jj}-{mm}-{tt}", "betrag_cent": cent, "beschreibung": "",
+                     "konto": konto, "kategorie": None}
+        elif tag == "86" and offen is not None:
+            offen["beschreibung"] = _mt940_verwendungszweck(wert)
+
+    for zeile in io.TextIOWrapper(datei, encoding=encoding, newline=None):
+        zeile = zeile.rstrip("\n")
+        if zeile.startswith(":") and zeile.find(":", 1) > 0:
+            feld_ende()
+            neues_tag = zeile[1:zeile.find(":", 1)]
+            if neues_tag == "61" and offen is not None:
+                yield offen
+                offen = None
+            tag, inhalt = neues_tag[:2], [zeile[zeile.find(":", 1) + 1:]]
+        elif zeile.startswith("-"):
+            feld_ende()
+            tag, inhalt = None, []
+        else:
+            inhalt.append(zeile)
+    feld_ende()
+    if offen is not None:
+        yield offen
+
+
+LESER = {"csv": lese_csv, "camt": lese_camt, "mt940": lese_mt940}
+
+
+# --- Schreiben ---
+# Datensätze landen zuerst in einer temporären Tabelle ohne Indizes und Trigger und werden
+# dann mit einem einzigen INSERT ... SELECT (nach Datum sortiert) übernommen. Die Einfüge-Trigger
+# auf zahlungen sind dabei aus; db.massenimport trägt Salden, Monatswerte, Volltextindex und
+# Beschreibungen danach mit je einem Statement für alle neuen Zeilen nach und schreibt statt der
+# einzelnen Zahlungen einen Sammeleintrag ins Änderungsprotokoll.
+# Der Fingerabdruck (siehe fingerabdruck.py) wird aus konto_id, Betrag und dem in Python
+# berechneten Hash von Datum und Beschreibung zusammengesetzt; die Hashes entstehen je Block
+# spaltenweise (teil_hashes). Datensätze ohne Kategorie aus der Quelle bekommen sie, falls eine
+# Regel passt, schon beim Einlesen (regel_kategorie_id).
+_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS import_zahlungen (
+    betrag_cent INTEGER, datum TEXT, beschreibung TEXT, konto TEXT, kategorie TEXT, teil_hash TEXT,
+    regel_kategorie_id INTEGER
+)
+"""
+
+class ImportErgebnis:
+    def __init__(self, anzahl, sekunden, uebersprungen=0):
+        self.anzahl = anzahl
+        self.sekunden = sekunden
+        self.uebersprungen = uebersprungen
+
+    @property
+    def zeilen_pro_sekunde(self):
+        # Verarbeitete Zeilen, also einschließlich übersprungener Duplikate
+        gelesen = self.anzahl + self.uebersprungen
+        return gelesen / self.sekunden if self.sekunden > 0 else float("inf")
+
+    def __str__(self):
+        text = f"{self.anzahl} Zahlungen in {self.sekunden:.2f} s ({self.zeilen_pro_sekunde:,.0f} Zeilen/s)"
+        if self.uebersprungen:
+            text += f", {self.uebersprungen} bereits vorhanden"
+        return text
+
+
+def importiere(datensaetze, konto=None, blockgroesse=BLOCKGROESSE, fortschritt=None, duplikate_ueberspringen=True):
+    # konto: fester Kontoname für alle Datensätze (überschreibt den Wert der Quelle)
+    # fortschritt(anzahl): wird nach jedem gelesenen Block aufgerufen
+    # duplikate_ueberspringen: Zahlungen, deren Fingerabdruck schon in zahlungen steht, auslassen
+    start = time.perf_counter()
+    anzahl = 0
+    regelwerk = db.get_regelwerk() or None
+    stammdaten = db.get_stammdaten()
+
+    def regel_kategorie(d):
+        if d["kategorie"] is not None:
+            return None
+        return regelwerk.kategorie(d["beschreibung"], d["betrag_cent"], stammdaten.id("konten", konto or d["konto"]))
+
+    with db.transaction() as con:
+        con.execute(_STAGING)
+        con.execute("DELETE FROM temp.import_zahlungen")
+        quelle = iter(datensaetze)
+        while True:
+            block = list(islice(quelle, blockgroesse))
+            if not block:
+                break
+            # Spaltenweise über itemgetter, so bleibt es bei einem Python-Aufruf je Zeile (der Quelle)
+            daten = list(map(itemgetter("datum"), block))
+            beschreibungen = list(map(itemgetter("beschreibung"), block))
+            con.executemany(
+                "INSERT INTO temp.import_zahlungen VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip(map(itemgetter("betrag_cent"), block), daten, beschreibungen,
+                    repeat(konto) if konto else map(itemgetter("konto"), block),
+                    map(itemgetter("kategorie"), block), teil_hashes(daten, beschreibungen),
+                    map(regel_kategorie, block) if regelwerk is not None else repeat(None))
+            )
+            anzahl += len(block)
+            if fortschritt:
+                fortschritt(anzahl)
+
+        # Fehlende Konten/Kategorien anlegen, dann alles in einem Statement übernehmen
+        con.execute("""
+            INSERT OR IGNORE INTO konten (name)
+            SELECT DISTINCT konto FROM temp.import_zahlungen WHERE konto IS NOT NULL
+        """)
+        con.execute("""
+            INSERT OR IGNORE INTO kategorien (name)
+            SELECT DISTINCT kategorie FROM temp.import_zahlungen WHERE kategorie IS NOT NULL
+        """)
+        with db.massenimport(con):
+            cur = con.execute(f"""
+                INSERT INTO zahlungen (betrag_cent, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend,
+                                       fingerabdruck)
+                SELECT n.betrag_cent, CASE WHEN n.betrag_cent > 0 THEN 'Einnahme' ELSE 'Ausgabe' END, n.datum,
+                       n.kategorie_id, n.konto_id, n.beschreibung, 0, n.fp
+                FROM (
+                    SELECT i.*, IFNULL(k.id, i.regel_kategorie_id) AS kategorie_id, ko.id AS konto_id,
+                           IFNULL(ko.id, 0) || ':' || i.betrag_cent || ':' || i.teil_hash AS fp
+                    FROM temp.import_zahlungen i
+                    LEFT JOIN kategorien k ON k.name = i.kategorie
+                    LEFT JOIN konten ko ON ko.name = i.konto
+                ) n
+                -- archivierte Jahre bleiben unverändert, ihre Zahlungen zählen als übersprungen
+                WHERE CAST(substr(n.datum, 1, 4) AS INTEGER) > IFNULL((SELECT MAX(jahr) FROM archive), 0)
+                {"AND NOT EXISTS (SELECT 1 FROM zahlungen z WHERE z.fingerabdruck = n.fp)"
+                 if duplikate_ueberspringen else ""}
+                ORDER BY n.datum
+            """)
+            eingefuegt = cur.rowcount
+        con.execute("DROP TABLE temp.import_zahlungen")
+    # Neu angelegte Konten/Kategorien in den Cache übernehmen
+    db.stammdaten_neu_laden()
+    return ImportErgebnis(eingefuegt, time.perf_counter() - start, uebersprungen=anzahl - eingefuegt)
+
+
+def importiere_datei(pfad, format=None, konto=None, fortschritt=None, **optionen):
+    # fortschritt(anzahl, anteil): anteil = gelesener Anteil der Datei (0..1)
+    format = format or erkenne_format(pfad)
+    if format not in LESER:
+        raise ImportFehler(f"Unbekanntes Format: {format}")
+    groesse = os.path.getsize(pfad) or 1
+    with open(pfad, "rb") as datei:
+        melden = None
+        if fortschritt:
+            def melden(anzahl):
+                fortschritt(anzahl, min(datei.tell() / groesse, 1.0))
+        return importiere(LESER[format](datei, **optionen), konto=konto, fortschritt=melden)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kontoauszüge importieren")
+    parser.add_argument("dateien", nargs="+")
+    parser.add_argument("--format", choices=FORMATE, help="Standard: anhand der Dateiendung")
+    parser.add_argument("--konto", help="Alle Zahlungen diesem Konto zuordnen")
+    parser.add_argument("--trennzeichen", help="CSV-Trennzeichen (Standard: automatisch)")
+    parser.add_argument("--encoding", help="Zeichenkodierung der Datei")
+    parser.add_argument("--db", default=db.DB_FILE, help="Pfad zur Datenbank (Standard: %(default)s)")
+    args = parser.parse_args(argv)
+
+    db.DB_FILE = args.db
+    db.init_db()
+    for pfad in args.dateien:
+        format = args.format or erkenne_format(pfad)
+        optionen = {}
+        if args.encoding and format != "camt":
+            optionen["encoding"] = args.encoding
+        if args.trennzeichen and format == "csv":
+            optionen["trennzeichen"] = args.trennzeichen
+        try:
+            ergebnis = importiere_datei(pfad, format=format, konto=args.konto, **optionen)
+        except (ImportFehler, ValueError, ET.ParseError) as e:
+            print(f"{pfad}: {e}", file=sys.stderr)
+            return 1
+        print(f"{pfad}: {ergebnis}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
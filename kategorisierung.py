@@ -0,0 +1,137 @@
+# Automatische Kategorisierung über Regeln (Text enthält / regulärer Ausdruck, optional mit
+# Betragsbereich und Konto). Es gewinnt die passende Regel mit der kleinsten Priorität, bei
+# Gleichstand die ältere.
+#
+# Alle Text-Regeln werden zu einem einzigen regulären Ausdruck in Trie-Form zusammengefasst
+# ("re(?:al|we)" statt "real|rewe"); ein Lookahead an jeder Position liefert alle Vorkommen,
+# auch überlappende, in einem Durchlauf in C. Eine Alternation mit einer benannten Gruppe je
+# Regel wäre bei einigen hundert Regeln um Größenordnungen langsamer. Reguläre Ausdrücke
+# werden einzeln geprüft, aber nur, wenn ihre gemeinsame Alternation überhaupt passt und nur,
+# solange sie die bisher beste Regel noch schlagen können.
+import re
+
+ARTEN = {"text": "Text enthält", "regex": "Regulärer Ausdruck"}
+
+
+def pruefe_muster(art, muster):
+    if art not in ARTEN:
+        raise ValueError(f"Unbekannte Regelart: {art}")
+    if not muster:
+        raise ValueError("Das Muster darf nicht leer sein.")
+    if art == "regex":
+        try:
+            re.compile(muster)
+        except re.error as e:
+            raise ValueError(f"Ungültiger regulärer Ausdruck: {e}") from None
+
+
+def _trie_muster(woerter):
+    # Präfixbaum als Regex: gemeinsame Anfänge werden nur einmal geprüft
+    wurzel = {}
+    for wort in woerter:
+        knoten = wurzel
+        for zeichen in wort:
+            knoten = knoten.setdefault(zeichen, {})
+        knoten[""] = True
+
+    def ausdruck(knoten):
+        zweige = [re.escape(zeichen) + ausdruck(kind) for zeichen, kind in sorted(knoten.items()) if zeichen]
+        if not zweige:
+            return ""
+        text = zweige[0] if len(zweige) == 1 else "(?:" + "|".join(zweige) + ")"
+        # Endet hier ein Wort, ist der Rest optional (gierig: längstes Vorkommen je Position)
+        return f"(?:{text})?" if "" in knoten else text
+
+    return ausdruck(wurzel)
+
+
+class _Regel:
+    __slots__ = ("rang", "kategorie_id", "betrag_min", "betrag_max", "konto_id", "regex", "bedingt")
+
+    def __init__(self, rang, zeile, regex=None):
+        self.rang = rang
+        self.kategorie_id = zeile["kategorie_id"]
+        self.betrag_min = zeile["betrag_min"]
+        self.betrag_max = zeile["betrag_max"]
+        self.konto_id = zeile["konto_id"]
+        self.regex = regex
+        self.bedingt = self.konto_id is not None or self.betrag_min is not None or self.betrag_max is not None
+
+    def erfuellt(self, betrag_cent, konto_id):
+        if self.konto_id is not None and self.konto_id != konto_id:
+            return False
+        if self.betrag_min is None and self.betrag_max is None:
+            return True
+        if betrag_cent is None:
+            return False
+        betrag = abs(betrag_cent)
+        return ((self.betrag_min is None or betrag >= self.betrag_min)
+                and (self.betrag_max is None or betrag <= self.betrag_max))
+
+
+class Regelwerk:
+    # regeln: Zeilen mit art, muster, kategorie_id, betrag_min, betrag_max (Cent, ohne Vorzeichen),
+    # konto_id; bereits nach (prioritaet, id) sortiert
+    def __init__(self, regeln):
+        self._text = {}    # Wort -> [_Regel], nach Rang
+        self._regex = []   # [_Regel] nach Rang
+        self._anzahl = 0
+        for rang, zeile in enumerate(regeln):
+            muster = zeile["muster"]
+            if zeile["art"] == "regex":
+                self._regex.append(_Regel(rang, zeile, re.compile(muster, re.IGNORECASE)))
+            else:
+                self._text.setdefault(muster.lower(), []).append(_Regel(rang, zeile))
+            self._anzahl += 1
+        self._suche = None
+        self._irgendein_regex = None
+        if len(self._regex) > 1:
+            try:
+                self._irgendein_regex = re.compile(
+                    "|".join(f"(?:{regel.regex.pattern})" for regel in self._regex), re.IGNORECASE
+                )
+            except re.error:
+                pass  # z.B. gleich benannte Gruppen in zwei Regeln: dann ohne Vorprüfung
+        if self._text:
+            # Vorab-Lookahead auf die möglichen Anfangszeichen überspringt die übrigen Positionen schneller
+            anfaenge = re.escape("".join(sorted({wort[0] for wort in self._text})))
+            self._suche = re.compile(f"(?=[{anfaenge}])(?=({_trie_muster(self._text)}))")
+            # Je Wort alle Regel-Wörter, die Präfix davon sind: an einer Position liefert der
+            # Lookahead nur das längste Vorkommen, die kürzeren gelten dort ebenfalls
+            self._praefixe = {
+                wort: sorted(
+                    (regel for laenge in range(1, len(wort) + 1) for regel in self._text.get(wort[:laenge], ())),
+                    key=lambda regel: regel.rang
+                )
+                for wort in self._text
+            }
+
+    def __len__(self):
+        return self._anzahl
+
+    def kategorie(self, beschreibung, betrag_cent=None, konto_id=None):
+        # kategorie_id der besten passenden Regel oder None
+        text = (beschreibung or "").lower()
+        beste = None
+        if self._suche is not None:
+            for wort in set(self._suche.findall(text)):
+                for regel in self._praefixe[wort]:
+                    if beste is not None and regel.rang >= beste.rang:
+                        break
+                    if not regel.bedingt or regel.erfuellt(betrag_cent, konto_id):
+                        beste = regel
+                        break
+        if (self._regex and (beste is None or self._regex[0].rang < beste.rang)
+                and (self._irgendein_regex is None or self._irgendein_regex.search(text))):
+            for regel in self._regex:
+                if beste is not None and regel.rang >= beste.rang:
+                    break
+                if (not regel.bedingt or regel.erfuellt(betrag_cent, konto_id)) and regel.regex.search(text):
+                    beste = regel
+                    break
+        return beste.kategorie_id if beste is not None else None
+
+    def kategorisieren(self, zeilen):
+        # zeilen: (beschreibung, betrag_cent, konto_id) -> [kategorie_id oder None]
+        kategorie = self.kategorie
+        return [kategorie(beschreibung, betrag_cent, konto_id) for beschreibung, betrag_cent, konto_id in zeilen]
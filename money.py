@@ -0,0 +1,112 @@
+import re
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from functools import total_ordering
+
+
+def _muster(tausender, dezimal):
+    t, d = re.escape(tausender), re.escape(dezimal)
+    return re.compile(rf"^(?:\d+|[1-9]\d{{0,2}}(?:{t}\d{{3}})+)(?:{d}(\d{{1,2}}))?$")
+
+
+# Deutsche Schreibweise zuerst, dann englische
+_FORMATE = [_muster(".", ","), _muster(",", ".")]
+# Häufigster Fall ohne Tausendertrennzeichen ("-12,50", "12.50"), in beiden Schreibweisen eindeutig
+_EINFACH = re.compile(r"(-?)(\d+)[,.](\d\d)$")
+
+
+def parse_cent(text):
+    # Wie parse_betrag, liefert aber ganze Cent als int; für den Massenimport, bei dem sich ein
+    # Money-Objekt je Zeile bemerkbar macht
+    m = _EINFACH.match(text)
+    if m:
+        cent = int(m.group(2) + m.group(3))
+        return -cent if m.group(1) else cent
+    s = text.strip().replace("€", "").replace("EUR", "").replace(" ", "").replace("\u00a0", "")
+    negativ = s.startswith("-")
+    if s[:1] in "+-":
+        s = s[1:]
+    for muster in _FORMATE:
+        m = muster.match(s)
+        if m:
+            nachkomma = m.group(1) or ""
+            ganz = s[:len(s) - len(nachkomma) - (1 if nachkomma else 0)]
+            euro = int(re.sub(r"\D", "", ganz))
+            cent = euro * 100 + int(nachkomma.ljust(2, "0"))
+            return -cent if negativ else cent
+    raise ValueError(f"Ungültiger Betrag: {text!r}")
+
+
+def parse_betrag(text):
+    # Akzeptiert deutsche und englische Schreibweisen: "1.234,56", "1234,5", "12.50", "1,234.56", "-3 €"
+    return Money(parse_cent(text))
+
+
+@total_ordering
+class Money:
+    # Geldbetrag in ganzen Cent; in der Datenbank als INTEGER (betrag_cent) gespeichert
+    __slots__ = ("cent",)
+
+    def __init__(self, cent=0):
+        self.cent = int(cent)
+
+    @classmethod
+    def von(cls, wert):
+        if isinstance(wert, Money):
+            return wert
+        if isinstance(wert, str):
+            return parse_betrag(wert)
+        if isinstance(wert, float):
+            wert = repr(wert)
+        try:
+            d = Decimal(wert)
+        except InvalidOperation:
+            raise ValueError(f"Ungültiger Betrag: {wert!r}") from None
+        return cls(int((d * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+
+    def to_decimal(self):
+        return Decimal(self.cent) / 100
+
+    def __abs__(self):
+        return Money(abs(self.cent))
+
+    def __neg__(self):
+        return Money(-self.cent)
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cent + other.cent)
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.cent - other.cent)
+
+    def __eq__(self, other):
+        return isinstance(other, Money) and self.cent == other.cent
+
+    def __lt__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.cent < other.cent
+
+    def __hash__(self):
+        return hash(self.cent)
+
+    def __bool__(self):
+        return self.cent != 0
+
+    def __repr__(self):
+        return f"Money({self.cent})"
+
+    def format(self, symbol=True, waehrung="EUR"):
+        # Deutsche Schreibweise: 1.234,56 €, andere Währungen mit ihrem Code: 1.234,56 USD
+        vorzeichen = "-" if self.cent < 0 else ""
+        euro, cent = divmod(abs(self.cent), 100)
+        text = f"{vorzeichen}{euro:,}".replace(",", ".") + f",{cent:02d}"
+        if not symbol:
+            return text
+        return f"{text} €" if waehrung == "EUR" else f"{text} {waehrung}"
+
+    def __str__(self):
+        return self.format()
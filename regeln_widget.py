@@ -0,0 +1,221 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QSpinBox,
+    QMessageBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView
+)
+from PySide6.QtCore import Qt, Signal
+from db import get_regeln, add_regel, update_regel, delete_regel, zahlungen_kategorisieren
+from kategorisierung import ARTEN
+from money import Money, parse_betrag
+from stammdaten_qt import combo_anwenden
+
+SPALTEN = ["Priorität", "Art", "Muster", "Kategorie", "Konto", "Betrag ab", "Betrag bis"]
+
+
+class RegelnWidget(QWidget):
+    # Anzahl neu zugeordneter Zahlungen nach "Einordnen"
+    zahlungen_geaendert = Signal(int)
+
+    def __init__(self, worker, kategorien=None, konten=None):
+        super().__init__()
+        self.worker = worker
+        self.regeln = []
+        self.regel_id = None
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Regeln für die automatische Kategorisierung (kleinere Priorität gewinnt):"))
+        self.table = QTableWidget(0, len(SPALTEN))
+        self.table.setHorizontalHeaderLabels(SPALTEN)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.itemSelectionChanged.connect(self.auswahl_geaendert)
+        layout.addWidget(self.table)
+
+        # Zeile 1: Art, Muster, Kategorie
+        row1 = QHBoxLayout()
+        self.combo_art = QComboBox()
+        for art, name in ARTEN.items():
+            self.combo_art.addItem(name, userData=art)
+        row1.addWidget(self.combo_art)
+        self.input_muster = QLineEdit()
+        self.input_muster.setPlaceholderText("z.B. rewe  oder  ^netflix")
+        row1.addWidget(self.input_muster, 2)
+        row1.addWidget(QLabel("→ Kategorie:"))
+        self.combo_kategorie = QComboBox()
+        row1.addWidget(self.combo_kategorie)
+        layout.addLayout(row1)
+
+        # Zeile 2: Bedingungen und Priorität
+        row2 = QHBoxLayout()
+        row2.addWidget(QLabel("Konto:"))
+        self.combo_konto = QComboBox()
+        row2.addWidget(self.combo_konto)
+        row2.addWidget(QLabel("Betrag:"))
+        self.input_betrag_min = QLineEdit()
+        self.input_betrag_min.setPlaceholderText("ab")
+        self.input_betrag_min.setMaximumWidth(90)
+        row2.addWidget(self.input_betrag_min)
+        self.input_betrag_max = QLineEdit()
+        self.input_betrag_max.setPlaceholderText("bis")
+        self.input_betrag_max.setMaximumWidth(90)
+        row2.addWidget(self.input_betrag_max)
+        row2.addWidget(QLabel("Priorität:"))
+        self.input_prioritaet = QSpinBox()
+        self.input_prioritaet.setRange(0, 9999)
+        self.input_prioritaet.setValue(100)
+        row2.addWidget(self.input_prioritaet)
+        row2.addStretch()
+        layout.addLayout(row2)
+        self.update_kategorien(kategorien or [])
+        self.update_konten(konten or [])
+
+        # Zeile 3: Aktionen
+        row3 = QHBoxLayout()
+        self.btn_speichern = QPushButton("Regel anlegen")
+        self.btn_speichern.clicked.connect(self.speichern)
+        row3.addWidget(self.btn_speichern)
+        self.btn_neu = QPushButton("Neu")
+        self.btn_neu.clicked.connect(self.clear_fields)
+        row3.addWidget(self.btn_neu)
+        self.btn_loeschen = QPushButton("Löschen")
+        self.btn_loeschen.setEnabled(False)
+        self.btn_loeschen.clicked.connect(self.loeschen)
+        row3.addWidget(self.btn_loeschen)
+        row3.addStretch()
+        self.btn_einordnen = QPushButton("Zahlungen ohne Kategorie einordnen")
+        self.btn_einordnen.clicked.connect(self.einordnen)
+        row3.addWidget(self.btn_einordnen)
+        layout.addLayout(row3)
+        self.setLayout(layout)
+
+    def update_kategorien(self, kategorien):
+        auswahl = self.combo_kategorie.currentData()
+        self.combo_kategorie.clear()
+        for k in kategorien:
+            self.combo_kategorie.addItem(k["name"], userData=k["id"])
+        self.combo_kategorie.setCurrentIndex(max(self.combo_kategorie.findData(auswahl), 0))
+        self.aktualisieren()
+
+    def update_konten(self, konten):
+        auswahl = self.combo_konto.currentData()
+        self.combo_konto.clear()
+        self.combo_konto.addItem("Alle Konten", userData=None)
+        for k in konten:
+            self.combo_konto.addItem(k["name"], userData=k["id"])
+        self.combo_konto.setCurrentIndex(max(self.combo_konto.findData(auswahl), 0))
+        self.aktualisieren()
+
+    # Einzelne Änderungen aus dem Stammdaten-Cache; beim Löschen entfallen auch Regeln
+    def kategorien_anwenden(self, aenderung):
+        combo_anwenden(self.combo_kategorie, aenderung)
+        if aenderung.umbenannt or aenderung.entfernt:
+            self.aktualisieren()
+
+    def konten_anwenden(self, aenderung):
+        combo_anwenden(self.combo_konto, aenderung, versatz=1)
+        if aenderung.umbenannt or aenderung.entfernt:
+            self.aktualisieren()
+
+    # --- Laden ---
+    def aktualisieren(self):
+        self.worker.ausfuehren(lambda: [dict(r) for r in get_regeln()], ergebnis=self._geladen, schluessel="regeln")
+
+    def _geladen(self, regeln):
+        self.regeln = regeln
+        self.table.blockSignals(True)
+        self.table.setRowCount(len(regeln))
+        for zeile, r in enumerate(regeln):
+            werte = [
+                str(r["prioritaet"]),
+                ARTEN.get(r["art"], r["art"]),
+                r["muster"],
+                r["kategorie_name"] or "",
+                r["konto_name"] or "Alle Konten",
+                str(Money(r["betrag_min"])) if r["betrag_min"] is not None else "",
+                str(Money(r["betrag_max"])) if r["betrag_max"] is not None else "",
+            ]
+            for spalte, wert in enumerate(werte):
+                item = QTableWidgetItem(wert)
+                if spalte in (0, 5, 6):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(zeile, spalte, item)
+            if r["id"] == self.regel_id:
+                self.table.selectRow(zeile)
+        self.table.blockSignals(False)
+
+    # --- Formular ---
+    def auswahl_geaendert(self):
+        zeilen = self.table.selectionModel().selectedRows()
+        if not zeilen:
+            return
+        r = self.regeln[zeilen[0].row()]
+        self.regel_id = r["id"]
+        self.combo_art.setCurrentIndex(max(self.combo_art.findData(r["art"]), 0))
+        self.input_muster.setText(r["muster"])
+        self.combo_kategorie.setCurrentIndex(max(self.combo_kategorie.findData(r["kategorie_id"]), 0))
+        self.combo_konto.setCurrentIndex(max(self.combo_konto.findData(r["konto_id"]), 0))
+        for feld, cent in ((self.input_betrag_min, r["betrag_min"]), (self.input_betrag_max, r["betrag_max"])):
+            feld.setText(Money(cent).format(symbol=False) if cent is not None else "")
+        self.input_prioritaet.setValue(r["prioritaet"])
+        self.btn_speichern.setText("Änderung speichern")
+        self.btn_loeschen.setEnabled(True)
+
+    def clear_fields(self):
+        self.regel_id = None
+        self.table.clearSelection()
+        self.combo_art.setCurrentIndex(0)
+        self.input_muster.clear()
+        self.combo_konto.setCurrentIndex(0)
+        self.input_betrag_min.clear()
+        self.input_betrag_max.clear()
+        self.input_prioritaet.setValue(100)
+        self.btn_speichern.setText("Regel anlegen")
+        self.btn_loeschen.setEnabled(False)
+
+    def _betrag(self, feld):
+        # Leeres Feld: keine Grenze; sonst Cent ohne Vorzeichen
+        text = feld.text().strip()
+        return abs(parse_betrag(text).cent) if text else None
+
+    def speichern(self):
+        muster = self.input_muster.text().strip()
+        kategorie_id = self.combo_kategorie.currentData()
+        if not muster:
+            QMessageBox.warning(self, "Fehler", "Bitte ein Muster eingeben.")
+            return
+        if kategorie_id is None:
+            QMessageBox.warning(self, "Fehler", "Bitte eine Kategorie auswählen.")
+            return
+        try:
+            betrag_min = self._betrag(self.input_betrag_min)
+            betrag_max = self._betrag(self.input_betrag_max)
+        except ValueError:
+            QMessageBox.warning(self, "Fehler", "Bitte gültige Beträge eingeben (z.B. 1.234,56).")
+            return
+        args = (self.combo_art.currentData(), muster, kategorie_id, betrag_min, betrag_max,
+                self.combo_konto.currentData(), self.input_prioritaet.value())
+        # Ungültige reguläre Ausdrücke meldet db.add_regel/update_regel als ValueError
+        fehler = lambda exc: QMessageBox.warning(self, "Fehler", str(exc))
+        if self.regel_id is None:
+            self.worker.ausfuehren(add_regel, *args, ergebnis=self._gespeichert, fehler=fehler)
+        else:
+            self.worker.ausfuehren(update_regel, self.regel_id, *args, ergebnis=self._gespeichert, fehler=fehler)
+
+    def _gespeichert(self, _):
+        self.clear_fields()
+        self.aktualisieren()
+
+    def loeschen(self):
+        if self.regel_id is not None:
+            self.worker.ausfuehren(delete_regel, self.regel_id, ergebnis=self._gespeichert)
+
+    def einordnen(self):
+        def fertig(anzahl):
+            if anzahl:
+                self.zahlungen_geaendert.emit(anzahl)
+            QMessageBox.information(self, "Kategorisierung", f"{anzahl} Zahlungen einer Kategorie zugeordnet.")
+
+        self.worker.ausfuehren(zahlungen_kategorisieren, ergebnis=fertig)
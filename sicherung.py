@@ -0,0 +1,275 @@
+# Sicherungen der laufenden Datenbank (SQLite-Backup-API) und Wiederherstellung
+#
+# Kopiert wird seitenweise (SCHRITT_SEITEN je Schritt) über eine eigene Verbindung, die während
+# der ganzen Kopie eine Lesetransaktion offen hält. Dadurch ist die Kopie ein Schnappschuss eines
+# Stands: Schreiber arbeiten dank WAL ungehindert weiter, und die Backup-API muss nicht bei jeder
+# fremden Änderung von vorn anfangen (ohne offene Lesetransaktion tut sie das). Zwischen den
+# Schritten meldet sich fortschritt() und kann mit SicherungAbgebrochen abbrechen. Der GIL ist
+# während der Schritte frei, die Oberfläche bleibt bedienbar.
+#
+# Jeder Schnappschuss wird mit PRAGMA quick_check geprüft und mit den Archivdateien des
+# gesicherten Stands (siehe db.archivieren) und einer Beschreibung (sicherung.json) in ein
+# ZIP-Archiv gepackt: <verzeichnis>/<datenbank>_JJJJMMTT-HHMMSS.zip. Von den Sicherungen bleiben
+# die neuesten BEHALTEN. Zeitgesteuert sichert das Hauptfenster (siehe sicherung_qt), sonst:
+#
+#   python wartung.py sichern [--ziel VERZEICHNIS] [--behalten 7]
+#   python wartung.py sicherungen
+#   python wartung.py wiederherstellen [DATEI]
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+import db
+import db_pool
+
+SICHERUNG_VERSION = 1
+SCHRITT_SEITEN = 2048          # 8 MiB bei 4-KiB-Seiten
+BLOCK = 1 << 20                # beim Packen und Entpacken
+KOMPRESSION = 1             # Packen kostet die meiste Zeit; Stufe 6 braucht 2,5x so lange für 15 % weniger
+BEHALTEN = 7
+# Abstand der zeitgesteuerten Sicherungen; 0 schaltet sie ab
+STUNDEN = float(os.environ.get("FINANZGURU_SICHERUNG_STUNDEN", 24))
+BESCHREIBUNG = "sicherung.json"
+DATEN = "daten.db"
+_NAME = re.compile(r"_(\d{8}-\d{6})(?:-\d+)?\.zip$")
+
+
+class SicherungFehler(ValueError):
+    pass
+
+
+class SicherungAbgebrochen(SicherungFehler):
+    # Aus dem fortschritt-Callback geworfen, bricht die Sicherung ab; es bleibt keine Datei zurück
+    pass
+
+
+class SicherungErgebnis:
+    def __init__(self, pfad, beschreibung, sekunden):
+        self.pfad = pfad
+        self.beschreibung = beschreibung
+        self.sekunden = sekunden
+
+    def __str__(self):
+        groesse = os.path.getsize(self.pfad) / 2**20
+        archive = self.beschreibung["archive"]
+        text = f"{self.beschreibung['zahlungen']} Zahlungen"
+        if archive:
+            text += f" und {len(archive)} Archive"
+        return f"{text} in {self.sekunden:.1f} s gesichert ({groesse:.1f} MiB)"
+
+
+def verzeichnis():
+    # Standard: neben der Datenbank, <datenbank>_sicherungen
+    return os.environ.get("FINANZGURU_SICHERUNG") or f"{os.path.splitext(db.DB_FILE)[0]}_sicherungen"
+
+
+def sicherungen(ziel=None):
+    # [(pfad, zeitpunkt)] der vorhandenen Sicherungen dieser Datenbank, neueste zuerst
+    ziel = ziel or verzeichnis()
+    stamm = os.path.splitext(os.path.basename(db.DB_FILE))[0]
+    if not os.path.isdir(ziel):
+        return []
+    gefunden = []
+    for name in os.listdir(ziel):
+        treffer = _NAME.search(name)
+        if treffer and name[:treffer.start()] == stamm:
+            gefunden.append((os.path.join(ziel, name), datetime.strptime(treffer.group(1), "%Y%m%d-%H%M%S")))
+    return sorted(gefunden, key=lambda s: (s[1], s[0]), reverse=True)
+
+
+def faellig(ziel=None, stunden=STUNDEN):
+    if stunden <= 0:
+        return False
+    vorhanden = sicherungen(ziel)
+    return not vorhanden or (datetime.now() - vorhanden[0][1]).total_seconds() >= stunden * 3600
+
+
+def rotieren(ziel=None, behalten=BEHALTEN):
+    # Entfernt alle bis auf die neuesten behalten Sicherungen; liefert die entfernten Pfade
+    entfernt = [pfad for pfad, _ in sicherungen(ziel)[behalten:]]
+    for pfad in entfernt:
+        os.remove(pfad)
+    return entfernt
+
+
+def beschreibung(pfad):
+    try:
+        with zipfile.ZipFile(pfad) as z:
+            return json.loads(z.read(BESCHREIBUNG))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        raise SicherungFehler(f"{pfad} ist keine lesbare Sicherung: {e}") from e
+
+
+# --- Kopieren und Prüfen ---
+def _kopieren(quelle, ziel_pfad, melden):
+    # Seitenweise Kopie von quelle (offene Verbindung) nach ziel_pfad; die Kopie braucht keine -wal-Datei
+    ziel = sqlite3.connect(ziel_pfad, isolation_level=None)
+    try:
+        quelle.backup(ziel, pages=SCHRITT_SEITEN,
+                      progress=lambda status, rest, gesamt: melden(gesamt - rest, gesamt))
+        ziel.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        ziel.close()
+
+
+def _pruefen(pfad):
+    con = sqlite3.connect(pfad, isolation_level=None)
+    try:
+        meldungen = [row[0] for row in con.execute("PRAGMA quick_check")]
+    finally:
+        con.close()
+    if meldungen != ["ok"]:
+        raise SicherungFehler(f"quick_check für {os.path.basename(pfad)}: {'; '.join(meldungen[:5])}")
+
+
+def _packen(z, pfad, name, melden):
+    with open(pfad, "rb") as quelle, z.open(name, "w", force_zip64=True) as ziel:
+        gesamt = os.path.getsize(pfad)
+        geschrieben = 0
+        while block := quelle.read(BLOCK):
+            ziel.write(block)
+            geschrieben += len(block)
+            melden(geschrieben, gesamt)
+
+
+def _neuer_pfad(ziel):
+    stamm = os.path.splitext(os.path.basename(db.DB_FILE))[0]
+    zeit = datetime.now().strftime("%Y%m%d-%H%M%S")
+    pfad = os.path.join(ziel, f"{stamm}_{zeit}.zip")
+    nummer = 2
+    while os.path.exists(pfad):
+        pfad = os.path.join(ziel, f"{stamm}_{zeit}-{nummer}.zip")
+        nummer += 1
+    return pfad
+
+
+def sichern(ziel=None, behalten=BEHALTEN, fortschritt=None):
+    # fortschritt(schritt, erledigt, gesamt): schritt ist "Kopieren", "Prüfen" oder "Packen";
+    # behalten=None lässt ältere Sicherungen stehen
+    start = time.perf_counter()
+    ziel = ziel or verzeichnis()
+    os.makedirs(ziel, exist_ok=True)
+    if not os.path.exists(db.DB_FILE):
+        raise SicherungFehler(f"{db.DB_FILE} existiert nicht")
+
+    def melden(schritt):
+        if fortschritt is None:
+            return lambda erledigt, gesamt: None
+        return lambda erledigt, gesamt: fortschritt(schritt, erledigt, gesamt)
+
+    pfad = _neuer_pfad(ziel)
+    # Kopien entstehen neben dem Ziel, die Datenbank selbst bekommt keine fremden Dateien daneben
+    arbeit = tempfile.mkdtemp(prefix=".sicherung-", dir=ziel)
+    kopien = []
+    try:
+        quelle = sqlite3.connect(db.DB_FILE, timeout=db_pool.BUSY_TIMEOUT, isolation_level=None)
+        try:
+            # Die Lesetransaktion legt den Stand fest: Kopie, Archivliste und Beschreibung passen zusammen
+            quelle.execute("BEGIN")
+            archive = {row[0]: row[1] for row in quelle.execute("SELECT jahr, anzahl FROM archive ORDER BY jahr")}
+            info = {
+                "version": SICHERUNG_VERSION,
+                "erstellt": datetime.now().isoformat(timespec="seconds"),
+                "datenbank": os.path.basename(db.DB_FILE),
+                "schema_version": db.schema_version(quelle),
+                "zahlungen": quelle.execute("SELECT COUNT(*) FROM zahlungen").fetchone()[0],
+                "protokoll_stand": quelle.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'protokoll'").fetchone()[0],
+                "archive": {str(jahr): anzahl for jahr, anzahl in archive.items()},
+            }
+            _kopieren(quelle, os.path.join(arbeit, DATEN), melden("Kopieren"))
+        finally:
+            quelle.close()
+        kopien.append((os.path.join(arbeit, DATEN), DATEN))
+        # Archive ändern sich nach dem Anlegen nicht mehr; sie werden ebenso kopiert und geprüft
+        for jahr in archive:
+            archiv = db.archivpfad(jahr)
+            if not os.path.exists(archiv):
+                raise SicherungFehler(f"Archiv für {jahr} fehlt: {archiv}")
+            quelle = sqlite3.connect(f"file:{archiv}?mode=ro", uri=True, isolation_level=None)
+            try:
+                _kopieren(quelle, os.path.join(arbeit, f"archiv_{jahr}.db"), melden(f"Kopieren {jahr}"))
+            finally:
+                quelle.close()
+            kopien.append((os.path.join(arbeit, f"archiv_{jahr}.db"), f"archiv_{jahr}.db"))
+
+        for nummer, (kopie, _) in enumerate(kopien):
+            melden("Prüfen")(nummer, len(kopien))
+            _pruefen(kopie)
+        info["quick_check"] = "ok"
+
+        with zipfile.ZipFile(f"{pfad}.tmp", "w", zipfile.ZIP_DEFLATED, compresslevel=KOMPRESSION) as z:
+            z.writestr(BESCHREIBUNG, json.dumps(info, ensure_ascii=False, indent=2))
+            for kopie, name in kopien:
+                _packen(z, kopie, name, melden("Packen"))
+        os.replace(f"{pfad}.tmp", pfad)
+    except BaseException:
+        if os.path.exists(f"{pfad}.tmp"):
+            os.remove(f"{pfad}.tmp")
+        raise
+    finally:
+        shutil.rmtree(arbeit, ignore_errors=True)
+    if behalten is not None:
+        rotieren(ziel, behalten)
+    return SicherungErgebnis(pfad, info, time.perf_counter() - start)
+
+
+# --- Wiederherstellen ---
+def wiederherstellen(pfad, vorher_sichern=True, ziel=None):
+    # Ersetzt Datenbank und Archive durch den Stand der Sicherung pfad. Vorher wird der aktuelle
+    # Stand gesichert (ohne Rotation), die Wiederherstellung lässt sich also selbst rückgängig
+    # machen. Archivdateien, die der gesicherte Stand nicht kennt, werden nur umbenannt
+    # (.vor-wiederherstellung). Das Programm sollte dabei nicht laufen: Übersicht und
+    # Rückgängig-Verlauf eines offenen Fensters passen danach nicht mehr zur Datenbank.
+    info = beschreibung(pfad)
+    if info.get("version", 0) > SICHERUNG_VERSION or info["schema_version"] > len(db.MIGRATIONEN):
+        raise SicherungFehler(f"{pfad} stammt von einer neueren Programmversion")
+    vorherige = None
+    if vorher_sichern and os.path.exists(db.DB_FILE):
+        vorherige = sichern(ziel, behalten=None)
+
+    ordner = os.path.dirname(os.path.abspath(db.DB_FILE))
+    arbeit = tempfile.mkdtemp(prefix=".wiederherstellung-", dir=ordner)
+    try:
+        with zipfile.ZipFile(pfad) as z:
+            namen = [DATEN] + [f"archiv_{jahr}.db" for jahr in info["archive"]]
+            for name in namen:
+                with z.open(name) as quelle, open(os.path.join(arbeit, name), "wb") as ziel_datei:
+                    while block := quelle.read(BLOCK):
+                        ziel_datei.write(block)
+                _pruefen(os.path.join(arbeit, name))
+
+        # Über die Backup-API in die bestehende Datei: andere Verbindungen sehen den neuen Stand,
+        # WAL und Sperren bleiben in SQLites Hand
+        db_pool.close_all()
+        quelle = sqlite3.connect(os.path.join(arbeit, DATEN), isolation_level=None)
+        ziel_con = sqlite3.connect(db.DB_FILE, timeout=db_pool.BUSY_TIMEOUT, isolation_level=None)
+        try:
+            quelle.backup(ziel_con, pages=SCHRITT_SEITEN)
+        except sqlite3.OperationalError as e:
+            raise SicherungFehler(f"Wiederherstellen nicht möglich: {e}") from e
+        finally:
+            ziel_con.close()
+            quelle.close()
+
+        for jahr in info["archive"]:
+            os.replace(os.path.join(arbeit, f"archiv_{jahr}.db"), db.archivpfad(int(jahr)))
+        stamm, endung = os.path.splitext(os.path.basename(db.DB_FILE))
+        fremd = re.compile(re.escape(stamm) + r"_(\d{4})" + re.escape(endung or ".db"))
+        for name in os.listdir(ordner):
+            treffer = fremd.fullmatch(name)
+            if treffer and treffer.group(1) not in info["archive"]:
+                os.replace(os.path.join(ordner, name), os.path.join(ordner, f"{name}.vor-wiederherstellung"))
+    finally:
+        shutil.rmtree(arbeit, ignore_errors=True)
+    db_pool.close_all()
+    # Ältere Sicherungen auf das aktuelle Schema heben; Konten und Kategorien neu in den Cache
+    db.init_db()
+    db.stammdaten_neu_laden()
+    return info, vorherige
@@ -0,0 +1,33 @@
+# Zeitgesteuerte Sicherung aus dem Hauptfenster: sicherung.sichern läuft in einem eigenen Thread,
+# der Fortschritt kommt (nur bei jedem neuen Prozent) per Signal in die Statusleiste.
+from PySide6.QtCore import QThread, Signal
+import sicherung
+
+
+class SicherungThread(QThread):
+    fortschritt = Signal(str, int)
+    fertig = Signal(object)
+    fehler = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.gemeldet = None
+
+    def run(self):
+        def melden(schritt, erledigt, gesamt):
+            if self.isInterruptionRequested():
+                raise sicherung.SicherungAbgebrochen("Sicherung abgebrochen")
+            stand = (schritt, erledigt * 100 // gesamt if gesamt else 100)
+            if stand != self.gemeldet:
+                self.gemeldet = stand
+                self.fortschritt.emit(*stand)
+
+        try:
+            ergebnis = sicherung.sichern(fortschritt=melden)
+        except sicherung.SicherungAbgebrochen:
+            # Beim Schließen des Fensters; kein Fehler, die nächste Sicherung folgt beim nächsten Start
+            return
+        except Exception as e:
+            self.fehler.emit(str(e))
+        else:
+            self.fertig.emit(ergebnis)
@@ -0,0 +1,113 @@
+# Stammdaten im Speicher: Konten und Kategorien je Datenbank, nachschlagbar per id und per Name,
+# dazu die Währung jedes Kontos.
+# Jede Änderung erhöht die Version und ergibt eine Aenderung mit nur den hinzugefügten,
+# umbenannten und entfernten Einträgen; Listen in der Oberfläche wenden sie einzeln an,
+# statt sich neu aufzubauen (siehe stammdaten_qt.py). Ohne Datenbankzugriff; befüllt und
+# aktuell gehalten wird der Cache von db.py.
+import threading
+
+from waehrungen import BASIS
+
+ARTEN = ("konten", "kategorien")
+
+
+class Aenderung:
+    __slots__ = ("art", "version", "hinzugefuegt", "umbenannt", "entfernt")
+
+    def __init__(self, art, version, hinzugefuegt, umbenannt, entfernt):
+        # hinzugefuegt, umbenannt: [{"id", "name"}] (neuer Name); entfernt: [id]
+        self.art = art
+        self.version = version
+        self.hinzugefuegt = hinzugefuegt
+        self.umbenannt = umbenannt
+        self.entfernt = entfernt
+
+    def __repr__(self):
+        return (f"Aenderung({self.art!r}, v{self.version}, +{self.hinzugefuegt}, "
+                f"~{self.umbenannt}, -{self.entfernt})")
+
+
+class Stammdaten:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namen = {art: {} for art in ARTEN}   # art -> {id: name}
+        self._ids = {art: {} for art in ARTEN}     # art -> {name: id}
+        self._waehrungen = {}                      # konto_id -> Währung, nur abweichend von BASIS
+        # Steigt mit jeder Änderung; wer Namen selbst zwischenspeichert, erkennt daran alte Stände
+        self.version = 0
+        self.geladen = False
+
+    def name(self, art, eintrag_id):
+        return self._namen[art].get(eintrag_id)
+
+    def id(self, art, name):
+        return self._ids[art].get(name)
+
+    def waehrung(self, konto_id):
+        # Zahlungen ohne Konto und unbekannte Konten: BASIS
+        return self._waehrungen.get(konto_id, BASIS)
+
+    def waehrungen_setzen(self, waehrungen):
+        # {konto_id: waehrung} für alle Konten
+        self._waehrungen = {i: w for i, w in waehrungen.items() if w != BASIS}
+
+    def waehrung_setzen(self, konto_id, waehrung):
+        with self._lock:
+            neu = dict(self._waehrungen)
+            if waehrung == BASIS:
+                neu.pop(konto_id, None)
+            else:
+                neu[konto_id] = waehrung
+            self._waehrungen = neu
+
+    def fremdwaehrungen(self):
+        # Währungen außer BASIS, die ein Konto führt
+        return set(self._waehrungen.values())
+
+    def liste(self, art):
+        # [{"id", "name"}] nach Namen sortiert (wie ORDER BY name)
+        with self._lock:
+            eintraege = list(self._namen[art].items())
+        return [{"id": i, "name": n} for i, n in sorted(eintraege, key=lambda e: e[1])]
+
+    def setzen(self, art, zeilen):
+        # Vollständiger Stand aus der Datenbank (Zeilen mit id, name); Aenderung oder None
+        neu = {z["id"]: z["name"] for z in zeilen}
+        with self._lock:
+            alt = self._namen[art]
+            self.geladen = True
+            return self._aendern(
+                art,
+                [{"id": i, "name": n} for i, n in neu.items() if i not in alt],
+                [{"id": i, "name": n} for i, n in neu.items() if i in alt and alt[i] != n],
+                [i for i in alt if i not in neu],
+            )
+
+    def eintragen(self, art, eintrag_id, name):
+        # Neuer oder umbenannter Eintrag
+        with self._lock:
+            alt = self._namen[art].get(eintrag_id)
+            if alt == name:
+                return None
+            eintrag = [{"id": eintrag_id, "name": name}]
+            return self._aendern(art, eintrag if alt is None else [], [] if alt is None else eintrag, [])
+
+    def entfernen(self, art, eintrag_id):
+        with self._lock:
+            if eintrag_id not in self._namen[art]:
+                return None
+            return self._aendern(art, [], [], [eintrag_id])
+
+    def _aendern(self, art, hinzugefuegt, umbenannt, entfernt):
+        if not (hinzugefuegt or umbenannt or entfernt):
+            return None
+        namen, ids = self._namen[art], self._ids[art]
+        for eintrag_id in entfernt:
+            ids.pop(namen.pop(eintrag_id), None)
+        for e in umbenannt:
+            ids.pop(namen[e["id"]], None)
+        for e in hinzugefuegt + umbenannt:
+            namen[e["id"]] = e["name"]
+            ids[e["name"]] = e["id"]
+        self.version += 1
+        return Aenderung(art, self.version, hinzugefuegt, umbenannt, entfernt)
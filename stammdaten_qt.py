@@ -0,0 +1,46 @@
+# Wendet eine stammdaten.Aenderung auf Auswahllisten an, statt sie neu aufzubauen: nur
+# entfernte Einträge verschwinden, neue und umbenannte werden an ihrer Sortierposition
+# eingefügt. Einträge tragen die id als Daten und stehen nach Namen sortiert wie in
+# stammdaten.liste(); versatz = Anzahl fester Einträge davor ("Alle Konten" usw.).
+# Schon vorhandene "neue" Einträge (Liste nach dem Laden gebaut) werden ersetzt, nicht verdoppelt.
+from bisect import bisect_left
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QListWidgetItem
+
+
+def _position(anzahl, text, name, versatz):
+    texte = [text(i) for i in range(versatz, anzahl)]
+    return versatz + bisect_left(texte, name)
+
+
+def _weg(aenderung):
+    return set(aenderung.entfernt) | {e["id"] for e in aenderung.umbenannt + aenderung.hinzugefuegt}
+
+
+def combo_anwenden(combo, aenderung, versatz=0):
+    # Liefert True, wenn der ausgewählte Eintrag entfernt wurde (die Auswahl steht dann auf dem ersten)
+    auswahl = combo.currentData()
+    blockiert = combo.blockSignals(True)
+    for eintrag_id in _weg(aenderung):
+        index = combo.findData(eintrag_id)
+        if index >= versatz:
+            combo.removeItem(index)
+    for e in aenderung.umbenannt + aenderung.hinzugefuegt:
+        index = _position(combo.count(), combo.itemText, e["name"], versatz)
+        combo.insertItem(index, e["name"], userData=e["id"])
+    entfernt = auswahl is not None and combo.findData(auswahl) < 0
+    if auswahl is not None:
+        combo.setCurrentIndex(max(combo.findData(auswahl), 0))
+    combo.blockSignals(blockiert)
+    return entfernt
+
+
+def liste_anwenden(liste, aenderung):
+    weg = _weg(aenderung)
+    for zeile in reversed(range(liste.count())):
+        if liste.item(zeile).data(Qt.UserRole) in weg:
+            liste.takeItem(zeile)
+    for e in aenderung.umbenannt + aenderung.hinzugefuegt:
+        item = QListWidgetItem(e["name"])
+        item.setData(Qt.UserRole, e["id"])
+        liste.insertItem(_position(liste.count(), lambda i: liste.item(i).text(), e["name"], 0), item)
@@ -0,0 +1,27 @@
+# Zeitmessung des Programmstarts in Phasen (finanzguru_main.py --profile-startup).
+# Wird als erstes Modul importiert; die erste Phase umfasst damit alle übrigen Imports.
+import time
+
+START = time.perf_counter()
+_phasen = []
+_letzte = START
+
+
+def phase(name):
+    # Schließt die laufende Phase ab; Dauer seit der vorherigen Marke
+    global _letzte
+    jetzt = time.perf_counter()
+    _phasen.append((name, (jetzt - _letzte) * 1000, (jetzt - START) * 1000))
+    _letzte = jetzt
+
+
+def phasen():
+    # [(name, dauer_ms, seit_start_ms)]
+    return list(_phasen)
+
+
+def bericht():
+    zeilen = [f"{'Phase':<28}{'Dauer [ms]':>12}{'Summe [ms]':>12}"]
+    for name, dauer, summe in _phasen:
+        zeilen.append(f"{name:<28}{dauer:>12.1f}{summe:>12.1f}")
+    return "\n".join(zeilen)
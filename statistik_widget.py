@@ -0,0 +1,299 @@
+import math
+from datetime import date
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QComboBox, QToolTip
+from PySide6.QtGui import QPainter, QColor, QPen, QFontMetrics
+from PySide6.QtCore import Qt, QRectF, QPointF
+from db import get_cashflow, get_kategorie_summen, get_jahresverlauf
+from money import Money
+import diagnose
+
+try:
+    import analyse
+except ImportError:  # NumPy ist optional; ohne fehlen Vermögensverlauf, Durchschnitte und Perzentile
+    analyse = None
+
+GRUEN = QColor("#2e7d32")
+ROT = QColor("#c62828")
+BLAU = QColor("#1565c0")
+ORANGE = QColor("#ef6c00")
+GRAU = QColor("#9e9e9e")
+
+
+def _euro_kurz(cent):
+    # Achsenbeschriftung ohne Cent: "12.345 €"
+    return f"{cent / 100:,.0f} €".replace(",", ".")
+
+
+def _schrittweite(spanne, teile=5):
+    # "Runde" Schrittweite (1, 2, 5 x 10^n) für die Y-Achse
+    if spanne <= 0:
+        return 100
+    roh = spanne / teile
+    basis = 10 ** math.floor(math.log10(roh))
+    for faktor in (1, 2, 5, 10):
+        if roh <= faktor * basis:
+            return faktor * basis
+    return 10 * basis
+
+
+# --- Diagramm ---
+class BalkenDiagramm(QWidget):
+    # Gruppierte Balken je Beschriftung (eine Farbe je Serie), optional Linien darüber.
+    # Werte in Cent; negative Werte zeigen nach unten. Zu breite Beschriftungen werden bei
+    # Zeitachsen ausgedünnt, mit kuerzen=True (z.B. Kategorien) stattdessen abgekürzt.
+    def __init__(self, titel, kuerzen=False):
+        super().__init__()
+        self.titel = titel
+        self.kuerzen = kuerzen
+        self.beschriftungen = []
+        self.serien = []
+        self.linien = []
+        self._gruppen = []
+        self.setMinimumHeight(220)
+        self.setMouseTracking(True)
+
+    def set_daten(self, beschriftungen, serien, linien=()):
+        # serien und linien: [(name, QColor, [cent, ...])]
+        self.beschriftungen = list(beschriftungen)
+        self.serien = list(serien)
+        self.linien = list(linien)
+        self.update()
+
+    def _wertebereich(self):
+        werte = [w for _, _, reihe in self.serien + self.linien for w in reihe]
+        unten, oben = min(werte + [0]), max(werte + [0])
+        schritt = _schrittweite(oben - unten)
+        return math.floor(unten / schritt) * schritt, math.ceil(oben / schritt) * schritt or schritt, schritt
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing)
+        fm = QFontMetrics(self.font())
+        zeile = fm.height()
+
+        p.setPen(self.palette().text().color())
+        p.drawText(QRectF(0, 0, self.width(), zeile + 4), Qt.AlignLeft | Qt.AlignVCenter, self.titel)
+        # Legende rechts oben
+        x = self.width() - 8
+        legende = [(name, farbe) for name, farbe, _ in self.serien + self.linien]
+        for name, farbe in reversed(legende):
+            x -= fm.horizontalAdvance(name)
+            p.drawText(QPointF(x, zeile), name)
+            x -= 14
+            p.fillRect(QRectF(x, zeile - 9, 10, 10), farbe)
+            x -= 12
+
+        if not self.beschriftungen:
+            p.setPen(GRAU)
+            p.drawText(self.rect(), Qt.AlignCenter, "Keine Daten")
+            return
+
+        unten, oben, schritt = self._wertebereich()
+        links = max(fm.horizontalAdvance(_euro_kurz(unten)), fm.horizontalAdvance(_euro_kurz(oben))) + 12
+        flaeche = QRectF(links, zeile + 12, self.width() - links - 8, self.height() - 2 * zeile - 20)
+
+        def y_von(cent):
+            return flaeche.bottom() - (cent - unten) / (oben - unten) * flaeche.height()
+
+        # Raster und Y-Achse
+        wert = unten
+        while wert <= oben:
+            y = y_von(wert)
+            p.setPen(QPen(GRAU, 0.5 if wert else 1.2))
+            p.drawLine(QPointF(flaeche.left(), y), QPointF(flaeche.right(), y))
+            p.setPen(self.palette().text().color())
+            p.drawText(QRectF(0, y - zeile / 2, links - 6, zeile), Qt.AlignRight | Qt.AlignVCenter, _euro_kurz(wert))
+            wert += schritt
+
+        # Balken
+        anzahl = len(self.beschriftungen)
+        breite = flaeche.width() / anzahl
+        balken = breite * 0.8 / max(len(self.serien), 1)
+        null = y_von(0)
+        self._gruppen = []
+        for i in range(anzahl):
+            x0 = flaeche.left() + i * breite
+            self._gruppen.append((x0, x0 + breite))
+            for s, (_, farbe, reihe) in enumerate(self.serien):
+                y = y_von(reihe[i])
+                p.fillRect(QRectF(x0 + breite * 0.1 + s * balken, min(y, null), balken, abs(null - y)), farbe)
+
+        # Linien (z.B. Saldo, Durchschnitt); Punkte nur, solange sie nicht ineinanderlaufen
+        for _, farbe, reihe in self.linien:
+            p.setPen(QPen(farbe, 2))
+            punkte = [QPointF(flaeche.left() + (i + 0.5) * breite, y_von(w)) for i, w in enumerate(reihe)]
+            for a, b in zip(punkte, punkte[1:]):
+                p.drawLine(a, b)
+            if breite >= 8:
+                for punkt in punkte:
+                    p.drawEllipse(punkt, 2.5, 2.5)
+
+        # X-Beschriftung ohne Überlappung
+        p.setPen(self.palette().text().color())
+        if self.kuerzen:
+            for i, text in enumerate(self.beschriftungen):
+                rect = QRectF(flaeche.left() + i * breite, flaeche.bottom() + 4, breite, zeile)
+                p.drawText(rect, Qt.AlignCenter, fm.elidedText(text, Qt.ElideRight, int(breite) - 4))
+            return
+        label_breite = max(fm.horizontalAdvance(b) for b in self.beschriftungen) + 8
+        jede = max(1, math.ceil(label_breite / breite))
+        for i in range(0, anzahl, jede):
+            rect = QRectF(flaeche.left() + i * breite - label_breite / 2 + breite / 2, flaeche.bottom() + 4,
+                          label_breite, zeile)
+            p.drawText(rect, Qt.AlignCenter, self.beschriftungen[i])
+
+    def mouseMoveEvent(self, event):
+        x = event.position().x()
+        for i, (x0, x1) in enumerate(self._gruppen):
+            if x0 <= x < x1:
+                zeilen = [self.beschriftungen[i]]
+                zeilen += [f"{name}: {Money(int(reihe[i]))}" for name, _, reihe in self.serien + self.linien]
+                QToolTip.showText(event.globalPosition().toPoint(), "\n".join(zeilen), self)
+                return
+        QToolTip.hideText()
+
+
+# --- Seite ---
+def _monat_minus(monate):
+    heute = date.today()
+    index = heute.year * 12 + heute.month - 1 - monate
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _luecken_fuellen(cashflow):
+    # Monate ohne Buchungen fehlen in monatswerte, auf der Zeitachse sollen sie als 0 erscheinen
+    if not cashflow:
+        return cashflow
+    vorhanden = {r["monat"]: r for r in cashflow}
+    jahr, monat = map(int, cashflow[0]["monat"].split("-"))
+    ergebnis = []
+    while True:
+        schluessel = f"{jahr:04d}-{monat:02d}"
+        ergebnis.append(vorhanden.get(schluessel, {"monat": schluessel, "einnahmen_cent": 0, "ausgaben_cent": 0,
+                                                   "anzahl": 0}))
+        if schluessel == cashflow[-1]["monat"]:
+            return ergebnis
+        jahr, monat = (jahr + 1, 1) if monat == 12 else (jahr, monat + 1)
+
+
+def statistik_laden(von, bis):
+    # Läuft im DB-Worker. Summen kommen aus den Monatswerten; Verläufe und Verteilungen
+    # aus den NumPy-Spalten (zwischengespeichert bis zur nächsten Änderung der Datenbank).
+    daten = {
+        "cashflow": _luecken_fuellen([dict(r) for r in get_cashflow(von, bis)]),
+        "kategorien": [dict(r) for r in get_kategorie_summen(von, bis)],
+        "jahre": [dict(r) for r in get_jahresverlauf()],
+    }
+    if analyse is not None:
+        sp = analyse.spalten()
+        monate, saldo = analyse.saldo_zum_monatsende(sp)
+        auswahl = slice(None)
+        if von or bis:
+            monate_text = monate.astype(str)
+            auswahl = (monate_text >= (von or "")) & (monate_text <= (bis or "9999-99"))
+        daten["vermoegen"] = (monate[auswahl].astype(str).tolist(), saldo[auswahl].tolist())
+        netto = [r["einnahmen_cent"] + r["ausgaben_cent"] for r in daten["cashflow"]]
+        daten["netto_schnitt"] = analyse.gleitender_durchschnitt(netto, 3).round().astype(int).tolist()
+        daten["perzentile"] = analyse.perzentile(sp.zeitraum(von, bis))
+    return daten
+
+
+class StatistikWidget(QWidget):
+    def __init__(self, worker):
+        super().__init__()
+        self.worker = worker
+
+        layout = QVBoxLayout()
+        kopf = QHBoxLayout()
+        kopf.addWidget(QLabel("Zeitraum:"))
+        self.combo_zeitraum = QComboBox()
+        # userData: Anzahl zurückliegender Monate, ein Jahr ("2024") oder None für alles
+        self.combo_zeitraum.addItem("Letzte 12 Monate", userData=11)
+        self.combo_zeitraum.addItem("Letzte 24 Monate", userData=23)
+        self.combo_zeitraum.addItem("Gesamt", userData=None)
+        self.combo_zeitraum.currentIndexChanged.connect(self.aktualisieren)
+        kopf.addWidget(self.combo_zeitraum)
+        kopf.addStretch()
+        self.label_summen = QLabel()
+        kopf.addWidget(self.label_summen)
+        layout.addLayout(kopf)
+
+        raster = QGridLayout()
+        self.chart_cashflow = BalkenDiagramm("Cashflow je Monat")
+        self.chart_kategorien = BalkenDiagramm("Ausgaben nach Kategorie", kuerzen=True)
+        self.chart_jahre = BalkenDiagramm("Verlauf über die Jahre")
+        raster.addWidget(self.chart_cashflow, 0, 0, 1, 2)
+        raster.addWidget(self.chart_kategorien, 1, 0)
+        raster.addWidget(self.chart_jahre, 1, 1)
+        raster.setRowStretch(0, 3)
+        raster.setRowStretch(1, 2)
+        self.chart_vermoegen = None
+        if analyse is not None:
+            self.chart_vermoegen = BalkenDiagramm("Vermögen zum Monatsende")
+            raster.addWidget(self.chart_vermoegen, 2, 0, 1, 2)
+            raster.setRowStretch(2, 2)
+        layout.addLayout(raster)
+        self.label_perzentile = QLabel()
+        self.label_perzentile.setStyleSheet("color: gray;")
+        layout.addWidget(self.label_perzentile)
+        self.setLayout(layout)
+
+    def zeitraum(self):
+        daten = self.combo_zeitraum.currentData()
+        if daten is None:
+            return None, None
+        if isinstance(daten, str):
+            return f"{daten}-01", f"{daten}-12"
+        return _monat_minus(daten), _monat_minus(0)
+
+    def aktualisieren(self):
+        von, bis = self.zeitraum()
+        self.worker.ausfuehren(statistik_laden, von, bis, ergebnis=self._geladen, schluessel="statistik")
+
+    def _geladen(self, daten):
+        cashflow = daten["cashflow"]
+        self.chart_cashflow.set_daten(
+            [r["monat"] for r in cashflow],
+            [("Einnahmen", GRUEN, [r["einnahmen_cent"] for r in cashflow]),
+             ("Ausgaben", ROT, [r["ausgaben_cent"] for r in cashflow])],
+            [("Saldo", BLAU, [r["einnahmen_cent"] + r["ausgaben_cent"] for r in cashflow])]
+            + ([("Ø 3 Monate", ORANGE, daten["netto_schnitt"])] if "netto_schnitt" in daten else [])
+        )
+        kategorien = daten["kategorien"]
+        self.chart_kategorien.set_daten(
+            [r["kategorie_name"] or "Keine Kategorie" for r in kategorien],
+            [("Ausgaben", ROT, [-r["summe_cent"] for r in kategorien])]
+        )
+        jahre = daten["jahre"]
+        self.chart_jahre.set_daten(
+            [r["jahr"] for r in jahre],
+            [("Einnahmen", GRUEN, [r["einnahmen_cent"] for r in jahre]),
+             ("Ausgaben", ROT, [r["ausgaben_cent"] for r in jahre])],
+            [("Saldo", BLAU, [r["einnahmen_cent"] + r["ausgaben_cent"] for r in jahre])]
+        )
+        if self.chart_vermoegen is not None:
+            monate, saldo = daten["vermoegen"]
+            self.chart_vermoegen.set_daten(monate, [], [("Vermögen", BLAU, saldo)])
+            perz = daten["perzentile"]
+            self.label_perzentile.setText(
+                f"Einzelausgaben im Zeitraum: Median {Money(perz[50])}  ·  90 % bis {Money(perz[90])}"
+                f"  ·  99 % bis {Money(perz[99])}"
+            )
+        einnahmen = sum(r["einnahmen_cent"] for r in cashflow)
+        ausgaben = sum(r["ausgaben_cent"] for r in cashflow)
+        self.label_summen.setText(
+            f"Einnahmen {Money(einnahmen)}  ·  Ausgaben {Money(-ausgaben)}  ·  Saldo {Money(einnahmen + ausgaben)}"
+        )
+        self._jahre_anbieten([r["jahr"] for r in jahre])
+
+    def _jahre_anbieten(self, jahre):
+        # Einzelne Jahre als Zeitraum, ohne dabei ein erneutes Laden auszulösen
+        vorhanden = {self.combo_zeitraum.itemData(i) for i in range(self.combo_zeitraum.count())}
+        self.combo_zeitraum.blockSignals(True)
+        for jahr in sorted(set(jahre) - vorhanden, reverse=True):
+            self.combo_zeitraum.addItem(jahr, userData=jahr)
+        self.combo_zeitraum.blockSignals(False)
+
+
+# Laufzeitmessung (siehe diagnose.py): Diagramme mit neuen Daten füllen
+diagnose.instrumentieren(StatistikWidget, "ui", ["_geladen"])
@@ -0,0 +1,21 @@
+# Die Module liegen flach im Projektverzeichnis, die Helfer der Benchmarks in benchmarks/
+import sys
+from pathlib import Path
+
+import pytest
+
+WURZEL = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WURZEL))
+sys.path.insert(0, str(WURZEL / "benchmarks"))
+
+import db
+import db_pool
+
+
+@pytest.fixture
+def datenbank(tmp_path, monkeypatch):
+    # Frische Datenbank (alle Migrationen) je Test; die Caches in db.py hängen an DB_FILE
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "finanzguru_data.db"))
+    db.init_db()
+    yield tmp_path
+    db_pool.close_all()
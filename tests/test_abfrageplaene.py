@@ -0,0 +1,9 @@
+# Alle Abfragen aus db.py gegen die Beispiel-Datenbank aus abfrageplaene: kein vollständiger Scan
+# über große Tabellen und kein temporärer B-Tree (wie python wartung.py plaene)
+import abfrageplaene
+
+
+def test_alle_abfragen_nutzen_indizes():
+    probleme = abfrageplaene.pruefe()
+    assert probleme == [], "\n".join(f"{funktion}: {detail}\n    {' '.join(sql.split())}"
+                                     for funktion, sql, detail in probleme)
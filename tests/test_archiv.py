@@ -0,0 +1,96 @@
+# Archive: archivieren verschiebt die Zahlungen eines Jahres in eine eigene Datei; gelesen wird
+# über main und Archive (UNION ALL), Salden und Monatswerte bleiben gleich, Zahlungen in
+# archivierten Jahren lassen sich nicht mehr anlegen oder ändern
+import os
+from datetime import date
+
+import pytest
+
+import db
+from db import ArchivFehler
+
+
+def ohne_abweichung():
+    assert db.pruefe_salden() == []
+    assert db.pruefe_monatswerte() == []
+
+
+def protokoll():
+    with db.connection() as con:
+        return [tuple(r) for r in con.execute("SELECT seq, tabelle, zeilen_id FROM protokoll ORDER BY seq")]
+
+
+@pytest.fixture
+def zahlungen(datenbank):
+    giro, essen = db.add_konto("Giro"), db.add_kategorie("Essen")
+    ids = {}
+    for jahr in (2022, 2023, 2024):
+        for monat in (1, 6, 12):
+            ids[jahr, monat] = db.add_zahlung(f"{monat},{jahr % 100}", "Ausgabe", f"{jahr}-{monat:02d}-15", essen,
+                                              giro, f"Markt {jahr}", False)
+    db.add_zahlung("1000,00", "Einnahme", "2024-02-01", None, giro, "Gehalt", True)
+    return {"giro": giro, "essen": essen, "ids": ids}
+
+
+def test_archivieren_liest_weiter_alles(zahlungen):
+    vorher = db.get_zahlungen()
+    vermoegen, salden, cashflow = db.get_gesamtvermoegen(), db.get_salden(), db.get_cashflow()
+    db.add_konto("Bar")
+    protokoll_vorher = protokoll()
+
+    assert db.archivieren(2022) == 3
+    assert db.archivieren(2023) == 3
+    assert db.archivjahre() == [2022, 2023]
+    assert os.path.exists(db.archivpfad(2022)) and os.path.exists(db.archivpfad(2023))
+    with db.connection() as con:
+        assert con.execute("SELECT COUNT(*) FROM main.zahlungen").fetchone()[0] == 4
+
+    # Lesen über main und beide Archive: dieselben Zeilen in derselben Reihenfolge
+    assert [dict(z) for z in db.get_zahlungen()] == [dict(z) for z in vorher]
+    assert db.zahlungen_zaehlen() == len(vorher)
+    assert db.zahlungen_zaehlen({"von": "2022-06-01", "bis": "2023-06-30"}) == 4
+    assert sorted(z["datum"] for z in db.suche_zahlungen({"text": "markt 2022"}, 10)) == [
+        "2022-01-15", "2022-06-15", "2022-12-15"]
+
+    assert (db.get_gesamtvermoegen(), db.get_salden(), db.get_cashflow()) == (vermoegen, salden, cashflow)
+    ohne_abweichung()
+
+    # Aus dem Protokoll verschwinden nur die Einträge der archivierten Zahlungen
+    archiviert = {i for (jahr, _), i in zahlungen["ids"].items() if jahr < 2024}
+    nachher = protokoll()
+    assert [e for e in nachher if e[1] != "archive"] == [
+        e for e in protokoll_vorher if not (e[1] == "zahlungen" and e[2] in archiviert)]
+    assert [e[1:] for e in nachher if e[1] == "archive"] == [("archive", 2022), ("archive", 2023)]
+    assert ("konten", db.get_stammdaten().id("konten", "Bar")) in [e[1:] for e in nachher]
+
+
+def test_schreiben_in_archiviertes_jahr(zahlungen):
+    giro, essen, ids = zahlungen["giro"], zahlungen["essen"], zahlungen["ids"]
+    db.archivieren(2022)
+    with pytest.raises(ArchivFehler):
+        db.add_zahlung("5,00", "Ausgabe", "2022-03-01", essen, giro, "Nachtrag", False)
+    # Auch nicht per Änderung einer laufenden Zahlung ins archivierte Jahr
+    with pytest.raises(ArchivFehler):
+        db.update_zahlung(ids[2024, 1], "1,24", "Ausgabe", "2022-01-15", essen, giro, "Markt 2024", False)
+    # Konto und Kategorie stecken in archivierten Zahlungen
+    with pytest.raises(ArchivFehler):
+        db.delete_konto(giro)
+    with pytest.raises(ArchivFehler):
+        db.delete_kategorie(essen)
+    assert db.get_zahlung_by_id(ids[2024, 1])["datum"] == "2024-01-15"
+    ohne_abweichung()
+    # Das folgende Jahr bleibt beschreibbar
+    db.add_zahlung("5,00", "Ausgabe", "2023-03-01", essen, giro, "Nachtrag", False)
+
+
+def test_archivieren_nur_abgeschlossen_und_der_reihe_nach(zahlungen):
+    with pytest.raises(ArchivFehler, match="noch nicht abgeschlossen"):
+        db.archivieren(date.today().year)
+    with pytest.raises(ArchivFehler, match="Zuerst 2022"):
+        db.archivieren(2023)
+    # Der abgebrochene Versuch hinterlässt keine Datei
+    assert not os.path.exists(db.archivpfad(2023))
+    db.archivieren(2022)
+    with pytest.raises(ArchivFehler):
+        db.archivieren(2022)
+    assert db.archivjahre() == [2022]
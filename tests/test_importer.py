@@ -0,0 +1,175 @@
+# Leser für Kontoauszüge (CSV, CAMT.053, MT940) mit kleinen Beispieldateien und importiere()
+# mit Duplikaterkennung über den Fingerabdruck
+import io
+
+import pytest
+
+import db
+import importer
+from importer import ImportFehler
+
+
+def lesen(leser, text, encoding="utf-8", **optionen):
+    return list(leser(io.BytesIO(text.encode(encoding)), **optionen))
+
+
+# --- CSV ---
+CSV = (
+    "Buchungstag;Beguenstigter/Zahlungspflichtiger;Verwendungszweck;Betrag;Kategorie\n"
+    "02.01.2024;REWE Markt;Einkauf;-45,90;Lebensmittel\n"
+    '31.01.24;Arbeitgeber AG;"Gehalt; Januar";2.500,00;\n'
+    "2024-02-03;;Bargeld;-50,00;\n"
+)
+
+
+def test_csv():
+    assert lesen(importer.lese_csv, CSV) == [
+        {"datum": "2024-01-02", "betrag_cent": -4590, "beschreibung": "REWE Markt Einkauf", "konto": None,
+         "kategorie": "Lebensmittel"},
+        {"datum": "2024-01-31", "betrag_cent": 250000, "beschreibung": "Arbeitgeber AG Gehalt; Januar",
+         "konto": None, "kategorie": None},
+        {"datum": "2024-02-03", "betrag_cent": -5000, "beschreibung": "Bargeld", "konto": None, "kategorie": None},
+    ]
+
+
+def test_csv_komma_bom_und_zuordnung():
+    text = "﻿Wann,Was,Amount,Account\n2024-03-01,Miete,-800.00,Giro\n\n2024-03-02,Zins,0.12,Giro\n"
+    zeilen = lesen(importer.lese_csv, text, zuordnung={"datum": "Wann", "beschreibung": "Was"})
+    assert [(z["datum"], z["betrag_cent"], z["beschreibung"], z["konto"]) for z in zeilen] == [
+        ("2024-03-01", -80000, "Miete", "Giro"),
+        ("2024-03-02", 12, "Zins", "Giro"),
+    ]
+
+
+def test_csv_kurze_zeile_mit_zeilennummer():
+    # Zeile 4 der Datei (Kopfzeile mitgezählt) hat nur zwei Spalten
+    text = CSV.replace("2024-02-03;;Bargeld;-50,00;\n", "2024-02-03;Bargeld\n")
+    with pytest.raises(ImportFehler, match=r"^Zeile 4: 2 statt mindestens 5 Spalten"):
+        lesen(importer.lese_csv, text)
+
+
+def test_csv_ohne_pflichtspalte():
+    with pytest.raises(ImportFehler, match="betrag"):
+        lesen(importer.lese_csv, "Datum;Text\n01.01.2024;x\n")
+
+
+def test_csv_ungueltiges_datum():
+    with pytest.raises(ImportFehler, match="Datum"):
+        lesen(importer.lese_csv, "Datum;Betrag\n1.1.2024;1,00\n")
+
+
+# --- CAMT.053 ---
+CAMT = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+  <BkToCstmrStmt>
+    <Stmt>
+      <Acct><Id><IBAN>DE02120300000000202051</IBAN></Id></Acct>
+      <Ntry>
+        <Amt Ccy="EUR">45.90</Amt>
+        <CdtDbtInd>DBIT</CdtDbtInd>
+        <BookgDt><Dt>2024-01-02</Dt></BookgDt>
+        <NtryDtls><TxDtls>
+          <RltdPties><Cdtr><Nm>REWE Markt</Nm></Cdtr></RltdPties>
+          <RmtInf><Ustrd>Einkauf</Ustrd><Ustrd>Filiale 12</Ustrd></RmtInf>
+        </TxDtls></NtryDtls>
+      </Ntry>
+      <Ntry>
+        <Amt Ccy="EUR">2500.00</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <BookgDt><DtTm>2024-01-31T08:00:00</DtTm></BookgDt>
+        <AddtlNtryInf>Gehalt</AddtlNtryInf>
+      </Ntry>
+    </Stmt>
+  </BkToCstmrStmt>
+</Document>
+"""
+
+
+def test_camt():
+    assert lesen(importer.lese_camt, CAMT) == [
+        {"datum": "2024-01-02", "betrag_cent": -4590, "beschreibung": "REWE Markt Einkauf Filiale 12",
+         "konto": "DE02120300000000202051", "kategorie": None},
+        {"datum": "2024-01-31", "betrag_cent": 250000, "beschreibung": "Gehalt",
+         "konto": "DE02120300000000202051", "kategorie": None},
+    ]
+
+
+# --- MT940 ---
+MT940 = """:20:STARTUMSE
+:25:10020030/1234567
+:28C:00001/001
+:60F:C240101EUR1000,00
+:61:2401020102D45,90NMSCNONREF
+:86:106?00KARTENZAHLUNG?20Einkauf Filiale?2112?32REWE Mä
+rkt
+:61:2401310131C2500,00NMSCNONREF
+:86:Gehalt Januar
+:61:2402030203RC1,5NMSCNONREF
+:62F:C240203EUR3455,60
+-
+"""
+
+
+def test_mt940():
+    assert lesen(importer.lese_mt940, MT940, encoding="latin-1") == [
+        {"datum": "2024-01-02", "betrag_cent": -4590, "beschreibung": "REWE Märkt Einkauf Filiale12",
+         "konto": "10020030/1234567", "kategorie": None},
+        {"datum": "2024-01-31", "betrag_cent": 250000, "beschreibung": "Gehalt Januar",
+         "konto": "10020030/1234567", "kategorie": None},
+        # Storno einer Gutschrift (RC) ohne :86:
+        {"datum": "2024-02-03", "betrag_cent": -150, "beschreibung": "",
+         "konto": "10020030/1234567", "kategorie": None},
+    ]
+
+
+def test_mt940_ungueltige_umsatzzeile():
+    with pytest.raises(ImportFehler, match=":61:"):
+        lesen(importer.lese_mt940, ":25:123\n:61:kaputt\n-\n")
+
+
+def test_format_erkennen():
+    assert [importer.erkenne_format(p) for p in ("a.CSV", "b.xml", "c.sta", "d.940")] == ["csv", "camt", "mt940", "mt940"]
+    with pytest.raises(ImportFehler):
+        importer.erkenne_format("e.pdf")
+
+
+# --- importiere ---
+def datensatz(datum, cent, beschreibung, konto="Giro", kategorie=None):
+    return {"datum": datum, "betrag_cent": cent, "beschreibung": beschreibung, "konto": konto,
+            "kategorie": kategorie}
+
+
+def test_importiere_ueberspringt_duplikate(datenbank):
+    erste = [datensatz("2024-01-02", -4590, "REWE Markt Einkauf", kategorie="Lebensmittel"),
+             datensatz("2024-01-31", 250000, "Gehalt")]
+    ergebnis = importer.importiere(erste)
+    assert (ergebnis.anzahl, ergebnis.uebersprungen) == (2, 0)
+
+    zweite = [
+        # gleiche Zahlung, Beschreibung nur anders geschrieben
+        datensatz("2024-01-02", -4590, "rewe markt, Einkauf!"),
+        # anderer Betrag, anderes Datum, anderes Konto: neu
+        datensatz("2024-01-02", -4591, "REWE Markt Einkauf"),
+        datensatz("2024-01-03", -4590, "REWE Markt Einkauf"),
+        datensatz("2024-01-02", -4590, "REWE Markt Einkauf", konto="Bar"),
+    ]
+    ergebnis = importer.importiere(zweite)
+    assert (ergebnis.anzahl, ergebnis.uebersprungen) == (3, 1)
+    assert db.zahlungen_zaehlen() == 5
+    # Ein manuell eingetragenes Duplikat erkennt add_zahlung am selben Fingerabdruck
+    with pytest.raises(db.DoppelteZahlung):
+        db.add_zahlung("2500,00", "Einnahme", "2024-01-31", None, db.get_stammdaten().id("konten", "Giro"),
+                       "Gehalt", False)
+
+    ergebnis = importer.importiere(erste, duplikate_ueberspringen=False)
+    assert (ergebnis.anzahl, ergebnis.uebersprungen) == (2, 0)
+
+
+def test_importiere_legt_konten_und_kategorien_an(datenbank):
+    importer.importiere([datensatz("2024-01-02", -100, "x", konto="DE02 Neu", kategorie="Neu")], konto=None)
+    stammdaten = db.get_stammdaten()
+    assert stammdaten.id("konten", "DE02 Neu") is not None
+    assert stammdaten.id("kategorien", "Neu") is not None
+    importer.importiere([datensatz("2024-01-03", -100, "y", konto="Wird ersetzt")], konto="Fest")
+    assert {z["konto_id"] for z in db.get_zahlungen()} == {stammdaten.id("konten", "DE02 Neu"),
+                                                        stammdaten.id("konten", "Fest")}
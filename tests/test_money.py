@@ -0,0 +1,116 @@
+# Geldbeträge in ganzen Cent: Parser für Eingaben, Money-Arithmetik und die Umstellung alter
+# Datenbanken von betrag REAL auf betrag_cent INTEGER (db._migration_cent)
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+import db
+import db_pool
+from money import Money, parse_betrag, parse_cent
+
+
+@pytest.mark.parametrize("text, cent", [
+    ("1.234,56", 123456),
+    ("1234,5", 123450),
+    ("0,5", 50),
+    ("1.234", 123400),
+    ("1.234.567,89", 123456789),
+    ("1 234,56 EUR", 123456),
+    ("  42  ", 4200),
+    ("+7", 700),
+    # englische Schreibweise
+    ("12.50", 1250),
+    ("1,234.56", 123456),
+    # negativ
+    ("-12,50", -1250),
+    ("-0,01", -1),
+    ("-3 €", -300),
+    ("-1.234,56", -123456),
+])
+def test_parse_betrag(text, cent):
+    assert parse_betrag(text) == Money(cent)
+    assert parse_cent(text) == cent
+
+
+@pytest.mark.parametrize("text", ["", "abc", "1,2,3", "12,3a", "1.23.4", "1,5,0"])
+def test_parse_betrag_ungueltig(text):
+    with pytest.raises(ValueError):
+        parse_betrag(text)
+
+
+@pytest.mark.parametrize("wert, cent", [
+    # Floats über ihre kürzeste Darstellung, nicht über den Binärwert (1.005 ist eigentlich 1.00499...)
+    (1.005, 101),
+    (0.285, 29),
+    (0.1 + 0.2, 30),
+    # kaufmännisch gerundet, halbe Cent von der Null weg
+    (Decimal("2.675"), 268),
+    (Decimal("-0.005"), -1),
+    (2, 200),
+    ("19,99", 1999),
+])
+def test_money_von_rundet_auf_cent(wert, cent):
+    assert Money.von(wert).cent == cent
+
+
+def test_money_arithmetik():
+    a, b = Money(1050), Money(-299)
+    assert a + b == Money(751)
+    assert a - b == Money(1349)
+    assert -a == Money(-1050) and abs(b) == Money(299)
+    assert b < a and a > b and a >= Money(1050)
+    assert sum([a, b, Money(1)], Money()) == Money(752)
+    assert not Money() and a
+    assert hash(Money(5)) == hash(Money(5)) and len({Money(5), Money(5)}) == 1
+    assert Money(5) != 5
+    assert a.to_decimal() == Decimal("10.50")
+    assert Money.von(a) is a
+    with pytest.raises(TypeError):
+        a + 1
+
+
+def test_money_format():
+    assert Money(-123456).format() == "-1.234,56 €"
+    assert Money(5).format(symbol=False) == "0,05"
+    assert Money(100).format(waehrung="USD") == "1,00 USD"
+    assert str(Money(123456789)) == "1.234.567,89 €"
+
+
+def test_migration_cent(tmp_path, monkeypatch):
+    # Datenbank auf dem Stand vor der Umstellung (betrag REAL, Vorzeichen über typ) anlegen
+    pfad = tmp_path / "alt.db"
+    con = sqlite3.connect(pfad)
+    stand = db.MIGRATIONEN.index(db._migration_cent)
+    for migration in db.MIGRATIONEN[:stand]:
+        migration(con.cursor())
+    con.executemany(
+        "INSERT INTO zahlungen (betrag, typ, datum, kategorie_id, konto_id, beschreibung, wiederkehrend) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", [
+            (19.99, "Ausgabe", "2023-01-02", 2, 1, "Einkauf", 0),
+            (1234.56, "Einnahme", "2023-01-31", 3, 1, "Gehalt", 1),
+            (0.1 + 0.2, "Ausgabe", "2023-02-01", None, 2, "Brötchen", 0),
+            (12.5, "Ausgabe", "2023-02-03", None, None, "ohne Konto", 0),
+        ])
+    con.execute(f"PRAGMA user_version = {stand}")
+    con.commit()
+    con.close()
+
+    monkeypatch.setattr(db, "DB_FILE", str(pfad))
+    try:
+        db.init_db()
+        with db.connection() as con:
+            zeilen = con.execute("SELECT id, betrag_cent, typ, beschreibung FROM zahlungen ORDER BY id").fetchall()
+            spalten = [r[1] for r in con.execute("PRAGMA table_info(zahlungen)")]
+            salden = dict(con.execute("SELECT konto_id, saldo_cent FROM salden").fetchall())
+        assert [tuple(z) for z in zeilen] == [
+            (1, -1999, "Ausgabe", "Einkauf"),
+            (2, 123456, "Einnahme", "Gehalt"),
+            (3, -30, "Ausgabe", "Brötchen"),
+            (4, -1250, "Ausgabe", "ohne Konto"),
+        ]
+        assert "betrag" not in spalten
+        assert salden == {0: -1250, 1: 123456 - 1999, 2: -30}
+        assert db.pruefe_salden() == [] and db.pruefe_monatswerte() == []
+    finally:
+        db_pool.close_all()
@@ -0,0 +1,115 @@
+# Änderungsprotokoll: zuruecknehmen stellt das Bild vor einer Aktion exakt wieder her,
+# wiederholen spielt sie erneut ein; ein Massenimport ist ein Sammeleintrag und wird in einem
+# Schritt zurückgenommen
+import pytest
+
+import db
+import importer
+
+
+def zahlungen():
+    with db.connection() as con:
+        return [dict(r) for r in con.execute("SELECT * FROM zahlungen ORDER BY id")]
+
+
+def konten():
+    with db.connection() as con:
+        return [tuple(r) for r in con.execute("SELECT id, name FROM konten ORDER BY id")]
+
+
+def ohne_abweichung():
+    assert db.pruefe_salden() == []
+    assert db.pruefe_monatswerte() == []
+
+
+@pytest.fixture
+def stamm(datenbank):
+    return {"giro": db.add_konto("Giro"), "essen": db.add_kategorie("Essen"), "miete": db.add_kategorie("Miete")}
+
+
+def test_zuruecknehmen_und_wiederholen(stamm):
+    bilder = [zahlungen()]
+    aktionen = []
+
+    def aktion(funktion, *args):
+        ergebnis, von, bis = db.protokolliert(funktion, *args)
+        assert bis > von
+        aktionen.append((von, bis))
+        bilder.append(zahlungen())
+        return ergebnis
+
+    ids = [aktion(db.add_zahlung, f"{i},50", "Ausgabe", f"2024-0{i}-10", stamm["essen"], stamm["giro"],
+                  f"Einkauf {i}", False) for i in range(1, 6)]
+    aktion(db.zahlungen_kategorie_setzen, ids[1:4], stamm["miete"])
+    aktion(db.zahlungen_konto_setzen, ids[:2], None)
+    aktion(db.zahlungen_loeschen, ids[2:])
+
+    # Rückwärts: nach jedem Schritt genau das Bild vor der Aktion
+    for (von, bis), vorher in zip(reversed(aktionen), reversed(bilder[:-1])):
+        db.zuruecknehmen(von, bis)
+        assert zahlungen() == vorher
+        ohne_abweichung()
+    # Vorwärts: wieder das Bild nach der Aktion, mit denselben ids
+    for (von, bis), nachher in zip(aktionen, bilder[1:]):
+        db.wiederholen(von, bis)
+        assert zahlungen() == nachher
+        ohne_abweichung()
+
+
+def test_konflikt_nach_anderer_aenderung(stamm):
+    _, von, bis = db.protokolliert(db.zahlungen_kategorie_setzen, [
+        db.add_zahlung("1,00", "Ausgabe", "2024-01-01", stamm["essen"], stamm["giro"], "A", False)], stamm["miete"])
+    zahlung_id = zahlungen()[0]["id"]
+    db.update_zahlung(zahlung_id, "2,00", "Ausgabe", "2024-01-01", stamm["miete"], stamm["giro"], "A", False)
+    vorher = zahlungen()
+    with pytest.raises(db.Konflikt):
+        db.zuruecknehmen(von, bis)
+    # Nichts halb zurückgenommen
+    assert zahlungen() == vorher
+
+
+def test_aenderungen_seit(stamm):
+    stand = db.protokoll_stand()
+    zahlung_id = db.add_zahlung("1,00", "Ausgabe", "2024-01-01", None, stamm["giro"], "A", False)
+    neu, geaendert = db.aenderungen_seit(stand)
+    assert neu == db.protokoll_stand() and geaendert == {"zahlungen": {zahlung_id}}
+    importer.importiere([{"datum": "2024-02-01", "betrag_cent": -100, "beschreibung": "B", "konto": "Giro",
+                          "kategorie": None}])
+    # Sammeleintrag: die ganze Tabelle gilt als geändert
+    assert db.aenderungen_seit(neu)[1] == {"zahlungen": set()}
+    db.protokoll_verdichten(0)
+    assert db.aenderungen_seit(stand)[1] is None
+
+
+def test_import_in_einem_schritt(stamm):
+    db.add_zahlung("20,00", "Ausgabe", "2024-01-02", stamm["essen"], stamm["giro"], "Vorher", False)
+    vorher, konten_vorher = zahlungen(), konten()
+    datensaetze = [{"datum": f"2024-{i % 12 + 1:02d}-15", "betrag_cent": (-1) ** i * (100 + i),
+                    "beschreibung": f"Umsatz {i}", "konto": ("Giro", "Neu")[i % 2], "kategorie": None}
+                   for i in range(150)]
+    ergebnis, von, bis = db.protokolliert(importer.importiere, datensaetze)
+    assert ergebnis.anzahl == 150
+    nachher = zahlungen()
+    with db.connection() as con:
+        eintraege = con.execute("SELECT tabelle, zeilen_id FROM protokoll WHERE seq > ? AND seq <= ?",
+                                (von, bis)).fetchall()
+    # Ein Sammeleintrag für die Zahlungen, dazu das neu angelegte Konto
+    assert sorted(tuple(e) for e in eintraege) == [("konten", db.get_stammdaten().id("konten", "Neu")),
+                                                   ("zahlungen", db.SAMMELEINTRAG)]
+
+    assert db.zuruecknehmen(von, bis) == 2
+    assert zahlungen() == vorher and konten() == konten_vorher
+    ohne_abweichung()
+    db.wiederholen(von, bis)
+    assert zahlungen() == nachher
+    ohne_abweichung()
+    # Ein zweites Mal: die Bilder kommen vom jüngsten Zurücknehmen
+    db.zuruecknehmen(von, bis)
+    db.wiederholen(von, bis)
+    assert zahlungen() == nachher
+
+    # Fehlt eine importierte Zahlung, passt der Sammeleintrag nicht mehr
+    db.delete_zahlung(nachher[-1]["id"])
+    with pytest.raises(db.Konflikt):
+        db.zuruecknehmen(von, bis)
+    assert len(zahlungen()) == len(nachher) - 1
@@ -0,0 +1,101 @@
+# Salden je Konto und Monatswerte (Statistik) werden per Trigger bzw. nach dem Massenimport
+# fortgeschrieben; nach jeder Art von Änderung an zahlungen dürfen sie nicht von der
+# Neuberechnung aus zahlungen abweichen (pruefe_salden / pruefe_monatswerte)
+import pytest
+
+import db
+import importer
+
+
+def ohne_abweichung():
+    assert db.pruefe_salden() == []
+    assert db.pruefe_monatswerte() == []
+
+
+def salden():
+    with db.connection() as con:
+        return {r["konto_id"]: r["saldo_cent"] for r in con.execute("SELECT konto_id, saldo_cent FROM salden")
+                if r["saldo_cent"]}
+
+
+def cashflow():
+    return {z["monat"]: (z["einnahmen_cent"], z["ausgaben_cent"], z["anzahl"]) for z in db.get_cashflow()}
+
+
+@pytest.fixture
+def stamm(datenbank):
+    return {
+        "giro": db.add_konto("Giro"),
+        "bar": db.add_konto("Bar"),
+        "essen": db.add_kategorie("Essen"),
+        "gehalt": db.add_kategorie("Gehalt"),
+    }
+
+
+def test_einzelne_aenderungen(stamm):
+    giro, bar, essen, gehalt = stamm["giro"], stamm["bar"], stamm["essen"], stamm["gehalt"]
+    lohn = db.add_zahlung("2500,00", "Einnahme", "2024-01-31", gehalt, giro, "Lohn", True)
+    brot = db.add_zahlung("3,20", "Ausgabe", "2024-01-05", essen, bar, "Bäcker", False)
+    markt = db.add_zahlung("45,90", "Ausgabe", "2024-02-03", essen, giro, "Markt", False)
+    ohne = db.add_zahlung("10,00", "Ausgabe", "2024-02-10", None, None, "ohne Konto", False)
+    ohne_abweichung()
+    assert salden() == {giro: 250000 - 4590, bar: -320, 0: -1000}
+    assert cashflow() == {"2024-01": (250000, -320, 2), "2024-02": (0, -5590, 2)}
+
+    # Betrag, Typ und Monat ändern
+    db.update_zahlung(markt, "50,00", "Einnahme", "2024-03-01", essen, giro, "Markt", False)
+    ohne_abweichung()
+    # Kontowechsel: der Betrag wandert von einem Saldo zum anderen
+    db.update_zahlung(brot, "3,20", "Ausgabe", "2024-01-05", essen, giro, "Bäcker", False)
+    ohne_abweichung()
+    assert salden() == {giro: 250000 + 5000 - 320, 0: -1000}
+
+    db.delete_zahlung(ohne)
+    db.delete_zahlung(lohn)
+    ohne_abweichung()
+    assert salden() == {giro: 5000 - 320}
+    assert cashflow() == {"2024-01": (0, -320, 1), "2024-03": (5000, 0, 1)}
+
+
+def test_sammelaenderungen(stamm):
+    giro, bar, essen, gehalt = stamm["giro"], stamm["bar"], stamm["essen"], stamm["gehalt"]
+    ids = [db.add_zahlung(f"{i},00", "Ausgabe", f"2023-{i % 12 + 1:02d}-15", essen, giro, f"Einkauf {i}", False)
+           for i in range(1, 25)]
+    db.zahlungen_konto_setzen(ids[:10], bar)
+    db.zahlungen_kategorie_setzen(ids[5:15], gehalt)
+    db.zahlungen_kategorie_setzen(ids[:3], None)
+    ohne_abweichung()
+    db.zahlungen_loeschen(ids[::2])
+    ohne_abweichung()
+    db.delete_konto(bar)
+    db.delete_kategorie(gehalt)
+    ohne_abweichung()
+    assert sum(salden().values()) == -sum(i * 100 for i in range(2, 25, 2))
+
+
+def test_massenimport(stamm):
+    db.add_zahlung("20,00", "Ausgabe", "2024-01-02", stamm["essen"], stamm["giro"], "Vorher", False)
+    datensaetze = [
+        {"datum": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "betrag_cent": (-1) ** i * (100 + i),
+         "beschreibung": f"Umsatz {i % 7}", "konto": ("Giro", "Neu", None)[i % 3],
+         "kategorie": ("Essen", "Neue Kategorie", None)[i % 3]}
+        for i in range(300)
+    ]
+    ergebnis = importer.importiere(datensaetze, blockgroesse=64)
+    assert ergebnis.anzahl == 300
+    ohne_abweichung()
+    # Monatswerte für ein ganzes Jahr stimmen mit den Zahlungen überein
+    assert sum(a for _, _, a in cashflow().values()) == db.zahlungen_zaehlen()
+    assert sum(salden().values()) == sum(d["betrag_cent"] for d in datensaetze) - 2000
+
+
+def test_abweichung_wird_erkannt_und_repariert(stamm):
+    db.add_zahlung("12,34", "Ausgabe", "2024-05-01", stamm["essen"], stamm["giro"], "Test", False)
+    with db.transaction() as con:
+        con.execute("UPDATE salden SET saldo_cent = saldo_cent + 1")
+        con.execute("UPDATE monatswerte SET anzahl = anzahl + 1")
+    assert db.pruefe_salden() and db.pruefe_monatswerte()
+    db.pruefe_salden(reparieren=True)
+    db.pruefe_monatswerte(reparieren=True)
+    ohne_abweichung()
+    assert salden() == {stamm["giro"]: -1234}
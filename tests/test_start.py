@@ -0,0 +1,34 @@
+# Programmstart ohne Bildschirm: das erste Zeichnen des Hauptfensters bleibt unter dem Budget
+# aus benchmarks/bench_start.py (Median aus mehreren Starts als eigener Prozess, wie dort).
+# Als Zeitmessung hängt das von Rechner und Last ab und läuft daher nur mit
+# FINANZGURU_BENCHMARKS=1, z.B.  FINANZGURU_BENCHMARKS=1 python -m pytest tests/test_start.py
+import os
+import statistics
+
+import pytest
+
+pytest.importorskip("PySide6")
+pytestmark = pytest.mark.skipif(os.environ.get("FINANZGURU_BENCHMARKS") != "1",
+                                reason="Zeitmessung, nur mit FINANZGURU_BENCHMARKS=1")
+
+import db
+import db_pool
+from bench_start import ZIEL_MS, starten
+from bench_suche import befuellen
+
+ZAHLUNGEN = 20000
+STARTS = 3
+
+
+@pytest.fixture
+def befuellt(tmp_path, monkeypatch):
+    monkeypatch.setenv("QT_QPA_PLATFORM", "offscreen")
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "finanzguru_data.db"))
+    befuellen(ZAHLUNGEN)
+    db_pool.close_all()
+    return tmp_path
+
+
+def test_erstes_zeichnen_unter_budget(befuellt):
+    erstes_zeichnen = statistics.median(starten(befuellt)[0]["Erstes Zeichnen"] for _ in range(STARTS))
+    assert erstes_zeichnen <= ZIEL_MS, f"Erstes Zeichnen nach {erstes_zeichnen:.0f} ms, Budget {ZIEL_MS} ms"
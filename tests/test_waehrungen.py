@@ -0,0 +1,117 @@
+# Wechselkurse: Kurse sucht den letzten Kurs am oder vor dem Tag (Wochenende -> Freitag), vor dem
+# ersten Kurs gilt der erste; kurse_lesen liest das breite EZB- und das lange Format.
+# analyse.in_basis muss je Zahlung dasselbe liefern wie Kurse.umrechnen, die Monatsauswertungen
+# rechnen zum Kurs am letzten Tag des Monats um
+import zipfile
+
+import numpy as np
+import pytest
+
+import analyse
+import db
+from waehrungen import Kurse, WaehrungFehler, kurse_lesen
+
+# Donnerstag bis Montag, Wochenende ohne Kurs
+USD = [("2024-02-29", 1.08), ("2024-03-01", 1.10), ("2024-03-04", 1.25)]
+
+
+def kurse(**reihen):
+    geladen = []
+
+    def laden(waehrung):
+        geladen.append(waehrung)
+        return reihen.get(waehrung, [])
+
+    return Kurse(laden), geladen
+
+
+def test_kurs_am_wochenende_und_vor_dem_ersten():
+    k, geladen = kurse(USD=USD)
+    assert k.kurs("USD", "2024-03-01") == 1.10
+    # Samstag und Sonntag: Kurs vom Freitag
+    assert k.kurs("USD", "2024-03-02") == k.kurs("USD", "2024-03-03") == 1.10
+    assert k.kurs("USD", "2024-03-04") == 1.25
+    assert k.kurs("USD", "2030-01-01") == 1.25
+    # Vor dem ersten Kurs gilt der erste
+    assert k.kurs("USD", "2020-01-01") == 1.08
+    assert k.kurs("EUR", "2020-01-01") == 1.0
+    assert geladen == ["USD"]
+
+    assert k.umrechnen(-11000, "USD", "2024-03-03") == -10000
+    assert k.umrechnen(1000, "USD", "2024-02-29") == round(1000 / 1.08)
+    assert k.umrechnen(500, "EUR", "2024-03-03") == 500
+    with pytest.raises(WaehrungFehler):
+        k.kurs("GBP", "2024-03-01")
+
+
+def test_kurse_lesen_breit(tmp_path):
+    # EZB: neueste Zeile zuerst, jede Zeile endet mit einem Komma, "N/A" = kein Kurs
+    text = "Date,USD,JPY,EUR,\n2024-03-04,1.0855,N/A,1,\n2024-03-01,1.0830,162.51,1,\n"
+    pfad = tmp_path / "eurofxref-hist.csv"
+    pfad.write_text(text, encoding="utf-8")
+    erwartet = [("USD", "2024-03-04", 1.0855), ("USD", "2024-03-01", 1.083), ("JPY", "2024-03-01", 162.51)]
+    assert list(kurse_lesen(pfad)) == erwartet
+    with zipfile.ZipFile(tmp_path / "eurofxref-hist.zip", "w") as archiv:
+        archiv.writestr("eurofxref-hist.csv", text)
+    assert list(kurse_lesen(tmp_path / "eurofxref-hist.zip")) == erwartet
+
+
+def test_kurse_lesen_lang(tmp_path):
+    pfad = tmp_path / "kurse.csv"
+    pfad.write_text("waehrung;datum;kurs\nusd;01.03.2024;1,0830\nCHF;2024-03-01;0,9525\nEUR;2024-03-01;1\n"
+                    "GBP;2024-03-01;\n", encoding="utf-8")
+    assert list(kurse_lesen(pfad)) == [("USD", "2024-03-01", 1.083), ("CHF", "2024-03-01", 0.9525)]
+    pfad.write_text("waehrung,datum,kurs\nUSD,2024-03-01,1.0830\n", encoding="utf-8")
+    assert list(kurse_lesen(pfad)) == [("USD", "2024-03-01", 1.083)]
+    pfad.write_text("Tag;Kurs\n", encoding="utf-8")
+    with pytest.raises(WaehrungFehler):
+        list(kurse_lesen(pfad))
+
+
+def test_monatsende():
+    assert [db._monatsende(m) for m in ("2024-02", "2023-02", "2024-04", "2024-12")] == [
+        "2024-02-29", "2023-02-28", "2024-04-30", "2024-12-31"]
+
+
+@pytest.fixture
+def fremdwaehrung(datenbank):
+    # Kurse an den Monatsenden und direkt danach unterscheiden sich deutlich
+    datei = datenbank / "kurse.csv"
+    datei.write_text("Date,USD,\n2024-01-31,1.10,\n2024-02-29,1.20,\n2024-03-01,1.50,\n"
+                     "2024-04-30,1.30,\n2024-05-01,1.60,\n", encoding="utf-8")
+    db.kurse_laden([datei])
+    depot, giro = db.add_konto("Depot", "USD"), db.add_konto("Giro")
+    analyse.cache_leeren()
+    yield depot, giro
+    analyse.cache_leeren()
+
+
+def test_in_basis_wie_umrechnen(fremdwaehrung):
+    depot, giro = fremdwaehrung
+    for i, datum in enumerate(("2024-01-02", "2024-02-29", "2024-03-02", "2024-03-03", "2024-04-30",
+                               "2024-05-01", "2024-06-15")):
+        db.add_zahlung(f"{100 + i},33", "Ausgabe", datum, None, depot, f"Depot {i}", False)
+        db.add_zahlung(f"{10 + i},00", "Einnahme", datum, None, giro, f"Giro {i}", False)
+    db.add_zahlung("7,77", "Ausgabe", "2024-03-10", None, None, "ohne Konto", False)
+
+    stammdaten, k = db.get_stammdaten(), db.get_kurse()
+    sp = analyse.spalten()
+    with db.connection() as con:
+        roh = dict(con.execute("SELECT id, betrag_cent FROM zahlungen").fetchall())
+    erwartet = [k.umrechnen(roh[i], stammdaten.waehrung(konto), str(tag))
+                for i, konto, tag in zip(sp.id.tolist(), sp.konto.tolist(), sp.datum.astype(str))]
+    assert sp.betrag_cent.tolist() == erwartet
+    assert np.array_equal(analyse.in_basis(np.array([roh[i] for i in sp.id.tolist()], dtype=np.int64),
+                                           sp.datum, sp.konto), sp.betrag_cent)
+    # Giro und ohne Konto bleiben unverändert
+    basis = sp.konto != depot
+    assert sp.betrag_cent[basis].tolist() == [roh[i] for i in sp.id[basis].tolist()]
+
+
+def test_monatswerte_zum_kurs_am_monatsende(fremdwaehrung):
+    depot, _ = fremdwaehrung
+    db.add_zahlung("120,00", "Ausgabe", "2024-02-10", None, depot, "Februar", False)
+    db.add_zahlung("130,00", "Einnahme", "2024-04-05", None, depot, "April", False)
+    cashflow = {z["monat"]: (z["einnahmen_cent"], z["ausgaben_cent"]) for z in db.get_cashflow()}
+    # Schaltjahr-Februar und 30-Tage-Monat: Kurs vom 29.02. bzw. 30.04., nicht vom Folgetag
+    assert cashflow == {"2024-02": (0, -10000), "2024-04": (10000, 0)}
@@ -0,0 +1,269 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from db import (
+    get_zahlungen_seite, get_zahlungen_gefiltert, suche_zahlungen, fts_abfrage, get_uebersicht_zeile,
+    get_stammdaten
+)
+from money import Money
+from db_worker import DbWorker
+import diagnose
+
+SEITENGROESSE = 500
+
+SPALTEN = ["", "Datum", "Betrag", "Konto", "Kategorie", "Beschreibung", ""]
+SPALTE_TYP, SPALTE_DATUM, SPALTE_BETRAG, SPALTE_KONTO, SPALTE_KATEGORIE, SPALTE_BESCHREIBUNG, SPALTE_WIEDERK = range(7)
+
+
+def _schluessel(zeile):
+    return (zeile["datum"], zeile["id"])
+
+
+class ZahlungenModel(QAbstractTableModel):
+    # Hält nur die bisher angezeigten Fenster der Übersicht; weitere Zeilen
+    # lädt die View über canFetchMore/fetchMore nach, wenn gescrollt wird.
+    # Alle Abfragen laufen über den DbWorker; die Zeilen kommen asynchron an.
+    def __init__(self, parent=None, seitengroesse=SEITENGROESSE, worker=None):
+        super().__init__(parent)
+        self.seitengroesse = seitengroesse
+        self.worker = worker if worker is not None else DbWorker(self, synchron=True)
+        self._zeilen = []
+        self._alles_geladen = False
+        self._laedt = False
+        # Aktiver Filter der Filterleiste (dict, siehe db.suche_zahlungen) oder None
+        self._suchfilter = None
+        # Wird bei neu_laden erhöht; Antworten für einen älteren Stand werden verworfen
+        self._generation = 0
+
+    # --- Qt-Model-Schnittstelle ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._zeilen)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(SPALTEN)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return SPALTEN[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        eintrag = self._zeilen[index.row()]
+        spalte = index.column()
+        if role == Qt.DisplayRole:
+            return self._text(eintrag, spalte)
+        if role == Qt.UserRole:
+            return eintrag["id"]
+        if role == Qt.TextAlignmentRole and spalte == SPALTE_BETRAG:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._alles_geladen and not self._laedt
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._alles_geladen or self._laedt:
+            return
+        self._laedt = True
+        generation = self._generation
+        nach = _schluessel(self._zeilen[-1]) if self._zeilen else None
+        if self._nach_relevanz():
+            # Relevanz-Reihenfolge hat keinen Schlüssel, daher hier per Offset weiterblättern
+            abfrage = (suche_zahlungen, self._suchfilter, self.seitengroesse, len(self._zeilen))
+        elif self._suchfilter:
+            abfrage = (get_zahlungen_gefiltert, self._suchfilter, self.seitengroesse, nach)
+        else:
+            abfrage = (get_zahlungen_seite, self.seitengroesse, nach)
+        self.worker.ausfuehren(
+            *abfrage,
+            ergebnis=lambda neue: self._seite_geladen(generation, neue),
+            fehler=lambda e: self._seite_fehlgeschlagen(generation, e)
+        )
+
+    def _seite_geladen(self, generation, neue):
+        if generation != self._generation:
+            return
+        self._laedt = False
+        if len(neue) < self.seitengroesse:
+            self._alles_geladen = True
+        if not neue:
+            return
+        start = len(self._zeilen)
+        self.beginInsertRows(QModelIndex(), start, start + len(neue) - 1)
+        self._zeilen.extend(neue)
+        self.endInsertRows()
+
+    def _seite_fehlgeschlagen(self, generation, exc):
+        if generation == self._generation:
+            self._laedt = False
+        self.worker.fehler.emit(exc)
+
+    # --- Formatierung (erst beim Zeichnen) ---
+    def _text(self, eintrag, spalte):
+        if spalte == SPALTE_TYP:
+            return "➕" if eintrag["typ"] == "Einnahme" else "➖"
+        if spalte == SPALTE_DATUM:
+            return eintrag["datum"]
+        if spalte == SPALTE_BETRAG:
+            # in der Währung des Kontos
+            return Money(abs(eintrag["betrag_cent"])).format(waehrung=get_stammdaten().waehrung(eintrag["konto_id"]))
+        # Namen aus dem Stammdaten-Cache statt per JOIN; gelöschte Einträge liefern None
+        if spalte == SPALTE_KONTO:
+            return get_stammdaten().name("konten", eintrag["konto_id"]) or "Kein Konto"
+        if spalte == SPALTE_KATEGORIE:
+            return get_stammdaten().name("kategorien", eintrag["kategorie_id"]) or "Keine Kategorie"
+        if spalte == SPALTE_BESCHREIBUNG:
+            return eintrag["beschreibung"]
+        if spalte == SPALTE_WIEDERK:
+            return "🔁" if eintrag["wiederkehrend"] else ""
+        return None
+
+    # --- Zugriff und Einzelzeilen-Updates ---
+    def zahlung_id(self, row):
+        return self._zeilen[row]["id"]
+
+    def eintrag(self, row):
+        return self._zeilen[row]
+
+    def _nach_relevanz(self):
+        return bool(self._suchfilter and fts_abfrage(self._suchfilter.get("text")))
+
+    def set_filter(self, suchfilter):
+        self._suchfilter = suchfilter or None
+        self.neu_laden()
+
+    def namen_geaendert(self):
+        # Konto/Kategorie umbenannt oder gelöscht: nur die beiden Spalten neu zeichnen
+        if self._zeilen:
+            unten = len(self._zeilen) - 1
+            self.dataChanged.emit(self.index(0, SPALTE_KONTO), self.index(unten, SPALTE_KATEGORIE), [Qt.DisplayRole])
+
+    def neu_laden(self):
+        self.beginResetModel()
+        self._zeilen = []
+        self._alles_geladen = False
+        self._laedt = False
+        self._generation += 1
+        self.endResetModel()
+
+    def _zeile_von_id(self, zahlung_id):
+        for row, eintrag in enumerate(self._zeilen):
+            if eintrag["id"] == zahlung_id:
+                return row
+        return None
+
+    def _einfuegeposition(self, schluessel):
+        # Zeilen sind absteigend nach (datum, id) sortiert
+        lo, hi = 0, len(self._zeilen)
+        while lo < hi:
+            mitte = (lo + hi) // 2
+            if _schluessel(self._zeilen[mitte]) > schluessel:
+                lo = mitte + 1
+            else:
+                hi = mitte
+        return lo
+
+    def _einfuegen(self, eintrag):
+        row = self._einfuegeposition(_schluessel(eintrag))
+        if row == len(self._zeilen) and not self._alles_geladen:
+            # Liegt hinter dem geladenen Fenster, kommt mit fetchMore
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._zeilen.insert(row, eintrag)
+        self.endInsertRows()
+
+    def _entfernen(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._zeilen[row]
+        self.endRemoveRows()
+
+    def _zeile_laden(self, zahlung_id, weiter):
+        generation = self._generation
+
+        def geladen(eintrag):
+            if generation == self._generation:
+                weiter(zahlung_id, eintrag)
+
+        self.worker.ausfuehren(get_uebersicht_zeile, zahlung_id, ergebnis=geladen)
+
+    def zeile_eingefuegt(self, zahlung_id):
+        if self._suchfilter:
+            # Ob und wo die Zeile im Filterergebnis steht, weiß nur die Abfrage
+            self.neu_laden()
+            return
+        self._zeile_laden(zahlung_id, self._eingefuegt)
+
+    def _eingefuegt(self, zahlung_id, eintrag):
+        if eintrag is not None and self._zeile_von_id(zahlung_id) is None:
+            self._einfuegen(eintrag)
+
+    def zeile_geaendert(self, zahlung_id):
+        if self._suchfilter:
+            self.neu_laden()
+            return
+        self._zeile_laden(zahlung_id, self._geaendert)
+
+    def _geaendert(self, zahlung_id, eintrag):
+        row = self._zeile_von_id(zahlung_id)
+        if row is None:
+            if eintrag is not None:
+                self._einfuegen(eintrag)
+            return
+        if eintrag is None:
+            self._entfernen(row)
+            return
+        if _schluessel(self._zeilen[row]) == _schluessel(eintrag):
+            self._zeilen[row] = eintrag
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(SPALTEN) - 1))
+        else:
+            # Sortierposition hat sich geändert
+            self._entfernen(row)
+            self._einfuegen(eintrag)
+
+    def zeile_entfernt(self, zahlung_id):
+        row = self._zeile_von_id(zahlung_id)
+        if row is not None:
+            self._entfernen(row)
+
+    # --- Sammeländerungen (ein Update der View statt einer Abfrage je Zeile) ---
+    # anzahl: Zahl der Zeilen, die die Datenbank tatsächlich geändert bzw. gelöscht hat. Passt sie
+    # nicht zur Auswahl (z.B. markierte Zahlungen archivierter Jahre, die sich nicht mehr ändern
+    # lassen), ist unklar, welche Zeilen betroffen sind: dann neu laden statt zu raten.
+    def zeilen_geaendert(self, ids, werte, anzahl=None):
+        # werte: geänderte Felder, z.B. {"kategorie_id": 3}; Datum und id bleiben, die Sortierung also auch
+        if self._suchfilter:
+            # Ob die Zeilen noch zum Filter passen, weiß nur die Abfrage
+            self.neu_laden()
+            return
+        ids = set(ids)
+        zeilen = [row for row, eintrag in enumerate(self._zeilen) if eintrag["id"] in ids]
+        # Zeilen, die den Wert schon haben, lässt die Datenbank aus (siehe db._fuer_ids)
+        erwartet = sum(1 for row in zeilen if any(self._zeilen[row][feld] != wert for feld, wert in werte.items()))
+        if anzahl is not None and anzahl != erwartet:
+            self.neu_laden()
+            return
+        if not zeilen:
+            return
+        for row in zeilen:
+            self._zeilen[row] = dict(self._zeilen[row], **werte)
+        self.dataChanged.emit(self.index(zeilen[0], 0), self.index(zeilen[-1], len(SPALTEN) - 1))
+
+    def zeilen_entfernt(self, ids, anzahl=None):
+        # Zusammenhängende Bereiche von hinten nach vorn entfernen, damit die Zeilennummern gültig bleiben
+        ids = set(ids)
+        zeilen = [row for row, eintrag in enumerate(self._zeilen) if eintrag["id"] in ids]
+        if anzahl is not None and anzahl != len(zeilen):
+            self.neu_laden()
+            return
+        while zeilen:
+            ende = zeilen.pop()
+            anfang = ende
+            while zeilen and zeilen[-1] == anfang - 1:
+                anfang = zeilen.pop()
+            self.beginRemoveRows(QModelIndex(), anfang, ende)
+            del self._zeilen[anfang:ende + 1]
+            self.endRemoveRows()
+
+
+# Laufzeitmessung (siehe diagnose.py): Einarbeiten geladener Seiten und einzelner Zeilen
+diagnose.instrumentieren(ZahlungenModel, "ui", ["neu_laden", "_seite_geladen", "_eingefuegt", "_geaendert"])
@@ -0,0 +1,91 @@
+# Termine wiederkehrender Verträge und Vorschau des Kontostands.
+# Termine werden immer vom Beginn aus gezählt (Beginn + n * Rhythmus), damit ein Vertrag zum 31.
+# nach einem kurzen Monat wieder am 31. fällig wird, statt dauerhaft auf den 28. zu rutschen.
+import calendar
+from datetime import date, timedelta
+
+# Rhythmus in Monaten
+RHYTHMEN = {1: "monatlich", 3: "vierteljährlich", 6: "halbjährlich", 12: "jährlich"}
+
+
+def _datum(wert):
+    if wert is None or isinstance(wert, date):
+        return wert
+    return date.fromisoformat(wert)
+
+
+def plus_monate(tag, monate):
+    jahr, monat = divmod(tag.month - 1 + monate, 12)
+    jahr += tag.year
+    return date(jahr, monat + 1, min(tag.day, calendar.monthrange(jahr, monat + 1)[1]))
+
+
+def _erster_index(beginn, rhythmus, ab):
+    # Nummer n des ersten Termins am oder nach `ab`
+    if ab <= beginn:
+        return 0
+    n = ((ab.year - beginn.year) * 12 + ab.month - beginn.month) // rhythmus
+    while plus_monate(beginn, n * rhythmus) < ab:
+        n += 1
+    return n
+
+
+def termine(beginn, rhythmus, ab, bis, ende=None):
+    # Alle Termine in [ab, bis], höchstens bis zum Vertragsende
+    beginn, ab, bis, ende = _datum(beginn), _datum(ab), _datum(bis), _datum(ende)
+    if ende is not None and ende < bis:
+        bis = ende
+    n = _erster_index(beginn, rhythmus, ab)
+    ergebnis = []
+    termin = plus_monate(beginn, n * rhythmus)
+    while termin <= bis:
+        ergebnis.append(termin)
+        n += 1
+        termin = plus_monate(beginn, n * rhythmus)
+    return ergebnis
+
+
+def naechster_termin(beginn, rhythmus, ab, ende=None):
+    # Erster Termin am oder nach `ab`; None, wenn der Vertrag bis dahin endet
+    beginn, ab, ende = _datum(beginn), _datum(ab), _datum(ende)
+    termin = plus_monate(beginn, _erster_index(beginn, rhythmus, ab) * rhythmus)
+    if ende is not None and termin > ende:
+        return None
+    return termin
+
+
+def faellige_termine(vertrag, bis):
+    # Für einen fälligen Vertrag: (Termine bis einschließlich `bis`, nächste Fälligkeit danach oder None)
+    beginn, rhythmus, ende = vertrag["beginn"], vertrag["rhythmus_monate"], vertrag["ende"]
+    bis = _datum(bis)
+    faellig = termine(beginn, rhythmus, vertrag["naechste_faelligkeit"], bis, ende)
+    return faellig, naechster_termin(beginn, rhythmus, bis + timedelta(days=1), ende)
+
+
+def vorschau(vertraege, saldo_cent, heute=None, monate=12):
+    # Kontostand zum Ende des laufenden und der folgenden `monate` Monate, wenn nur die Verträge
+    # buchen. Liefert [(monat "YYYY-MM", saldo_cent)]. Für die Vorschau zählt nur der Monat eines
+    # Termins, daher wird je Vertrag in ganzen Monaten gerechnet statt Datumswerte zu erzeugen.
+    heute = _datum(heute) or date.today()
+    monatsanfang = heute.replace(day=1)
+    aktuell = heute.year * 12 + heute.month - 1
+    aenderung = [0] * (monate + 1)
+    for v in vertraege:
+        if v["naechste_faelligkeit"] is None:
+            continue
+        beginn, rhythmus, ende = _datum(v["beginn"]), v["rhythmus_monate"], _datum(v["ende"])
+        n = _erster_index(beginn, rhythmus, _datum(v["naechste_faelligkeit"]))
+        n_ende = _erster_index(beginn, rhythmus, ende + timedelta(days=1)) if ende else None
+        versatz = beginn.year * 12 + beginn.month - 1 - aktuell
+        while n_ende is None or n < n_ende:
+            index = versatz + n * rhythmus
+            if index > monate:
+                break
+            # Noch nicht gebuchte, bereits fällige Termine zählen zum laufenden Monat
+            aenderung[max(index, 0)] += v["betrag_cent"]
+            n += 1
+    verlauf = []
+    for i, betrag in enumerate(aenderung):
+        saldo_cent += betrag
+        verlauf.append((plus_monate(monatsanfang, i).isoformat()[:7], saldo_cent))
+    return verlauf
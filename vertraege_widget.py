@@ -0,0 +1,277 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QDateEdit,
+    QMessageBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView
+)
+from PySide6.QtCore import Qt, QDate, Signal
+from db import (
+    get_vertraege, add_vertrag, update_vertrag, delete_vertrag, vertraege_buchen, vertraege_uebernehmen,
+    get_vorschau
+)
+from money import Money, parse_betrag
+from statistik_widget import BalkenDiagramm, BLAU
+from vertraege import RHYTHMEN
+import diagnose
+from stammdaten_qt import combo_anwenden
+
+_KEIN_DATUM = QDate(1900, 1, 1)
+SPALTEN = ["Name", "Betrag", "Rhythmus", "Nächste Fälligkeit", "Ende", "Kategorie", "Konto"]
+
+
+def vertraege_laden():
+    # Läuft im DB-Worker
+    return {"vertraege": [dict(r) for r in get_vertraege()], "vorschau": get_vorschau()}
+
+
+class VertraegeWidget(QWidget):
+    # Anzahl neu gebuchter Zahlungen, damit Übersicht und Salden nachziehen können
+    gebucht = Signal(int)
+
+    def __init__(self, worker, kategorien=None, konten=None):
+        super().__init__()
+        self.worker = worker
+        self.vertraege = []
+        self.vertrag_id = None
+
+        layout = QVBoxLayout()
+        self.label_vorschau = QLabel()
+        self.label_vorschau.setStyleSheet("font-size: 16px; font-weight: bold;")
+        layout.addWidget(self.label_vorschau)
+        self.chart_vorschau = BalkenDiagramm("Kontostand der nächsten 12 Monate (nur Verträge)")
+        self.chart_vorschau.setMinimumHeight(180)
+        layout.addWidget(self.chart_vorschau, 2)
+
+        self.table = QTableWidget(0, len(SPALTEN))
+        self.table.setHorizontalHeaderLabels(SPALTEN)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.itemSelectionChanged.connect(self.auswahl_geaendert)
+        layout.addWidget(self.table, 3)
+
+        # Zeile 1: Name, Betrag, Typ
+        row1 = QHBoxLayout()
+        row1.addWidget(QLabel("Name:"))
+        self.input_name = QLineEdit()
+        self.input_name.setPlaceholderText("z.B. Miete, Netflix, Gehalt")
+        row1.addWidget(self.input_name, 2)
+        row1.addWidget(QLabel("Betrag:"))
+        self.input_betrag = QLineEdit()
+        self.input_betrag.setPlaceholderText("z.B. 1.234,56")
+        row1.addWidget(self.input_betrag)
+        self.combo_typ = QComboBox()
+        self.combo_typ.addItems(["Ausgabe", "Einnahme"])
+        row1.addWidget(self.combo_typ)
+        layout.addLayout(row1)
+
+        # Zeile 2: Rhythmus, Beginn, Ende, Kategorie, Konto
+        row2 = QHBoxLayout()
+        row2.addWidget(QLabel("Rhythmus:"))
+        self.combo_rhythmus = QComboBox()
+        for monate, name in RHYTHMEN.items():
+            self.combo_rhythmus.addItem(name, userData=monate)
+        row2.addWidget(self.combo_rhythmus)
+        row2.addWidget(QLabel("Beginn:"))
+        self.input_beginn = QDateEdit()
+        self.input_beginn.setCalendarPopup(True)
+        self.input_beginn.setDate(QDate.currentDate())
+        row2.addWidget(self.input_beginn)
+        row2.addWidget(QLabel("Ende:"))
+        # Kleinstes Datum steht für "unbefristet"
+        self.input_ende = QDateEdit()
+        self.input_ende.setCalendarPopup(True)
+        self.input_ende.setMinimumDate(_KEIN_DATUM)
+        self.input_ende.setSpecialValueText("unbefristet")
+        self.input_ende.setDate(_KEIN_DATUM)
+        row2.addWidget(self.input_ende)
+        row2.addWidget(QLabel("Kategorie:"))
+        self.combo_kategorie = QComboBox()
+        row2.addWidget(self.combo_kategorie)
+        row2.addWidget(QLabel("Konto:"))
+        self.combo_konto = QComboBox()
+        row2.addWidget(self.combo_konto)
+        layout.addLayout(row2)
+        self.update_kategorien(kategorien or [])
+        self.update_konten(konten or [])
+
+        # Zeile 3: Aktionen
+        row3 = QHBoxLayout()
+        self.btn_speichern = QPushButton("Vertrag anlegen")
+        self.btn_speichern.clicked.connect(self.speichern)
+        row3.addWidget(self.btn_speichern)
+        self.btn_neu = QPushButton("Neu")
+        self.btn_neu.clicked.connect(self.clear_fields)
+        row3.addWidget(self.btn_neu)
+        self.btn_loeschen = QPushButton("Löschen")
+        self.btn_loeschen.clicked.connect(self.loeschen)
+        self.btn_loeschen.setEnabled(False)
+        row3.addWidget(self.btn_loeschen)
+        row3.addStretch()
+        self.btn_uebernehmen = QPushButton("Wiederkehrende Zahlungen übernehmen")
+        self.btn_uebernehmen.setToolTip(
+            "Legt für als wiederkehrend markierte Zahlungen ohne Vertrag monatliche Verträge an"
+        )
+        self.btn_uebernehmen.clicked.connect(self.uebernehmen)
+        row3.addWidget(self.btn_uebernehmen)
+        layout.addLayout(row3)
+        self.setLayout(layout)
+
+    def update_kategorien(self, kategorien):
+        auswahl = self.combo_kategorie.currentData()
+        self.combo_kategorie.clear()
+        self.combo_kategorie.addItem("Keine Kategorie", userData=None)
+        for k in kategorien:
+            self.combo_kategorie.addItem(k["name"], userData=k["id"])
+        self.combo_kategorie.setCurrentIndex(max(self.combo_kategorie.findData(auswahl), 0))
+
+    def update_konten(self, konten):
+        auswahl = self.combo_konto.currentData()
+        self.combo_konto.clear()
+        for k in konten:
+            self.combo_konto.addItem(k["name"], userData=k["id"])
+        self.combo_konto.setCurrentIndex(max(self.combo_konto.findData(auswahl), 0))
+
+    # Einzelne Änderungen aus dem Stammdaten-Cache; die Tabelle zeigt Namen, daher bei
+    # Umbenennen/Löschen neu laden
+    def kategorien_anwenden(self, aenderung):
+        combo_anwenden(self.combo_kategorie, aenderung, versatz=1)
+        if aenderung.umbenannt or aenderung.entfernt:
+            self.aktualisieren()
+
+    def konten_anwenden(self, aenderung):
+        combo_anwenden(self.combo_konto, aenderung)
+        if aenderung.umbenannt or aenderung.entfernt:
+            self.aktualisieren()
+
+    # --- Laden und Buchen ---
+    def aktualisieren(self):
+        self.worker.ausfuehren(vertraege_laden, ergebnis=self._geladen, schluessel="vertraege")
+
+    def buchen(self):
+        # Fällige Termine buchen (beim Start und per Timer aus dem Hauptfenster)
+        self.worker.ausfuehren(vertraege_buchen, ergebnis=self._gebucht, schluessel="vertraege_buchen")
+
+    def _gebucht(self, anzahl):
+        if anzahl:
+            self.gebucht.emit(anzahl)
+        if self.isVisible() or anzahl:
+            self.aktualisieren()
+
+    def _geladen(self, daten):
+        self.vertraege = daten["vertraege"]
+        self.table.blockSignals(True)
+        self.table.setRowCount(len(self.vertraege))
+        for zeile, v in enumerate(self.vertraege):
+            werte = [
+                v["name"],
+                str(Money(v["betrag_cent"])),
+                RHYTHMEN.get(v["rhythmus_monate"], f"alle {v['rhythmus_monate']} Monate"),
+                v["naechste_faelligkeit"] or "beendet",
+                v["ende"] or "",
+                v["kategorie_name"] or "",
+                v["konto_name"] or "",
+            ]
+            for spalte, wert in enumerate(werte):
+                item = QTableWidgetItem(wert)
+                if spalte == 1:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(zeile, spalte, item)
+            if self.vertraege[zeile]["id"] == self.vertrag_id:
+                self.table.selectRow(zeile)
+        self.table.blockSignals(False)
+
+        vorschau = daten["vorschau"]
+        self.chart_vorschau.set_daten([m for m, _ in vorschau], [], [("Kontostand", BLAU, [s for _, s in vorschau])])
+        monat, saldo = vorschau[-1]
+        self.label_vorschau.setText(f"Kontostand in 12 Monaten (Ende {monat}): {Money(saldo)}")
+
+    # --- Formular ---
+    def auswahl_geaendert(self):
+        zeilen = self.table.selectionModel().selectedRows()
+        if not zeilen:
+            return
+        v = self.vertraege[zeilen[0].row()]
+        self.vertrag_id = v["id"]
+        self.input_name.setText(v["name"])
+        self.input_betrag.setText(Money(abs(v["betrag_cent"])).format(symbol=False))
+        self.combo_typ.setCurrentText(v["typ"])
+        self.combo_rhythmus.setCurrentIndex(max(self.combo_rhythmus.findData(v["rhythmus_monate"]), 0))
+        self.input_beginn.setDate(QDate.fromString(v["beginn"], "yyyy-MM-dd"))
+        self.input_ende.setDate(QDate.fromString(v["ende"], "yyyy-MM-dd") if v["ende"] else _KEIN_DATUM)
+        self.combo_kategorie.setCurrentIndex(max(self.combo_kategorie.findData(v["kategorie_id"]), 0))
+        self.combo_konto.setCurrentIndex(max(self.combo_konto.findData(v["konto_id"]), 0))
+        self.btn_speichern.setText("Änderung speichern")
+        self.btn_loeschen.setEnabled(True)
+
+    def clear_fields(self):
+        self.vertrag_id = None
+        self.table.clearSelection()
+        self.input_name.clear()
+        self.input_betrag.clear()
+        self.combo_typ.setCurrentIndex(0)
+        self.combo_rhythmus.setCurrentIndex(0)
+        self.input_beginn.setDate(QDate.currentDate())
+        self.input_ende.setDate(_KEIN_DATUM)
+        self.combo_kategorie.setCurrentIndex(0)
+        self.btn_speichern.setText("Vertrag anlegen")
+        self.btn_loeschen.setEnabled(False)
+
+    def speichern(self):
+        name = self.input_name.text().strip()
+        if not name:
+            QMessageBox.warning(self, "Fehler", "Bitte einen Namen eingeben.")
+            return
+        try:
+            betrag = parse_betrag(self.input_betrag.text())
+        except ValueError:
+            betrag = None
+        if betrag is None or betrag.cent <= 0:
+            QMessageBox.warning(self, "Fehler", "Bitte einen gültigen Betrag eingeben (z.B. 1.234,56).")
+            return
+        konto_id = self.combo_konto.currentData()
+        if konto_id is None:
+            QMessageBox.warning(self, "Fehler", "Bitte ein Konto auswählen.")
+            return
+        beginn = self.input_beginn.date().toString("yyyy-MM-dd")
+        ende = None
+        if self.input_ende.date() != _KEIN_DATUM:
+            ende = self.input_ende.date().toString("yyyy-MM-dd")
+            if ende < beginn:
+                QMessageBox.warning(self, "Fehler", "Das Ende liegt vor dem Beginn.")
+                return
+        args = (name, betrag, self.combo_typ.currentText(), self.combo_rhythmus.currentData(), beginn, ende,
+                self.combo_kategorie.currentData(), konto_id)
+        if self.vertrag_id is None:
+            self.worker.ausfuehren(add_vertrag, *args, ergebnis=self._gespeichert)
+        else:
+            self.worker.ausfuehren(update_vertrag, self.vertrag_id, *args, ergebnis=self._gespeichert)
+
+    def _gespeichert(self, _):
+        # Ein Beginn in der Vergangenheit bucht die verpassten Termine sofort nach
+        self.clear_fields()
+        self.buchen()
+        self.aktualisieren()
+
+    def loeschen(self):
+        if self.vertrag_id is None:
+            return
+        confirm = QMessageBox.question(
+            self, "Vertrag löschen",
+            f"Soll der Vertrag '{self.input_name.text()}' wirklich gelöscht werden?\n"
+            "Bereits gebuchte Zahlungen bleiben erhalten.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if confirm == QMessageBox.Yes:
+            self.worker.ausfuehren(delete_vertrag, self.vertrag_id, ergebnis=self._gespeichert)
+
+    def uebernehmen(self):
+        def fertig(anzahl):
+            self.aktualisieren()
+            QMessageBox.information(self, "Verträge", f"{anzahl} Verträge aus wiederkehrenden Zahlungen angelegt.")
+
+        self.worker.ausfuehren(vertraege_uebernehmen, ergebnis=fertig)
+
+
+# Laufzeitmessung (siehe diagnose.py): Tabelle und Vorschau mit neuen Daten füllen
+diagnose.instrumentieren(VertraegeWidget, "ui", ["_geladen"])
@@ -0,0 +1,134 @@
+# Währungen und Wechselkurse. Jedes Konto führt eine Währung (Standard BASIS); Zahlungen haben die
+# Währung ihres Kontos, Zahlungen ohne Konto sind in BASIS. Gesamtvermögen und Auswertungen rechnen
+# in BASIS um. Kurse kommen nur aus lokalen Dateien (kein Netzzugriff), siehe kurse_lesen; sie
+# gelten wie bei der EZB als "Einheiten der Fremdwährung je 1 EUR".
+#
+# Kurse hält die Kurse je Währung als sortierte Listen im Speicher; ein Kurs gilt ab seinem Datum
+# bis zum nächsten (Wochenenden und Feiertage haben keinen eigenen). Nachgeschlagene Kurse werden
+# je (Währung, Datum) gemerkt, so kostet jede weitere Umrechnung für denselben Tag nur einen
+# Dict-Zugriff.
+import csv
+import io
+import re
+import zipfile
+from bisect import bisect_right
+from pathlib import Path
+
+BASIS = "EUR"
+# Vorschläge für die Auswahl in der Oberfläche; andere dreistellige Codes sind ebenso erlaubt
+GAENGIGE = ("EUR", "USD", "GBP", "CHF", "JPY", "SEK", "NOK", "DKK", "PLN", "CZK", "HUF", "CAD", "AUD")
+
+_CODE = re.compile(r"^[A-Z]{3}$")
+
+
+class WaehrungFehler(ValueError):
+    pass
+
+
+def pruefe_code(waehrung):
+    code = (waehrung or "").strip().upper()
+    if not _CODE.match(code):
+        raise WaehrungFehler(f"Ungültiger Währungscode: {waehrung!r} (erwartet z.B. USD)")
+    return code
+
+
+# --- Kursdateien ---
+# Zwei Formate, Trennzeichen , oder ; (Dezimalkomma bei ;):
+#   breit (EZB, eurofxref-hist.csv, auch als .zip): Date,USD,JPY,...  je Zeile ein Tag, "N/A" = kein Kurs
+#   lang: waehrung;datum;kurs  je Zeile ein Kurs
+def _zahl(text, trennzeichen):
+    text = text.strip()
+    if not text or text.upper() == "N/A":
+        return None
+    kurs = float(text.replace(",", ".") if trennzeichen == ";" else text)
+    if kurs <= 0:
+        raise WaehrungFehler(f"Ungültiger Kurs: {text}")
+    return kurs
+
+
+def _datum(text):
+    text = text.strip()
+    if re.match(r"^\d{4}-\d{2}-\d{2}$", text):
+        return text
+    m = re.match(r"^(\d{1,2})\.(\d{1,2})\.(\d{4})$", text)
+    if m:
+        return f"{m.group(3)}-{int(m.group(2)):02d}-{int(m.group(1)):02d}"
+    raise WaehrungFehler(f"Ungültiges Datum in der Kursdatei: {text!r}")
+
+
+def _text_lesen(pfad):
+    pfad = Path(pfad)
+    if pfad.suffix.lower() == ".zip":
+        with zipfile.ZipFile(pfad) as archiv:
+            namen = [n for n in archiv.namelist() if n.lower().endswith(".csv")]
+            if not namen:
+                raise WaehrungFehler(f"{pfad.name} enthält keine CSV-Datei")
+            return archiv.read(namen[0]).decode("utf-8-sig")
+    return pfad.read_text(encoding="utf-8-sig")
+
+
+def kurse_lesen(pfad):
+    # Liefert (waehrung, datum, kurs) je Kurs; BASIS selbst wird übersprungen
+    text = _text_lesen(pfad)
+    kopfzeile = text.split("\n", 1)[0]
+    trennzeichen = ";" if kopfzeile.count(";") > kopfzeile.count(",") else ","
+    zeilen = csv.reader(io.StringIO(text), delimiter=trennzeichen)
+    kopf = [s.strip() for s in next(zeilen, [])]
+    if not kopf:
+        return
+    if [s.lower() for s in kopf[:3]] == ["waehrung", "datum", "kurs"]:
+        for zeile in zeilen:
+            if len(zeile) >= 3 and zeile[0].strip():
+                waehrung = pruefe_code(zeile[0])
+                kurs = _zahl(zeile[2], trennzeichen)
+                if waehrung != BASIS and kurs is not None:
+                    yield waehrung, _datum(zeile[1]), kurs
+        return
+    if kopf[0].lower() not in ("date", "datum"):
+        raise WaehrungFehler(f"Unbekanntes Format der Kursdatei: {', '.join(kopf[:4])}")
+    # Die EZB-Datei endet jede Zeile mit einem Komma, daher leere Spaltennamen auslassen
+    spalten = [(i, pruefe_code(name)) for i, name in enumerate(kopf) if i and name]
+    for zeile in zeilen:
+        if not zeile or not zeile[0].strip():
+            continue
+        datum = _datum(zeile[0])
+        for i, waehrung in spalten:
+            kurs = _zahl(zeile[i], trennzeichen) if i < len(zeile) else None
+            if waehrung != BASIS and kurs is not None:
+                yield waehrung, datum, kurs
+
+
+# --- Kurs-Cache ---
+class Kurse:
+    # laden(waehrung) -> [(datum, kurs)] nach Datum aufsteigend; wird je Währung nur einmal gerufen
+    def __init__(self, laden):
+        self._laden = laden
+        self._reihen = {}   # waehrung -> (daten, kurse)
+        self._cache = {}    # (waehrung, datum) -> kurs
+
+    def reihe(self, waehrung):
+        reihe = self._reihen.get(waehrung)
+        if reihe is None:
+            zeilen = self._laden(waehrung)
+            reihe = ([z[0] for z in zeilen], [z[1] for z in zeilen])
+            self._reihen[waehrung] = reihe
+        return reihe
+
+    def kurs(self, waehrung, datum):
+        # Letzter Kurs am oder vor datum ("YYYY-MM-DD"); vor dem ersten bekannten Kurs gilt dieser
+        if waehrung == BASIS:
+            return 1.0
+        kurs = self._cache.get((waehrung, datum))
+        if kurs is None:
+            daten, kurse = self.reihe(waehrung)
+            if not daten:
+                raise WaehrungFehler(f"Keine Wechselkurse für {waehrung} geladen")
+            kurs = kurse[max(bisect_right(daten, datum) - 1, 0)]
+            self._cache[(waehrung, datum)] = kurs
+        return kurs
+
+    def umrechnen(self, cent, waehrung, datum):
+        # Cent in waehrung -> Cent in BASIS, auf ganze Cent gerundet
+        if waehrung == BASIS or not cent:
+            return cent
+        return round(cent / self.kurs(waehrung, datum))
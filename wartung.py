@@ -0,0 +1,257 @@
+# Wartungsbefehle für die Datenbank
+#
+#   python wartung.py salden [--reparieren]
+#   python wartung.py monatswerte [--neu-aufbauen]
+#   python wartung.py beschreibungen
+#   python wartung.py kurse [DATEI...]
+#   python wartung.py plaene
+#   python wartung.py duplikate [--tage 3]
+#   python wartung.py kategorisieren [--alle]
+#   python wartung.py protokoll [--behalten 200000]
+#   python wartung.py archivieren JAHR
+#   python wartung.py archive
+#   python wartung.py sichern [--ziel VERZEICHNIS] [--behalten 7]
+#   python wartung.py sicherungen [--ziel VERZEICHNIS]
+#   python wartung.py wiederherstellen [DATEI] [--ohne-sicherung]
+import argparse
+import os
+import sys
+
+import abfrageplaene
+import db
+import sicherung
+from money import Money
+from waehrungen import WaehrungFehler
+
+
+def cmd_salden(args):
+    abweichungen = db.pruefe_salden(reparieren=args.reparieren)
+    if not abweichungen:
+        print("Salden stimmen.")
+        return 0
+    for konto_id, gespeichert, berechnet in abweichungen:
+        print(f"Konto {konto_id}: gespeichert {gespeichert}, berechnet {berechnet}, "
+              f"Differenz {berechnet - gespeichert}")
+    if args.reparieren:
+        print(f"{len(abweichungen)} Salden neu berechnet.")
+        return 0
+    return 1
+
+
+def cmd_monatswerte(args):
+    abweichungen = db.pruefe_monatswerte(reparieren=args.neu_aufbauen)
+    for (monat, kategorie_id, konto_id, typ), gespeichert, berechnet in abweichungen:
+        print(f"{monat} Kategorie {kategorie_id} Konto {konto_id} {typ}: "
+              f"gespeichert {Money(gespeichert[0])} ({gespeichert[1]}), "
+              f"berechnet {Money(berechnet[0])} ({berechnet[1]})")
+    if args.neu_aufbauen:
+        print("Monatswerte neu aufgebaut.")
+        return 0
+    if abweichungen:
+        print(f"{len(abweichungen)} Monatswerte weichen ab (mit --neu-aufbauen neu berechnen).")
+        return 1
+    print("Monatswerte stimmen.")
+    return 0
+
+
+def cmd_beschreibungen(args):
+    anzahl = db.beschreibungen_neu_aufbauen()
+    print(f"{anzahl} verschiedene Beschreibungen für das Vervollständigen neu aufgebaut.")
+    return 0
+
+
+def cmd_kurse(args):
+    # Ohne Dateien: nur den vorhandenen Bestand auflisten
+    if args.dateien:
+        try:
+            anzahl = db.kurse_laden(args.dateien)
+        except (OSError, WaehrungFehler) as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"{anzahl} Kurse geladen.")
+    bestand = db.get_kursbestand()
+    for b in bestand:
+        print(f"{b['waehrung']}: {b['anzahl']} Kurse von {b['von']} bis {b['bis']}")
+    if not bestand:
+        print("Keine Wechselkurse geladen.")
+    return 0
+
+
+def cmd_plaene(args):
+    probleme = abfrageplaene.pruefe()
+    for funktion, sql, detail in probleme:
+        print(f"{funktion}: {detail}\n    {' '.join(sql.split())}")
+    if probleme:
+        print(f"{len(probleme)} Abfragepläne ohne passenden Index.")
+        return 1
+    print("Alle Abfragepläne nutzen Indizes.")
+    return 0
+
+
+def cmd_duplikate(args):
+    gruppen = db.finde_beinahe_duplikate(tage=args.tage)
+    for gruppe in gruppen:
+        print("Mögliche Duplikate:")
+        for zahlung_id in gruppe:
+            z = db.get_zahlung_by_id(zahlung_id)
+            print(f"  #{z['id']} {z['datum']} {Money(z['betrag_cent'])} {z['beschreibung']}")
+    print(f"{len(gruppen)} Gruppen gefunden.")
+    return 0
+
+
+def cmd_kategorisieren(args):
+    anzahl = db.zahlungen_kategorisieren(alle=args.alle)
+    print(f"{anzahl} Zahlungen per Regel einer Kategorie zugeordnet.")
+    return 0
+
+
+def cmd_protokoll(args):
+    entfernt = db.protokoll_verdichten(behalten=args.behalten)
+    print(f"{entfernt} alte Protokolleinträge entfernt, Stand {db.protokoll_stand()}.")
+    return 0
+
+
+def cmd_archivieren(args):
+    vorher = os.path.getsize(db.DB_FILE)
+    try:
+        anzahl = db.archivieren(args.jahr)
+    except db.ArchivFehler as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{anzahl} Zahlungen aus {args.jahr} nach {db.archivpfad(args.jahr)} verschoben, "
+          f"Datenbank {vorher / 2**20:.1f} -> {os.path.getsize(db.DB_FILE) / 2**20:.1f} MiB.")
+    return 0
+
+
+def cmd_archive(args):
+    archive = db.get_archive()
+    for a in archive:
+        pfad = db.archivpfad(a["jahr"])
+        groesse = f"{os.path.getsize(pfad) / 2**20:.1f} MiB" if os.path.exists(pfad) else "Datei fehlt"
+        print(f"{a['jahr']}: {a['anzahl']} Zahlungen, {groesse}, archiviert {a['erstellt']}")
+    if not archive:
+        print("Keine archivierten Jahre.")
+    return 0
+
+
+def cmd_sichern(args):
+    # Fortschritt nur im Terminal (nicht etwa im cron-Log)
+    interaktiv = sys.stderr.isatty()
+
+    def melden(schritt, erledigt, gesamt):
+        print(f"\r{schritt}: {erledigt / gesamt if gesamt else 1:.0%}   ", end="", file=sys.stderr, flush=True)
+
+    try:
+        ergebnis = sicherung.sichern(args.ziel, behalten=args.behalten, fortschritt=melden if interaktiv else None)
+    except sicherung.SicherungFehler as e:
+        print(f"\n{e}" if interaktiv else e, file=sys.stderr)
+        return 1
+    if interaktiv:
+        print(file=sys.stderr)
+    print(f"{ergebnis}\n-> {ergebnis.pfad}")
+    return 0
+
+
+def cmd_sicherungen(args):
+    vorhanden = sicherung.sicherungen(args.ziel)
+    for pfad, _ in vorhanden:
+        try:
+            info = sicherung.beschreibung(pfad)
+        except sicherung.SicherungFehler as e:
+            print(f"{pfad}: {e}")
+            continue
+        archive = f", Archive {', '.join(info['archive'])}" if info["archive"] else ""
+        print(f"{pfad}: {info['erstellt']}, {info['zahlungen']} Zahlungen{archive}, "
+              f"{os.path.getsize(pfad) / 2**20:.1f} MiB")
+    if not vorhanden:
+        print(f"Keine Sicherungen in {args.ziel or sicherung.verzeichnis()}.")
+    return 0
+
+
+def cmd_wiederherstellen(args):
+    pfad = args.datei
+    if pfad is None:
+        vorhanden = sicherung.sicherungen(args.ziel)
+        if not vorhanden:
+            print(f"Keine Sicherungen in {args.ziel or sicherung.verzeichnis()}.", file=sys.stderr)
+            return 1
+        pfad = vorhanden[0][0]
+    try:
+        info, vorherige = sicherung.wiederherstellen(pfad, vorher_sichern=not args.ohne_sicherung, ziel=args.ziel)
+    except sicherung.SicherungFehler as e:
+        print(e, file=sys.stderr)
+        return 1
+    if vorherige is not None:
+        print(f"Bisheriger Stand gesichert: {vorherige.pfad}")
+    print(f"Stand vom {info['erstellt']} wiederhergestellt ({info['zahlungen']} Zahlungen) aus {pfad}.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wartung der Finanz-Datenbank")
+    parser.add_argument("--db", help="Pfad zur Datenbank (Standard: %(default)s)", default=db.DB_FILE)
+    sub = parser.add_subparsers(dest="befehl", required=True)
+
+    p = sub.add_parser("salden", help="Salden gegen die Zahlungen prüfen")
+    p.add_argument("--reparieren", action="store_true", help="Salden bei Abweichung neu berechnen")
+    p.set_defaults(func=cmd_salden)
+
+    p = sub.add_parser("monatswerte", help="Monatswerte (Statistik) gegen die Zahlungen prüfen")
+    p.add_argument("--neu-aufbauen", action="store_true", help="Monatswerte aus den Zahlungen neu aufbauen")
+    p.set_defaults(func=cmd_monatswerte)
+
+    p = sub.add_parser("beschreibungen", help="Vorschläge für die Beschreibung aus den Zahlungen neu aufbauen")
+    p.set_defaults(func=cmd_beschreibungen)
+
+    p = sub.add_parser("kurse", help="Wechselkurse aus Dateien laden (EZB-CSV/ZIP oder waehrung;datum;kurs)")
+    p.add_argument("dateien", nargs="*", metavar="DATEI")
+    p.set_defaults(func=cmd_kurse)
+
+    p = sub.add_parser("duplikate", help="Beinahe-Duplikate suchen")
+    p.add_argument("--tage", type=int, default=3, help="Maximaler Abstand in Tagen (Standard: %(default)s)")
+    p.set_defaults(func=cmd_duplikate)
+
+    p = sub.add_parser("kategorisieren", help="Zahlungen ohne Kategorie per Regeln zuordnen")
+    p.add_argument("--alle", action="store_true", help="Auch Zahlungen mit Kategorie neu zuordnen, wenn eine Regel passt")
+    p.set_defaults(func=cmd_kategorisieren)
+
+    p = sub.add_parser("protokoll", help="Änderungsprotokoll (Rückgängig) auf die neuesten Einträge kürzen")
+    p.add_argument("--behalten", type=int, default=db.PROTOKOLL_BEHALTEN,
+                   help="Anzahl neuester Einträge, die bleiben (Standard: %(default)s)")
+    p.set_defaults(func=cmd_protokoll)
+
+    p = sub.add_parser("archivieren", help="Abgeschlossenes Jahr in eine eigene Archivdatei verschieben")
+    p.add_argument("jahr", type=int)
+    p.set_defaults(func=cmd_archivieren)
+
+    p = sub.add_parser("archive", help="Archivierte Jahre auflisten")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("sichern", help="Datenbank und Archive im laufenden Betrieb sichern")
+    p.add_argument("--ziel", help="Verzeichnis der Sicherungen (Standard: neben der Datenbank)")
+    p.add_argument("--behalten", type=int, default=sicherung.BEHALTEN,
+                   help="Anzahl neuester Sicherungen, die bleiben (Standard: %(default)s)")
+    p.set_defaults(func=cmd_sichern)
+
+    p = sub.add_parser("sicherungen", help="Vorhandene Sicherungen auflisten")
+    p.add_argument("--ziel", help="Verzeichnis der Sicherungen (Standard: neben der Datenbank)")
+    p.set_defaults(func=cmd_sicherungen, ohne_db=True)
+
+    p = sub.add_parser("wiederherstellen", help="Stand einer Sicherung wiederherstellen (Programm vorher beenden)")
+    p.add_argument("datei", nargs="?", help="Sicherung (Standard: die neueste)")
+    p.add_argument("--ziel", help="Verzeichnis der Sicherungen (Standard: neben der Datenbank)")
+    p.add_argument("--ohne-sicherung", action="store_true", help="Den bisherigen Stand vorher nicht sichern")
+    p.set_defaults(func=cmd_wiederherstellen, ohne_db=True)
+
+    p = sub.add_parser("plaene", help="Abfragepläne aller Datenbankfunktionen prüfen")
+    p.set_defaults(func=cmd_plaene, ohne_db=True)
+
+    args = parser.parse_args(argv)
+    db.DB_FILE = args.db
+    if not getattr(args, "ohne_db", False):
+        db.init_db()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,21 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
-    QPushButton, QDateEdit, QMessageBox, QCheckBox
+    QPushButton, QDateEdit, QMessageBox, QCheckBox, QCompleter
 )
-from PySide6.QtCore import QDate
+from PySide6.QtCore import QDate, QTimer, QStringListModel
+from collections import OrderedDict
+from money import Money, parse_betrag
+from stammdaten_qt import combo_anwenden
+
+# Kategorie-Vorschlag erst nach kurzer Tipp-Pause anfragen
+VORSCHLAG_VERZOEGERUNG_MS = 250
+# Vorschläge für die Beschreibung: so viele Einträge im Popup, so viele Präfixe im Cache
+VERVOLLSTAENDIGEN_ANZAHL = 10
+VERVOLLSTAENDIGEN_CACHE = 64
 
 class ZahlungEintragenWidget(QWidget):
-    def __init__(self, kategorien=None, konten=None, on_save=None, on_update=None, edit_mode=False):
+    def __init__(self, kategorien=None, konten=None, on_save=None, on_update=None, edit_mode=False,
+                 on_vorschlag=None, on_vervollstaendigen=None):
         super().__init__()
         if kategorien is None:
             kategorien = []
@@ -13,15 +23,30 @@ class ZahlungEintragenWidget(QWidget):
             konten = []
         self.on_save = on_save
         self.on_update = on_update
+        # on_vorschlag(daten, fertig): ermittelt eine passende kategorie_id und ruft fertig(kategorie_id) auf
+        self.on_vorschlag = on_vorschlag
+        # on_vervollstaendigen(praefix, fertig): ruft fertig(zeilen) mit den häufigsten passenden
+        # Beschreibungen und den Werten ihrer zuletzt gesehenen Zahlung auf (db.beschreibungen_vorschlagen)
+        self.on_vervollstaendigen = on_vervollstaendigen
+        self._vervollstaendigt = OrderedDict()  # Präfix -> Zeilen, zuletzt benutzte hinten
+        self._vorbelegung = {}  # angezeigte Beschreibung -> Zeile
+        self._vervollstaendigen_stand = 0  # Antworten von vor dem letzten Speichern verwerfen
         self.edit_mode = edit_mode
         self.zahlung_id = None
+        # Hat der Benutzer die Kategorie selbst gewählt, wird sie nicht mehr überschrieben
+        self._kategorie_gewaehlt = False
+        self._vorschlag_timer = QTimer(self)
+        self._vorschlag_timer.setSingleShot(True)
+        self._vorschlag_timer.setInterval(VORSCHLAG_VERZOEGERUNG_MS)
+        self._vorschlag_timer.timeout.connect(self.kategorie_vorschlagen)
 
         layout = QVBoxLayout()
         # Zeile 1: Betrag, Typ (Einnahme/Ausgabe)
         row1 = QHBoxLayout()
         row1.addWidget(QLabel("Betrag:"))
         self.input_betrag = QLineEdit()
-        self.input_betrag.setPlaceholderText("z.B. 50,00")
+        self.input_betrag.setPlaceholderText("z.B. 1.234,56")
+        self.input_betrag.textEdited.connect(self._vorschlag_timer.start)
         row1.addWidget(self.input_betrag)
 
 
@@ -32,12 +57,14 @@ class ZahlungEintragenWidget(QWidget):
         row2.addWidget(QLabel("Typ:"))
         self.combo_typ = QComboBox()
         self.combo_typ.addItems(["Einnahme", "Ausgabe"])
+        self.combo_typ.activated.connect(self._vorschlag_timer.start)
         row2.addWidget(self.combo_typ)
 
         row2.addWidget(QLabel("Kategorie:"))
         self.combo_kategorie = QComboBox()
         for k in kategorien:
             self.combo_kategorie.addItem(k["name"], userData=k["id"])
+        self.combo_kategorie.activated.connect(self._kategorie_manuell)
         row2.addWidget(self.combo_kategorie)
         layout.addLayout(row2)
 
@@ -54,6 +81,7 @@ class ZahlungEintragenWidget(QWidget):
         self.combo_konto = QComboBox()
         for k in konten:
             self.combo_konto.addItem(k["name"], userData=k["id"])
+        self.combo_konto.activated.connect(self._vorschlag_timer.start)
         row3.addWidget(self.combo_konto)
         layout.addLayout(row3)
 
@@ -62,6 +90,14 @@ class ZahlungEintragenWidget(QWidget):
         row4.addWidget(QLabel("Beschreibung:"))
         self.input_beschreibung = QLineEdit()
         self.input_beschreibung.setPlaceholderText("optional")
+        self.input_beschreibung.textEdited.connect(self._vorschlag_timer.start)
+        self.input_beschreibung.textEdited.connect(self.beschreibung_vervollstaendigen)
+        # Das Popup wird selbst befüllt (schon passend sortiert), der Completer filtert nicht nach
+        self.completer = QCompleter(QStringListModel(self), self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(VERVOLLSTAENDIGEN_ANZAHL)
+        self.completer.setWidget(self.input_beschreibung)
+        self.completer.activated[str].connect(self._vervollstaendigung_gewaehlt)
         row4.addWidget(self.input_beschreibung)
         layout.addLayout(row4)
 
@@ -79,7 +115,7 @@ class ZahlungEintragenWidget(QWidget):
         self.setLayout(layout)
 
     def speichern(self):
-        betrag = self.input_betrag.text().replace(",", ".")
+        betrag = self.input_betrag.text()
         typ = self.combo_typ.currentText()
         datum = self.input_datum.date().toString("yyyy-MM-dd")
         kategorie_id = self.combo_kategorie.currentData()
@@ -88,9 +124,11 @@ class ZahlungEintragenWidget(QWidget):
         wiederkehrend = self.checkbox_wiederkehrend.isChecked()
 
         try:
-            betrag_float = float(betrag)
+            betrag_money = parse_betrag(betrag)
         except ValueError:
-            QMessageBox.warning(self, "Fehler", "Bitte einen gültigen Betrag eingeben (z.B. 12.50).")
+            betrag_money = None
+        if betrag_money is None or betrag_money.cent < 0:
+            QMessageBox.warning(self, "Fehler", "Bitte einen gültigen Betrag eingeben (z.B. 1.234,56).")
             return
 
         if kategorie_id is None:
@@ -101,7 +139,7 @@ class ZahlungEintragenWidget(QWidget):
             return
 
         zahlungsdaten = {
-            "betrag": betrag_float,
+            "betrag": betrag_money,
             "typ": typ,
             "datum": datum,
             "kategorie_id": kategorie_id,
@@ -114,13 +152,96 @@ class ZahlungEintragenWidget(QWidget):
             self.on_update(self.zahlung_id, zahlungsdaten)
         elif not self.edit_mode and self.on_save:
             self.on_save(zahlungsdaten)
-        self.clear_fields()
+        # Die Felder leert erst das Hauptfenster, wenn das Speichern geklappt hat (clear_fields);
+        # schlägt es fehl, bleibt die Eingabe samt Bearbeitungsmodus zum Korrigieren stehen
+
+    def _kategorie_manuell(self):
+        self._kategorie_gewaehlt = True
+
+    def kategorie_vorschlagen(self):
+        # Nur für neue Zahlungen und solange die Kategorie nicht von Hand gewählt wurde
+        beschreibung = self.input_beschreibung.text().strip()
+        if self.edit_mode or self._kategorie_gewaehlt or not beschreibung or not self.on_vorschlag:
+            return
+        try:
+            betrag = parse_betrag(self.input_betrag.text())
+        except ValueError:
+            betrag = None
+        self.on_vorschlag({
+            "beschreibung": beschreibung,
+            "betrag": betrag,
+            "typ": self.combo_typ.currentText(),
+            "konto_id": self.combo_konto.currentData(),
+        }, self._vorschlag_uebernehmen)
+
+    def _vorschlag_uebernehmen(self, kategorie_id):
+        if kategorie_id is None or self.edit_mode or self._kategorie_gewaehlt:
+            return
+        index = self.combo_kategorie.findData(kategorie_id)
+        if index != -1:
+            self.combo_kategorie.setCurrentIndex(index)
+
+    def beschreibung_vervollstaendigen(self, text):
+        # Nur beim Neuanlegen; beim Bearbeiten würde die Vorbelegung die Zahlung verändern
+        praefix = text.lstrip()
+        if self.edit_mode or not praefix or not self.on_vervollstaendigen:
+            self.completer.popup().hide()
+            return
+        if praefix in self._vervollstaendigt:
+            self._vervollstaendigt.move_to_end(praefix)
+            self._vervollstaendigung_zeigen(praefix, self._vervollstaendigt[praefix])
+            return
+        stand = self._vervollstaendigen_stand
+        self.on_vervollstaendigen(praefix, lambda zeilen: self._vervollstaendigung_angekommen(stand, praefix, zeilen))
+
+    def _vervollstaendigung_angekommen(self, stand, praefix, zeilen):
+        if stand != self._vervollstaendigen_stand:
+            return
+        self._vervollstaendigt[praefix] = zeilen
+        while len(self._vervollstaendigt) > VERVOLLSTAENDIGEN_CACHE:
+            self._vervollstaendigt.popitem(last=False)
+        self._vervollstaendigung_zeigen(praefix, zeilen)
+
+    def _vervollstaendigung_zeigen(self, praefix, zeilen):
+        # Antworten auf einen inzwischen weitergetippten Text verwerfen
+        if self.edit_mode or self.input_beschreibung.text().lstrip() != praefix:
+            return
+        self._vorbelegung = {z["beschreibung"]: z for z in zeilen}
+        # Steht die Beschreibung schon vollständig da, braucht es kein Popup
+        if not zeilen or (len(zeilen) == 1 and zeilen[0]["beschreibung"] == praefix.strip()):
+            self.completer.popup().hide()
+            return
+        self.completer.model().setStringList([z["beschreibung"] for z in zeilen])
+        self.completer.complete()
+
+    def _vervollstaendigung_gewaehlt(self, beschreibung):
+        # Vorbelegen mit den Werten der zuletzt gesehenen Zahlung dieser Beschreibung. Ein schon
+        # eingetippter Betrag und eine von Hand gewählte Kategorie bleiben stehen; die übernommene
+        # Kategorie zählt wie von Hand gewählt, der Regel-Vorschlag überschreibt sie nicht mehr.
+        self.input_beschreibung.setText(beschreibung)
+        zeile = self._vorbelegung.get(beschreibung)
+        if zeile is None or self.edit_mode:
+            return
+        if zeile["typ"]:
+            self.combo_typ.setCurrentText(zeile["typ"])
+        if zeile["betrag_cent"] is not None and not self.input_betrag.text().strip():
+            self.input_betrag.setText(Money(abs(zeile["betrag_cent"])).format(symbol=False))
+        if zeile["konto_id"] is not None:
+            idx = self.combo_konto.findData(zeile["konto_id"])
+            if idx != -1:
+                self.combo_konto.setCurrentIndex(idx)
+        if zeile["kategorie_id"] is not None and not self._kategorie_gewaehlt:
+            idx = self.combo_kategorie.findData(zeile["kategorie_id"])
+            if idx != -1:
+                self.combo_kategorie.setCurrentIndex(idx)
+                self._kategorie_gewaehlt = True
+                self._vorschlag_timer.stop()
 
     def set_edit_mode(self, mode, zahlung_id=None, daten=None):
         self.edit_mode = mode
         self.zahlung_id = zahlung_id
         if daten:
-            self.input_betrag.setText(str(daten.get("betrag", "")))
+            self.input_betrag.setText(Money(abs(daten.get("betrag_cent", 0))).format(symbol=False))
             self.combo_typ.setCurrentText(daten.get("typ", "Einnahme"))
             datum_qdate = QDate.fromString(daten.get("datum", ""), "yyyy-MM-dd")
             if datum_qdate.isValid():
@@ -151,13 +272,17 @@ class ZahlungEintragenWidget(QWidget):
         self.btn_speichern.setText("Speichern")
         self.edit_mode = False
         self.zahlung_id = None
+        self._kategorie_gewaehlt = False
+        self._vorschlag_timer.stop()
+        # Nach dem Speichern zählt die neue Zahlung mit; die Vorschläge neu anfragen
+        self._vervollstaendigt.clear()
+        self._vervollstaendigen_stand += 1
+        self._vorbelegung = {}
+        self.completer.popup().hide()
 
-    def update_kategorien(self, kategorien):
-        self.combo_kategorie.clear()
-        for k in kategorien:
-            self.combo_kategorie.addItem(k["name"], userData=k["id"])
+    # Einzelne Änderungen aus dem Stammdaten-Cache (Auswahl bleibt erhalten)
+    def kategorien_anwenden(self, aenderung):
+        combo_anwenden(self.combo_kategorie, aenderung)
 
-    def update_konten(self, konten):
-        self.combo_konto.clear()
-        for k in konten:
-            self.combo_konto.addItem(k["name"], userData=k["id"])
\ No newline at end of file
+    def konten_anwenden(self, aenderung):
+        combo_anwenden(self.combo_konto, aenderung)